@@ -5,6 +5,13 @@ RAPID Alert Assembly and Production Module
 Queries the RAPID database for a source detection, assembles an LSST-compatible
 alert packet, serializes it with fastavro, and optionally publishes to Kafka.
 
+Alerts for all new sources of a difference image (pid) or exposure (expid) are
+produced in a batch by produce_alerts, which queries the triggering sources,
+their diaObjects, and their source histories with set-based queries per field,
+and delivers the alerts asynchronously to a Kafka producer or a FileAlertSink.
+Cutouts of a difference image's sources are made in memory by make_cutouts
+from the science, template, and difference images.
+
 Uses the rapid.v01_00 schema (LSST alert_packet v10.0 compatible).
 """
 
@@ -12,12 +19,17 @@ import io
 import json
 import os
 import sys
+import gzip
 import struct
 import logging
+import functools
 from pathlib import Path
 
+import numpy as np
 import fastavro
 import fastavro.schema
+from astropy.io import fits
+from astropy.wcs import WCS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -38,6 +50,9 @@ SCHEMA_FILES = [
 # Roman filter names
 ROMAN_FILTERS = ["F062", "F087", "F106", "F129", "F146", "F158", "F184", "F213"]
 
+# Cutout size in pixels (odd, so stamps are centered on the source pixel)
+CUTOUT_SIZE = 63
+
 
 def load_schema():
     """Load and parse the RAPID v1.0 alert schema."""
@@ -45,6 +60,12 @@ def load_schema():
     return fastavro.schema.load_schema_ordered(schema_paths)
 
 
+@functools.lru_cache(maxsize=1)
+def get_schema():
+    """Return the parsed RAPID v1.0 alert schema, loaded once per process."""
+    return load_schema()
+
+
 def build_dia_source(row, filter_name=None):
     """Build a diaSource record from a database row dict.
 
@@ -192,74 +213,137 @@ def load_cutout(filepath):
         return None
 
 
-def assemble_alert(db, sid, cutout_dir=None):
-    """Assemble a complete alert packet for a given source ID.
+def _cutout_header_template(header, size):
+    """Make the FITS header of cutouts of an image, with the image WCS."""
+    template = fits.Header()
+    template["SIMPLE"] = True
+    template["BITPIX"] = -32
+    template["NAXIS"] = 2
+    template["NAXIS1"] = size
+    template["NAXIS2"] = size
+    if "CTYPE1" in header:
+        template.extend(WCS(header).to_header(relax=True))
+    return template
+
+
+def _fits_bytes(header, data):
+    """Serialize a float32 image and its header as FITS bytes."""
+    header_bytes = header.tostring().encode("ascii")
+    data_bytes = data.astype(">f4").tobytes()
+    return header_bytes + data_bytes + b"\0" * (-len(data_bytes) % 2880)
+
+
+def make_cutouts(source_rows, sci_image_filename, ref_image_filename, diff_image_filename,
+                 size=CUTOUT_SIZE, hdu_index=0, compresslevel=6):
+    """Make gzipped FITS cutouts of the science, template, and difference images.
+
+    The images are those of one difference image (pid), on the pixel grid of
+    the science image (template resampled onto it), as are the sources'
+    PSF-fit positions.  The images are memory-mapped and the stamps of all
+    sources are sliced in a single pass (in order of y, so the images are
+    paged in sequentially), then serialized and gzipped in memory.
+
+    Stamps are size x size, centered on the pixel nearest (xfit, yfit)
+    (zero-based), and padded with NaNs beyond the image edges.  Each has
+    the image WCS, with CRPIX shifted to the stamp.
 
     Args:
-        db: RAPIDDB instance (from rapid.database.modules.utils.rapid_db).
-        sid: source ID to build the alert for.
+        source_rows: list of source dicts with sid, xfit, and yfit.
+        sci_image_filename: science image FITS file.
+        ref_image_filename: template (reference) image FITS file, resampled
+            onto the science image.
+        diff_image_filename: difference image FITS file.
+        size: cutout size in pixels.
+        hdu_index: index of the image HDU in the FITS files.
+        compresslevel: gzip compression level.
+
+    Returns:
+        dict keyed by sid of dicts with the cutoutScience, cutoutTemplate,
+        and cutoutDifference gzipped FITS bytes.
+    """
+    images = [("cutoutScience", sci_image_filename),
+              ("cutoutTemplate", ref_image_filename),
+              ("cutoutDifference", diff_image_filename)]
+
+    hduls = [fits.open(filename, memmap=True) for key, filename in images]
+
+    try:
+        stamp_images = []
+        for (key, filename), hdul in zip(images, hduls):
+            hdu = hdul[hdu_index]
+            template = _cutout_header_template(hdu.header, size)
+            crpix = (template.get("CRPIX1"), template.get("CRPIX2"))
+            stamp_images.append((key, hdu.data, template, crpix))
+
+        cutouts = {}
+        for row in sorted(source_rows, key=lambda row: row["yfit"]):
+            x0 = int(np.floor(float(row["xfit"]) + 0.5)) - size // 2
+            y0 = int(np.floor(float(row["yfit"]) + 0.5)) - size // 2
+
+            source_cutouts = {}
+            for key, data, template, crpix in stamp_images:
+                ny, nx = data.shape
+                xa, xb = max(x0, 0), min(x0 + size, nx)
+                ya, yb = max(y0, 0), min(y0 + size, ny)
+
+                stamp = np.full((size, size), np.nan, dtype=np.float32)
+                if xa < xb and ya < yb:
+                    stamp[ya - y0:yb - y0, xa - x0:xb - x0] = data[ya:yb, xa:xb]
+
+                if crpix[0] is not None:
+                    template["CRPIX1"] = crpix[0] - x0
+                if crpix[1] is not None:
+                    template["CRPIX2"] = crpix[1] - y0
+
+                source_cutouts[key] = gzip.compress(_fits_bytes(template, stamp),
+                                                    compresslevel=compresslevel, mtime=0)
+
+            cutouts[int(row["sid"])] = source_cutouts
+    finally:
+        for hdul in hduls:
+            hdul.close()
+
+    return cutouts
+
+
+def build_alert(source_row, obj_row=None, prv_rows=None, cutout_dir=None, cutouts=None):
+    """Build an alert packet from the database rows for a source.
+
+    Args:
+        source_row: dict for the triggering source (sources table columns
+            plus filter_name).
+        obj_row: dict with astroobjects table columns for the source's
+            diaObject, or None if the source is not merged into an object.
+        prv_rows: list of dicts for the previous detections of the diaObject
+            (sources table columns plus filter_name), ordered by MJD.
         cutout_dir: optional directory containing cutout FITS files.
+        cutouts: optional dict with the cutoutDifference, cutoutScience, and
+            cutoutTemplate bytes of the source (see make_cutouts), used
+            instead of cutout files.
 
     Returns:
         dict conforming to rapid.v01_00.alert.
     """
-    # Query the triggering source with filter name
-    cur = db.conn.cursor()
-    cur.execute("""
-        SELECT s.*, f.filter as filter_name
-        FROM sources s
-        JOIN filters f ON s.fid = f.fid
-        WHERE s.sid = %s
-    """, (sid,))
-    columns = [desc[0] for desc in cur.description]
-    row = cur.fetchone()
-    if row is None:
-        raise ValueError(f"Source {sid} not found")
-    source_row = dict(zip(columns, row))
     filter_name = source_row.get("filter_name")
-    field = int(source_row["field"])
-
-    # Get diaObjectId via per-field merges/astroobjects tables
-    cur.execute(f"""
-        SELECT m.aid, a.*
-        FROM merges_{field} m
-        JOIN astroobjects_{field} a ON m.aid = a.aid
-        WHERE m.sid = %s
-    """, (sid,))
-    columns = [desc[0] for desc in cur.description]
-    obj_row = cur.fetchone()
+    sid = source_row["sid"]
 
     dia_object = None
     dia_object_id = None
     if obj_row is not None:
-        obj_dict = dict(zip(columns, obj_row))
-        dia_object_id = obj_dict["aid"]
-        source_row["aid"] = dia_object_id
+        dia_object_id = obj_row["aid"]
+        source_row = dict(source_row, aid=dia_object_id)
 
     # Build triggering diaSource
     dia_source = build_dia_source(source_row, filter_name)
     triggering_mjd = dia_source["midpointMjdTai"]
 
-    # Query previous detections for the same object (12-month window)
     prv_dia_sources = None
     prv_dia_forced_sources = None
     if dia_object_id is not None:
-        cur.execute(f"""
-            SELECT s.*, f.filter as filter_name
-            FROM sources s
-            JOIN merges_{field} m ON s.sid = m.sid
-            JOIN filters f ON s.fid = f.fid
-            WHERE m.aid = %s AND s.sid != %s
-              AND s.mjdobs >= %s
-            ORDER BY s.mjdobs
-        """, (dia_object_id, sid, triggering_mjd - 365.25))
-        columns = [desc[0] for desc in cur.description]
-        prv_rows = cur.fetchall()
         if prv_rows:
             prv_dia_sources = []
             for prow in prv_rows:
-                pdict = dict(zip(columns, prow))
-                pdict["aid"] = dia_object_id
+                pdict = dict(prow, aid=dia_object_id)
                 prv_dia_sources.append(
                     build_dia_source(pdict, pdict.get("filter_name"))
                 )
@@ -272,28 +356,29 @@ def assemble_alert(db, sid, cutout_dir=None):
         last_mjd = max(all_mjds)
 
         dia_object = build_dia_object(
-            obj_dict, first_mjd=first_mjd, last_mjd=last_mjd,
+            obj_row, first_mjd=first_mjd, last_mjd=last_mjd,
             validity_mjd=triggering_mjd,
         )
 
         # Forced photometry in RAPID produces FITS files, not DB records;
         # integration with alert packets is not yet implemented.
         prv_dia_forced_sources = None
-        logger.info("Forced photometry not yet available for alert assembly")
-
-    cur.close()
 
     # Load cutouts
     cutout_diff = None
     cutout_sci = None
     cutout_tmpl = None
-    if cutout_dir is not None:
+    if cutouts is not None:
+        cutout_diff = cutouts.get("cutoutDifference")
+        cutout_sci = cutouts.get("cutoutScience")
+        cutout_tmpl = cutouts.get("cutoutTemplate")
+    elif cutout_dir is not None:
         cutout_diff = load_cutout(os.path.join(cutout_dir, f"{sid}_diff.fits.gz"))
         cutout_sci = load_cutout(os.path.join(cutout_dir, f"{sid}_sci.fits.gz"))
         cutout_tmpl = load_cutout(os.path.join(cutout_dir, f"{sid}_tmpl.fits.gz"))
 
     return {
-        "diaSourceId": source_row["sid"],
+        "diaSourceId": sid,
         "observation_reason": None,
         "target_name": None,
         "diaSource": dia_source,
@@ -308,18 +393,220 @@ def assemble_alert(db, sid, cutout_dir=None):
     }
 
 
+def assemble_alert(db, sid, cutout_dir=None):
+    """Assemble a complete alert packet for a given source ID.
+
+    Args:
+        db: RAPIDDB instance (from rapid.database.modules.utils.rapid_db).
+        sid: source ID to build the alert for.
+        cutout_dir: optional directory containing cutout FITS files.
+
+    Returns:
+        dict conforming to rapid.v01_00.alert.
+    """
+    # Query the triggering source with filter name
+    cur = db.conn.cursor()
+    cur.execute("""
+        SELECT s.*, f.filter as filter_name
+        FROM sources s
+        JOIN filters f ON s.fid = f.fid
+        WHERE s.sid = %s
+    """, (sid,))
+    columns = [desc[0] for desc in cur.description]
+    row = cur.fetchone()
+    if row is None:
+        raise ValueError(f"Source {sid} not found")
+    source_row = dict(zip(columns, row))
+    field = int(source_row["field"])
+
+    # Get diaObjectId via per-field merges/astroobjects tables
+    cur.execute(f"""
+        SELECT m.aid, a.*
+        FROM merges_{field} m
+        JOIN astroobjects_{field} a ON m.aid = a.aid
+        WHERE m.sid = %s
+    """, (sid,))
+    columns = [desc[0] for desc in cur.description]
+    obj_row = cur.fetchone()
+
+    obj_dict = None
+    prv_rows = None
+    if obj_row is not None:
+        obj_dict = dict(zip(columns, obj_row))
+        dia_object_id = obj_dict["aid"]
+
+        # Query previous detections for the same object (12-month window)
+        cur.execute(f"""
+            SELECT s.*, f.filter as filter_name
+            FROM sources s
+            JOIN merges_{field} m ON s.sid = m.sid
+            JOIN filters f ON s.fid = f.fid
+            WHERE m.aid = %s AND s.sid != %s
+              AND s.mjdobs >= %s
+            ORDER BY s.mjdobs, s.sid
+        """, (dia_object_id, sid, float(source_row["mjdobs"]) - 365.25))
+        columns = [desc[0] for desc in cur.description]
+        prv_rows = [dict(zip(columns, prow)) for prow in cur.fetchall()]
+
+        logger.info("Forced photometry not yet available for alert assembly")
+
+    cur.close()
+
+    return build_alert(source_row, obj_dict, prv_rows, cutout_dir=cutout_dir)
+
+
+def query_triggering_sources(db, pid=None, expid=None, sids=None):
+    """Query the triggering sources for a batch of alerts.
+
+    Exactly one of pid, expid, or sids selects the sources.
+
+    Args:
+        db: RAPIDDB instance.
+        pid: DiffImages primary key (all sources of a difference image).
+        expid: Exposures primary key (all sources of an exposure).
+        sids: list of source IDs.
+
+    Returns:
+        list of dicts (sources table columns plus filter_name), ordered by sid.
+    """
+    if [pid, expid, sids].count(None) != 2:
+        raise ValueError("Exactly one of pid, expid, or sids must be given")
+
+    if pid is not None:
+        where, param = "s.pid = %s", int(pid)
+    elif expid is not None:
+        where, param = "s.expid = %s", int(expid)
+    else:
+        where, param = "s.sid = ANY(%s)", [int(sid) for sid in sids]
+
+    cur = db.conn.cursor()
+    cur.execute(f"""
+        SELECT s.*, f.filter as filter_name
+        FROM sources s
+        JOIN filters f ON s.fid = f.fid
+        WHERE {where}
+        ORDER BY s.sid
+    """, (param,))
+    columns = [desc[0] for desc in cur.description]
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    cur.close()
+    return rows
+
+
+def query_objects_and_histories(db, field, source_rows):
+    """Query the diaObjects and source histories for sources in one field.
+
+    One query gets the astroobjects records of all the sources, and one
+    query gets the detections of all those objects in the 12-month window
+    before the earliest source; the window of each source is applied here.
+
+    Args:
+        db: RAPIDDB instance.
+        field: Roman tessellation index of the sources
+            (selects the merges_<field> and astroobjects_<field> tables).
+        source_rows: list of source dicts from query_triggering_sources.
+
+    Returns:
+        (objects, histories): dict of astroobjects dicts keyed by sid, and
+        dict of lists of source dicts ordered by MJD keyed by aid.
+    """
+    sids = [int(row["sid"]) for row in source_rows]
+
+    cur = db.conn.cursor()
+    cur.execute(f"""
+        SELECT m.sid as merge_sid, m.aid, a.*
+        FROM merges_{field} m
+        JOIN astroobjects_{field} a ON m.aid = a.aid
+        WHERE m.sid = ANY(%s)
+    """, (sids,))
+    columns = [desc[0] for desc in cur.description]
+    objects = {}
+    for row in cur.fetchall():
+        obj_dict = dict(zip(columns, row))
+        objects.setdefault(obj_dict.pop("merge_sid"), obj_dict)
+
+    histories = {}
+    if objects:
+        aids = sorted(set(obj_dict["aid"] for obj_dict in objects.values()))
+        min_mjd = min(float(row["mjdobs"]) for row in source_rows) - 365.25
+        cur.execute(f"""
+            SELECT m.aid as merge_aid, s.*, f.filter as filter_name
+            FROM sources s
+            JOIN merges_{field} m ON s.sid = m.sid
+            JOIN filters f ON s.fid = f.fid
+            WHERE m.aid = ANY(%s)
+              AND s.mjdobs >= %s
+            ORDER BY s.mjdobs, s.sid
+        """, (aids, min_mjd))
+        columns = [desc[0] for desc in cur.description]
+        for row in cur.fetchall():
+            pdict = dict(zip(columns, row))
+            histories.setdefault(pdict.pop("merge_aid"), []).append(pdict)
+
+    cur.close()
+    return objects, histories
+
+
+def assemble_alerts(db, pid=None, expid=None, sids=None, cutout_dir=None,
+                    cutout_images=None):
+    """Assemble alert packets for a batch of sources.
+
+    Sources are selected by pid, expid, or sids (see query_triggering_sources),
+    and alerts are generated field by field, with three queries per field
+    instead of three per source.
+
+    Args:
+        db: RAPIDDB instance.
+        pid: DiffImages primary key.
+        expid: Exposures primary key.
+        sids: list of source IDs.
+        cutout_dir: optional directory containing cutout FITS files.
+        cutout_images: optional (science, template, difference) image
+            filenames of the difference image, to make the cutouts of the
+            sources in memory with make_cutouts.  They are made one field
+            at a time, just before the field's alerts are yielded, so only
+            one field's stamps are held at once.
+
+    Yields:
+        (sid, alert_dict) with alert_dict conforming to rapid.v01_00.alert.
+    """
+    source_rows = query_triggering_sources(db, pid=pid, expid=expid, sids=sids)
+
+    source_rows_by_field = {}
+    for row in source_rows:
+        source_rows_by_field.setdefault(int(row["field"]), []).append(row)
+
+    for field, source_rows in source_rows_by_field.items():
+        objects, histories = query_objects_and_histories(db, field, source_rows)
+
+        cutouts = {}
+        if cutout_images is not None:
+            cutouts = make_cutouts(source_rows, *cutout_images)
+
+        for source_row in source_rows:
+            sid = source_row["sid"]
+            obj_dict = objects.get(sid)
+            prv_rows = None
+            if obj_dict is not None:
+                min_mjd = float(source_row["mjdobs"]) - 365.25
+                prv_rows = [prow for prow in histories.get(obj_dict["aid"], [])
+                            if prow["sid"] != sid and prow["mjdobs"] >= min_mjd]
+            yield sid, build_alert(source_row, obj_dict, prv_rows, cutout_dir=cutout_dir,
+                                   cutouts=cutouts.get(sid))
+
+
 def serialize_alert(alert_dict, schema=None):
     """Serialize an alert dict to Avro bytes.
 
     Args:
         alert_dict: dict conforming to rapid.v01_00.alert.
-        schema: parsed fastavro schema (loaded if not provided).
+        schema: parsed fastavro schema (get_schema() if not provided).
 
     Returns:
         bytes containing the Avro-serialized alert.
     """
     if schema is None:
-        schema = load_schema()
+        schema = get_schema()
     buf = io.BytesIO()
     fastavro.schemaless_writer(buf, schema, alert_dict)
     return buf.getvalue()
@@ -357,7 +644,7 @@ def produce_alert(db, sid, producer=None, topic="alerts", cutout_dir=None):
     Returns:
         bytes containing the serialized alert.
     """
-    schema = load_schema()
+    schema = get_schema()
     alert_dict = assemble_alert(db, sid, cutout_dir=cutout_dir)
     alert_bytes = serialize_alert(alert_dict, schema=schema)
     logger.info("Alert for sid=%d serialized (%d bytes)", sid, len(alert_bytes))
@@ -368,12 +655,165 @@ def produce_alert(db, sid, producer=None, topic="alerts", cutout_dir=None):
     return alert_bytes
 
 
+class FileAlertSink:
+    """Local stand-in for a confluent_kafka.Producer that writes alerts to files.
+
+    Each message is written to <outdir>/<topic>/<key>.avro (schemaless Avro,
+    as on the Kafka topic), and its delivery callback is served by the next
+    poll() or flush(), as with Kafka.
+
+    Args:
+        outdir: output directory.
+    """
+
+    class Message:
+        """Delivered message, with the accessors used by delivery callbacks."""
+
+        def __init__(self, topic, key, value):
+            self._topic = topic
+            self._key = key
+            self._value = value
+
+        def topic(self):
+            return self._topic
+
+        def partition(self):
+            return 0
+
+        def key(self):
+            return self._key
+
+        def value(self):
+            return self._value
+
+    def __init__(self, outdir):
+        self.outdir = outdir
+        self.n_messages = 0
+        self._pending = []
+
+    def produce(self, topic, value, key=None, callback=None):
+        if key is None:
+            key = str(self.n_messages)
+        if isinstance(key, bytes):
+            key = key.decode()
+        topic_dir = os.path.join(self.outdir, topic)
+        os.makedirs(topic_dir, exist_ok=True)
+        with open(os.path.join(topic_dir, f"{key}.avro"), "wb") as f:
+            f.write(value)
+        self.n_messages += 1
+        self._pending.append((callback, FileAlertSink.Message(topic, key, value)))
+
+    def poll(self, timeout=None):
+        pending, self._pending = self._pending, []
+        for callback, msg in pending:
+            if callback is not None:
+                callback(None, msg)
+        return len(pending)
+
+    def flush(self, timeout=None):
+        self.poll()
+        return 0
+
+    def __len__(self):
+        return len(self._pending)
+
+
+def publish_alerts(messages, producer, topic="alerts", max_in_flight=1000,
+                   flush_timeout=60.0):
+    """Publish serialized alerts asynchronously to a Kafka topic.
+
+    Messages are produced without waiting for delivery; the producer is
+    polled to serve delivery callbacks, and to wait whenever max_in_flight
+    messages are undelivered.  The producer is flushed once at the end.
+
+    Args:
+        messages: iterable of (key, alert_bytes).
+        producer: confluent_kafka.Producer instance or FileAlertSink.
+        topic: Kafka topic name.
+        max_in_flight: maximum number of produced but undelivered messages.
+        flush_timeout: timeout in seconds of the final flush.
+
+    Returns:
+        dict with the numbers of alerts produced, delivered, failed,
+        and undelivered after the final flush.
+    """
+    counts = {"produced": 0, "delivered": 0, "failed": 0}
+
+    def delivery_callback(err, msg):
+        if err:
+            counts["failed"] += 1
+            logger.error("Message delivery failed: %s", err)
+        else:
+            counts["delivered"] += 1
+
+    for key, alert_bytes in messages:
+        while True:
+            try:
+                producer.produce(topic, alert_bytes, key=str(key),
+                                 callback=delivery_callback)
+                break
+            except BufferError:
+                # Local producer queue is full.
+                producer.poll(0.1)
+        counts["produced"] += 1
+        producer.poll(0)
+
+        while counts["produced"] - counts["delivered"] - counts["failed"] >= max_in_flight:
+            producer.poll(0.1)
+
+    counts["undelivered"] = producer.flush(flush_timeout)
+
+    logger.info("Alerts produced to topic %s: %d (delivered %d, failed %d, undelivered %d)",
+                topic, counts["produced"], counts["delivered"], counts["failed"],
+                counts["undelivered"])
+
+    return counts
+
+
+def produce_alerts(db, producer, pid=None, expid=None, sids=None, topic="alerts",
+                   cutout_dir=None, cutout_images=None, max_in_flight=1000):
+    """End-to-end: assemble, serialize, and publish alerts for a batch of sources.
+
+    Alerts are streamed from assembly through serialization (with the parsed
+    schema loaded once) to asynchronous delivery, so only the in-flight
+    alerts are held in memory.
+
+    Args:
+        db: RAPIDDB instance.
+        producer: confluent_kafka.Producer instance or FileAlertSink.
+        pid: DiffImages primary key.
+        expid: Exposures primary key.
+        sids: list of source IDs.
+        topic: Kafka topic name.
+        cutout_dir: optional directory containing cutout FITS files.
+        cutout_images: optional (science, template, difference) image
+            filenames, to make the cutouts in memory (see assemble_alerts).
+        max_in_flight: maximum number of produced but undelivered messages.
+
+    Returns:
+        dict with the numbers of alerts produced, delivered, failed,
+        and undelivered (see publish_alerts).
+    """
+    schema = get_schema()
+
+    logger.info("Forced photometry not yet available for alert assembly")
+
+    messages = ((sid, serialize_alert(alert_dict, schema=schema))
+                for sid, alert_dict in assemble_alerts(db, pid=pid, expid=expid, sids=sids,
+                                                       cutout_dir=cutout_dir,
+                                                       cutout_images=cutout_images))
+
+    return publish_alerts(messages, producer, topic=topic, max_in_flight=max_in_flight)
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(f"Usage: {sys.argv[0]} <source_id> [--kafka]")
+        print(f"       {sys.argv[0]} --pid <pid> [--images <sci_image> <ref_image> <diff_image>]"
+              " [--kafka | --outdir <dir>]")
+        print(f"       {sys.argv[0]} --expid <expid> [--kafka | --outdir <dir>]")
         sys.exit(1)
 
-    source_id = int(sys.argv[1])
     use_kafka = "--kafka" in sys.argv
 
     # Import RAPIDDB
@@ -390,5 +830,26 @@ if __name__ == "__main__":
             "message.max.bytes": "15728640",
         })
 
+    if sys.argv[1] in ("--pid", "--expid"):
+        batch_id = int(sys.argv[2])
+        if producer is None:
+            outdir = sys.argv[sys.argv.index("--outdir") + 1] if "--outdir" in sys.argv else "."
+            producer = FileAlertSink(outdir)
+
+        cutout_images = None
+        if sys.argv[1] == "--pid" and "--images" in sys.argv:
+            i = sys.argv.index("--images")
+            cutout_images = tuple(sys.argv[i + 1:i + 4])
+
+        if sys.argv[1] == "--pid":
+            counts = produce_alerts(db, producer, pid=batch_id, cutout_images=cutout_images)
+        else:
+            counts = produce_alerts(db, producer, expid=batch_id)
+        print(f"Alerts produced: {counts['produced']} (delivered {counts['delivered']}, "
+              f"failed {counts['failed']}, undelivered {counts['undelivered']})")
+        sys.exit(0 if counts["failed"] == 0 and counts["undelivered"] == 0 else 1)
+
+    source_id = int(sys.argv[1])
+
     alert_bytes = produce_alert(db, source_id, producer=producer)
     print(f"Alert produced: {len(alert_bytes)} bytes")
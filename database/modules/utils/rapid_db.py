@@ -1,7 +1,15 @@
 import os
 import psycopg2
-import re
+import psycopg2.extras
+import psycopg2.pool
 import hashlib
+import io
+import struct
+import time
+import random
+import threading
+import weakref
+import numpy as np
 
 debug = 1
 
@@ -57,6 +65,255 @@ def compute_checksum(fname,dbcksum=None):
     return cksum
 
 
+def get_connection_parameters():
+
+    '''
+    Get database connection parameters from environment.
+    '''
+
+    dbport = os.getenv('DBPORT')
+    dbname = os.getenv('DBNAME')
+    dbuser = os.getenv('DBUSER')
+    dbpass = os.getenv('DBPASS')
+    dbserver = os.getenv('DBSERVER')
+
+    print("dbserver,dbname,dbport,dbuser =",dbserver,dbname,dbport,dbuser)
+
+    if dbport is None:
+        print("*** Error: Env. var. DBPORT not set; quitting...")
+        exit(64)
+
+    if dbname is None:
+        print("*** Error: Env. var. DBNAME not set; quitting...")
+        exit(64)
+
+    if dbuser is None:
+        print("*** Error: Env. var. DBUSER not set; quitting...")
+        exit(64)
+
+    if dbpass is None:
+        print("*** Error: Env. var. DBPASS not set; quitting...")
+        exit(64)
+
+    if dbserver is None:
+        print("*** Error: Env. var. DBSERVER not set; quitting...")
+        exit(64)
+
+    return dict(host=dbserver,database=dbname,port=dbport,user=dbuser,password=dbpass)
+
+
+def connection_is_alive(conn):
+
+    '''
+    Health check of database connection: run a minimal query in a temporary cursor.
+    If no transaction was open beforehand, the one started by the query is rolled back,
+    so that the connection is not left idle in a transaction.
+    '''
+
+    if conn is None or conn.closed:
+        return False
+
+    try:
+        in_transaction = conn.status != psycopg2.extensions.STATUS_READY
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        if not in_transaction:
+            conn.rollback()
+        return True
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+
+
+########################################################################################################
+# Connection pooling.
+########################################################################################################
+
+
+class RAPIDDBConnectionPool:
+
+    """
+    Bounded pool of connections to the RAPID operations database, for the current process.
+
+    Connections are opened lazily, only when no idle connection is available, with retries and
+    randomized exponential backoff so that many AWS Batch jobs starting together do not all hit the
+    database at the same instant.  Idle connections are health-checked when acquired, and dead ones are
+    replaced.  Acquisition blocks while all maxconn connections are in use, for at most timeout seconds,
+    after which psycopg2.pool.PoolError is raised.  Thread-safe.
+
+    Pooled RAPIDDB objects must not be nested beyond maxconn: a thread that holds a pooled connection
+    and acquires another (e.g., through a helper that opens its own RAPIDDB(pooled=True)) needs two
+    connections, and with the default maxconn of 1 would wait forever on itself.  This case raises
+    PoolError at once, and threads sharing the pool need maxconn (env. var. DBPOOLMAXCONN) of at least
+    the number of connections they hold at the same time.
+    """
+
+    def __init__(self,maxconn,connect_kwargs,num_retries=5,retry_wait=1.0,timeout=300.0):
+
+        self.maxconn = maxconn
+        self.connect_kwargs = connect_kwargs
+        self.num_retries = num_retries
+        self.retry_wait = retry_wait
+        self.timeout = timeout
+
+        self.idle = []
+        self.lock = threading.Lock()
+        self.semaphore = threading.BoundedSemaphore(maxconn)
+
+
+        # Thread that acquired each connection in use (keyed by id(conn)), for detecting
+        # a thread that would wait on connections it holds itself.
+
+        self.owners = {}
+
+        self.num_connections_opened = 0
+
+
+    def _connect(self):
+
+        for attempt in range(self.num_retries + 1):
+
+            try:
+                conn = psycopg2.connect(**self.connect_kwargs)
+                break
+            except psycopg2.OperationalError as error:
+                if attempt == self.num_retries:
+                    raise
+                wait = self.retry_wait * (2 ** attempt) * random.uniform(0.5,1.5)
+                print(f"*** Warning: Could not connect to database ({error}); retrying in {wait:.1f} seconds...")
+                time.sleep(wait)
+
+        with self.lock:
+            self.num_connections_opened += 1
+
+        return conn
+
+
+    def getconn(self):
+
+        '''
+        Acquire a healthy connection, blocking while the pool is exhausted (for at most timeout seconds).
+        '''
+
+        thread_id = threading.get_ident()
+
+        with self.lock:
+            n_held = sum([1 for owner in self.owners.values() if owner == thread_id])
+
+        if n_held >= self.maxconn:
+            raise psycopg2.pool.PoolError(f"Thread already holds all {self.maxconn} pooled database connections " +
+                                          "(nested RAPIDDB(pooled=True); see DBPOOLMAXCONN)")
+
+        if not self.semaphore.acquire(timeout=self.timeout):
+            raise psycopg2.pool.PoolError(f"Timed out after {self.timeout} seconds waiting for one of " +
+                                          f"{self.maxconn} pooled database connections (see DBPOOLMAXCONN)")
+
+        try:
+            while True:
+
+                with self.lock:
+                    conn = self.idle.pop() if len(self.idle) > 0 else None
+
+                if conn is None:
+                    conn = self._connect()
+
+                elif not connection_is_alive(conn):
+                    print("*** Warning: Discarding dead database connection from pool...")
+
+                    try:
+                        conn.close()
+                    except psycopg2.Error:
+                        pass
+
+                    continue
+
+                with self.lock:
+                    self.owners[id(conn)] = thread_id
+
+                return conn
+
+        except:
+            self.semaphore.release()
+            raise
+
+
+    def putconn(self,conn,close=False):
+
+        '''
+        Release connection back to the pool.  Any open transaction is rolled back.
+        '''
+
+        with self.lock:
+            self.owners.pop(id(conn),None)
+
+        try:
+            if close or conn.closed:
+                conn.close()
+            else:
+                try:
+                    conn.rollback()
+                    with self.lock:
+                        self.idle.append(conn)
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    conn.close()
+        finally:
+            self.semaphore.release()
+
+
+    def closeall(self):
+
+        with self.lock:
+            for conn in self.idle:
+                conn.close()
+            self.idle = []
+
+
+connection_pool = None
+connection_pool_pid = None
+
+
+# Names of server-side prepared statements already prepared on each database connection.
+# Prepared statements live as long as the connection, so with pooled connections they
+# are reused across RAPIDDB objects.
+
+prepared_statements = weakref.WeakKeyDictionary()
+
+
+# Big-endian NumPy dtypes of PostgreSQL types for binary COPY (see RAPIDDB.copy_arrays_into_database).
+
+copy_binary_dtypes = {"smallint": ">i2",
+                      "integer": ">i4",
+                      "bigint": ">i8",
+                      "real": ">f4",
+                      "double precision": ">f8",
+                      "boolean": "u1"}
+
+
+def get_connection_pool():
+
+    '''
+    Return the connection pool of the current process, creating it on first use.
+    The maximum number of connections per process is given by env. var. DBPOOLMAXCONN (default 1),
+    the number of connection retries by DBCONNECTRETRIES (default 5), and the maximum wait in seconds
+    for a connection when all are in use by DBPOOLTIMEOUT (default 300); see RAPIDDBConnectionPool
+    for the restriction on nested pooled RAPIDDB objects.
+    A pool inherited from a parent process by fork is abandoned, not closed, since closing
+    its connections would terminate the parent's database sessions.
+    '''
+
+    global connection_pool, connection_pool_pid
+
+    if connection_pool is None or connection_pool_pid != os.getpid():
+
+        maxconn = int(os.getenv('DBPOOLMAXCONN','1'))
+        num_retries = int(os.getenv('DBCONNECTRETRIES','5'))
+        timeout = float(os.getenv('DBPOOLTIMEOUT','300'))
+
+        connection_pool = RAPIDDBConnectionPool(maxconn,get_connection_parameters(),num_retries,timeout=timeout)
+        connection_pool_pid = os.getpid()
+
+    return connection_pool
+
+
 ########################################################################################################
 ########################################################################################################
 ########################################################################################################
@@ -80,47 +337,41 @@ class RAPIDDB:
 
 ########################################################################################################
 
-    def __init__(self):
+    def __init__(self,pooled=False):
+
+        '''
+        If pooled is True, acquire a connection from the connection pool of the current process
+        (see get_connection_pool), which is returned to the pool by the close method.
+        RAPIDDB objects can also be used as context managers, which call the close method on exit.
+        '''
 
         self.exit_code = 0
         self.conn = None
+        self.pool = None
 
 
-        # Get database connection parameters from environment.
-
-        dbport = os.getenv('DBPORT')
-        dbname = os.getenv('DBNAME')
-        dbuser = os.getenv('DBUSER')
-        dbpass = os.getenv('DBPASS')
-        dbserver = os.getenv('DBSERVER')
-
-        print("dbserver,dbname,dbport,dbuser =",dbserver,dbname,dbport,dbuser)
+        # Acquire pooled connection.
 
-        if dbport is None:
-            print("*** Error: Env. var. DBPORT not set; quitting...")
-            exit(64)
+        if pooled:
 
-        if dbname is None:
-            print("*** Error: Env. var. DBNAME not set; quitting...")
-            exit(64)
-
-        if dbuser is None:
-            print("*** Error: Env. var. DBUSER not set; quitting...")
-            exit(64)
+            try:
+                self.pool = get_connection_pool()
+                self.conn = self.pool.getconn()
+            except (Exception, psycopg2.DatabaseError) as error:
+                print("Could not connect to database...",error)
+                self.pool = None
+                self.exit_code = 64
+                return
 
-        if dbpass is None:
-            print("*** Error: Env. var. DBPASS not set; quitting...")
-            exit(64)
+            self.cur = self.conn.cursor()
 
-        if dbserver is None:
-            print("*** Error: Env. var. DBSERVER not set; quitting...")
-            exit(64)
+            return
 
 
         # Connect to database
 
         try:
-            self.conn = psycopg2.connect(host=dbserver,database=dbname,port=dbport,user=dbuser,password=dbpass)
+            self.conn = psycopg2.connect(**get_connection_parameters())
         except:
             print("Could not connect to database...")
             self.exit_code = 64
@@ -155,7 +406,7 @@ class RAPIDDB:
     def close(self):
 
         '''
-        Close database cursor and then connection.
+        Close database cursor and then connection (or return the connection to the pool if pooled).
         '''
 
         try:
@@ -165,20 +416,31 @@ class RAPIDDB:
             self.exit_code = 2
         finally:
             if self.conn is not None:
-                self.conn.close()
-                print('Database connection closed.')
+                if self.pool is not None:
+                    self.pool.putconn(self.conn)
+                    print('Database connection returned to pool.')
+                else:
+                    self.conn.close()
+                    print('Database connection closed.')
+                self.conn = None
 
 ########################################################################################################
 
-    def is_connection_alive():
+    def __enter__(self):
 
-        try:
-            # Open a temporary cursor and run a minimal query
-            with self.conn.cursor() as cur:
-                cur.execute("SELECT 1;")
-            return True
-        except (psycopg2.OperationalError, psycopg2.InterfaceError):
-            return False
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+
+        self.close()
+
+        return False
+
+########################################################################################################
+
+    def is_connection_alive(self):
+
+        return connection_is_alive(self.conn)
 
 ########################################################################################################
 
@@ -198,6 +460,37 @@ class RAPIDDB:
         return records
 
 
+########################################################################################################
+
+    def _execute_prepared(self,name,query,params):
+
+        '''
+        Execute a parameterized query as a server-side prepared statement.
+        This is a protected, internal method.
+        The query has placeholders $1, $2, ..., with explicit casts where the parameter types are not
+        implied.  It is prepared (parsed and planned) once per database connection under the given
+        name, which must be a valid SQL identifier unique to the query text, and thereafter only
+        the parameter values are sent.  NumPy scalars are converted to Python scalars.
+        '''
+
+        statements = prepared_statements.setdefault(self.conn,set())
+
+        if name not in statements:
+
+            if debug == 1:
+                print(f"Preparing statement {name}: {query}")
+
+            self.cur.execute(f"PREPARE {name} AS {query}")
+            statements.add(name)
+
+        params = [param.item() if isinstance(param,np.generic) else param for param in params]
+
+        if len(params) == 0:
+            self.cur.execute(f"EXECUTE {name}")
+        else:
+            self.cur.execute(f"EXECUTE {name} (" + ",".join(["%s"] * len(params)) + ")",params)
+
+
 ########################################################################################################
 
     def vacuum_analyze_table(self,tablename):
@@ -228,19 +521,19 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from addExposure(" +\
-            "cast('TEMPLATE_DATEOBS' as timestamp)," +\
-            "cast(TEMPLATE_MJDOBS as double precision)," +\
-            "cast(TEMPLATE_FIELD as integer)," +\
-            "cast(TEMPLATE_HP6 as integer)," +\
-            "cast(TEMPLATE_HP9 as integer)," +\
-            "cast('TEMPLATE_FILTER' as character varying(16))," +\
-            "cast(TEMPLATE_EXPTIME as real), " +\
-            "cast(TEMPLATE_INFOBITS as integer), " +\
-            "cast(TEMPLATE_STATUS as smallint)) as " +\
+            "cast($1 as timestamp)," +\
+            "cast($2 as double precision)," +\
+            "cast($3 as integer)," +\
+            "cast($4 as integer)," +\
+            "cast($5 as integer)," +\
+            "cast($6 as character varying(16))," +\
+            "cast($7 as real), " +\
+            "cast($8 as integer), " +\
+            "cast($9 as smallint)) as " +\
             "(expid integer," +\
             " fid smallint);"
 
@@ -257,32 +550,11 @@ class RAPIDDB:
         print('----> infobits = {}'.format(infobits))
         print('----> status = {}'.format(status))
 
-        mjdobs_str = str(mjdobs)
-        field_str = str(field)
-        hp6_str = str(hp6)
-        hp9_str = str(hp9)
-        exptime_str = str(exptime)
-        infobits_str = str(infobits)
-        status_str = str(status)
-
-        rep = {"TEMPLATE_DATEOBS": dateobs,
-               "TEMPLATE_MJDOBS": mjdobs_str,
-               "TEMPLATE_FIELD": field_str,
-               "TEMPLATE_HP6": hp6_str,
-               "TEMPLATE_HP9": hp9_str,
-               "TEMPLATE_FILTER": filter,
-               "TEMPLATE_EXPTIME": exptime_str}
-
-        rep["TEMPLATE_INFOBITS"] = infobits_str
-        rep["TEMPLATE_STATUS"] = status_str
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (dateobs,mjdobs,field,hp6,hp9,filter,exptime,infobits,status)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("add_exposure",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -316,68 +588,68 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from addL2File(" +\
-            "cast(TEMPLATE_EXPID as integer)," +\
-            "cast(TEMPLATE_SCA as smallint)," +\
-            "cast(TEMPLATE_FIELD as integer)," +\
-            "cast(TEMPLATE_HP6 as integer)," +\
-            "cast(TEMPLATE_HP9 as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast('TEMPLATE_DATEOBS' as timestamp without time zone)," +\
-            "cast(TEMPLATE_MJDOBS as double precision)," +\
-            "cast(TEMPLATE_EXPTIME as real)," +\
-            "cast(TEMPLATE_INFOBITS as integer)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)," +\
-            "cast(TEMPLATE_CRVAL1 as double precision)," +\
-            "cast(TEMPLATE_CRVAL2 as double precision)," +\
-            "cast(TEMPLATE_CRPIX1 as real)," +\
-            "cast(TEMPLATE_CRPIX2 as real)," +\
-            "cast(TEMPLATE_CD11 as double precision)," +\
-            "cast(TEMPLATE_CD12 as double precision)," +\
-            "cast(TEMPLATE_CD21 as double precision)," +\
-            "cast(TEMPLATE_CD22 as double precision)," +\
-            "cast('TEMPLATE_CTYPE1' as character varying(16))," +\
-            "cast('TEMPLATE_CTYPE2' as character varying(16))," +\
-            "cast('TEMPLATE_CUNIT1' as character varying(16))," +\
-            "cast('TEMPLATE_CUNIT2' as character varying(16))," +\
-            "cast(TEMPLATE_A_ORDER as smallint)," +\
-            "cast(TEMPLATE_A_0_2 as double precision)," +\
-            "cast(TEMPLATE_A_0_3 as double precision)," +\
-            "cast(TEMPLATE_A_0_4 as double precision)," +\
-            "cast(TEMPLATE_A_1_1 as double precision)," +\
-            "cast(TEMPLATE_A_1_2 as double precision)," +\
-            "cast(TEMPLATE_A_1_3 as double precision)," +\
-            "cast(TEMPLATE_A_2_0 as double precision)," +\
-            "cast(TEMPLATE_A_2_1 as double precision)," +\
-            "cast(TEMPLATE_A_2_2 as double precision)," +\
-            "cast(TEMPLATE_A_3_0 as double precision)," +\
-            "cast(TEMPLATE_A_3_1 as double precision)," +\
-            "cast(TEMPLATE_A_4_0 as double precision)," +\
-            "cast(TEMPLATE_B_ORDER as smallint)," +\
-            "cast(TEMPLATE_B_0_2 as double precision)," +\
-            "cast(TEMPLATE_B_0_3 as double precision)," +\
-            "cast(TEMPLATE_B_0_4 as double precision)," +\
-            "cast(TEMPLATE_B_1_1 as double precision)," +\
-            "cast(TEMPLATE_B_1_2 as double precision)," +\
-            "cast(TEMPLATE_B_1_3 as double precision)," +\
-            "cast(TEMPLATE_B_2_0 as double precision)," +\
-            "cast(TEMPLATE_B_2_1 as double precision)," +\
-            "cast(TEMPLATE_B_2_2 as double precision)," +\
-            "cast(TEMPLATE_B_3_0 as double precision)," +\
-            "cast(TEMPLATE_B_3_1 as double precision)," +\
-            "cast(TEMPLATE_B_4_0 as double precision)," +\
-            "cast(TEMPLATE_EQUINOX as real)," +\
-            "cast(TEMPLATE_RA as double precision)," +\
-            "cast(TEMPLATE_DEC as double precision)," +\
-            "cast(TEMPLATE_PAOBSY as real)," +\
-            "cast(TEMPLATE_PAFPA as real)," +\
-            "cast(TEMPLATE_ZPTMAG as real)," +\
-            "cast(TEMPLATE_SKYMEAN AS real)) as " +\
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as integer)," +\
+            "cast($4 as integer)," +\
+            "cast($5 as integer)," +\
+            "cast($6 as smallint)," +\
+            "cast($7 as timestamp without time zone)," +\
+            "cast($8 as double precision)," +\
+            "cast($9 as real)," +\
+            "cast($10 as integer)," +\
+            "cast($11 as character varying(255))," +\
+            "cast($12 as character varying(32))," +\
+            "cast($13 as smallint)," +\
+            "cast($14 as double precision)," +\
+            "cast($15 as double precision)," +\
+            "cast($16 as real)," +\
+            "cast($17 as real)," +\
+            "cast($18 as double precision)," +\
+            "cast($19 as double precision)," +\
+            "cast($20 as double precision)," +\
+            "cast($21 as double precision)," +\
+            "cast($22 as character varying(16))," +\
+            "cast($23 as character varying(16))," +\
+            "cast($24 as character varying(16))," +\
+            "cast($25 as character varying(16))," +\
+            "cast($26 as smallint)," +\
+            "cast($27 as double precision)," +\
+            "cast($28 as double precision)," +\
+            "cast($29 as double precision)," +\
+            "cast($30 as double precision)," +\
+            "cast($31 as double precision)," +\
+            "cast($32 as double precision)," +\
+            "cast($33 as double precision)," +\
+            "cast($34 as double precision)," +\
+            "cast($35 as double precision)," +\
+            "cast($36 as double precision)," +\
+            "cast($37 as double precision)," +\
+            "cast($38 as double precision)," +\
+            "cast($39 as smallint)," +\
+            "cast($40 as double precision)," +\
+            "cast($41 as double precision)," +\
+            "cast($42 as double precision)," +\
+            "cast($43 as double precision)," +\
+            "cast($44 as double precision)," +\
+            "cast($45 as double precision)," +\
+            "cast($46 as double precision)," +\
+            "cast($47 as double precision)," +\
+            "cast($48 as double precision)," +\
+            "cast($49 as double precision)," +\
+            "cast($50 as double precision)," +\
+            "cast($51 as double precision)," +\
+            "cast($52 as real)," +\
+            "cast($53 as double precision)," +\
+            "cast($54 as double precision)," +\
+            "cast($55 as real)," +\
+            "cast($56 as real)," +\
+            "cast($57 as real)," +\
+            "cast($58 AS real)) as " +\
             "(rid integer," +\
             " version smallint);"
 
@@ -388,73 +660,11 @@ class RAPIDDB:
         print('----> sca = {}'.format(sca))
         print('----> filename = {}'.format(filename))
 
-        rep = {"TEMPLATE_EXPID": str(expid),
-               "TEMPLATE_SCA": str(sca),
-               "TEMPLATE_FIELD": str(field),
-               "TEMPLATE_HP6": str(hp6),
-               "TEMPLATE_HP9": str(hp9),
-               "TEMPLATE_FID": str(fid),
-               "TEMPLATE_DATEOBS": dateobs}
-
-        rep["TEMPLATE_MJDOBS"] = str(mjdobs)
-        rep["TEMPLATE_EXPTIME"] = str(exptime)
-        rep["TEMPLATE_INFOBITS"] = str(infobits)
-        rep["TEMPLATE_FILENAME"] = filename
-        rep["TEMPLATE_CHECKSUM"] = checksum
-        rep["TEMPLATE_STATUS"] = str(status)
-        rep["TEMPLATE_CRVAL1"] = str(crval1)
-        rep["TEMPLATE_CRVAL2"] = str(crval2)
-        rep["TEMPLATE_CRPIX1"] = str(crpix1)
-        rep["TEMPLATE_CRPIX2"] = str(crpix2)
-        rep["TEMPLATE_CD11"] = str(cd11)
-        rep["TEMPLATE_CD12"] = str(cd12)
-        rep["TEMPLATE_CD21"] = str(cd21)
-        rep["TEMPLATE_CD22"] = str(cd22)
-        rep["TEMPLATE_CTYPE1"] = ctype1
-        rep["TEMPLATE_CTYPE2"] = ctype2
-        rep["TEMPLATE_CUNIT1"] = cunit1
-        rep["TEMPLATE_CUNIT2"] = cunit2
-        rep["TEMPLATE_A_ORDER"] = str(a_order)
-        rep["TEMPLATE_A_0_2"] = str(a_0_2)
-        rep["TEMPLATE_A_0_3"] = str(a_0_3)
-        rep["TEMPLATE_A_0_4"] = str(a_0_4)
-        rep["TEMPLATE_A_1_1"] = str(a_1_1)
-        rep["TEMPLATE_A_1_2"] = str(a_1_2)
-        rep["TEMPLATE_A_1_3"] = str(a_1_3)
-        rep["TEMPLATE_A_2_0"] = str(a_2_0)
-        rep["TEMPLATE_A_2_1"] = str(a_2_1)
-        rep["TEMPLATE_A_2_2"] = str(a_2_2)
-        rep["TEMPLATE_A_3_0"] = str(a_3_0)
-        rep["TEMPLATE_A_3_1"] = str(a_3_1)
-        rep["TEMPLATE_A_4_0"] = str(a_4_0)
-        rep["TEMPLATE_B_ORDER"] = str(b_order)
-        rep["TEMPLATE_B_0_2"] = str(b_0_2)
-        rep["TEMPLATE_B_0_3"] = str(b_0_3)
-        rep["TEMPLATE_B_0_4"] = str(b_0_4)
-        rep["TEMPLATE_B_1_1"] = str(b_1_1)
-        rep["TEMPLATE_B_1_2"] = str(b_1_2)
-        rep["TEMPLATE_B_1_3"] = str(b_1_3)
-        rep["TEMPLATE_B_2_0"] = str(b_2_0)
-        rep["TEMPLATE_B_2_1"] = str(b_2_1)
-        rep["TEMPLATE_B_2_2"] = str(b_2_2)
-        rep["TEMPLATE_B_3_0"] = str(b_3_0)
-        rep["TEMPLATE_B_3_1"] = str(b_3_1)
-        rep["TEMPLATE_B_4_0"] = str(b_4_0)
-        rep["TEMPLATE_EQUINOX"] = str(equinox)
-        rep["TEMPLATE_RA"] = str(ra)
-        rep["TEMPLATE_DEC"] = str(dec)
-        rep["TEMPLATE_PAOBSY"] = str(paobsy)
-        rep["TEMPLATE_PAFPA"] = str(pafpa)
-        rep["TEMPLATE_ZPTMAG"] = str(zptmag)
-        rep["TEMPLATE_SKYMEAN"] = str(skymean)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (expid,sca,field,hp6,hp9,fid,dateobs,mjdobs,exptime,infobits,filename,checksum,status,crval1,crval2,crpix1,crpix2,cd11,cd12,cd21,cd22,ctype1,ctype2,cunit1,cunit2,a_order,a_0_2,a_0_3,a_0_4,a_1_1,a_1_2,a_1_3,a_2_0,a_2_1,a_2_2,a_3_0,a_3_1,a_4_0,b_order,b_0_2,b_0_3,b_0_4,b_1_1,b_1_2,b_1_3,b_2_0,b_2_1,b_2_2,b_3_0,b_3_1,b_4_0,equinox,ra,dec,paobsy,pafpa,zptmag,skymean)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("add_l2file_fourth_order",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -489,84 +699,84 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from addL2File(" +\
-            "cast(TEMPLATE_EXPID as integer)," +\
-            "cast(TEMPLATE_SCA as smallint)," +\
-            "cast(TEMPLATE_FIELD as integer)," +\
-            "cast(TEMPLATE_HP6 as integer)," +\
-            "cast(TEMPLATE_HP9 as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast('TEMPLATE_DATEOBS' as timestamp without time zone)," +\
-            "cast(TEMPLATE_MJDOBS as double precision)," +\
-            "cast(TEMPLATE_EXPTIME as real)," +\
-            "cast(TEMPLATE_INFOBITS as integer)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)," +\
-            "cast(TEMPLATE_CRVAL1 as double precision)," +\
-            "cast(TEMPLATE_CRVAL2 as double precision)," +\
-            "cast(TEMPLATE_CRPIX1 as real)," +\
-            "cast(TEMPLATE_CRPIX2 as real)," +\
-            "cast(TEMPLATE_CD11 as double precision)," +\
-            "cast(TEMPLATE_CD12 as double precision)," +\
-            "cast(TEMPLATE_CD21 as double precision)," +\
-            "cast(TEMPLATE_CD22 as double precision)," +\
-            "cast('TEMPLATE_CTYPE1' as character varying(16))," +\
-            "cast('TEMPLATE_CTYPE2' as character varying(16))," +\
-            "cast('TEMPLATE_CUNIT1' as character varying(16))," +\
-            "cast('TEMPLATE_CUNIT2' as character varying(16))," +\
-            "cast(TEMPLATE_A_ORDER as smallint)," +\
-            "cast(TEMPLATE_A_0_1 as double precision)," +\
-            "cast(TEMPLATE_A_0_2 as double precision)," +\
-            "cast(TEMPLATE_A_0_3 as double precision)," +\
-            "cast(TEMPLATE_A_0_4 as double precision)," +\
-            "cast(TEMPLATE_A_0_5 as double precision)," +\
-            "cast(TEMPLATE_A_1_0 as double precision)," +\
-            "cast(TEMPLATE_A_1_1 as double precision)," +\
-            "cast(TEMPLATE_A_1_2 as double precision)," +\
-            "cast(TEMPLATE_A_1_3 as double precision)," +\
-            "cast(TEMPLATE_A_1_4 as double precision)," +\
-            "cast(TEMPLATE_A_2_0 as double precision)," +\
-            "cast(TEMPLATE_A_2_1 as double precision)," +\
-            "cast(TEMPLATE_A_2_2 as double precision)," +\
-            "cast(TEMPLATE_A_2_3 as double precision)," +\
-            "cast(TEMPLATE_A_3_0 as double precision)," +\
-            "cast(TEMPLATE_A_3_1 as double precision)," +\
-            "cast(TEMPLATE_A_3_2 as double precision)," +\
-            "cast(TEMPLATE_A_4_0 as double precision)," +\
-            "cast(TEMPLATE_A_4_1 as double precision)," +\
-            "cast(TEMPLATE_A_5_0 as double precision)," +\
-            "cast(TEMPLATE_B_ORDER as smallint)," +\
-            "cast(TEMPLATE_B_0_1 as double precision)," +\
-            "cast(TEMPLATE_B_0_2 as double precision)," +\
-            "cast(TEMPLATE_B_0_3 as double precision)," +\
-            "cast(TEMPLATE_B_0_4 as double precision)," +\
-            "cast(TEMPLATE_B_0_5 as double precision)," +\
-            "cast(TEMPLATE_B_1_0 as double precision)," +\
-            "cast(TEMPLATE_B_1_1 as double precision)," +\
-            "cast(TEMPLATE_B_1_2 as double precision)," +\
-            "cast(TEMPLATE_B_1_3 as double precision)," +\
-            "cast(TEMPLATE_B_1_4 as double precision)," +\
-            "cast(TEMPLATE_B_2_0 as double precision)," +\
-            "cast(TEMPLATE_B_2_1 as double precision)," +\
-            "cast(TEMPLATE_B_2_2 as double precision)," +\
-            "cast(TEMPLATE_B_2_3 as double precision)," +\
-            "cast(TEMPLATE_B_3_0 as double precision)," +\
-            "cast(TEMPLATE_B_3_1 as double precision)," +\
-            "cast(TEMPLATE_B_3_2 as double precision)," +\
-            "cast(TEMPLATE_B_4_0 as double precision)," +\
-            "cast(TEMPLATE_B_4_1 as double precision)," +\
-            "cast(TEMPLATE_B_5_0 as double precision)," +\
-            "cast(TEMPLATE_EQUINOX as real)," +\
-            "cast(TEMPLATE_RA as double precision)," +\
-            "cast(TEMPLATE_DEC as double precision)," +\
-            "cast(TEMPLATE_PAOBSY as real)," +\
-            "cast(TEMPLATE_PAFPA as real)," +\
-            "cast(TEMPLATE_ZPTMAG as real)," +\
-            "cast(TEMPLATE_SKYMEAN AS real)) as " +\
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as integer)," +\
+            "cast($4 as integer)," +\
+            "cast($5 as integer)," +\
+            "cast($6 as smallint)," +\
+            "cast($7 as timestamp without time zone)," +\
+            "cast($8 as double precision)," +\
+            "cast($9 as real)," +\
+            "cast($10 as integer)," +\
+            "cast($11 as character varying(255))," +\
+            "cast($12 as character varying(32))," +\
+            "cast($13 as smallint)," +\
+            "cast($14 as double precision)," +\
+            "cast($15 as double precision)," +\
+            "cast($16 as real)," +\
+            "cast($17 as real)," +\
+            "cast($18 as double precision)," +\
+            "cast($19 as double precision)," +\
+            "cast($20 as double precision)," +\
+            "cast($21 as double precision)," +\
+            "cast($22 as character varying(16))," +\
+            "cast($23 as character varying(16))," +\
+            "cast($24 as character varying(16))," +\
+            "cast($25 as character varying(16))," +\
+            "cast($26 as smallint)," +\
+            "cast($27 as double precision)," +\
+            "cast($28 as double precision)," +\
+            "cast($29 as double precision)," +\
+            "cast($30 as double precision)," +\
+            "cast($31 as double precision)," +\
+            "cast($32 as double precision)," +\
+            "cast($33 as double precision)," +\
+            "cast($34 as double precision)," +\
+            "cast($35 as double precision)," +\
+            "cast($36 as double precision)," +\
+            "cast($37 as double precision)," +\
+            "cast($38 as double precision)," +\
+            "cast($39 as double precision)," +\
+            "cast($40 as double precision)," +\
+            "cast($41 as double precision)," +\
+            "cast($42 as double precision)," +\
+            "cast($43 as double precision)," +\
+            "cast($44 as double precision)," +\
+            "cast($45 as double precision)," +\
+            "cast($46 as double precision)," +\
+            "cast($47 as smallint)," +\
+            "cast($48 as double precision)," +\
+            "cast($49 as double precision)," +\
+            "cast($50 as double precision)," +\
+            "cast($51 as double precision)," +\
+            "cast($52 as double precision)," +\
+            "cast($53 as double precision)," +\
+            "cast($54 as double precision)," +\
+            "cast($55 as double precision)," +\
+            "cast($56 as double precision)," +\
+            "cast($57 as double precision)," +\
+            "cast($58 as double precision)," +\
+            "cast($59 as double precision)," +\
+            "cast($60 as double precision)," +\
+            "cast($61 as double precision)," +\
+            "cast($62 as double precision)," +\
+            "cast($63 as double precision)," +\
+            "cast($64 as double precision)," +\
+            "cast($65 as double precision)," +\
+            "cast($66 as double precision)," +\
+            "cast($67 as double precision)," +\
+            "cast($68 as real)," +\
+            "cast($69 as double precision)," +\
+            "cast($70 as double precision)," +\
+            "cast($71 as real)," +\
+            "cast($72 as real)," +\
+            "cast($73 as real)," +\
+            "cast($74 AS real)) as " +\
             "(rid integer," +\
             " version smallint);"
 
@@ -577,89 +787,11 @@ class RAPIDDB:
         print('----> sca = {}'.format(sca))
         print('----> filename = {}'.format(filename))
 
-        rep = {"TEMPLATE_EXPID": str(expid),
-               "TEMPLATE_SCA": str(sca),
-               "TEMPLATE_FIELD": str(field),
-               "TEMPLATE_HP6": str(hp6),
-               "TEMPLATE_HP9": str(hp9),
-               "TEMPLATE_FID": str(fid),
-               "TEMPLATE_DATEOBS": dateobs}
-
-        rep["TEMPLATE_MJDOBS"] = str(mjdobs)
-        rep["TEMPLATE_EXPTIME"] = str(exptime)
-        rep["TEMPLATE_INFOBITS"] = str(infobits)
-        rep["TEMPLATE_FILENAME"] = filename
-        rep["TEMPLATE_CHECKSUM"] = checksum
-        rep["TEMPLATE_STATUS"] = str(status)
-        rep["TEMPLATE_CRVAL1"] = str(crval1)
-        rep["TEMPLATE_CRVAL2"] = str(crval2)
-        rep["TEMPLATE_CRPIX1"] = str(crpix1)
-        rep["TEMPLATE_CRPIX2"] = str(crpix2)
-        rep["TEMPLATE_CD11"] = str(cd11)
-        rep["TEMPLATE_CD12"] = str(cd12)
-        rep["TEMPLATE_CD21"] = str(cd21)
-        rep["TEMPLATE_CD22"] = str(cd22)
-        rep["TEMPLATE_CTYPE1"] = ctype1
-        rep["TEMPLATE_CTYPE2"] = ctype2
-        rep["TEMPLATE_CUNIT1"] = cunit1
-        rep["TEMPLATE_CUNIT2"] = cunit2
-        rep["TEMPLATE_A_ORDER"] = str(a_order)
-        rep["TEMPLATE_A_0_1"] = str(a_0_1)
-        rep["TEMPLATE_A_0_2"] = str(a_0_2)
-        rep["TEMPLATE_A_0_3"] = str(a_0_3)
-        rep["TEMPLATE_A_0_4"] = str(a_0_4)
-        rep["TEMPLATE_A_0_5"] = str(a_0_5)
-        rep["TEMPLATE_A_1_0"] = str(a_1_0)
-        rep["TEMPLATE_A_1_1"] = str(a_1_1)
-        rep["TEMPLATE_A_1_2"] = str(a_1_2)
-        rep["TEMPLATE_A_1_3"] = str(a_1_3)
-        rep["TEMPLATE_A_1_4"] = str(a_1_4)
-        rep["TEMPLATE_A_2_0"] = str(a_2_0)
-        rep["TEMPLATE_A_2_1"] = str(a_2_1)
-        rep["TEMPLATE_A_2_2"] = str(a_2_2)
-        rep["TEMPLATE_A_2_3"] = str(a_2_3)
-        rep["TEMPLATE_A_3_0"] = str(a_3_0)
-        rep["TEMPLATE_A_3_1"] = str(a_3_1)
-        rep["TEMPLATE_A_3_2"] = str(a_3_2)
-        rep["TEMPLATE_A_4_0"] = str(a_4_0)
-        rep["TEMPLATE_A_4_1"] = str(a_4_1)
-        rep["TEMPLATE_A_5_0"] = str(a_5_0)
-        rep["TEMPLATE_B_ORDER"] = str(b_order)
-        rep["TEMPLATE_B_0_1"] = str(b_0_1)
-        rep["TEMPLATE_B_0_2"] = str(b_0_2)
-        rep["TEMPLATE_B_0_3"] = str(b_0_3)
-        rep["TEMPLATE_B_0_4"] = str(b_0_4)
-        rep["TEMPLATE_B_0_5"] = str(b_0_5)
-        rep["TEMPLATE_B_1_0"] = str(b_1_0)
-        rep["TEMPLATE_B_1_1"] = str(b_1_1)
-        rep["TEMPLATE_B_1_2"] = str(b_1_2)
-        rep["TEMPLATE_B_1_3"] = str(b_1_3)
-        rep["TEMPLATE_B_1_4"] = str(b_1_4)
-        rep["TEMPLATE_B_2_0"] = str(b_2_0)
-        rep["TEMPLATE_B_2_1"] = str(b_2_1)
-        rep["TEMPLATE_B_2_2"] = str(b_2_2)
-        rep["TEMPLATE_B_2_3"] = str(b_2_3)
-        rep["TEMPLATE_B_3_0"] = str(b_3_0)
-        rep["TEMPLATE_B_3_1"] = str(b_3_1)
-        rep["TEMPLATE_B_3_2"] = str(b_3_2)
-        rep["TEMPLATE_B_4_0"] = str(b_4_0)
-        rep["TEMPLATE_B_4_1"] = str(b_4_1)
-        rep["TEMPLATE_B_5_0"] = str(b_5_0)
-        rep["TEMPLATE_EQUINOX"] = str(equinox)
-        rep["TEMPLATE_RA"] = str(ra)
-        rep["TEMPLATE_DEC"] = str(dec)
-        rep["TEMPLATE_PAOBSY"] = str(paobsy)
-        rep["TEMPLATE_PAFPA"] = str(pafpa)
-        rep["TEMPLATE_ZPTMAG"] = str(zptmag)
-        rep["TEMPLATE_SKYMEAN"] = str(skymean)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (expid,sca,field,hp6,hp9,fid,dateobs,mjdobs,exptime,infobits,filename,checksum,status,crval1,crval2,crpix1,crpix2,cd11,cd12,cd21,cd22,ctype1,ctype2,cunit1,cunit2,a_order,a_0_1,a_0_2,a_0_3,a_0_4,a_0_5,a_1_0,a_1_1,a_1_2,a_1_3,a_1_4,a_2_0,a_2_1,a_2_2,a_2_3,a_3_0,a_3_1,a_3_2,a_4_0,a_4_1,a_5_0,b_order,b_0_1,b_0_2,b_0_3,b_0_4,b_0_5,b_1_0,b_1_1,b_1_2,b_1_3,b_1_4,b_2_0,b_2_1,b_2_2,b_2_3,b_3_0,b_3_1,b_3_2,b_4_0,b_4_1,b_5_0,equinox,ra,dec,paobsy,pafpa,zptmag,skymean)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("add_l2file_fifth_order",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -687,15 +819,15 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from updateL2File(" +\
-            "cast(TEMPLATE_RID as integer)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)," +\
-            "cast(TEMPLATE_VERSION AS smallint));"
+            "cast($1 as integer)," +\
+            "cast($2 as character varying(255))," +\
+            "cast($3 as character varying(32))," +\
+            "cast($4 as smallint)," +\
+            "cast($5 AS smallint));"
 
 
         # Query database.
@@ -706,16 +838,7 @@ class RAPIDDB:
         print('----> status = {}'.format(status))
         print('----> version = {}'.format(version))
 
-        rep = {"TEMPLATE_RID": str(rid),
-               "TEMPLATE_FILENAME": filename,
-               "TEMPLATE_CHECKSUM": checksum}
-
-        rep["TEMPLATE_STATUS"] = str(status)
-        rep["TEMPLATE_VERSION"] = str(version)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,filename,checksum,status,version)
 
         print('query = {}'.format(query))
 
@@ -723,7 +846,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("update_l2file",query,params)
 
             try:
                 for record in self.cur:
@@ -751,29 +874,29 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from registerL2FileMeta(" +\
-            "cast(TEMPLATE_RID as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast(TEMPLATE_SCA as smallint)," +\
-            "cast(TEMPLATE_RA0 as double precision)," +\
-            "cast(TEMPLATE_DEC0 as double precision)," +\
-            "cast(TEMPLATE_RA1 as double precision)," +\
-            "cast(TEMPLATE_DEC1 as double precision)," +\
-            "cast(TEMPLATE_RA2 as double precision)," +\
-            "cast(TEMPLATE_DEC2 as double precision)," +\
-            "cast(TEMPLATE_RA3 as double precision)," +\
-            "cast(TEMPLATE_DEC3 as double precision)," +\
-            "cast(TEMPLATE_RA4 as double precision)," +\
-            "cast(TEMPLATE_DEC4 as double precision)," +\
-            "cast(TEMPLATE_Z as double precision)," +\
-            "cast(TEMPLATE_Y as double precision)," +\
-            "cast(TEMPLATE_Z AS double precision)," +\
-            "cast(TEMPLATE_HP6 AS integer)," +\
-            "cast(TEMPLATE_HP9 AS integer)," +\
-            "cast(TEMPLATE_MJDOBS as double precision));"
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as smallint)," +\
+            "cast($4 as double precision)," +\
+            "cast($5 as double precision)," +\
+            "cast($6 as double precision)," +\
+            "cast($7 as double precision)," +\
+            "cast($8 as double precision)," +\
+            "cast($9 as double precision)," +\
+            "cast($10 as double precision)," +\
+            "cast($11 as double precision)," +\
+            "cast($12 as double precision)," +\
+            "cast($13 as double precision)," +\
+            "cast($14 as double precision)," +\
+            "cast($15 as double precision)," +\
+            "cast($16 AS double precision)," +\
+            "cast($17 AS integer)," +\
+            "cast($18 AS integer)," +\
+            "cast($19 as double precision));"
 
 
         # Query database.
@@ -784,31 +907,7 @@ class RAPIDDB:
         print('----> ra0 = {}'.format(ra0))
         print('----> dec0 = {}'.format(dec0))
 
-        rep = {"TEMPLATE_RID": str(rid)}
-
-        rep["TEMPLATE_FID"] = str(fid)
-        rep["TEMPLATE_SCA"] = str(sca)
-
-        rep["TEMPLATE_RA0"] = str(ra0)
-        rep["TEMPLATE_DEC0"] = str(dec0)
-        rep["TEMPLATE_RA1"] = str(ra1)
-        rep["TEMPLATE_DEC1"] = str(dec1)
-        rep["TEMPLATE_RA2"] = str(ra2)
-        rep["TEMPLATE_DEC2"] = str(dec2)
-        rep["TEMPLATE_RA3"] = str(ra3)
-        rep["TEMPLATE_DEC3"] = str(dec3)
-        rep["TEMPLATE_RA4"] = str(ra4)
-        rep["TEMPLATE_DEC4"] = str(dec4)
-        rep["TEMPLATE_X"] = str(x)
-        rep["TEMPLATE_Y"] = str(y)
-        rep["TEMPLATE_Z"] = str(z)
-        rep["TEMPLATE_HP6"] = str(hp6)
-        rep["TEMPLATE_HP9"] = str(hp9)
-        rep["TEMPLATE_MJDOBS"] = str(mjdobs)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,fid,sca,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4,x,y,z,hp6,hp9,mjdobs)
 
         print('query = {}'.format(query))
 
@@ -816,7 +915,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("register_l2filemeta",query,params)
 
             try:
                 for record in self.cur:
@@ -1264,30 +1363,24 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
-            "select sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4 from L2FileMeta where rid=TEMPLATE_RID;"
+        query =\
+            "select sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4 from L2FileMeta where rid=$1;"
 
 
         # Query database.
 
         print('----> rid = {}'.format(rid))
 
-        rid_str = str(rid)
-
-        rep = {"TEMPLATE_RID": rid_str}
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_l2filemeta_record",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -1323,6 +1416,52 @@ class RAPIDDB:
         return sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4
 
 
+########################################################################################################
+
+    def get_l2filemeta_records_for_rids(self,rids):
+
+        '''
+        Get records from L2FileMeta database table for given list of rids, in one query.
+        Returns dictionary keyed by rid of tuples (sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4),
+        as returned by get_l2filemeta_record.  Rids without a record are omitted.
+        '''
+
+        self.exit_code = 0
+
+
+        # Define parameterized query.
+
+        query =\
+            "select rid,sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4 from L2FileMeta where rid = any($1::integer[]);"
+
+
+        # Query database.
+
+        rids = [int(rid) for rid in rids]
+
+        print('----> number of rids = {}'.format(len(rids)))
+
+        print('query = {}'.format(query))
+
+
+        # Execute query.
+
+        records_dict = {}
+
+        try:
+            self._execute_prepared("get_l2filemeta_records_for_rids",query,(rids,))
+
+            for record in self.cur:
+                records_dict[record[0]] = tuple(record[1:])
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print('*** Error getting L2FileMeta records for rids ({}); skipping...'.format(error))
+            self.exit_code = 67
+
+        print("nrecs =",len(records_dict))
+
+        return records_dict
+
 ########################################################################################################
 
     def get_overlapping_l2files(self,
@@ -1352,43 +1491,43 @@ class RAPIDDB:
             radius_of_initial_cone_search = 0.18
 
 
-        # Define query template.
+        # Define parameterized query.
 
         # TODO: This query will not actually give all overlapping images (however small a chance this may be).
         #       For example, an image corner may overlap on a sky tile that does not cover a tile center or corner.
 
-        query_template =\
+        query =\
             "select a.rid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4,field, " +\
-            "q3c_dist(ra0, dec0, cast(TEMPLATE_RA0 as double precision), cast(TEMPLATE_DEC0 as double precision)) as dist " +\
+            "q3c_dist(ra0, dec0, cast($1 as double precision), cast($2 as double precision)) as dist " +\
             "from L2FileMeta a, L2Files b " +\
             "where a.rid = b.rid " +\
-            "and a.fid = TEMPLATE_FID " +\
+            "and a.fid = $3 " +\
             "and status > 0 " +\
             "and vbest > 0 " +\
-            "and q3c_radial_query(ra0, dec0, cast(TEMPLATE_RA0 as double precision), cast(TEMPLATE_DEC0 as double precision), cast(TEMPLATE_RADIUS as double precision)) " +\
-            "and (q3c_poly_query(ra1, dec1, array[cast(TEMPLATE_RA1 as double precision), cast(TEMPLATE_DEC1 as double precision)," +\
-                                                 "cast(TEMPLATE_RA2 as double precision), cast(TEMPLATE_DEC2 as double precision)," +\
-                                                 "cast(TEMPLATE_RA3 as double precision), cast(TEMPLATE_DEC3 as double precision)," +\
-                                                 "cast(TEMPLATE_RA4 as double precision), cast(TEMPLATE_DEC4 as double precision)]) " +\
-            "or q3c_poly_query(ra2, dec2, array[cast(TEMPLATE_RA1 as double precision), cast(TEMPLATE_DEC1 as double precision)," +\
-                                               "cast(TEMPLATE_RA2 as double precision), cast(TEMPLATE_DEC2 as double precision)," +\
-                                               "cast(TEMPLATE_RA3 as double precision), cast(TEMPLATE_DEC3 as double precision)," +\
-                                               "cast(TEMPLATE_RA4 as double precision), cast(TEMPLATE_DEC4 as double precision)]) " +\
-            "or q3c_poly_query(ra3, dec3, array[cast(TEMPLATE_RA1 as double precision), cast(TEMPLATE_DEC1 as double precision)," +\
-                                               "cast(TEMPLATE_RA2 as double precision), cast(TEMPLATE_DEC2 as double precision)," +\
-                                               "cast(TEMPLATE_RA3 as double precision), cast(TEMPLATE_DEC3 as double precision)," +\
-                                               "cast(TEMPLATE_RA4 as double precision), cast(TEMPLATE_DEC4 as double precision)]) " +\
-            "or q3c_poly_query(ra4, dec4, array[cast(TEMPLATE_RA1 as double precision), cast(TEMPLATE_DEC1 as double precision)," +\
-                                               "cast(TEMPLATE_RA2 as double precision), cast(TEMPLATE_DEC2 as double precision)," +\
-                                               "cast(TEMPLATE_RA3 as double precision), cast(TEMPLATE_DEC3 as double precision)," +\
-                                               "cast(TEMPLATE_RA4 as double precision), cast(TEMPLATE_DEC4 as double precision)]) " +\
-            "or q3c_poly_query(ra0, dec0, array[cast(TEMPLATE_RA1 as double precision), cast(TEMPLATE_DEC1 as double precision)," +\
-                                               "cast(TEMPLATE_RA2 as double precision), cast(TEMPLATE_DEC2 as double precision)," +\
-                                               "cast(TEMPLATE_RA3 as double precision), cast(TEMPLATE_DEC3 as double precision)," +\
-                                               "cast(TEMPLATE_RA4 as double precision), cast(TEMPLATE_DEC4 as double precision)])) " +\
-            "and a.mjdobs >= TEMPLATE_STARTMJDOBS " +\
-            "and a.mjdobs < TEMPLATE_ENDMJDOBS " +\
-            "and a.rid != TEMPLATE_RID " +\
+            "and q3c_radial_query(ra0, dec0, cast($1 as double precision), cast($2 as double precision), cast($4 as double precision)) " +\
+            "and (q3c_poly_query(ra1, dec1, array[cast($5 as double precision), cast($6 as double precision)," +\
+                                                 "cast($7 as double precision), cast($8 as double precision)," +\
+                                                 "cast($9 as double precision), cast($10 as double precision)," +\
+                                                 "cast($11 as double precision), cast($12 as double precision)]) " +\
+            "or q3c_poly_query(ra2, dec2, array[cast($5 as double precision), cast($6 as double precision)," +\
+                                               "cast($7 as double precision), cast($8 as double precision)," +\
+                                               "cast($9 as double precision), cast($10 as double precision)," +\
+                                               "cast($11 as double precision), cast($12 as double precision)]) " +\
+            "or q3c_poly_query(ra3, dec3, array[cast($5 as double precision), cast($6 as double precision)," +\
+                                               "cast($7 as double precision), cast($8 as double precision)," +\
+                                               "cast($9 as double precision), cast($10 as double precision)," +\
+                                               "cast($11 as double precision), cast($12 as double precision)]) " +\
+            "or q3c_poly_query(ra4, dec4, array[cast($5 as double precision), cast($6 as double precision)," +\
+                                               "cast($7 as double precision), cast($8 as double precision)," +\
+                                               "cast($9 as double precision), cast($10 as double precision)," +\
+                                               "cast($11 as double precision), cast($12 as double precision)]) " +\
+            "or q3c_poly_query(ra0, dec0, array[cast($5 as double precision), cast($6 as double precision)," +\
+                                               "cast($7 as double precision), cast($8 as double precision)," +\
+                                               "cast($9 as double precision), cast($10 as double precision)," +\
+                                               "cast($11 as double precision), cast($12 as double precision)])) " +\
+            "and a.mjdobs >= $13 " +\
+            "and a.mjdobs < $14 " +\
+            "and a.rid != $15 " +\
             "order by dist; "
 
 
@@ -1420,32 +1559,13 @@ class RAPIDDB:
             end_mjdobs = mjdobs
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> rid = {}'.format(rid))
         print('----> fid = {}'.format(fid))
         print('----> radius_of_initial_cone_search = {}'.format(radius_of_initial_cone_search))
 
-        rep = {"TEMPLATE_RID": str(rid)}
-
-        rep["TEMPLATE_FID"] = str(fid)
-        rep["TEMPLATE_STARTMJDOBS"] = str(start_mjdobs)
-        rep["TEMPLATE_ENDMJDOBS"] = str(end_mjdobs)
-        rep["TEMPLATE_RA0"] = str(field_ra0)
-        rep["TEMPLATE_DEC0"] = str(field_dec0)
-        rep["TEMPLATE_RA1"] = str(field_ra1)
-        rep["TEMPLATE_DEC1"] = str(field_dec1)
-        rep["TEMPLATE_RA2"] = str(field_ra2)
-        rep["TEMPLATE_DEC2"] = str(field_dec2)
-        rep["TEMPLATE_RA3"] = str(field_ra3)
-        rep["TEMPLATE_DEC3"] = str(field_dec3)
-        rep["TEMPLATE_RA4"] = str(field_ra4)
-        rep["TEMPLATE_DEC4"] = str(field_dec4)
-        rep["TEMPLATE_RADIUS"] = str(radius_of_initial_cone_search)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (field_ra0,field_dec0,fid,radius_of_initial_cone_search,field_ra1,field_dec1,field_ra2,field_dec2,field_ra3,field_dec3,field_ra4,field_dec4,start_mjdobs,end_mjdobs,rid)
 
         print('query = {}'.format(query))
 
@@ -1453,7 +1573,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("get_overlapping_l2files",query,params)
 
             try:
                 records = []
@@ -1486,30 +1606,26 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select filename,expid,sca,field,mjdobs,exptime,infobits,status,vbest,version " +\
             "from L2Files " +\
-            "where rid = TEMPLATE_RID; "
+            "where rid = $1; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> rid = {}'.format(rid))
 
-        rep = {"TEMPLATE_RID": str(rid)}
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_info_for_l2file",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -1542,6 +1658,54 @@ class RAPIDDB:
         return record
 
 
+########################################################################################################
+
+    def get_info_for_l2files(self,rids):
+
+        '''
+        Query select columns in L2Files database table for given list of RIDs, in one query.
+        Returns dictionary keyed by rid of records (filename,expid,sca,field,mjdobs,exptime,infobits,
+        status,vbest,version), as returned by get_info_for_l2file.  RIDs without a record are omitted.
+        '''
+
+        self.exit_code = 0
+
+
+        # Define parameterized query.
+
+        query =\
+            "select rid,filename,expid,sca,field,mjdobs,exptime,infobits,status,vbest,version " +\
+            "from L2Files " +\
+            "where rid = any($1::integer[]); "
+
+
+        # Formulate query parameters.
+
+        rids = [int(rid) for rid in rids]
+
+        print('----> number of rids = {}'.format(len(rids)))
+
+        print('query = {}'.format(query))
+
+
+        # Execute query.
+
+        records_dict = {}
+
+        try:
+            self._execute_prepared("get_info_for_l2files",query,(rids,))
+
+            for record in self.cur:
+                records_dict[record[0]] = tuple(record[1:])
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print('*** Error getting select columns from L2Files records for rids ({}); skipping...'.format(error))
+            self.exit_code = 67
+
+        print("nrecs =",len(records_dict))
+
+        return records_dict
+
 ########################################################################################################
 
     def get_best_reference_image(self,ppid,field,fid):
@@ -1553,39 +1717,32 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select rfid,filename,infobits,version " +\
             "from RefImages " +\
             "where vbest > 0 " +\
             "and status > 0 " +\
-            "and ppid = TEMPLATE_PPID " +\
-            "and field = TEMPLATE_FIELD " +\
-            "and fid = TEMPLATE_FID; "
+            "and ppid = $1 " +\
+            "and field = $2 " +\
+            "and fid = $3; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> ppid = {}'.format(ppid))
         print('----> field = {}'.format(field))
         print('----> fid = {}'.format(fid))
 
-        rep = {"TEMPLATE_PPID": str(ppid)}
-
-        rep["TEMPLATE_FIELD"] = str(field)
-        rep["TEMPLATE_FID"] = str(fid)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (ppid,field,fid)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_best_reference_image",query,params)
         record = self.cur.fetchone()
 
         record_dict = {}
@@ -1606,7 +1763,74 @@ class RAPIDDB:
 
 ########################################################################################################
 
-    def start_job(self,ppid,fid,expid,field,sca,rid,machine='null',slurm='null'):
+    def get_best_reference_images(self,ppid,fields,fids):
+
+        '''
+        Query RefImages database table for the best (latest unless version is locked) versions of reference
+        images for given pipeline and lists of fields and fids (taken pairwise), in one query.
+        Returns dictionary keyed by (field,fid) of dictionaries with keys rfid, filename, infobits,
+        and version, as returned by get_best_reference_image.  Pairs without a record are omitted.
+        '''
+
+        self.exit_code = 0
+
+
+        # Define parameterized query.
+
+        query =\
+            "select a.field,a.fid,rfid,filename,infobits,version " +\
+            "from RefImages a, unnest($2::integer[],$3::smallint[]) as b(field,fid) " +\
+            "where vbest > 0 " +\
+            "and status > 0 " +\
+            "and ppid = $1 " +\
+            "and a.field = b.field " +\
+            "and a.fid = b.fid; "
+
+
+        # Formulate query parameters.
+
+        fields = [int(field) for field in fields]
+        fids = [int(fid) for fid in fids]
+
+        print('----> ppid = {}'.format(ppid))
+        print('----> number of (field,fid) pairs = {}'.format(len(fields)))
+
+        params = (ppid,fields,fids)
+
+        print('query = {}'.format(query))
+
+
+        # Execute query.  Keep the first record for each (field,fid), as get_best_reference_image does.
+
+        records_dict = {}
+
+        try:
+            self._execute_prepared("get_best_reference_images",query,params)
+
+            for record in self.cur:
+
+                if (record[0],record[1]) in records_dict:
+                    continue
+
+                record_dict = {}
+                record_dict["rfid"] = record[2]
+                record_dict["filename"] = record[3]
+                record_dict["infobits"] = record[4]
+                record_dict["version"] = record[5]
+
+                records_dict[(record[0],record[1])] = record_dict
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print('*** Error getting best RefImages records ({}); skipping...'.format(error))
+            self.exit_code = 67
+
+        print("nrecs =",len(records_dict))
+
+        return records_dict
+
+########################################################################################################
+
+    def start_job(self,ppid,fid,expid,field,sca,rid,machine=None,slurm=None):
 
         '''
         Insert or update record in Jobs database table.  Return job ID.
@@ -1615,18 +1839,18 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select jid from startJob(" +\
-            "cast('TEMPLATE_PPID' as smallint)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast(TEMPLATE_EXPID as integer)," +\
-            "cast(TEMPLATE_FIELD as integer)," +\
-            "cast(TEMPLATE_SCA as smallint)," +\
-            "cast(TEMPLATE_RID as integer), " +\
-            "cast(TEMPLATE_MACHINE as smallint), " +\
-            "cast(TEMPLATE_SLURM as integer)) as jid;"
+            "cast($1 as smallint)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as integer)," +\
+            "cast($4 as integer)," +\
+            "cast($5 as smallint)," +\
+            "cast($6 as integer), " +\
+            "cast($7 as smallint), " +\
+            "cast($8 as integer)) as jid;"
 
 
         # Query database.
@@ -1638,30 +1862,11 @@ class RAPIDDB:
         print('----> sca = {}'.format(sca))
         print('----> rid = {}'.format(rid))
 
-        ppid_str = str(ppid)
-        fid_str = str(fid)
-        expid_str = str(expid)
-        field_str = str(field)
-        sca_str = str(sca)
-        rid_str = str(rid)
-
-        rep = {"TEMPLATE_PPID": ppid_str,
-               "TEMPLATE_FID": fid_str,
-               "TEMPLATE_EXPID": expid_str,
-               "TEMPLATE_FIELD": field_str}
-
-        rep["TEMPLATE_SCA"] = sca_str
-        rep["TEMPLATE_RID"] = rid_str
-        rep["TEMPLATE_MACHINE"] = str(machine)
-        rep["TEMPLATE_SLURM"] = str(slurm)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (ppid,fid,expid,field,sca,rid,machine,slurm)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("start_job",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -1689,25 +1894,33 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
         if ended is None:
 
-            query_template =\
+            statement_name = "end_job"
+
+            query =\
                 "select from endJob(" +\
-                "cast(TEMPLATE_JID as integer)," +\
-                "cast(TEMPLATE_EXITCODE as smallint)," +\
-                "cast('TEMPLATE_AWSBATJOBID' as varchar(64)));"
+                "cast($1 as integer)," +\
+                "cast($2 as smallint)," +\
+                "cast($3 as varchar(64)));"
+
+            params = (jid,job_exitcode,aws_batch_job_id)
 
         else:
 
-            query_template =\
+            statement_name = "end_job_with_times"
+
+            query =\
                 "select from endJob(" +\
-                "cast(TEMPLATE_JID as integer)," +\
-                "cast(TEMPLATE_EXITCODE as smallint)," +\
-                "cast('TEMPLATE_AWSBATJOBID' as varchar(64)),"+\
-                "cast('TEMPLATE_STARTED' as timestamp),"+\
-                "cast('TEMPLATE_ENDED' as timestamp));"
+                "cast($1 as integer)," +\
+                "cast($2 as smallint)," +\
+                "cast($3 as varchar(64)),"+\
+                "cast($4 as timestamp),"+\
+                "cast($5 as timestamp));"
+
+            params = (jid,job_exitcode,aws_batch_job_id,started,ended)
 
 
         # Query database.
@@ -1715,26 +1928,9 @@ class RAPIDDB:
         print('----> jid = {}'.format(jid))
         print('----> job_exitcode = {}'.format(job_exitcode))
 
-        jid_str = str(jid)
-        job_exitcode_str = str(job_exitcode)
-
-        rep = {"TEMPLATE_JID": jid_str,
-               "TEMPLATE_EXITCODE": job_exitcode_str}
-
-        rep["TEMPLATE_AWSBATJOBID"] = aws_batch_job_id
-
-        if ended is not None:
-            rep["TEMPLATE_STARTED"] = started
-            rep["TEMPLATE_ENDED"] = ended
-
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
-
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared(statement_name,query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -1807,19 +2003,19 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from addRefImage(" +\
-            "cast(TEMPLATE_FIELD as integer)," +\
-            "cast(TEMPLATE_HP6 as integer)," +\
-            "cast(TEMPLATE_HP9 as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast(TEMPLATE_PPID as smallint)," +\
-            "cast(TEMPLATE_INFOBITS as integer)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)) as " +\
+            "cast($1 as integer)," +\
+            "cast($2 as integer)," +\
+            "cast($3 as integer)," +\
+            "cast($4 as smallint)," +\
+            "cast($5 as smallint)," +\
+            "cast($6 as integer)," +\
+            "cast($7 as character varying(255))," +\
+            "cast($8 as character varying(32))," +\
+            "cast($9 as smallint)) as " +\
             "(rfid integer," +\
             " version smallint);"
 
@@ -1830,25 +2026,11 @@ class RAPIDDB:
         print('----> field = {}'.format(field))
         print('----> filename = {}'.format(filename))
 
-        rep = {"TEMPLATE_PPID": str(ppid),
-               "TEMPLATE_FIELD": str(field),
-               "TEMPLATE_HP6": str(hp6),
-               "TEMPLATE_HP9": str(hp9),
-               "TEMPLATE_FID": str(fid)}
-
-        rep["TEMPLATE_INFOBITS"] = str(infobits)
-        rep["TEMPLATE_FILENAME"] = filename
-        rep["TEMPLATE_CHECKSUM"] = checksum
-        rep["TEMPLATE_STATUS"] = str(status)
-
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (field,hp6,hp9,fid,ppid,infobits,filename,checksum,status)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("add_refimage",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -1876,15 +2058,15 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from updateRefImage(" +\
-            "cast(TEMPLATE_RFID as integer)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)," +\
-            "cast(TEMPLATE_VERSION AS smallint));"
+            "cast($1 as integer)," +\
+            "cast($2 as character varying(255))," +\
+            "cast($3 as character varying(32))," +\
+            "cast($4 as smallint)," +\
+            "cast($5 AS smallint));"
 
 
         # Query database.
@@ -1895,16 +2077,7 @@ class RAPIDDB:
         print('----> status = {}'.format(status))
         print('----> version = {}'.format(version))
 
-        rep = {"TEMPLATE_RFID": str(rfid),
-               "TEMPLATE_FILENAME": filename,
-               "TEMPLATE_CHECKSUM": checksum}
-
-        rep["TEMPLATE_STATUS"] = str(status)
-        rep["TEMPLATE_VERSION"] = str(version)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rfid,filename,checksum,status,version)
 
         print('query = {}'.format(query))
 
@@ -1912,7 +2085,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("update_refimage",query,params)
 
             try:
                 for record in self.cur:
@@ -1940,36 +2113,30 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select psfid,filename " +\
             "from PSFs " +\
             "where vbest > 0 " +\
             "and status > 0 " +\
-            "and sca = TEMPLATE_SCA " +\
-            "and fid = TEMPLATE_FID; "
+            "and sca = $1 " +\
+            "and fid = $2; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> sca = {}'.format(sca))
         print('----> fid = {}'.format(fid))
 
-        rep = {"TEMPLATE_SCA": str(sca)}
-
-        rep["TEMPLATE_FID"] = str(fid)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (sca,fid)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_best_psf",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -1980,12 +2147,57 @@ class RAPIDDB:
             psfid = None
             filename = None
 
-            print("*** Error: Could not get best PSFs database record; continuing...")
-            self.exit_code = 67
+            print("*** Error: Could not get best PSFs database record; continuing...")
+            self.exit_code = 67
+
+
+        return psfid,filename
+
+
+########################################################################################################
+
+    def get_best_psfs(self):
+
+        '''
+        Query PSFs database table for the best (latest unless version is locked) versions of PSFs
+        for all (sca,fid) combinations, in one query.  Returns dictionary keyed by (sca,fid) of
+        tuples (psfid,filename), as returned by get_best_psf.
+        '''
+
+        self.exit_code = 0
+
+
+        # Define query.
+
+        query =\
+            "select sca,fid,psfid,filename " +\
+            "from PSFs " +\
+            "where vbest > 0 " +\
+            "and status > 0;"
+
+
+        # Query database.
+
+        print('query = {}'.format(query))
+
+
+        # Execute query.  Keep the first record for each (sca,fid), as get_best_psf does.
+
+        records_dict = {}
+
+        try:
+            self._execute_prepared("get_best_psfs",query,())
+
+            for record in self.cur:
+                records_dict.setdefault((record[0],record[1]),(record[2],record[3]))
 
+        except (Exception, psycopg2.DatabaseError) as error:
+            print('*** Error getting best PSFs records ({}); skipping...'.format(error))
+            self.exit_code = 67
 
-        return psfid,filename
+        print("nrecs =",len(records_dict))
 
+        return records_dict
 
 ########################################################################################################
 
@@ -1998,30 +2210,26 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select ppid,rid,expid,sca,field,fid,started,ended,status,exitcode " +\
             "from Jobs " +\
-            "where jid = TEMPLATE_JID; "
+            "where jid = $1; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> jid = {}'.format(jid))
 
-        rep = {"TEMPLATE_JID": str(jid)}
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (jid,)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_info_for_job",query,params)
         record = self.cur.fetchone()
 
         record_dict = {}
@@ -2058,28 +2266,28 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from addDiffImage(" +\
-            "cast(TEMPLATE_RID as integer)," +\
-            "cast(TEMPLATE_PPID as smallint)," +\
-            "cast(TEMPLATE_RFID as integer)," +\
-            "cast(TEMPLATE_INFOBITSSCI as integer)," +\
-            "cast(TEMPLATE_INFOBITSREF as integer)," +\
-            "cast(TEMPLATE_RA0 as double precision)," +\
-            "cast(TEMPLATE_DEC0 as double precision)," +\
-            "cast(TEMPLATE_RA1 as double precision)," +\
-            "cast(TEMPLATE_DEC1 as double precision)," +\
-            "cast(TEMPLATE_RA2 as double precision)," +\
-            "cast(TEMPLATE_DEC2 as double precision)," +\
-            "cast(TEMPLATE_RA3 as double precision)," +\
-            "cast(TEMPLATE_DEC3 as double precision)," +\
-            "cast(TEMPLATE_RA4 as double precision)," +\
-            "cast(TEMPLATE_DEC4 as double precision)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)) as " +\
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as integer)," +\
+            "cast($4 as integer)," +\
+            "cast($5 as integer)," +\
+            "cast($6 as double precision)," +\
+            "cast($7 as double precision)," +\
+            "cast($8 as double precision)," +\
+            "cast($9 as double precision)," +\
+            "cast($10 as double precision)," +\
+            "cast($11 as double precision)," +\
+            "cast($12 as double precision)," +\
+            "cast($13 as double precision)," +\
+            "cast($14 as double precision)," +\
+            "cast($15 as double precision)," +\
+            "cast($16 as character varying(255))," +\
+            "cast($17 as character varying(32))," +\
+            "cast($18 as smallint)) as " +\
             "(pid integer," +\
             " version smallint);"
 
@@ -2091,35 +2299,11 @@ class RAPIDDB:
         print('----> rfid = {}'.format(rfid))
         print('----> filename = {}'.format(filename))
 
-        rep = {"TEMPLATE_RID": str(rid),
-               "TEMPLATE_PPID": str(ppid),
-               "TEMPLATE_RFID": str(rfid),
-               "TEMPLATE_INFOBITSSCI": str(infobitssci),
-               "TEMPLATE_INFOBITSREF": str(infobitsref)}
-
-        rep["TEMPLATE_RA0"] = str(ra0)
-        rep["TEMPLATE_DEC0"] = str(dec0)
-        rep["TEMPLATE_RA1"] = str(ra1)
-        rep["TEMPLATE_DEC1"] = str(dec1)
-        rep["TEMPLATE_RA2"] = str(ra2)
-        rep["TEMPLATE_DEC2"] = str(dec2)
-        rep["TEMPLATE_RA3"] = str(ra3)
-        rep["TEMPLATE_DEC3"] = str(dec3)
-        rep["TEMPLATE_RA4"] = str(ra4)
-        rep["TEMPLATE_DEC4"] = str(dec4)
-
-        rep["TEMPLATE_FILENAME"] = filename
-        rep["TEMPLATE_CHECKSUM"] = checksum
-        rep["TEMPLATE_STATUS"] = str(status)
-
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,ppid,rfid,infobitssci,infobitsref,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4,filename,checksum,status)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("add_diffimage",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -2147,15 +2331,15 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from updateDiffImage(" +\
-            "cast(TEMPLATE_PID as integer)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)," +\
-            "cast(TEMPLATE_VERSION AS smallint));"
+            "cast($1 as integer)," +\
+            "cast($2 as character varying(255))," +\
+            "cast($3 as character varying(32))," +\
+            "cast($4 as smallint)," +\
+            "cast($5 AS smallint));"
 
 
         # Query database.
@@ -2166,16 +2350,7 @@ class RAPIDDB:
         print('----> status = {}'.format(status))
         print('----> version = {}'.format(version))
 
-        rep = {"TEMPLATE_PID": str(pid),
-               "TEMPLATE_FILENAME": filename,
-               "TEMPLATE_CHECKSUM": checksum}
-
-        rep["TEMPLATE_STATUS"] = str(status)
-        rep["TEMPLATE_VERSION"] = str(version)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (pid,filename,checksum,status,version)
 
         print('query = {}'.format(query))
 
@@ -2183,7 +2358,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("update_diffimage",query,params)
 
             try:
                 for record in self.cur:
@@ -2211,12 +2386,12 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from registerRefImImage(" +\
-            "cast(TEMPLATE_RFID as integer)," +\
-            "cast(TEMPLATE_RID AS integer));"
+            "cast($1 as integer)," +\
+            "cast($2 AS integer));"
 
 
         # Query database.
@@ -2224,14 +2399,7 @@ class RAPIDDB:
         print('----> rfid = {}'.format(rfid))
         print('----> rid = {}'.format(rid))
 
-        rep = {"TEMPLATE_RFID": str(rfid)}
-
-        rep["TEMPLATE_RID"] = str(rid)
-
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rfid,rid)
 
         print('query = {}'.format(query))
 
@@ -2239,7 +2407,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("register_refimimage",query,params)
 
             try:
                 for record in self.cur:
@@ -2323,20 +2491,20 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from registerRefImCatalog(" +\
-            "cast(TEMPLATE_RFID as integer)," +\
-            "cast(TEMPLATE_PPID as smallint)," +\
-            "cast(TEMPLATE_CATTYPE as smallint)," +\
-            "cast(TEMPLATE_FIELD as integer)," +\
-            "cast(TEMPLATE_HP6 as integer)," +\
-            "cast(TEMPLATE_HP9 as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast('TEMPLATE_FILENAME' as character varying(255))," +\
-            "cast('TEMPLATE_CHECKSUM' as character varying(32))," +\
-            "cast(TEMPLATE_STATUS as smallint)) as " +\
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as smallint)," +\
+            "cast($4 as integer)," +\
+            "cast($5 as integer)," +\
+            "cast($6 as integer)," +\
+            "cast($7 as smallint)," +\
+            "cast($8 as character varying(255))," +\
+            "cast($9 as character varying(32))," +\
+            "cast($10 as smallint)) as " +\
             "(rfcatid integer," +\
             " svid smallint);"
 
@@ -2349,26 +2517,11 @@ class RAPIDDB:
         print('----> field = {}'.format(field))
         print('----> filename = {}'.format(filename))
 
-        rep = {"TEMPLATE_RFID": str(rfid),
-               "TEMPLATE_PPID": str(ppid),
-               "TEMPLATE_CATTYPE": str(cattype),
-               "TEMPLATE_FIELD": str(field),
-               "TEMPLATE_HP6": str(hp6),
-               "TEMPLATE_HP9": str(hp9)}
-
-        rep["TEMPLATE_FID"] = str(fid)
-        rep["TEMPLATE_FILENAME"] = filename
-        rep["TEMPLATE_CHECKSUM"] = checksum
-        rep["TEMPLATE_STATUS"] = str(status)
-
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rfid,ppid,cattype,field,hp6,hp9,fid,filename,checksum,status)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("register_refimcatalog",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -2408,22 +2561,22 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from registerDiffImMeta(" +\
-            "cast(TEMPLATE_PID as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast(TEMPLATE_SCA as smallint)," +\
-            "cast(TEMPLATE_FIELD AS integer)," +\
-            "cast(TEMPLATE_HP6 AS integer)," +\
-            "cast(TEMPLATE_HP9 AS integer)," +\
-            "cast(TEMPLATE_NSEXCATSOURCES AS integer)," +\
-            "cast(TEMPLATE_REFSCALEFAC AS real)," +\
-            "cast(TEMPLATE_DXRMSFIN AS real)," +\
-            "cast(TEMPLATE_DYRMSFIN AS real)," +\
-            "cast(TEMPLATE_DXMEDIANFIN AS real)," +\
-            "cast(TEMPLATE_DYMEDIANFIN AS real));"
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 as smallint)," +\
+            "cast($4 AS integer)," +\
+            "cast($5 AS integer)," +\
+            "cast($6 AS integer)," +\
+            "cast($7 AS integer)," +\
+            "cast($8 AS real)," +\
+            "cast($9 AS real)," +\
+            "cast($10 AS real)," +\
+            "cast($11 AS real)," +\
+            "cast($12 AS real));"
 
 
         # Query database.
@@ -2441,23 +2594,7 @@ class RAPIDDB:
         print('----> dxmedianfin = {}'.format(dxmedianfin))
         print('----> dymedianfin = {}'.format(dymedianfin))
 
-        rep = {"TEMPLATE_PID": str(pid)}
-
-        rep["TEMPLATE_FID"] = str(fid)
-        rep["TEMPLATE_SCA"] = str(sca)
-        rep["TEMPLATE_FIELD"] = str(field)
-        rep["TEMPLATE_HP6"] = str(hp6)
-        rep["TEMPLATE_HP9"] = str(hp9)
-        rep["TEMPLATE_NSEXCATSOURCES"] = str(nsexcatsources)
-        rep["TEMPLATE_REFSCALEFAC"] = str(scalefacref)
-        rep["TEMPLATE_DXRMSFIN"] = str(dxrmsfin)
-        rep["TEMPLATE_DYRMSFIN"] = str(dyrmsfin)
-        rep["TEMPLATE_DXMEDIANFIN"] = str(dxmedianfin)
-        rep["TEMPLATE_DYMEDIANFIN"] = str(dymedianfin)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (pid,fid,sca,field,hp6,hp9,nsexcatsources,scalefacref,dxrmsfin,dyrmsfin,dxmedianfin,dymedianfin)
 
         print('query = {}'.format(query))
 
@@ -2465,7 +2602,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("register_diffimmeta",query,params)
 
             try:
                 for record in self.cur:
@@ -2563,34 +2700,34 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from registerRefImMeta(" +\
-            "cast(TEMPLATE_RFID as integer)," +\
-            "cast(TEMPLATE_FID as smallint)," +\
-            "cast(TEMPLATE_FIELD AS integer)," +\
-            "cast(TEMPLATE_HP6 AS integer)," +\
-            "cast(TEMPLATE_HP9 AS integer)," +\
-            "cast(TEMPLATE_NFRAMES AS smallint)," +\
-            "cast(TEMPLATE_MJDOBSMIN AS double precision)," +\
-            "cast(TEMPLATE_MJDOBSMAX AS double precision)," +\
-            "cast(TEMPLATE_NPIXSAT AS integer)," +\
-            "cast(TEMPLATE_NPIXNAN AS integer)," +\
-            "cast(TEMPLATE_CLMEAN AS real)," +\
-            "cast(TEMPLATE_CLSTDDEV AS real)," +\
-            "cast(TEMPLATE_CLNOUTLIERS AS integer)," +\
-            "cast(TEMPLATE_GMEDIAN AS real)," +\
-            "cast(TEMPLATE_DATASCALE AS real)," +\
-            "cast(TEMPLATE_GMIN AS real)," +\
-            "cast(TEMPLATE_GMAX AS real)," +\
-            "cast(TEMPLATE_COV5PERCENT AS real)," +\
-            "cast(TEMPLATE_MEDNCOV AS real)," +\
-            "cast(TEMPLATE_MEDPIXUNC AS real)," +\
-            "cast(TEMPLATE_FWHMMEDPIX AS real)," +\
-            "cast(TEMPLATE_FWHMMINPIX AS real)," +\
-            "cast(TEMPLATE_FWHMMAXPIX AS real)," +\
-            "cast(TEMPLATE_NSEXCATSOURCES AS integer));"
+            "cast($1 as integer)," +\
+            "cast($2 as smallint)," +\
+            "cast($3 AS integer)," +\
+            "cast($4 AS integer)," +\
+            "cast($5 AS integer)," +\
+            "cast($6 AS smallint)," +\
+            "cast($7 AS double precision)," +\
+            "cast($8 AS double precision)," +\
+            "cast($9 AS integer)," +\
+            "cast($10 AS integer)," +\
+            "cast($11 AS real)," +\
+            "cast($12 AS real)," +\
+            "cast($13 AS integer)," +\
+            "cast($14 AS real)," +\
+            "cast($15 AS real)," +\
+            "cast($16 AS real)," +\
+            "cast($17 AS real)," +\
+            "cast($18 AS real)," +\
+            "cast($19 AS real)," +\
+            "cast($20 AS real)," +\
+            "cast($21 AS real)," +\
+            "cast($22 AS real)," +\
+            "cast($23 AS real)," +\
+            "cast($24 AS integer));"
 
 
         # Query database.
@@ -2620,35 +2757,7 @@ class RAPIDDB:
         print('----> fwhmmaxpix = {}'.format(fwhmmaxpix))
         print('----> nsexcatsources = {}'.format(nsexcatsources))
 
-        rep = {"TEMPLATE_RFID": str(rfid)}
-
-        rep["TEMPLATE_FID"] = str(fid)
-        rep["TEMPLATE_FIELD"] = str(field)
-        rep["TEMPLATE_HP6"] = str(hp6)
-        rep["TEMPLATE_HP9"] = str(hp9)
-        rep["TEMPLATE_NFRAMES"] = str(nframes)
-        rep["TEMPLATE_MJDOBSMIN"] = str(mjdobsmin)
-        rep["TEMPLATE_MJDOBSMAX"] = str(mjdobsmax)
-        rep["TEMPLATE_NPIXSAT"] = str(npixsat)
-        rep["TEMPLATE_NPIXNAN"] = str(npixnan)
-        rep["TEMPLATE_CLMEAN"] = str(clmean)
-        rep["TEMPLATE_CLSTDDEV"] = str(clstddev)
-        rep["TEMPLATE_CLNOUTLIERS"] = str(clnoutliers)
-        rep["TEMPLATE_GMEDIAN"] = str(gmedian)
-        rep["TEMPLATE_DATASCALE"] = str(datascale)
-        rep["TEMPLATE_GMIN"] = str(gmin)
-        rep["TEMPLATE_GMAX"] = str(gmax)
-        rep["TEMPLATE_COV5PERCENT"] = str(cov5percent)
-        rep["TEMPLATE_MEDNCOV"] = str(medncov)
-        rep["TEMPLATE_MEDPIXUNC"] = str(medpixunc)
-        rep["TEMPLATE_FWHMMEDPIX"] = str(fwhmmedpix)
-        rep["TEMPLATE_FWHMMINPIX"] = str(fwhmminpix)
-        rep["TEMPLATE_FWHMMAXPIX"] = str(fwhmmaxpix)
-        rep["TEMPLATE_NSEXCATSOURCES"] = str(nsexcatsources)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rfid,fid,field,hp6,hp9,nframes,mjdobsmin,mjdobsmax,npixsat,npixnan,clmean,clstddev,clnoutliers,gmedian,datascale,gmin,gmax,cov5percent,medncov,medpixunc,fwhmmedpix,fwhmminpix,fwhmmaxpix,nsexcatsources)
 
         print('query = {}'.format(query))
 
@@ -2656,7 +2765,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("register_refimmeta",query,params)
 
             try:
                 for record in self.cur:
@@ -2731,30 +2840,24 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
-            "select filter from Filters where fid=TEMPLATE_FID;"
+        query =\
+            "select filter from Filters where fid=$1;"
 
 
         # Query database.
 
         print('----> fid = {}'.format(fid))
 
-        fid_str = str(fid)
-
-        rep = {"TEMPLATE_FID": fid_str}
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (fid,)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_exposure_filter",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -2783,36 +2886,30 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select pid,rfid,filename,infobitssci,version " +\
             "from DiffImages " +\
             "where vbest > 0 " +\
             "and status > 0 " +\
-            "and rid = TEMPLATE_RID " +\
-            "and ppid = TEMPLATE_PPID; "
+            "and rid = $1 " +\
+            "and ppid = $2; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> rid = {}'.format(rid))
         print('----> ppid = {}'.format(ppid))
 
-        rep = {"TEMPLATE_RID": str(rid)}
-
-        rep["TEMPLATE_PPID"] = str(ppid)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,ppid)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_best_difference_image",query,params)
         record = self.cur.fetchone()
 
         record_dict = {}
@@ -2844,30 +2941,23 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select rfid,filename,infobits,version " +\
             "from RefImages " +\
-            "where rfid = TEMPLATE_RFID; "
+            "where rfid = cast($1 as integer); "
 
-
-        # Formulate query by substituting parameters into query template.
+        params = (rfid,)
 
         print('----> rfid = {}'.format(rfid))
 
-        rep = {"TEMPLATE_RFID": str(rfid)}
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
-
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_reference_image",query,params)
         record = self.cur.fetchone()
 
         record_dict = {}
@@ -3186,31 +3276,27 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select crval1,crval2,crpix1,crpix2,cd11,cd12,cd21,cd22, " +\
             "expid,sca,fid,field,hp6,hp9,mjdobs " +\
             "from L2Files " +\
-            "where rid = TEMPLATE_RID; "
+            "where rid = $1; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print('----> rid = {}'.format(rid))
 
-        rep = {"TEMPLATE_RID": str(rid)}
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (rid,)
 
         print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared("get_l2file_info_for_sources",query,params)
         record = self.cur.fetchone()
 
         record_dict = {}
@@ -3329,6 +3415,159 @@ class RAPIDDB:
         return None
 
 
+########################################################################################################
+
+    def copy_records_into_database(self,records,table_name,columns,truncate_first=False,commit=True,debug=0):
+
+        '''
+        Copy records (tuples of column values, with None for NULL) into specified database table
+        through an in-memory buffer, without writing an intermediate file.  Optionally truncate
+        the table first, in the same transaction.  With commit=False, the transaction is left open,
+        so that it is committed (or rolled back on error) together with the caller's next statement.
+        Returns number of records copied.
+        '''
+
+        self.exit_code = 0
+
+        separator = ","
+        null_string = "\\N" # Default for PostgreSQL COPY
+
+        if debug == 1:
+            print('table_name = {}'.format(table_name))
+            print('nrecords = {}'.format(len(records)))
+
+
+        # Write records into in-memory buffer.
+
+        buffer = io.StringIO()
+
+        for record in records:
+            buffer.write(separator.join([null_string if value is None else str(value) for value in record]) + "\n")
+
+        buffer.seek(0)
+
+
+        # Bulk-load specified database table.
+
+        try:
+
+            if truncate_first:
+                self.cur.execute(f"TRUNCATE {table_name};")
+
+            self.cur.copy_from(buffer, table_name, sep=separator, null=null_string, columns=columns)
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f'*** Error bulk-loading records into specified database table ({table_name}): {error}; skipping...')
+            self.exit_code = 67
+            self.conn.rollback()           # Rollback database transaction
+            return
+
+        if self.exit_code == 0 and commit:
+            self.conn.commit()           # Commit database transaction
+
+        return len(records)
+
+
+########################################################################################################
+
+    def copy_arrays_into_database(self,arrays,table_name,columns,column_types,debug=0):
+
+        '''
+        Copy columns of values into specified database table with binary COPY, through an in-memory
+        buffer, without formatting values as text or writing an intermediate file.  Each element of arrays
+        is a NumPy array (one value per row) or a scalar (same value for all rows).  Column types are
+        PostgreSQL type names (keys of copy_binary_dtypes) matching the table columns, since binary COPY
+        does not convert types.  NULL values are not supported.  Returns number of rows copied.
+        '''
+
+        self.exit_code = 0
+
+        nrows = max([np.size(array) for array in arrays if np.ndim(array) > 0],default=1)
+
+        if debug == 1:
+            print('table_name = {}'.format(table_name))
+            print('nrows = {}'.format(nrows))
+
+
+        # Each row is a 16-bit field count followed by a 32-bit byte length and the big-endian value of each field.
+
+        fields = [("nfields",">i2")]
+        for i,column_type in enumerate(column_types):
+            dtype = np.dtype(copy_binary_dtypes[column_type])
+            fields.append((f"len{i}",">i4"))
+            fields.append((f"val{i}",dtype))
+
+        rows = np.empty(nrows,dtype=np.dtype(fields))
+
+        rows["nfields"] = len(columns)
+        for i,array in enumerate(arrays):
+            rows[f"len{i}"] = rows.dtype[f"val{i}"].itemsize
+            rows[f"val{i}"] = array
+
+        buffer = io.BytesIO()
+        buffer.write(b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii",0,0))
+        buffer.write(rows.tobytes())
+        buffer.write(struct.pack(">h",-1))
+        buffer.seek(0)
+
+        del rows
+
+
+        # Bulk-load specified database table.
+
+        query = f"COPY {table_name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT binary);"
+
+        try:
+
+            self.cur.copy_expert(query,buffer)
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f'*** Error bulk-loading rows into specified database table ({table_name}): {error}; skipping...')
+            self.exit_code = 67
+            self.conn.rollback()           # Rollback database transaction
+            return
+
+        if self.exit_code == 0:
+            self.conn.commit()           # Commit database transaction
+
+        return nrows
+
+
+########################################################################################################
+
+    def reserve_astroobject_aids(self,n,debug=0):
+
+        '''
+        Reserve n aids from the astroobjects_aid_seq sequence (shared by all AstroObjects_<field> tables),
+        for astroobject records that are bulk-loaded with explicit aids.
+        '''
+
+        self.exit_code = 0
+
+        if n == 0:
+            return []
+
+        query = f"SELECT nextval('astroobjects_aid_seq') FROM generate_series(1,{n});"
+
+        if debug == 1:
+            print('query = {}'.format(query))
+
+        try:
+            self.cur.execute(query)
+            aids = [record[0] for record in self.cur.fetchall()]
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f'*** Error reserving aids from astroobjects_aid_seq (error={error}); skipping...')
+            self.exit_code = 67
+            self.conn.rollback()           # Rollback database transaction
+            return
+
+        if self.exit_code == 0:
+            self.conn.commit()           # Commit database transaction
+
+        return aids
+
+
 ########################################################################################################
 
     def add_astro_object(self,ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9):
@@ -3340,23 +3579,23 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select aid from addAstroObjects(" +\
-            "cast('TEMPLATE_RA0' as double precision)," +\
-            "cast('TEMPLATE_DEC0' as double precision)," +\
-            "cast('TEMPLATE_FLUX0' as real)," +\
-            "cast('TEMPLATE_MEANRA' as double precision)," +\
-            "cast('TEMPLATE_STDEVRA' as real)," +\
-            "cast('TEMPLATE_MEANDEC' as double precision)," +\
-            "cast('TEMPLATE_STDEVDEC' as real)," +\
-            "cast('TEMPLATE_MEANFLUX' as real)," +\
-            "cast('TEMPLATE_STDEVFLUX' as real)," +\
-            "cast('TEMPLATE_NSOURCES' as smallint)," +\
-            "cast('TEMPLATE_FIELD' as integer)," +\
-            "cast('TEMPLATE_HP6' as integer)," +\
-            "cast('TEMPLATE_HP9' as integer)) as aid;"
+            "cast($1 as double precision)," +\
+            "cast($2 as double precision)," +\
+            "cast($3 as real)," +\
+            "cast($4 as double precision)," +\
+            "cast($5 as real)," +\
+            "cast($6 as double precision)," +\
+            "cast($7 as real)," +\
+            "cast($8 as real)," +\
+            "cast($9 as real)," +\
+            "cast($10 as smallint)," +\
+            "cast($11 as integer)," +\
+            "cast($12 as integer)," +\
+            "cast($13 as integer)) as aid;"
 
 
         # Query database.
@@ -3375,42 +3614,11 @@ class RAPIDDB:
         print(f"----> hp6 = {hp6}")
         print(f"----> hp9 = {hp9}")
 
-        ra0_str = str(ra0)
-        dec0_str = str(dec0)
-        flux0_str = str(flux0)
-        meanra_str = str(meanra)
-        stdevra_str = str(stdevra)
-        meandec_str = str(meandec)
-        stdevdec_str = str(stdevdec)
-        meanflux_str = str(meanflux)
-        stdevflux_str = str(stdevflux)
-        nsources_str = str(nsources)
-        field_str = str(field)
-        hp6_str = str(hp6)
-        hp9_str = str(hp9)
-
-        rep = {"TEMPLATE_FIELD": field_str,
-               "TEMPLATE_HP6": hp6_str,
-               "TEMPLATE_HP9": hp9_str}
-
-        rep["TEMPLATE_RA0"] = ra0_str
-        rep["TEMPLATE_DEC0"] = dec0_str
-        rep["TEMPLATE_FLUX0"] = flux0_str
-        rep["TEMPLATE_MEANRA"] = meanra_str
-        rep["TEMPLATE_STDEVRA"] = stdevra_str
-        rep["TEMPLATE_MEANDEC"] = meandec_str
-        rep["TEMPLATE_STDEVDEC"] = stdevdec_str
-        rep["TEMPLATE_MEANFLUX"] = meanflux_str
-        rep["TEMPLATE_STDEVFLUX"] = stdevflux_str
-        rep["TEMPLATE_NSOURCES"] = nsources_str
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9)
 
         print('query = {}'.format(query))
 
-        self.cur.execute(query)
+        self._execute_prepared("add_astro_object",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -3437,12 +3645,12 @@ class RAPIDDB:
         self.exit_code = 0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select * from registerMerge(" +\
-            "cast(TEMPLATE_AID as integer)," +\
-            "cast(TEMPLATE_SID AS integer));"
+            "cast($1 as integer)," +\
+            "cast($2 AS integer));"
 
 
         # Query database.
@@ -3450,14 +3658,7 @@ class RAPIDDB:
         print('----> aid = {}'.format(aid))
         print('----> sid = {}'.format(sid))
 
-        rep = {"TEMPLATE_AID": str(aid)}
-
-        rep["TEMPLATE_SID"] = str(sid)
-
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (aid,sid)
 
         print('query = {}'.format(query))
 
@@ -3465,7 +3666,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("register_merge",query,params)
 
             try:
                 for record in self.cur:
@@ -3508,28 +3709,18 @@ class RAPIDDB:
             f"             hp9" +\
             f"            )" +\
             f"            values" +\
-            f"            ({str(ra0)}," +\
-            f"             {str(dec0)}," +\
-            f"             {str(flux0)}," +\
-            f"             {str(meanra)}," +\
-            f"             {str(stdevra)}," +\
-            f"             {str(meandec)}," +\
-            f"             {str(stdevdec)}," +\
-            f"             {str(meanflux)}," +\
-            f"             {str(stdevflux)}," +\
-            f"             {str(nsources)}," +\
-            f"             {str(field)}," +\
-            f"             {str(hp6)}," +\
-            f"             {str(hp9)})" +\
+            f"            ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13)" +\
             f"             RETURNING aid;"
 
+        params = (ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9)
+
         if debug == 1:
             print('query = {}'.format(query))
 
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared(f"add_astro_object_to_{tablename}",query,params)
         record = self.cur.fetchone()
 
         if record is not None:
@@ -3557,8 +3748,10 @@ class RAPIDDB:
 
         query =\
             f"select aid,sid from {tablename} " +\
-            f"where aid = {aid} " +\
-            f"and sid = {sid};"
+            f"where aid = $1 " +\
+            f"and sid = $2;"
+
+        params = (aid,sid)
 
         if debug == 1:
             print('query = {}'.format(query))
@@ -3566,7 +3759,7 @@ class RAPIDDB:
 
         # Execute query.
 
-        self.cur.execute(query)
+        self._execute_prepared(f"get_merge_from_{tablename}",query,params)
 
         try:
             record = self.cur.fetchone()
@@ -3590,8 +3783,8 @@ class RAPIDDB:
                 f"             sid" +\
                 f"            )" +\
                 f"            values" +\
-                f"            ({str(aid)}," +\
-                f"             {str(sid)});"
+                f"            ($1," +\
+                f"             $2);"
 
             if debug == 1:
                 print('query = {}'.format(query))
@@ -3599,7 +3792,7 @@ class RAPIDDB:
 
             # Execute query.
 
-            self.cur.execute(query)
+            self._execute_prepared(f"add_merge_to_{tablename}",query,params)
 
             try:
                 record = self.cur.fetchone()
@@ -3620,7 +3813,7 @@ class RAPIDDB:
 
         # Define query.
 
-        query = f"DELETE FROM {tablename} WHERE sid = {sid};"
+        query = f"DELETE FROM {tablename} WHERE sid = $1;"
 
         if debug == 1:
             print('query = {}'.format(query))
@@ -3629,7 +3822,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared(f"delete_merge_from_{tablename}",query,(sid,))
 
             if debug == 1:
                 rows_affected = self.cur.rowcount
@@ -3668,14 +3861,16 @@ class RAPIDDB:
         # Define query.
 
         query = f"update {astroobjects_tablename} " +\
-            f"set meanra = {meanra}, " +\
-            f"stdevra = {stdra}, " +\
-            f"meandec = {meandec}, " +\
-            f"stdevdec = {stddec}, " +\
-            f"meanflux = {meanflux}, " +\
-            f"stdevflux = {stdflux}, " +\
-            f"nsources = {nsources} " +\
-            f" where aid = {aid};"
+            f"set meanra = $1, " +\
+            f"stdevra = $2, " +\
+            f"meandec = $3, " +\
+            f"stdevdec = $4, " +\
+            f"meanflux = $5, " +\
+            f"stdevflux = $6, " +\
+            f"nsources = $7 " +\
+            f" where aid = $8;"
+
+        params = (meanra,stdra,meandec,stddec,meanflux,stdflux,nsources,aid)
 
 
         # Query database.
@@ -3687,7 +3882,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared(f"update_astroobject_statistics_{astroobjects_tablename}",query,params)
 
             try:
                 records = []
@@ -3715,7 +3910,7 @@ class RAPIDDB:
 
         # Define query.
 
-        query = f"DELETE FROM {child_tablename} WHERE sid = {sid};"
+        query = f"DELETE FROM {child_tablename} WHERE sid = $1;"
 
         if debug == 1:
             print('query = {}'.format(query))
@@ -3724,7 +3919,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared(f"delete_source_{child_tablename}",query,(sid,))
 
             if debug == 1:
                 rows_affected = self.cur.rowcount
@@ -3763,28 +3958,28 @@ class RAPIDDB:
             radius_of_initial_cone_search = 1.0
 
 
-        # Define query template.
+        # Define parameterized query.
 
-        query_template =\
+        query =\
             "select pid,expid,sca,a.fid,a.field,jd,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4, " +\
             "a.filename,a.checksum,infobitssci,infobitsref,a.rfid,b.filename,b.checksum,b.ppid, " +\
-            "q3c_dist(ra0, dec0, cast(TEMPLATE_RA0 as double precision), cast(TEMPLATE_DEC0 as double precision)) as dist " +\
+            "q3c_dist(ra0, dec0, cast($1 as double precision), cast($2 as double precision)) as dist " +\
             "from DiffImages a, RefImages b " +\
             "where a.rfid = b.rfid " +\
-            "and a.ppid = TEMPLATE_PPID " +\
-            "and jd >= TEMPLATE_JDEARLIEST " +\
+            "and a.ppid = $3 " +\
+            "and jd >= $4 " +\
             "and a.status > 0 " +\
             "and b.status > 0 " +\
             "and a.vbest > 0 " +\
             "and b.vbest > 0 " +\
             "and q3c_radial_query(ra0, dec0, " +\
-            "cast(TEMPLATE_RA0 as double precision), " +\
-            "cast(TEMPLATE_DEC0 as double precision), " +\
-            "cast(TEMPLATE_RADIUS as double precision)) " +\
+            "cast($1 as double precision), " +\
+            "cast($2 as double precision), " +\
+            "cast($5 as double precision)) " +\
             "order by jd; "
 
 
-        # Formulate query by substituting parameters into query template.
+        # Formulate query parameters.
 
         print(f'----> field_ra0 = {field_ra0}')
         print(f'----> field_dec0 = {field_dec0}')
@@ -3793,16 +3988,7 @@ class RAPIDDB:
         print(f'----> radius_of_initial_cone_search = {radius_of_initial_cone_search}')
         print(f'----> ppid = {ppid}')
 
-        rep = {"TEMPLATE_JDEARLIEST": str(jd_earliest)}
-
-        rep["TEMPLATE_RA0"] = str(field_ra0)
-        rep["TEMPLATE_DEC0"] = str(field_dec0)
-        rep["TEMPLATE_RADIUS"] = str(radius_of_initial_cone_search)
-        rep["TEMPLATE_PPID"] = str(ppid)
-
-        rep = dict((re.escape(k), v) for k, v in rep.items())
-        pattern = re.compile("|".join(rep.keys()))
-        query = pattern.sub(lambda m: rep[re.escape(m.group(0))], query_template)
+        params = (field_ra0,field_dec0,ppid,jd_earliest,radius_of_initial_cone_search)
 
         print('query = {}'.format(query))
 
@@ -3810,7 +3996,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared("get_possible_overlapping_diffimages",query,params)
 
             try:
                 records = []
@@ -3887,7 +4073,7 @@ class RAPIDDB:
 
         # Define query.
 
-        query = f"DELETE FROM {tablename} WHERE aid = {aid};"
+        query = f"DELETE FROM {tablename} WHERE aid = $1;"
 
         if debug == 1:
             print('query = {}'.format(query))
@@ -3896,7 +4082,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared(f"delete_astroobject_from_{tablename}",query,(aid,))
 
             if debug == 1:
                 rows_affected = self.cur.rowcount
@@ -3931,10 +4117,12 @@ class RAPIDDB:
         # Define query.
 
         query = f"update {astroobjects_tablename} " +\
-            f"set meanra = {meanra}, " +\
-            f"meandec = {meandec}, " +\
-            f"nsources = {nsources} " +\
-            f" where aid = {aid};"
+            f"set meanra = $1, " +\
+            f"meandec = $2, " +\
+            f"nsources = $3 " +\
+            f" where aid = $4;"
+
+        params = (meanra,meandec,nsources,aid)
 
 
         # Query database.
@@ -3946,7 +4134,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared(f"update_astroobject_mean_sky_position_{astroobjects_tablename}",query,params)
 
             try:
                 records = []
@@ -3975,7 +4163,7 @@ class RAPIDDB:
         # Define query.
 
         query = f"DELETE FROM {tablename} " +\
-            f"WHERE aid = {aid} " +\
+            f"WHERE aid = $1 " +\
             f"AND ctid NOT IN " +\
             f"(SELECT MIN(ctid) " +\
             f"FROM {tablename} " +\
@@ -3988,7 +4176,7 @@ class RAPIDDB:
         # Execute query.
 
         try:
-            self.cur.execute(query)
+            self._execute_prepared(f"delete_redundant_merges_for_{tablename}",query,(aid,))
 
             n_rows_deleted = self.cur.rowcount
 
@@ -4044,3 +4232,157 @@ class RAPIDDB:
             self.conn.commit()           # Commit database transaction
 
         return n_rows_deleted
+
+
+########################################################################################################
+
+    def add_astro_objects_to_field(self,tablename,astroobject_records,debug=0,commit=True):
+
+        '''
+        Insert many records into AstroObjects_<field> database table with a single multi-row insert.
+        Each input record is a tuple (ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,
+        stdevflux,nsources,field,hp6,hp9).  Returns list of aids, in the same order as the input records.
+        With commit=False, the transaction is left open for the caller to commit.
+        '''
+
+        self.exit_code = 0
+
+        if len(astroobject_records) == 0:
+            return []
+
+
+        # Define query.
+
+        query =\
+            f"insert into {tablename} " +\
+            f"(ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9) " +\
+            f"values %s RETURNING aid;"
+
+        if debug == 1:
+            print('query = {}'.format(query))
+            print(f"Number of {tablename} records to insert = {len(astroobject_records)}")
+
+
+        # Execute query.
+
+        try:
+            records = psycopg2.extras.execute_values(self.cur,
+                                                     query,
+                                                     astroobject_records,
+                                                     page_size=len(astroobject_records),
+                                                     fetch=True)
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f'*** Error inserting records into {tablename} (error={error}); skipping...')
+            self.exit_code = 67
+            self.conn.rollback()           # Rollback database transaction
+            return
+
+        aids = [record[0] for record in records]
+
+        if self.exit_code == 0 and commit:
+            self.conn.commit()           # Commit database transaction
+
+        return aids
+
+
+########################################################################################################
+
+    def add_merges_to_field(self,tablename,aid_sid_pairs,debug=0,commit=True):
+
+        '''
+        Insert many (aid,sid) records into Merges_<field> database table with a single statement,
+        skipping pairs that already exist (as in method add_merge_to_field).
+        Returns number of records inserted.
+        With commit=False, the transaction is left open for the caller to commit.
+        '''
+
+        self.exit_code = 0
+
+        if len(aid_sid_pairs) == 0:
+            return 0
+
+
+        # Define query.
+
+        query =\
+            f"insert into {tablename} (aid,sid) " +\
+            f"select distinct v.aid,v.sid from (values %s) as v(aid,sid) " +\
+            f"where not exists " +\
+            f"(select 1 from {tablename} as m where m.aid = v.aid and m.sid = v.sid);"
+
+        if debug == 1:
+            print('query = {}'.format(query))
+            print(f"Number of {tablename} records to insert = {len(aid_sid_pairs)}")
+
+
+        # Execute query.
+
+        try:
+            psycopg2.extras.execute_values(self.cur,
+                                           query,
+                                           aid_sid_pairs,
+                                           template="(%s::bigint,%s::bigint)",
+                                           page_size=len(aid_sid_pairs))
+
+            n_rows_inserted = self.cur.rowcount
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f'*** Error inserting records into {tablename} (error={error}); skipping...')
+            self.exit_code = 67
+            self.conn.rollback()           # Rollback database transaction
+            return
+
+        if self.exit_code == 0 and commit:
+            self.conn.commit()           # Commit database transaction
+
+        return n_rows_inserted
+
+
+########################################################################################################
+
+    def update_astroobjects_mean_sky_positions(self,astroobjects_tablename,position_records,debug=0,commit=True):
+
+        '''
+        Update meanra, meandec, and nsources in many AstroObjects database records with a single
+        UPDATE ... FROM VALUES statement.  Each input record is a tuple (aid,meanra,meandec,nsources).
+        With commit=False, the transaction is left open for the caller to commit.
+        '''
+
+        self.exit_code = 0
+
+        if len(position_records) == 0:
+            return
+
+
+        # Define query.
+
+        query = f"update {astroobjects_tablename} as t " +\
+            f"set meanra = v.meanra, " +\
+            f"meandec = v.meandec, " +\
+            f"nsources = v.nsources " +\
+            f"from (values %s) as v(aid,meanra,meandec,nsources) " +\
+            f"where t.aid = v.aid;"
+
+        if debug == 1:
+            print('query = {}'.format(query))
+            print(f"Number of {astroobjects_tablename} records to update = {len(position_records)}")
+
+
+        # Execute query.
+
+        try:
+            psycopg2.extras.execute_values(self.cur,
+                                           query,
+                                           position_records,
+                                           template="(%s::bigint,%s::double precision,%s::double precision,%s::smallint)",
+                                           page_size=len(position_records))
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f'*** Error updating mean sky positions in {astroobjects_tablename} records (error={error}); skipping...')
+            self.exit_code = 67
+            self.conn.rollback()           # Rollback database transaction
+            return
+
+        if self.exit_code == 0 and commit:
+            self.conn.commit()           # Commit database transaction
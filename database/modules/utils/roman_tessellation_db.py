@@ -1,6 +1,7 @@
 import os
 import re
 import sqlite3
+import numpy as np
 
 
 class RomanTessellationNSIDE512:
@@ -21,7 +22,12 @@ class RomanTessellationNSIDE512:
         69 = Query returned unexpected results (e.g., None)
     """
 
-    def __init__(self,debug=0):
+    def __init__(self,debug=0,check_same_thread=True):
+
+        '''
+        Set check_same_thread=False for a connection that is used by one thread at a time
+        but may be closed by another (e.g., by the main thread after its worker thread is done).
+        '''
 
         self.exit_code = 0
         self.conn = None
@@ -40,11 +46,13 @@ class RomanTessellationNSIDE512:
 
         print("dbname =",dbname)
 
+        self.dbname = dbname
+
 
         # Connect to database
 
         try:
-            self.conn = sqlite3.connect(database=dbname)
+            self.conn = sqlite3.connect(database=dbname,check_same_thread=check_same_thread)
         except:
             print("*** Error: Could not connect to database in sub roman_tessellation_db.__init__...")
             self.exit_code = 64
@@ -163,6 +171,61 @@ class RomanTessellationNSIDE512:
             return
 
 
+    def get_tessellation_index(self,index_file=None):
+
+        '''
+        Return in-memory RomanTessellationIndex of all sky tiles, for vectorized (RA, Dec) to rtid lookups.
+        The index is loaded from index_file (default: env. var. ROMANTESSELLATIONINDEXFILE, or else the
+        SQLite database filename with suffix _index.npz) if it exists and is not older than the SQLite
+        database; otherwise, it is built from the vskytiles table and saved to index_file for later runs.
+        '''
+
+        if index_file is None:
+            index_file = os.getenv('ROMANTESSELLATIONINDEXFILE')
+
+        if index_file is None:
+            index_file = re.sub(r"\.db$","",self.dbname) + "_index.npz"
+
+        if os.path.exists(index_file):
+            if os.path.exists(self.dbname) and os.path.getmtime(index_file) < os.path.getmtime(self.dbname):
+                print(f"Roman tessellation index {index_file} is older than {self.dbname}; rebuilding it...")
+            else:
+                print(f"Loading Roman tessellation index from {index_file}")
+                return RomanTessellationIndex.load(index_file)
+
+        print("Building Roman tessellation index from vskytiles table...")
+
+        try:
+            self.cur.execute("select rtid,ramin,ramax,decmin,decmax from vskytiles order by rtid;")
+
+            columns = [[],[],[],[],[]]
+            while True:
+                records = self.cur.fetchmany(100000)
+                if not records:
+                    break
+                for column,values in zip(columns,zip(*records)):
+                    column.extend(values)
+
+        except (Exception, sqlite3.DatabaseError) as error:
+            print("*** Error executing sub roman_tessellation_db.get_tessellation_index; returning None...")
+            self.exit_code = 67
+            return
+
+        tessellation_index = RomanTessellationIndex(np.array(columns[0],dtype=np.int64),
+                                                    np.array(columns[1],dtype=np.float64),
+                                                    np.array(columns[2],dtype=np.float64),
+                                                    np.array(columns[3],dtype=np.float64),
+                                                    np.array(columns[4],dtype=np.float64))
+
+        try:
+            tessellation_index.save(index_file)
+            print(f"Saved Roman tessellation index to {index_file}")
+        except OSError as error:
+            print(f"*** Warning: Could not save Roman tessellation index to {index_file} ({error}); continuing...")
+
+        return tessellation_index
+
+
     def get_center_sky_position(self,rtid):
 
         '''
@@ -690,3 +753,148 @@ class RomanTessellationNSIDE512:
                     print("*** Error fetching south pole tile in sub roman_tessellation_db.get_overlapping_sky_tiles; skipping...")
 
         return records
+
+
+class RomanTessellationIndex:
+
+    """
+    In-memory index of the Roman sky tessellation for NSIDE=512, for vectorized lookups
+    of the sky tile (rtid) containing each of many sky positions, without database queries.
+
+    Sky tiles are grouped into declination bins (rows of tiles with the same decmin and decmax,
+    which have consecutive rtids).  The declination bins are stored in ascending order of decmin,
+    and the tiles of each bin are stored contiguously in ascending order of ramin, so a lookup is
+    a searchsorted over declination bins followed by a searchsorted over the ramin values of the
+    tiles in the bin.  As with RomanTessellationNSIDE512.get_rtid, a tile contains (RA, Dec) if
+    decmin <= Dec < decmax and ramin <= RA < ramax, where RA - 360 is tried next for the tile
+    straddling RA = 0 (ramin < 0).  A declination bin with a single tile (a polar cap) contains
+    all RAs, since the south-pole tile is stored with ramin = ramax = 0.
+    """
+
+    # Tolerance for grouping tiles into declination bins (as in get_sky_tiles_in_dec_bin).
+
+    dec_tol = 1.0e-4
+
+    def __init__(self,rtid,ramin,ramax,decmin,decmax):
+
+        order = np.argsort(rtid,kind="stable")
+        rtid = rtid[order]
+        ramin = ramin[order]
+        ramax = ramax[order]
+        decmin = decmin[order]
+        decmax = decmax[order]
+
+
+        # Consecutive rtids with the same decmin and decmax are in the same declination bin.
+
+        new_bin = np.ones(len(rtid),dtype=bool)
+        new_bin[1:] = (np.abs(np.diff(decmin)) > self.dec_tol) | (np.abs(np.diff(decmax)) > self.dec_tol)
+        bin_start = np.flatnonzero(new_bin)
+        bin_end = np.append(bin_start[1:],len(rtid))
+
+
+        # Sort declination bins by ascending decmin, and tiles within each bin by ascending ramin.
+
+        bin_order = np.argsort(decmin[bin_start],kind="stable")
+        bin_start = bin_start[bin_order]
+        bin_end = bin_end[bin_order]
+
+        bin_index = np.repeat(np.arange(len(bin_start)),bin_end - bin_start)
+        tile_order = np.concatenate([np.arange(start,end) for start,end in zip(bin_start,bin_end)])
+        tile_order = tile_order[np.lexsort((ramin[tile_order],bin_index))]
+
+        self.rtid = rtid[tile_order]
+        self.ramin = ramin[tile_order]
+        self.ramax = ramax[tile_order]
+
+        self.bin_decmin = decmin[bin_start]
+        self.bin_decmax = decmax[bin_start]
+        self.bin_ntiles = bin_end - bin_start
+        self.bin_offset = np.concatenate(([0],np.cumsum(self.bin_ntiles)[:-1]))
+
+
+    def save(self,index_file):
+
+        '''
+        Save index arrays to an uncompressed .npz file.
+        '''
+
+        with open(index_file,"wb") as f:
+            np.savez(f,
+                     rtid=self.rtid,
+                     ramin=self.ramin,
+                     ramax=self.ramax,
+                     bin_decmin=self.bin_decmin,
+                     bin_decmax=self.bin_decmax,
+                     bin_ntiles=self.bin_ntiles,
+                     bin_offset=self.bin_offset)
+
+
+    @classmethod
+    def load(cls,index_file):
+
+        '''
+        Load index arrays saved by the save method.
+        '''
+
+        index = cls.__new__(cls)
+
+        with np.load(index_file) as npz:
+            for name in ["rtid","ramin","ramax","bin_decmin","bin_decmax","bin_ntiles","bin_offset"]:
+                setattr(index,name,npz[name])
+
+        return index
+
+
+    def get_rtids(self,ra_array,dec_array):
+
+        '''
+        Return array of rtids of the sky tiles containing the given sky positions (in degrees),
+        with -1 for any position not contained in a sky tile.
+        '''
+
+        ra_array = np.atleast_1d(np.asarray(ra_array,dtype=np.float64))
+        dec_array = np.atleast_1d(np.asarray(dec_array,dtype=np.float64))
+
+        rtids = np.full(len(ra_array),-1,dtype=np.int64)
+
+
+        # First level: declination bin with decmin <= dec < decmax.
+
+        bins = np.searchsorted(self.bin_decmin,dec_array,side="right") - 1
+        valid = bins >= 0
+        valid[valid] = dec_array[valid] < self.bin_decmax[bins[valid]]
+
+
+        # Second level: tile with ramin <= ra < ramax, within each declination bin occupied by the positions.
+
+        for b in np.unique(bins[valid]):
+
+            indices = np.flatnonzero(valid & (bins == b))
+
+            offset = self.bin_offset[b]
+            ntiles = self.bin_ntiles[b]
+
+            if ntiles == 1:
+                rtids[indices] = self.rtid[offset]
+                continue
+
+            ramin = self.ramin[offset:offset + ntiles]
+            ramax = self.ramax[offset:offset + ntiles]
+
+            for ra_shift in (0.0,360.0):
+
+                ra = ra_array[indices] - ra_shift
+
+                j = np.searchsorted(ramin,ra,side="right") - 1
+                found = j >= 0
+                found[found] = ra[found] < ramax[j[found]]
+
+                rtids[indices[found]] = self.rtid[offset + j[found]]
+
+                indices = indices[~found]
+
+                if len(indices) == 0:
+                    break
+
+        return rtids
@@ -85,7 +85,8 @@ if skip_already_ingested_check is None:
 print(f"do_already_ingested_check = {do_already_ingested_check}")
 
 
-# Open database connections for parallel access.
+# Number of parallel processes.  Each process lazily acquires its own database
+# connection from a per-process connection pool (see RAPIDDB pooled option).
 
 num_cores = os.getenv('NUM_CORES')
 
@@ -96,17 +97,6 @@ else:
 
 print("num_cores =",num_cores)
 
-dbh_list = []
-
-for i in range(num_cores):
-
-    dbh = db.RAPIDDB()
-
-    if dbh.exit_code >= 64:
-        exit(dbh.exit_code)
-
-    dbh_list.append(dbh)
-
 
 # Create S3-resource object.
 
@@ -148,66 +138,77 @@ def run_single_core_job(fits_files,index_thread):
         print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
         exit(64)
 
-    dbh = dbh_list[index_thread]
+    dbh = db.RAPIDDB(pooled=True)
 
-    fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}\n")
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
 
+    try:
+        fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}\n")
 
-    # Loop over input FITS files.
 
-    for index_fits_file in range(n_fits_files):
+        # Loop over input FITS files.
 
-        index_core = index_fits_file % num_cores
-        if index_thread != index_core:
-            continue
+        for index_fits_file in range(n_fits_files):
+
+            index_core = index_fits_file % num_cores
+            if index_thread != index_core:
+                continue
+
+            input_fits_file = fits_files[index_fits_file]
+
+            fh.write(f"i,input_fits_file = {i},{input_fits_file}\n")
 
-        input_fits_file = fits_files[index_fits_file]
 
-        fh.write(f"i,input_fits_file = {i},{input_fits_file}\n")
+            # Download file from input S3 bucket to local machine.
 
+            s3_object_input_fits_file = "s3://" + bucket_name_input + "/" + input_fits_file
+            download_cmd = ['aws','s3','cp',s3_object_input_fits_file,input_fits_file]
+            exitcode_from_download_cmd = util.execute_command(download_cmd)
 
-        # Download file from input S3 bucket to local machine.
+            fh.write(f"exitcode_from_download_cmd = {exitcode_from_download_cmd}\n")
 
-        s3_object_input_fits_file = "s3://" + bucket_name_input + "/" + input_fits_file
-        download_cmd = ['aws','s3','cp',s3_object_input_fits_file,input_fits_file]
-        exitcode_from_download_cmd = util.execute_command(download_cmd)
 
-        fh.write(f"exitcode_from_download_cmd = {exitcode_from_download_cmd}\n")
+            # Register L2 FITS file in database.
 
+            header = get_fits_header(input_fits_file)
 
-        # Register L2 FITS file in database.
+            wcs = WCS(header)
 
-        header = get_fits_header(input_fits_file)
+            expid,fid = register_exposure(dbh,header,wcs)
 
-        wcs = WCS(header)
+            rid,version,filename,checksum = register_l2file(dbh,header,wcs,input_fits_file,expid,fid)
 
-        expid,fid = register_exposure(dbh,header,wcs)
+            finalize_l2file(dbh,rid,version,filename,checksum)     # Keep same filename and version for now.
 
-        rid,version,filename,checksum = register_l2file(dbh,header,wcs,input_fits_file,expid,fid)
+            compute_and_register_l2filemeta(dbh,header,wcs,rid,fid)
 
-        finalize_l2file(dbh,rid,version,filename,checksum)     # Keep same filename and version for now.
 
-        compute_and_register_l2filemeta(dbh,header,wcs,rid,fid)
+            # Clean up work directory.
 
+            rm_cmd = ['rm','-f',subdir_work + "/" + input_fits_file]
+            exitcode_from_rm = util.execute_command(rm_cmd)
 
-        # Clean up work directory.
 
-        rm_cmd = ['rm','-f',subdir_work + "/" + input_fits_file]
-        exitcode_from_rm = util.execute_command(rm_cmd)
+            # Code-timing benchmark.
 
+            thread_end_time_benchmark = time.time()
+            diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+            fh.write(f"Elapsed time in seconds to register L2 FITS file in database = {diff_time_benchmark}\n")
+            thread_start_time_benchmark = thread_end_time_benchmark
 
-        # Code-timing benchmark.
 
-        thread_end_time_benchmark = time.time()
-        diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
-        fh.write(f"Elapsed time in seconds to register L2 FITS file in database = {diff_time_benchmark}\n")
-        thread_start_time_benchmark = thread_end_time_benchmark
+            # End of loop over fits_files.
 
+            fh.write(f"Loop end over fits_files: index_fits_file,input_fits_file = {index_fits_file},{input_fits_file}\n")
 
-        # End of loop over fits_files.
+    finally:
 
-        fh.write(f"Loop end over fits_files: index_fits_file,input_fits_file = {index_fits_file},{input_fits_file}\n")
+        # Return database connection to pool.
 
+        dbh.close()
 
     fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
 
@@ -4,12 +4,17 @@ Compute reprojected coadd image, coadd uncertainty map, and depth-of-coverage ma
 Uses reproject_and_coadd with either exact resampling (area-weighted interpolation)
 or gaussian-kernel adaptive resampling.
 
+In streaming mode (-s or --streaming), each input is instead loaded once and reprojected
+once, with its science and variance planes stacked so that they share the same pixel mapping,
+and accumulated into running output buffers, so that memory is O(output) rather than O(N inputs).
+
 Utilize parallel processing as the default for all available cores.
 
 Usage
 -----
   python coadd.py img1.fits img2.fits img3.fits -o result
   python coadd.py img*.fits -u unc*.fits --combine mean -j 4 -o result
+  python coadd.py img*.fits -u unc*.fits --streaming -o result
 """
 
 import os
@@ -17,6 +22,7 @@ import argparse
 import numpy as np
 from astropy.io import fits
 from astropy.wcs import WCS
+from astropy.wcs.utils import pixel_to_pixel
 from reproject import reproject_adaptive, reproject_exact
 from reproject.mosaicking import reproject_and_coadd, find_optimal_celestial_wcs
 
@@ -155,7 +161,7 @@ def compute_coadd(
     """
 
     # Load science images
-    science = [(load_hdu(p)[0], load_hdu(p)[1]) for p in input_paths]
+    science = [load_hdu(p)[:2] for p in input_paths]
 
     # Derive optimal output projection when not supplied
     if output_wcs is None:
@@ -186,7 +192,10 @@ def compute_coadd(
         print(f"Propagating uncertainty from {len(uncertainty_paths)} file(s) ...")
 
         # Coadd variance (= sigma^2) images using *sum* so we can divide by N^2
-        variance_inputs = [(load_hdu(p)[0] ** 2, load_hdu(p)[1]) for p in uncertainty_paths]
+        variance_inputs = []
+        for p in uncertainty_paths:
+            data, wcs, _ = load_hdu(p)
+            variance_inputs.append((data ** 2, wcs))
 
         variance_sum, _ = reproject_and_coadd(
             variance_inputs,
@@ -216,6 +225,195 @@ def compute_coadd(
     return coadd, uncertainty, coverage, output_wcs
 
 
+# ---------------------------------------------------------------------------
+# Streaming coadd routine
+# ---------------------------------------------------------------------------
+
+def _output_bounds(wcs_in, shape_in, wcs_out, shape_out, n_samples=11):
+
+    '''
+    Return the (ymin, ymax, xmin, xmax) bounding box in the output image of the
+    input image, from pixel_to_pixel of points sampled along the input-image edges
+    (as in reproject_and_coadd), or None if there is no overlap.
+    '''
+
+    ny, nx = shape_in
+    xs = np.linspace(-0.5, nx - 0.5, n_samples)
+    ys = np.linspace(-0.5, ny - 0.5, n_samples)
+    x_edges = np.concatenate([xs, xs, np.full(n_samples, -0.5), np.full(n_samples, nx - 0.5)])
+    y_edges = np.concatenate([np.full(n_samples, -0.5), np.full(n_samples, ny - 0.5), ys, ys])
+
+    x_out, y_out = pixel_to_pixel(wcs_in, wcs_out, x_edges, y_edges)
+
+    if np.any(np.isnan(x_out)) or np.any(np.isnan(y_out)):
+        return 0, shape_out[0], 0, shape_out[1]
+
+    ymin = max(0, int(np.floor(y_out.min() + 0.5)))
+    ymax = min(shape_out[0], int(np.ceil(y_out.max() + 0.5)))
+    xmin = max(0, int(np.floor(x_out.min() + 0.5)))
+    xmax = min(shape_out[1], int(np.ceil(x_out.max() + 0.5)))
+
+    if ymax <= ymin or xmax <= xmin:
+        return None
+
+    return ymin, ymax, xmin, xmax
+
+
+def compute_coadd_streaming(
+    input_paths,
+    uncertainty_paths=None,
+    output_wcs=None,
+    shape_out=None,
+    combine="mean",
+    n_jobs=None,
+    reprojection_type=None,
+):
+    """
+    Reproject and coadd a list of science FITS images, one input at a time.
+
+    Same parameters and returns as compute_coadd, and the same results as
+    reproject_and_coadd for combine = 'mean', 'sum', 'first', 'last', 'min', 'max'.
+    Each science image (and its uncertainty image, squared to variance) is loaded once.
+    When the science and uncertainty images share a WCS and shape, they are stacked
+    and reprojected in a single call, so the pixel mapping is computed once for both
+    planes.  The reprojected planes are weighted by their footprints and accumulated
+    into running sum, variance-sum, and coverage buffers of the output shape, so memory
+    does not grow with the number of inputs.
+    """
+
+    if combine not in ("mean", "sum", "first", "last", "min", "max"):
+        raise SystemExit(f"*** Error: Combine function not supported in streaming mode = {combine}")
+
+    # Derive optimal output projection from the headers only, when not supplied
+    if output_wcs is None:
+        shapes_and_wcs = []
+        for p in input_paths:
+            header = fits.getheader(p)
+            shapes_and_wcs.append(((header["NAXIS2"], header["NAXIS1"]), WCS(header)))
+        output_wcs, shape_out = find_optimal_celestial_wcs(shapes_and_wcs)
+
+    parallel = True if n_jobs is None else (False if n_jobs == 1 else n_jobs)
+
+    coadd = np.zeros(shape_out)
+    coverage = np.zeros(shape_out)
+    variance_sum = None if uncertainty_paths is None else np.zeros(shape_out)
+
+    if combine == "min":
+        coadd[...] = np.inf
+    elif combine == "max":
+        coadd[...] = -np.inf
+
+    print(f"Streaming coadd of {len(input_paths)} science image(s) [combine={combine}] ...")
+
+    for i, p in enumerate(input_paths):
+
+        data, wcs_in, _ = load_hdu(p)
+
+        bounds = _output_bounds(wcs_in, data.shape, output_wcs, shape_out)
+
+        if bounds is None:
+            print(f"  skipping {p} (no overlap with output)")
+            continue
+
+        ymin, ymax, xmin, xmax = bounds
+        view = (slice(ymin, ymax), slice(xmin, xmax))
+        wcs_out_indiv = output_wcs[view]
+        shape_out_indiv = (ymax - ymin, xmax - xmin)
+
+        variance = None
+        stacked = False
+
+        if uncertainty_paths is not None:
+            unc, wcs_unc, _ = load_hdu(uncertainty_paths[i])
+            variance = unc ** 2
+            del unc
+            stacked = variance.shape == data.shape and wcs_unc.wcs.compare(wcs_in.wcs)
+
+        # Reproject science and variance planes together, so that they share one pixel mapping
+        if stacked:
+            array, footprint = _reproject_method(
+                (np.stack([data, variance]), wcs_in),
+                wcs_out_indiv,
+                shape_out=(2,) + shape_out_indiv,
+                reprojection_type=reprojection_type,
+                parallel=parallel,
+            )
+            array_var, footprint_var = array[1], footprint[1]
+            array, footprint = array[0], footprint[0]
+        else:
+            array, footprint = _reproject_method(
+                (data, wcs_in),
+                wcs_out_indiv,
+                shape_out=shape_out_indiv,
+                reprojection_type=reprojection_type,
+                parallel=parallel,
+            )
+            if variance is not None:
+                array_var, footprint_var = _reproject_method(
+                    (variance, wcs_unc),
+                    wcs_out_indiv,
+                    shape_out=shape_out_indiv,
+                    reprojection_type=reprojection_type,
+                    parallel=parallel,
+                )
+
+        del data, variance
+
+        reset = np.isnan(array)
+        array[reset] = 0.0
+        footprint[reset] = 0.0
+
+        if combine in ("mean", "sum"):
+            coadd[view] += array * footprint
+            coverage[view] += footprint
+        else:
+            if combine == "first":
+                mask = coverage[view] == 0
+            elif combine == "last":
+                mask = footprint > 0
+            elif combine == "min":
+                mask = (footprint > 0) & (array < coadd[view])
+            else:
+                mask = (footprint > 0) & (array > coadd[view])
+            coverage[view] = np.where(mask, footprint, coverage[view])
+            coadd[view] = np.where(mask, array, coadd[view])
+
+        # Variances are always summed
+        if variance_sum is not None:
+            reset = np.isnan(array_var)
+            array_var[reset] = 0.0
+            footprint_var[reset] = 0.0
+            variance_sum[view] += array_var * footprint_var
+            del array_var, footprint_var
+
+        del array, footprint
+
+    if combine == "mean":
+        with np.errstate(invalid="ignore"):
+            coadd /= coverage
+
+    # Mask pixels with no coverage
+    coadd[coverage == 0] = np.nan
+
+    # --- uncertainty propagation (as in compute_coadd) ---
+    uncertainty = None
+    if variance_sum is not None:
+
+        n = np.maximum(coverage, 1)   # avoid division by zero
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if combine == "sum":
+                # sigma_sum = sqrt(sum_i sigma_i^2)
+                uncertainty = np.sqrt(variance_sum)
+            else:
+                # sigma_mean = sqrt(sum_i sigma_i^2) / N (approximation for other combine functions)
+                uncertainty = np.sqrt(variance_sum) / n
+
+        uncertainty[coverage == 0] = np.nan
+
+    return coadd, uncertainty, coverage, output_wcs
+
+
 # ---------------------------------------------------------------------------
 # Output writer
 # ---------------------------------------------------------------------------
@@ -280,6 +478,11 @@ def parse_args():
         "-t", "--type", type=str, default="exact", metavar="TYPE",
         help="Type of reprojection: exact or adaptive (default: exact)",
     )
+    p.add_argument(
+        "-s", "--streaming", action="store_true",
+        help="Load and reproject each input once, accumulating into output buffers " +\
+             "(memory independent of the number of inputs; combine median not supported)",
+    )
     return p.parse_args()
 
 
@@ -322,7 +525,13 @@ def main():
     else:
         print(f"n_jobs={args.jobs}")
 
-    coadd, uncertainty, coverage, wcs = compute_coadd(
+    if args.streaming:
+        print("streaming=True")
+        coadd_function = compute_coadd_streaming
+    else:
+        coadd_function = compute_coadd
+
+    coadd, uncertainty, coverage, wcs = coadd_function(
         args.inputs,
         uncertainty_paths=args.uncertainties,
         combine=args.combine,
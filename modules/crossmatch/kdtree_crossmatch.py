@@ -0,0 +1,341 @@
+"""
+In-memory cross-matching of sources with astroobjects for a single field (a.k.a. sky tile).
+
+The astroobjects of a field are loaded once into a KD-tree of unit vectors on the sphere,
+and the sources are then streamed through it one (expid, sca) batch at a time in ascending
+mjdobs order.  Astroobjects created during matching are kept in a small buffer index, which
+is merged into the main KD-tree only when it exceeds a size threshold, so the cost per batch
+does not grow with the number of astroobjects in the field.  This mirrors the stage-1 cross-matching done with q3c_join in the database
+(see pipeline/crossMatchSources.py), but the database is only read at the start and written
+at the end.
+
+Usage
+-----
+  matcher = KDTreeCrossMatcher(match_radius,astroobject_records)
+  for each batch of sources in ascending time order:
+      matcher.match_sources(sids,ras,decs,fluxes,fields,hp6s,hp9s)
+  aids = <reserve matcher.get_number_of_new_astroobjects() aids from database sequence>
+  astroobject_records = matcher.get_astroobject_records(aids)
+  merge_records = matcher.get_merge_records(aids)
+"""
+
+import math
+import numpy as np
+from scipy.spatial import cKDTree
+
+import modules.utils.rapid_pipeline_subs as util
+
+
+class KDTreeCrossMatcher:
+
+    """
+    Spherical-index cross-matcher for a single field.
+
+    Input astroobject records are tuples with the columns of the AstroObjects_<field> database table:
+    (aid,ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9).
+    New astroobjects created during matching are assigned aids only when written back to the database,
+    so they are tracked internally by their index in the astroobject arrays.
+
+    The main KD-tree indexes the astroobjects [0,n_indexed) at their sky positions when it was built.
+    Matching updates mean sky positions, so the main KD-tree is queried with the match radius plus the
+    maximum drift of any indexed astroobject since, and candidates are kept only if within the match radius
+    of their current positions.  New astroobjects [n_indexed,n) are in a buffer KD-tree of their current
+    positions, rebuilt for each batch.  Both are merged into a new main KD-tree when the buffer exceeds
+    max_buffer_size astroobjects, or when the maximum drift exceeds the match radius.
+    """
+
+    def __init__(self,match_radius,astroobject_records=None,max_buffer_size=4096):
+
+
+        # Match radius in degrees, converted to chord length on the unit sphere.
+
+        self.match_radius = match_radius
+        self.chord_radius = 2.0 * math.sin(0.5 * math.radians(match_radius))
+
+
+        # Astroobject columns are kept in Python lists, so that new astroobjects can be appended cheaply.
+
+        self.aid = []
+        self.ra0 = []
+        self.dec0 = []
+        self.flux0 = []
+        self.meanra = []
+        self.stdevra = []
+        self.meandec = []
+        self.stdevdec = []
+        self.meanflux = []
+        self.stdevflux = []
+        self.nsources = []
+        self.field = []
+        self.hp6 = []
+        self.hp9 = []
+
+        if astroobject_records is not None:
+            for record in astroobject_records:
+                self.aid.append(record[0])
+                self.ra0.append(record[1])
+                self.dec0.append(record[2])
+                self.flux0.append(record[3])
+                self.meanra.append(record[4])
+                self.stdevra.append(record[5])
+                self.meandec.append(record[6])
+                self.stdevdec.append(record[7])
+                self.meanflux.append(record[8])
+                self.stdevflux.append(record[9])
+                self.nsources.append(record[10])
+                self.field.append(record[11])
+                self.hp6.append(record[12])
+                self.hp9.append(record[13])
+
+        self.n_existing = len(self.aid)
+
+
+        # Indices of astroobjects that were updated or created (only these need be written back).
+
+        self.modified = set()
+
+
+        # Merges are recorded as (astroobject index, sid).
+
+        self.merges = []
+
+
+        # Unit vectors of the current mean sky positions of all astroobjects (rows [0,n) of a growable array).
+
+        self.xyz = util.compute_xyz_array(self.meanra,self.meandec)
+
+
+        # Main KD-tree (see class docstring), with the unit vectors it was built from.
+
+        self.max_buffer_size = max_buffer_size
+
+        self.tree = None
+        self.tree_xyz = None
+        self.n_indexed = 0
+        self.max_drift = 0.0
+
+        self._rebuild_index()
+
+
+    def _rebuild_index(self):
+
+        n = len(self.meanra)
+
+        self.tree_xyz = self.xyz[0:n].copy()
+        self.tree = cKDTree(self.tree_xyz) if n > 0 else None
+        self.n_indexed = n
+        self.max_drift = 0.0
+
+
+    def _find_matches(self,xyz):
+
+        '''
+        Return the sorted indices of the astroobjects within the match radius of each source unit vector,
+        at the current mean sky positions of the astroobjects.
+        '''
+
+        nsrcs = len(xyz)
+
+        matches = [[] for i in range(nsrcs)]
+
+        if self.tree is not None:
+
+            candidates = self.tree.query_ball_point(xyz,self.chord_radius + self.max_drift)
+
+            for i in range(nsrcs):
+
+                indices = candidates[i]
+
+                if len(indices) == 0:
+                    continue
+
+                indices = np.sort(np.asarray(indices,dtype=np.intp))
+
+                if self.max_drift > 0.0:
+                    dist = np.sqrt(np.sum((self.xyz[indices] - xyz[i]) ** 2,axis=1))
+                    indices = indices[dist <= self.chord_radius]
+
+                matches[i] = indices.tolist()
+
+        n = len(self.meanra)
+
+        if n > self.n_indexed:
+
+            buffer_tree = cKDTree(self.xyz[self.n_indexed:n])
+
+            for i,indices in enumerate(buffer_tree.query_ball_point(xyz,self.chord_radius)):
+                if len(indices) > 0:
+                    matches[i] = matches[i] + sorted(self.n_indexed + j for j in indices)
+
+        return matches
+
+
+    def match_sources(self,sids,ras,decs,fluxes,fields,hp6s,hp9s):
+
+        '''
+        Cross-match a batch of sources (normally all sources for a given expid and sca) with the astroobjects.
+        Matched sources are merged with every astroobject within the match radius, and the mean sky position
+        and number of sources of each matched astroobject are updated.  Unmatched sources become new astroobjects.
+        As with the database cross-matching, sources within a batch are not matched with each other.
+
+        Returns numbers of matched and unmatched sources.
+        '''
+
+        nsrcs = len(sids)
+
+        if nsrcs == 0:
+            return 0,0
+
+        matches = self._find_matches(util.compute_xyz_array(ras,decs))
+
+
+        # Update running means for matched sources before appending new astroobjects,
+        # so that the new astroobjects of this batch are not matched.
+
+        n_matched = 0
+        unmatched = []
+        updated = set()
+
+        for i in range(nsrcs):
+
+            indices = matches[i]
+
+            if len(indices) == 0:
+                unmatched.append(i)
+                continue
+
+            n_matched += 1
+
+            for j in indices:
+
+                nsources = self.nsources[j]
+
+                self.meanra[j] = util.update_meanra(self.meanra[j],nsources,ras[i])
+                self.meandec[j] = util.update_meandec(self.meandec[j],nsources,decs[i])
+                self.nsources[j] = nsources + 1
+
+                updated.add(j)
+                self.modified.add(j)
+                self.merges.append((j,sids[i]))
+
+
+        # Update unit vectors of the matched astroobjects, and the maximum drift of indexed astroobjects.
+
+        if len(updated) > 0:
+
+            updated = np.array(sorted(updated),dtype=np.intp)
+            self.xyz[updated] = util.compute_xyz_array([self.meanra[j] for j in updated],
+                                                       [self.meandec[j] for j in updated])
+
+            indexed = updated[updated < self.n_indexed]
+
+            if len(indexed) > 0:
+                drift = np.sqrt(np.sum((self.xyz[indexed] - self.tree_xyz[indexed]) ** 2,axis=1))
+                self.max_drift = max(self.max_drift,float(np.max(drift)))
+
+
+        # For now, set the lightcurve statistics to zero.              # TODO
+
+        for i in unmatched:
+
+            j = len(self.aid)
+
+            self.aid.append(None)
+            self.ra0.append(ras[i])
+            self.dec0.append(decs[i])
+            self.flux0.append(fluxes[i])
+            self.meanra.append(ras[i])
+            self.stdevra.append(0)
+            self.meandec.append(decs[i])
+            self.stdevdec.append(0)
+            self.meanflux.append(0)
+            self.stdevflux.append(0)
+            self.nsources.append(1)
+            self.field.append(fields[i])
+            self.hp6.append(hp6s[i])
+            self.hp9.append(hp9s[i])
+
+            self.modified.add(j)
+            self.merges.append((j,sids[i]))
+
+        if len(unmatched) > 0:
+
+            n = len(self.aid)
+
+            if n > len(self.xyz):
+                xyz = np.empty((max(n,2 * len(self.xyz)),3),dtype=np.float64)
+                xyz[0:n - len(unmatched)] = self.xyz[0:n - len(unmatched)]
+                self.xyz = xyz
+
+            self.xyz[n - len(unmatched):n] = util.compute_xyz_array([ras[i] for i in unmatched],
+                                                                     [decs[i] for i in unmatched])
+
+
+        # Merge the buffer into the main KD-tree when it is too large, or when positions have drifted too far.
+
+        if len(self.aid) - self.n_indexed > self.max_buffer_size or self.max_drift > self.chord_radius:
+            self._rebuild_index()
+
+        return n_matched,len(unmatched)
+
+
+    def get_number_of_new_astroobjects(self):
+
+        return len(self.aid) - self.n_existing
+
+
+    def _assign_new_aids(self,new_aids):
+
+        n_new = self.get_number_of_new_astroobjects()
+
+        if len(new_aids) != n_new:
+            raise ValueError(f"Number of new aids ({len(new_aids)}) not equal to number of new astroobjects ({n_new})")
+
+        for k in range(n_new):
+            self.aid[self.n_existing + k] = new_aids[k]
+
+
+    def get_astroobject_records(self,new_aids,only_modified=False):
+
+        '''
+        Assign aids to new astroobjects and return all astroobject records (or only those updated or created)
+        as tuples with the columns of the AstroObjects_<field> database table, including aid.
+        '''
+
+        self._assign_new_aids(new_aids)
+
+        if only_modified:
+            indices = sorted(self.modified)
+        else:
+            indices = range(len(self.aid))
+
+        records = []
+
+        for j in indices:
+            records.append((self.aid[j],
+                            self.ra0[j],
+                            self.dec0[j],
+                            self.flux0[j],
+                            self.meanra[j],
+                            self.stdevra[j],
+                            self.meandec[j],
+                            self.stdevdec[j],
+                            self.meanflux[j],
+                            self.stdevflux[j],
+                            self.nsources[j],
+                            self.field[j],
+                            self.hp6[j],
+                            self.hp9[j]))
+
+        return records
+
+
+    def get_merge_records(self,new_aids):
+
+        '''
+        Assign aids to new astroobjects and return (aid,sid) records for the Merges_<field> database table.
+        '''
+
+        self._assign_new_aids(new_aids)
+
+        return [(self.aid[j],sid) for j,sid in self.merges]
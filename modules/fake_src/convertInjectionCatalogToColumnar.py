@@ -0,0 +1,28 @@
+'''
+Convert injection catalogs from the JSON dict-of-dicts format (keyed by source ID, as written by
+generateInjectionCatalogForField.py) to the columnar .npz format (one array per column), which is read
+without rebuilding arrays source by source.  Each output file has the name of its input file with the
+extension .npz, in the same directory unless --output_dir is given.
+'''
+
+import os
+import argparse
+
+import modules.fake_src.injectionLightCurveModels as lcm
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert JSON injection catalogs to the columnar .npz format')
+    parser.add_argument('json_catalog_filenames', nargs='+', help='JSON injection catalog files')
+    parser.add_argument('--output_dir', default=None, help='Output directory for the .npz files')
+
+    args = parser.parse_args()
+
+    for json_catalog_filename in args.json_catalog_filenames:
+        output_dir = args.output_dir if args.output_dir is not None else os.path.dirname(json_catalog_filename)
+        npz_catalog_filename = os.path.join(output_dir,os.path.splitext(os.path.basename(json_catalog_filename))[0] + ".npz")
+
+        catalog = lcm.read_injection_catalog(json_catalog_filename)
+        lcm.write_injection_catalog(catalog,npz_catalog_filename)
+
+        print(f"{json_catalog_filename} -> {npz_catalog_filename} ({len(catalog['id'])} sources)")
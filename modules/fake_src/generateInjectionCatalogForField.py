@@ -12,6 +12,7 @@ import argparse
 import database.modules.utils.rapid_db as db
 import modules.utils.rapid_pipeline_subs as util
 import database.modules.utils.roman_tessellation_db as sqlite
+import modules.fake_src.injectionLightCurveModels as lcm
 
 
 swname = "generateInjectionCatalogForField.py"
@@ -45,6 +46,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate a catalog of fake sources with light curves parameters to inject into a given field')
     parser.add_argument('field_id', help='ID of the field (rtid of sky tile) to inject sources into')
     parser.add_argument('--config_input_filename', default=config_input_filename, help='INI file with the configuration for generating the injection catalog')
+    parser.add_argument('--output_format', choices=['json', 'npz'], default='json', help='Format of the injection catalog: JSON dict of sources keyed by ID, or columnar .npz')
 
     args = parser.parse_args()
     rtid = args.field_id
@@ -132,7 +134,11 @@ if __name__ == "__main__":
             }
             injection_counter += 1
 
-    #save the injection catalog as a json file
-    injection_catalog_filename = f"injection_catalog_rtid{rtid}.json"
-    with open(injection_catalog_filename, 'w') as f:
-        json.dump(injection_catalog, f, indent=4)
+    #save the injection catalog as a json file, or as a columnar npz file (one array per column, see injectionLightCurveModels.py)
+    if args.output_format == 'npz':
+        injection_catalog_filename = f"injection_catalog_rtid{rtid}.npz"
+        lcm.write_injection_catalog(lcm.injection_catalog_from_dict(injection_catalog), injection_catalog_filename)
+    else:
+        injection_catalog_filename = f"injection_catalog_rtid{rtid}.json"
+        with open(injection_catalog_filename, 'w') as f:
+            json.dump(injection_catalog, f, indent=4)
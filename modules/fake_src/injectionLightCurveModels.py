@@ -1,9 +1,18 @@
+import json
 import numpy as np
 
 """ 
-Light curve models for generating fake source injections
+Light curve models for generating fake source injections, and the columnar injection catalogs
+of light-curve parameters (one array per column, saved as .npz), with vectorized evaluation
+of the light curves of all catalog sources of each model type at an MJD.
 """
 
+# Light-curve parameter columns of injection catalogs, by light-curve model type
+INJECTION_CATALOG_PARAMETERS = {
+    'sinusoidal': ['period', 'amplitude', 'magnitude', 'phase'],
+    'gaussian': ['peak_time', 'peak_amplitude', 'sigma', 'magnitude'],
+}
+
 def SinusoidalLightCurve(time, mean_value, amplitude, period, phase):
     """
     Generate a sinusoidal light curve model.
@@ -45,3 +54,128 @@ def GaussianLightCurve(time, peak_time, peak_amplitude, sigma, static_value, tim
         gaussian_component = peak_amplitude * np.exp(-0.5 * ((time - peak_time) / sigma) ** 2)
     
     return static_value + gaussian_component
+
+
+def injection_catalog_from_dict(catalog_sources_dict):
+    """
+    Convert an injection catalog from the JSON dict-of-dicts format (keyed by source ID, as written by
+    generateInjectionCatalogForField.py) to the columnar format.
+
+    Parameters:
+    catalog_sources_dict (dict): Dictionary of sources, each with 'type', 'ra', 'dec', and 'parameters'.
+
+    Returns:
+    dict: Columnar catalog with arrays 'id', 'type', 'ra', 'dec', and one for each light-curve parameter
+          in INJECTION_CATALOG_PARAMETERS (NaN for sources of other model types), in the order of the sources.
+    """
+    parameter_names = []
+    for names in INJECTION_CATALOG_PARAMETERS.values():
+        parameter_names += [name for name in names if name not in parameter_names]
+
+    nsources = len(catalog_sources_dict)
+    catalog = {
+        'id': np.array(list(catalog_sources_dict.keys()), dtype=str),
+        'type': np.array([source['type'] for source in catalog_sources_dict.values()], dtype=str),
+        'ra': np.empty(nsources),
+        'dec': np.empty(nsources),
+    }
+    for name in parameter_names:
+        catalog[name] = np.full(nsources, np.nan)
+
+    for i, source in enumerate(catalog_sources_dict.values()):
+        catalog['ra'][i] = source['ra']
+        catalog['dec'][i] = source['dec']
+        for name, value in source['parameters'].items():
+            catalog[name][i] = value
+
+    return catalog
+
+
+def read_injection_catalog(catalog_filename):
+    """
+    Read an injection catalog in the columnar format (.npz) or the JSON dict-of-dicts format (converted on reading).
+
+    Parameters:
+    catalog_filename (str): Injection catalog file.
+
+    Returns:
+    dict: Columnar catalog (see injection_catalog_from_dict).
+    """
+    if catalog_filename.endswith('.npz'):
+        with np.load(catalog_filename, allow_pickle=False) as npz:
+            return {name: npz[name] for name in npz.files}
+
+    with open(catalog_filename, 'r') as f:
+        catalog_sources_dict = json.load(f)
+
+    return injection_catalog_from_dict(catalog_sources_dict)
+
+
+def write_injection_catalog(catalog, catalog_filename):
+    """
+    Write an injection catalog in the columnar format (compressed .npz).
+
+    Parameters:
+    catalog (dict): Columnar catalog (see injection_catalog_from_dict).
+    catalog_filename (str): Output .npz file.
+    """
+    with open(catalog_filename, 'wb') as f:
+        np.savez_compressed(f, **catalog)
+
+
+def select_injection_catalog_sources(catalog, index):
+    """
+    Select sources of a columnar injection catalog.
+
+    Parameters:
+    catalog (dict): Columnar catalog (see injection_catalog_from_dict).
+    index (array-like): Boolean mask or integer indices of the sources to select.
+
+    Returns:
+    dict: Columnar catalog of the selected sources.
+    """
+    return {name: column[index] for name, column in catalog.items()}
+
+
+def evaluate_injection_catalog_fluxes(catalog, mjd, zeropoint=0.0):
+    """
+    Evaluate the light curves of all sources of a columnar injection catalog at an MJD, with one vectorized
+    call per light-curve model type.
+
+    Sinusoidal light curves are in magnitudes. Gaussian light curves are in flux, with a static flux from the
+    magnitude, and a peak amplitude in delta magnitude relative to it.
+
+    Parameters:
+    catalog (dict): Columnar catalog (see injection_catalog_from_dict).
+    mjd (float): MJD at which to evaluate the light curves.
+    zeropoint (float): Zeropoint for converting magnitudes to fluxes (0 for fluxes in maggies).
+
+    Returns:
+    array-like: Fluxes of the sources, in the order of the catalog.
+    """
+    fluxes = np.full(len(catalog['type']), np.nan)
+
+    unknown_types = set(np.unique(catalog['type'])) - set(INJECTION_CATALOG_PARAMETERS.keys())
+    if unknown_types:
+        raise ValueError(f"Unknown light curve type: {sorted(unknown_types)[0]}")
+
+    is_sinusoidal = catalog['type'] == 'sinusoidal'
+    if np.any(is_sinusoidal):
+        mags = SinusoidalLightCurve(mjd,
+                                    catalog['magnitude'][is_sinusoidal],
+                                    catalog['amplitude'][is_sinusoidal],
+                                    catalog['period'][is_sinusoidal],
+                                    catalog['phase'][is_sinusoidal])
+        fluxes[is_sinusoidal] = 10**(-0.4*(mags - zeropoint))
+
+    is_gaussian = catalog['type'] == 'gaussian'
+    if np.any(is_gaussian):
+        static_fluxes = 10**(-0.4*(catalog['magnitude'][is_gaussian] - zeropoint))
+        peak_amplitudes = static_fluxes*(10**(0.4*catalog['peak_amplitude'][is_gaussian]) - 1.0)
+        fluxes[is_gaussian] = GaussianLightCurve(mjd,
+                                                 catalog['peak_time'][is_gaussian],
+                                                 peak_amplitudes,
+                                                 catalog['sigma'][is_gaussian],
+                                                 static_fluxes)
+
+    return fluxes
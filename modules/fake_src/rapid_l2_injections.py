@@ -1,6 +1,5 @@
 import argparse
 import importlib
-import json
 import numpy as np
 
 import asdf
@@ -16,7 +15,8 @@ import romanisim.psf
 import romanisim.wcs
 from romanisim.image import inject_sources_into_l2
 
-from modules.fake_src.injectionLightCurveModels import SinusoidalLightCurve, GaussianLightCurve
+from modules.fake_src.injectionLightCurveModels import (read_injection_catalog, select_injection_catalog_sources,
+                                                      evaluate_injection_catalog_fluxes)
 
 
 class GriddedEPSF:
@@ -133,13 +133,16 @@ def _make_injection_catalog(ra, dec, filter_name, fluxes_maggies):
 def _evaluate_catalogs_at_mjd(catalog_list_file, image_mjdobs, image_size, image_wcs, filter_name):
     """Evaluate variable star light curves at the image MJD and return positions and fluxes.
 
-    Reads the same JSON field catalog format used by the existing OU injection
-    pipeline. Fluxes are returned in maggies rather than image counts.
+    Reads the same field catalogs used by the existing OU injection pipeline,
+    in the columnar .npz format or the JSON format (converted on reading), and
+    evaluates the light curves of all sources on the image with one vectorized
+    call per light curve type. Fluxes are returned in maggies rather than
+    image counts.
 
     Parameters
     ----------
     catalog_list_file : str
-        Text file listing one JSON field catalog path per line.
+        Text file listing one field catalog path (.npz or JSON) per line.
     image_mjdobs : float
         MJD of the observation mid-time.
     image_size : tuple
@@ -162,45 +165,24 @@ def _evaluate_catalogs_at_mjd(catalog_list_file, image_mjdobs, image_size, image
     ra_out, dec_out, flux_out = [], [], []
 
     for catalog_path in input_catalogs:
-        with open(catalog_path, 'r') as f:
-            catalog_sources_dict = json.load(f)
-        catalog_sources = np.array(list(catalog_sources_dict.values()))
-
-        ra_coords = np.array([s['ra'] for s in catalog_sources])
-        dec_coords = np.array([s['dec'] for s in catalog_sources])
+        catalog = read_injection_catalog(catalog_path)
 
         # Convert to pixel positions; keep sources within 50 px of the image edge
-        xpos, ypos = image_wcs.toImage(ra_coords, dec_coords, units='deg')
+        xpos, ypos = image_wcs.toImage(catalog['ra'], catalog['dec'], units='deg')
         ny, nx = image_size
         on_image = ((xpos >= -50.0) & (xpos < nx + 50.0) &
                     (ypos >= -50.0) & (ypos < ny + 50.0))
 
-        for source in catalog_sources[on_image]:
-            if source['type'] == 'sinusoidal':
-                mag = SinusoidalLightCurve(
-                    image_mjdobs,
-                    source['parameters']['magnitude'],
-                    source['parameters']['amplitude'],
-                    source['parameters']['period'],
-                    source['parameters']['phase'])
-                flux_maggies = 10**(-0.4 * mag)
-            elif source['type'] == 'gaussian':
-                static_flux = 10**(-0.4 * source['parameters']['magnitude'])
-                peak_amplitude = static_flux * (10**(0.4 * source['parameters']['peak_amplitude']) - 1.0)
-                flux_maggies = GaussianLightCurve(
-                    image_mjdobs,
-                    source['parameters']['peak_time'],
-                    peak_amplitude,
-                    source['parameters']['sigma'],
-                    static_flux)
-            else:
-                raise ValueError(f"Unknown light curve type: {source['type']}")
-
-            ra_out.append(source['ra'])
-            dec_out.append(source['dec'])
-            flux_out.append(flux_maggies)
-
-    return np.array(ra_out), np.array(dec_out), np.array(flux_out)
+        on_image_catalog = select_injection_catalog_sources(catalog, on_image)
+
+        ra_out.append(on_image_catalog['ra'])
+        dec_out.append(on_image_catalog['dec'])
+        flux_out.append(evaluate_injection_catalog_fluxes(on_image_catalog, image_mjdobs))
+
+    if len(flux_out) == 0:
+        return np.array([]), np.array([]), np.array([])
+
+    return np.concatenate(ra_out), np.concatenate(dec_out), np.concatenate(flux_out)
 
 
 def inject_variable_stars_into_l2(asdf_path, catalog_list_file, output_path,
@@ -217,7 +199,7 @@ def inject_variable_stars_into_l2(asdf_path, catalog_list_file, output_path,
     asdf_path : str
         Path or S3 URI of the input L2 ASDF file.
     catalog_list_file : str
-        Text file listing one JSON field catalog path per line. Each catalog
+        Text file listing one field catalog path (.npz or JSON) per line. Each catalog
         follows the same format as the existing OU injection catalogs
         (sinusoidal or gaussian light curve parameters per source).
     output_path : str
@@ -294,7 +276,7 @@ if __name__ == '__main__':
     parser.add_argument('asdf_path',
                         help='Path or S3 URI of the input L2 ASDF file.')
     parser.add_argument('catalog_list_file',
-                        help='Text file listing one JSON field catalog path per line.')
+                        help='Text file listing one field catalog path (.npz or JSON) per line.')
     parser.add_argument('output_path',
                         help='Output ASDF file path for the image with injected sources.')
     parser.add_argument('--fix-wcs', action='store_true',
@@ -2,7 +2,6 @@ import os
 import numpy as np
 import random
 import argparse
-import json
 
 
 from astropy.io import fits, ascii
@@ -21,7 +20,7 @@ import galsim
 import galsim.wcs
 from galsim import roman
 
-from injectionLightCurveModels import SinusoidalLightCurve, GaussianLightCurve
+from injectionLightCurveModels import read_injection_catalog, select_injection_catalog_sources, evaluate_injection_catalog_fluxes
 
 def detect_sources_in_image(image_data, detection_nsigma=10, npixels=8, bkg_box_size=512, bkg_filter_size=3,
                    segm_nlevels=8, segm_contrast=0.002):
@@ -162,47 +161,30 @@ def generate_injection_positions_fluxes_from_catalogs_by_field(input_catalogs_fi
     flux = []
     for input_catalog in input_catalogs:
         input_catalog = input_catalog.strip() #remove whitespace and newline characters
-        with open(input_catalog, 'r') as f:
-            catalog_sources_dict = json.load(f)
-        catalog_sources = np.array(list(catalog_sources_dict.values()))
 
-        #pull out the 'ra' and 'dec' entries for each source in catalog, which is a nested dictionary, for each source
-        ra_coords = np.array([source['ra'] for source in catalog_sources])
-        dec_coords = np.array([source['dec'] for source in catalog_sources])
+        #columnar catalog (.npz, or JSON converted on reading), with one array for each of 'ra', 'dec', 'type', and the light curve parameters
+        catalog = read_injection_catalog(input_catalog)
 
         #convert the ra, dec to x,y positions using the image wcs
         #go a bit past the edges of the image to allow for sources that are just outside the image but could still have flux in the image due to the PSF
         #not sure if romanisim will handle this, need to test
 
-        xposition, yposition = image_wcs.toImage(ra_coords, dec_coords, units='deg')
+        xposition, yposition = image_wcs.toImage(catalog['ra'], catalog['dec'], units='deg')
         goodidx = (xposition >= -50.0) & (xposition < image_size[1] + 50.0) & (yposition >= -50.0) & (yposition < image_size[0] + 50.0)
 
-        for i,source in enumerate(catalog_sources[goodidx]):
-            if source['type'] == 'sinusoidal':
-                #do it in mag, though diff flux light curves will not be sinusoidal.
-                mean_mag = source['parameters']['magnitude']
-                mag_amplitude = source['parameters']['amplitude']
-                period = source['parameters']['period'] #days
-                phase = source['parameters']['phase'] #between 0 and 1
+        #evaluate the light curves of all sources on the image at the time of the image to get the fluxes for injection,
+        #with one vectorized call for each light curve type (sinusoidal light curves are done in mag, though diff flux
+        #light curves will not be sinusoidal; gaussian amplitudes are the outburst in delta mag from the baseline magnitude)
+        source_fluxes = evaluate_injection_catalog_fluxes(select_injection_catalog_sources(catalog, goodidx), image_mjdobs, zeropoint)
 
-                #evaluate the sinusoidal light curve at the time of the image to get the flux for injection
-                source_mag = SinusoidalLightCurve(image_mjdobs, mean_mag, mag_amplitude, period, phase)
-                source_flux = 10**(-0.4*(source_mag - zeropoint)) #convert magnitude to flux for injection
+        xpix.append(xposition[goodidx])
+        ypix.append(yposition[goodidx])
+        flux.append(source_fluxes)
 
-            elif source['type'] == 'gaussian':
-                peak_time = source['parameters']['peak_time'] #MJD
-                sigma = source['parameters']['sigma'] #days, width of the gaussian
-                static_flux = 10**(-0.4*(source['parameters']['magnitude'] - zeropoint))
-                peak_amplitude = static_flux*(10**(0.4*source['parameters']['peak_amplitude']) - 1.0) #convert amplitude from magnitude to flux units, where amplitude is the difference between the baseline magnitude and is the amplitude of the outburst in delta mag.
+    if len(flux) == 0:
+        return np.array([]), np.array([]), np.array([])
 
-                #evaluate the gaussian light curve at the time of the image to get the flux for injection
-                source_flux = GaussianLightCurve(image_mjdobs, peak_time, peak_amplitude, sigma, static_flux)
-
-            xpix.append(xposition[goodidx][i])
-            ypix.append(yposition[goodidx][i])
-            flux.append(source_flux)
-
-    return np.array(xpix), np.array(ypix), np.array(flux)
+    return np.concatenate(xpix), np.concatenate(ypix), np.concatenate(flux)
 
 def save_injection_catalog(xpos, ypos, fluxes, catalog_outfile):
     """Save injection catalog to file."""
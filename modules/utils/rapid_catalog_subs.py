@@ -0,0 +1,143 @@
+"""
+RAPID Catalog Subs
+
+Reading and writing of the photutils PSF-fit and finder catalogs.  The catalogs are written
+as ASCII text files (astropy basic format) by the science and reference-image pipelines,
+along with a sidecar Parquet file of the typed catalogs joined on id, which has the same
+filename as the PSF-fit catalog but with suffix .parquet instead of .txt.  Readers prefer
+the sidecar file, and otherwise parse the ASCII catalogs with a fixed-schema reader, which
+avoids the format guessing and single-threaded parsing of QTable.read(...,format='ascii').
+"""
+
+import os
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+from astropy.table import QTable, join
+
+
+# Integer-valued columns of the PSF-fit catalog (PSFPhotometry) and finder catalog (DAOStarFinder).
+# All other columns are read as 64-bit floats.
+
+psfcat_int_columns = ["id","group_id","group_size","n_pixels_fit","flags","iter_detected","npix"]
+
+
+#-------------------------------------------------------------------
+# Return filename of sidecar Parquet file for given PSF-fit catalog filename.
+
+def psfcat_sidecar_filename(psfcat_filename):
+
+    return os.path.splitext(psfcat_filename)[0] + ".parquet"
+
+
+#-------------------------------------------------------------------
+# Write joined PSF-fit and finder catalog table to sidecar Parquet file
+# for given PSF-fit catalog filename.  Returns sidecar filename.
+
+def write_psfcat_sidecar(joined_table,psfcat_filename):
+
+    sidecar_filename = psfcat_sidecar_filename(psfcat_filename)
+
+    arrays = {}
+    for colname in joined_table.colnames:
+        col = joined_table[colname]
+        arrays[colname] = np.asarray(getattr(col,"value",col))
+
+    pq.write_table(pa.table(arrays),sidecar_filename)
+
+    return sidecar_filename
+
+
+#-------------------------------------------------------------------
+# Read sidecar Parquet file into QTable.
+
+def read_psfcat_sidecar(sidecar_filename):
+
+    table = pq.read_table(sidecar_filename)
+
+    joined_table = QTable()
+    for colname in table.column_names:
+        if colname.startswith("__index_level_"):
+            continue
+        joined_table[colname] = table.column(colname).to_numpy()
+
+    return joined_table
+
+
+#-------------------------------------------------------------------
+# Read ASCII catalog written by astropy.io.ascii.write (basic format:
+# header line of column names, then space-delimited values) into QTable,
+# with fixed column types (see psfcat_int_columns), using the
+# multithreaded Arrow CSV reader.  Falls back to QTable.read with format
+# guessing if the catalog does not parse with the fixed schema (e.g.,
+# masked values written as empty strings).
+
+def read_psfcat_ascii(filename):
+
+    with open(filename,"r") as f:
+        colnames = f.readline().split()
+
+    column_types = {colname: pa.int64() if colname in psfcat_int_columns else pa.float64() for colname in colnames}
+
+    parse_options = pa_csv.ParseOptions(delimiter=" ")
+    convert_options = pa_csv.ConvertOptions(column_types=column_types,null_values=[],strings_can_be_null=False)
+
+    try:
+        table = pa_csv.read_csv(filename,parse_options=parse_options,convert_options=convert_options)
+    except pa.ArrowInvalid as error:
+        print(f"*** Warning: Could not read catalog {filename} with fixed schema ({error}); reading with format guessing...")
+        return QTable.read(filename,format='ascii')
+
+    qtable = QTable()
+    for colname in table.column_names:
+        qtable[colname] = table.column(colname).to_numpy()
+
+    return qtable
+
+
+#-------------------------------------------------------------------
+# Read PSF-fit and finder catalogs, joined on id.  The sidecar Parquet
+# file next to the PSF-fit catalog is read if it exists (symbolic links
+# are resolved first); otherwise, both ASCII catalogs are read and joined.
+
+def read_joined_psfcat(psfcat_filename,psfcat_finder_filename):
+
+    sidecar_filename = psfcat_sidecar_filename(os.path.realpath(psfcat_filename))
+
+    if os.path.isfile(sidecar_filename):
+        return read_psfcat_sidecar(sidecar_filename)
+
+    psfcat_qtable = read_psfcat_ascii(psfcat_filename)
+    psfcat_finder_qtable = read_psfcat_ascii(psfcat_finder_filename)
+
+    return join_psfcat(psfcat_qtable,psfcat_finder_qtable)
+
+
+#-------------------------------------------------------------------
+# Inner join of PSF-fit and finder catalogs on id, with the same result
+# as astropy.table.join(...,keys='id',join_type='inner'), i.e., rows in
+# ascending order of id, but by index arrays from np.intersect1d, since
+# id is unique in each catalog.  Falls back to astropy.table.join if
+# the ids are not unique or the catalogs share other column names.
+
+def join_psfcat(psfcat_qtable,psfcat_finder_qtable):
+
+    ids = np.asarray(psfcat_qtable['id'])
+    finder_ids = np.asarray(psfcat_finder_qtable['id'])
+
+    shared_colnames = set(psfcat_qtable.colnames) & set(psfcat_finder_qtable.colnames)
+
+    if shared_colnames != {'id'} or len(np.unique(ids)) != len(ids) or len(np.unique(finder_ids)) != len(finder_ids):
+        return join(psfcat_qtable, psfcat_finder_qtable, keys='id', join_type='inner')
+
+    _,index,finder_index = np.intersect1d(ids,finder_ids,assume_unique=True,return_indices=True)
+
+    joined_table = QTable()
+    for colname in psfcat_qtable.colnames:
+        joined_table[colname] = psfcat_qtable[colname][index]
+    for colname in psfcat_finder_qtable.colnames:
+        if colname != 'id':
+            joined_table[colname] = psfcat_finder_qtable[colname][finder_index]
+
+    return joined_table
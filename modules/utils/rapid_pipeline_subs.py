@@ -4,16 +4,23 @@ RAPID Pipeline Subs
 
 import os
 import math
+import functools
+from statistics import NormalDist
 from astropy.io import fits
 from astropy.wcs import WCS
 from astropy.coordinates import SkyCoord
 import re
+import time
+import warnings
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import numpy.ma as ma
+from numpy.lib.stride_tricks import sliding_window_view
 import boto3
 from botocore.exceptions import ClientError
-from scipy.ndimage import zoom
+from scipy.ndimage import zoom, shift
 
 plot_flag = False
 
@@ -311,13 +318,252 @@ def download_file_from_s3_bucket(s3_client,s3_full_name,outputfile=None):
     return filename,subdirs,downloaded_from_bucket
 
 
-def compute_clip_corr(n_sigma):
+def parse_s3_full_name(s3_full_name):
+
+    '''
+    Parse S3 full name of the form s3://<bucket>/<object name> and return bucket name and object name,
+    or None,None if it cannot be parsed.
+    '''
+
+    string_match = re.match(r"s3://(.+?)/(.+)", s3_full_name)
+
+    if string_match is None:
+        return None,None
+
+    return string_match.group(1),string_match.group(2)
+
+
+class LocalDirectoryS3Client:
+
+    '''
+    Stand-in for a boto3 S3 client that serves S3 objects from a local directory, for testing without AWS.
+    S3 object s3://<bucket>/<object name> is read from file <local_dir>/<bucket>/<object name>.
+    Only the download_file method is supported.
+    '''
+
+    def __init__(self,local_dir):
+
+        self.local_dir = local_dir
+
+    def download_file(self,s3_bucket_name,s3_object_name,filename):
+
+        local_file = os.path.join(self.local_dir,s3_bucket_name,s3_object_name)
+
+        if not os.path.isfile(local_file):
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}},'HeadObject')
+
+        shutil.copyfile(local_file,filename)
+
+
+def prefetch_files_from_s3_bucket(s3_client,s3_full_names,num_threads=16):
+
+    '''
+    Download S3 objects concurrently with a bounded thread pool of num_threads threads
+    (boto3 clients are thread-safe).  Input s3_full_names is a dictionary of S3 full names
+    (s3://<bucket>/<object name>) mapped to local output filenames, so that an S3 object
+    shared by several consumers is downloaded only once.  Subdirectories of the output
+    filenames are created as needed.  Return dictionary of S3 full names mapped to booleans
+    if successful, and the total number of bytes downloaded.
+    '''
+
+    def download(s3_full_name,filename):
+
+        s3_bucket_name,s3_object_name = parse_s3_full_name(s3_full_name)
+
+        if s3_bucket_name is None:
+            print(f"*** Warning: Could not parse S3 full name ({s3_full_name})")
+            return False,0
+
+        subdirs = os.path.dirname(filename)
+
+        if subdirs != "":
+            os.makedirs(subdirs,exist_ok=True)
+
+        try:
+            s3_client.download_file(s3_bucket_name,s3_object_name,filename)
+
+        except ClientError as e:
+            print(f"*** Warning: Failed to download {filename} from {s3_full_name}")
+            return False,0
+
+        return True,os.path.getsize(filename)
+
+
+    start_time = time.time()
+
+    downloaded_from_bucket = {}
+    total_bytes = 0
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+
+        futures = {}
+
+        for s3_full_name,filename in s3_full_names.items():
+            futures[s3_full_name] = executor.submit(download,s3_full_name,filename)
+
+        for s3_full_name,future in futures.items():
+            downloaded,nbytes = future.result()
+            downloaded_from_bucket[s3_full_name] = downloaded
+            total_bytes += nbytes
+
+    elapsed_time = time.time() - start_time
+
+    num_downloaded = sum(downloaded_from_bucket.values())
+    throughput = total_bytes / elapsed_time / 1.0e6 if elapsed_time > 0.0 else 0.0
+
+    print(f"prefetch_files_from_s3_bucket: Downloaded {num_downloaded} of {len(s3_full_names)} S3 objects " +
+          f"({total_bytes} bytes) in {elapsed_time:.3f} seconds with {num_threads} threads ({throughput:.3f} MB/s)")
+
+    return downloaded_from_bucket,total_bytes
+
+
+class AWSBatchJobTracker:
+
+    '''
+    Track the statuses of a set of AWS Batch jobs with batched describe_jobs calls.
+    Jobs are described in batches of up to 100 job IDs (the AWS Batch limit per request),
+    and jobs that have reached a terminal status (SUCCEEDED or FAILED) are not described again,
+    so each poll only queries the outstanding jobs.  The batch client is passed in (normally
+    boto3.client('batch')), so that a stub client with a describe_jobs method can be used for testing.
+    Jobs not yet returned by describe_jobs have status UNKNOWN.  A job that is not returned by
+    max_missing_polls consecutive successful describe_jobs requests (e.g., a mistyped job ID, or a job
+    older than the AWS Batch retention period) is marked FAILED, so that it cannot stall wait forever.
+    '''
+
+    terminal_statuses = ("SUCCEEDED","FAILED")
+
+    def __init__(self,batch_client,job_ids,batch_size=100,max_missing_polls=10):
+
+        self.batch_client = batch_client
+        self.batch_size = min(batch_size,100)
+        self.max_missing_polls = max_missing_polls
+        self.job_status = {job_id: "UNKNOWN" for job_id in job_ids}
+        self.n_missing_polls = {job_id: 0 for job_id in job_ids}
+        self.missing_job_ids = []
+        self.outstanding = list(self.job_status.keys())
+        self.n_api_calls = 0
+        self.n_polls = 0
+
+
+    def poll(self):
+
+        '''
+        Describe the outstanding jobs, update their statuses, and drop those that reached a terminal status.
+        Errors from describe_jobs are printed, and the jobs in the failed batch remain outstanding
+        (without counting as missing).  Return the number of outstanding jobs.
+        '''
+
+        still_outstanding = []
+
+        for i in range(0,len(self.outstanding),self.batch_size):
+
+            batch_job_ids = self.outstanding[i:i + self.batch_size]
+
+            try:
+                response = self.batch_client.describe_jobs(jobs=batch_job_ids)
+                self.n_api_calls += 1
+
+                returned_job_ids = set()
+                for job in response['jobs']:
+                    self.job_status[job['jobId']] = job['status']
+                    returned_job_ids.add(job['jobId'])
+
+                for job_id in batch_job_ids:
+                    if job_id in returned_job_ids:
+                        self.n_missing_polls[job_id] = 0
+                        continue
+
+                    self.n_missing_polls[job_id] += 1
+
+                    if self.n_missing_polls[job_id] >= self.max_missing_polls:
+                        print(f"*** Warning: AWS Batch job {job_id} not returned by describe_jobs in " +
+                              f"{self.n_missing_polls[job_id]} consecutive polls; marking it FAILED...")
+                        self.job_status[job_id] = "FAILED"
+                        self.missing_job_ids.append(job_id)
+
+            except Exception as error:
+                print('*** Error running client.describe_jobs ({}); continuing...'.format(error))
+
+            for job_id in batch_job_ids:
+                if self.job_status[job_id] not in self.terminal_statuses:
+                    still_outstanding.append(job_id)
+
+        self.outstanding = still_outstanding
+        self.n_polls += 1
+
+        return len(self.outstanding)
+
+
+    def get_status_counts(self):
+
+        '''
+        Return dictionary of job status mapped to number of jobs with that status.
+        '''
+
+        status_counts = {}
+
+        for job_status in self.job_status.values():
+            status_counts[job_status] = status_counts.get(job_status,0) + 1
+
+        return status_counts
+
+
+    def is_finished(self):
+
+        return len(self.outstanding) == 0
+
+
+    def wait(self,min_poll_interval=10.0,max_poll_interval=60.0,sleep=time.sleep,timeout=None):
+
+        '''
+        Poll until all jobs have reached a terminal status, printing the status counts after each poll.
+        The polling interval is adaptive: it is reset to min_poll_interval whenever jobs finished since
+        the previous poll, and otherwise doubled, up to max_poll_interval.  The sleep function can be
+        replaced for testing.  If timeout (seconds) is given, stop polling once it has elapsed, leaving
+        the unfinished jobs outstanding (see is_finished).  Return the status counts.
+        '''
+
+        poll_interval = min_poll_interval
+        n_outstanding_prev = len(self.outstanding)
+
+        start_time = time.monotonic()
+
+        while True:
+
+            n_outstanding = self.poll()
+
+            print(f"AWSBatchJobTracker: poll={self.n_polls}, n_api_calls={self.n_api_calls}, " +
+                  f"n_outstanding={n_outstanding}, status_counts={self.get_status_counts()}")
+
+            if n_outstanding == 0:
+                break
+
+            if timeout is not None and time.monotonic() - start_time >= timeout:
+                print(f"*** Warning: AWSBatchJobTracker: Timed out after {timeout} seconds " +
+                      f"with {n_outstanding} jobs outstanding; returning...")
+                break
+
+            if n_outstanding < n_outstanding_prev:
+                poll_interval = min_poll_interval
+            else:
+                poll_interval = min(2.0 * poll_interval,max_poll_interval)
+
+            n_outstanding_prev = n_outstanding
+
+            print(f"AWSBatchJobTracker: Sleeping {poll_interval} seconds and then will check again...")
+            sleep(poll_interval)
+
+        return self.get_status_counts()
+
+
+def compute_clip_corr_monte_carlo(n_sigma):
 
     """
     Compute a correction factor to properly reinflate the variance after it is
     naturally diminished via data-clipping.  Employ a simple Monte Carlo method
     and standard normal deviates to simulate the data-clipping and obtain the
-    correction factor.
+    correction factor.  This is slow (10 x 1,000,000 deviates), and is kept only
+    as a reference for compute_clip_corr.
     """
 
     var_trials = []
@@ -344,45 +590,108 @@ def compute_clip_corr(n_sigma):
     return corr_fact
 
 
-def fits_data_statistics_with_clipping(input_filename,n_sigma = 3.0,hdu_index = 0,satlev = 50000.0):
+@functools.lru_cache(maxsize=32)
+def compute_clip_corr(n_sigma):
 
     """
-    Compute statistics, with n-sigma outlier rejection for avg,std,nkept,noutliers
-    ignoring NaNs, across all data array dimensions.
-    Assumes the 2D image data are in the specified HDU of the FITS file.
+    Compute a correction factor to properly reinflate the variance after it is
+    naturally diminished via data-clipping.  The data are clipped at
+    median +/- n_sigma * sigma, where sigma = 0.5 * (p84 - p16), so for standard
+    normal deviates the clipping limit is c = n_sigma * z84, and the variance of
+    the clipped (truncated) normal distribution is
+    1 - 2 * c * phi(c) / (2 * Phi(c) - 1).
+    The correction factor is the reciprocal of this variance, and is cached by n_sigma.
     """
 
-    hdul = fits.open(input_filename)
-    data_array = hdul[hdu_index].data
+    n_sigma = float(n_sigma)
 
-    hdul.close()
+    if n_sigma <= 0.0:
+        raise ValueError(f"n_sigma must be positive ({n_sigma})")
+
+    std_normal = NormalDist()
+
+    z84 = std_normal.inv_cdf(0.84)
+    c = n_sigma * z84
+
+    var = 1.0 - 2.0 * c * std_normal.pdf(c) / (2.0 * std_normal.cdf(c) - 1.0)
+
+    corr_fact = 1.0 / var
+
+    return corr_fact
+
+
+def compute_percentiles_by_partition(a,percentiles):
+
+    """
+    Compute percentiles of a 1D array with a single partition-based selection,
+    using the same linear interpolation between closest ranks as np.percentile.
+    The input array is partially reordered in place.
+    """
+
+    n = a.size
+    positions = [0.01 * p * (n - 1) for p in percentiles]
+
+    kth = set()
+    for pos in positions:
+        kth.add(int(math.floor(pos)))
+        kth.add(int(math.ceil(pos)))
+
+    a.partition(sorted(kth))
+
+    values = []
+    for pos in positions:
+        lo = int(math.floor(pos))
+        hi = int(math.ceil(pos))
+        frac = pos - lo
+        values.append(a[lo] + (a[hi] - a[lo]) * frac)
+
+    return values
+
+
+def data_statistics_with_clipping(data_array,n_sigma = 3.0,satlev = 50000.0):
+
+    """
+    Compute statistics, with n-sigma outlier rejection for avg,std,nkept,noutliers
+    ignoring NaNs, across all data array dimensions, for an already-loaded data array.
+    The median, 16th and 84th percentiles come from one partition-based selection over
+    the non-NaN data, and the clipped statistics are computed from the data kept,
+    so no masked array is made.  The input data array is not modified.
+    """
 
     cf = compute_clip_corr(n_sigma)
     sqrtcf = np.sqrt(cf)
 
-    a = np.array(data_array)
-
-    image_size = np.shape(a)
-    pixcount = image_size[0] * image_size[1]
-
-    datamin = np.nanmin(a)
-    datamax = np.nanmax(a)
-    nancount = np.isnan(a).sum()
-    satcount = np.greater_equal(a,satlev).sum()
-    med = np.nanmedian(a)
-    p16 = np.nanpercentile(a,16)
-    p84 = np.nanpercentile(a,84)
-    sigma = 0.5 * (p84 - p16)
-    mdmsg = med - n_sigma * sigma
-    b = np.less(a,mdmsg)
-    mdpsg = med + n_sigma * sigma
-    c = np.greater(a,mdpsg)
-    d = np.where(np.isnan(a),True,False)
-    mask = b | c | d
-    mx = ma.masked_array(a, mask)
-    avg = ma.getdata(mx.mean())
-    std = ma.getdata(mx.std()) * sqrtcf
-    nkept = ma.getdata(mx.count())
+    a = np.asarray(data_array)
+
+    pixcount = a.size
+
+    satcount = np.count_nonzero(a >= satlev)
+
+
+    # Copy of the non-NaN data, which is reordered by the partition-based selection.
+
+    finite_data = a[~np.isnan(a)].ravel()
+    nancount = pixcount - finite_data.size
+
+    if finite_data.size == 0:
+        datamin = datamax = med = sigma = avg = std = np.nan
+        nkept = 0
+    else:
+        datamin = finite_data.min()
+        datamax = finite_data.max()
+        p16,med,p84 = compute_percentiles_by_partition(finite_data,[16.0,50.0,84.0])
+        sigma = 0.5 * (p84 - p16)
+        mdmsg = med - n_sigma * sigma
+        mdpsg = med + n_sigma * sigma
+
+        keep = finite_data >= mdmsg
+        keep &= finite_data <= mdpsg
+        kept_data = finite_data[keep]
+
+        nkept = kept_data.size
+        avg = kept_data.mean(dtype=np.float64)
+        std = kept_data.std(dtype=np.float64) * sqrtcf
+
     noutliers = pixcount - nancount - nkept
 
     # Return data dictionary to simplify interface.
@@ -404,6 +713,134 @@ def fits_data_statistics_with_clipping(input_filename,n_sigma = 3.0,hdu_index =
     return stats
 
 
+def fits_data_statistics_with_clipping(input_filename,n_sigma = 3.0,hdu_index = 0,satlev = 50000.0):
+
+    """
+    Compute statistics, with n-sigma outlier rejection for avg,std,nkept,noutliers
+    ignoring NaNs, across all data array dimensions.
+    Assumes the 2D image data are in the specified HDU of the FITS file.
+    See data_statistics_with_clipping for an already-loaded data array.
+    """
+
+    with fits.open(input_filename) as hdul:
+        stats = data_statistics_with_clipping(hdul[hdu_index].data,n_sigma,satlev)
+
+    return stats
+
+
+class ImageWorkspace:
+
+    '''
+    Named image-data arrays and FITS headers kept in memory across pipeline steps.  Each image is read
+    from its FITS file once (load), or added from an array computed in memory (add), and is then modified
+    with the ndarray-level helpers (e.g., scale_data, replace_nans_in_data, restore_nans_in_data,
+    apply_subpixel_orthogonal_offsets_to_data, normalize_data) instead of their FITS-file versions,
+    which read and rewrite the whole FITS file (with checksums) for every step.  An image is written
+    to its FITS file (PRIMARY HDU, with checksums) only when write is called, i.e., when an external
+    tool needs the file or the file is uploaded as a product, and only if it was modified since it was
+    loaded or last written.
+    '''
+
+    def __init__(self):
+
+        self.images = {}
+        self.n_reads = 0
+        self.n_writes = 0
+
+
+    def load(self,name,fits_file,hdu_index=0):
+
+        '''
+        Read image data and header from the given HDU of FITS file, and return the image data.
+        '''
+
+        with fits.open(fits_file) as hdul:
+            data = np.array(hdul[hdu_index].data)
+            header = hdul[hdu_index].header.copy()
+
+        self.images[name] = {"data": data,"header": header,"fits_file": fits_file,"modified": False}
+        self.n_reads += 1
+
+        return data
+
+
+    def add(self,name,data,header,fits_file):
+
+        '''
+        Add image computed in memory, to be written to fits_file, with a copy of the given header.
+        Return the image data.
+        '''
+
+        self.images[name] = {"data": data,"header": header.copy(),"fits_file": fits_file,"modified": True}
+
+        return data
+
+
+    def get_data(self,name):
+
+        return self.images[name]["data"]
+
+
+    def get_header(self,name):
+
+        '''
+        Return the header of the image, which may be modified in place (e.g., by apply_subpixel_orthogonal_offsets_to_data).
+        '''
+
+        return self.images[name]["header"]
+
+
+    def set_data(self,name,data):
+
+        '''
+        Replace the image data, and mark the image as modified.
+        '''
+
+        self.images[name]["data"] = data
+        self.images[name]["modified"] = True
+
+
+    def write(self,name,fits_file=None):
+
+        '''
+        Write image to its FITS file (or to the given FITS file) if it was modified since it was loaded or last written.
+        Return the FITS filename.
+        '''
+
+        image = self.images[name]
+
+        if fits_file is None:
+            fits_file = image["fits_file"]
+        elif fits_file != image["fits_file"]:
+            image["modified"] = True
+
+        if image["modified"]:
+
+            print(f"ImageWorkspace: writing image {name} to FITS file = {fits_file}")
+
+            fits.PrimaryHDU(header=image["header"],data=image["data"]).writeto(fits_file,overwrite=True,checksum=True)
+
+            image["fits_file"] = fits_file
+            image["modified"] = False
+            self.n_writes += 1
+
+        return fits_file
+
+
+    def remove(self,name):
+
+        '''
+        Release the memory of the image.  The image is not written.
+        '''
+
+        del self.images[name]
+
+
+    def clear(self):
+
+        self.images = {}
+
+
 #-------------------------------------------------------------------
 # Given pixel location (x, y) on a tangent plane, compute the corresponding
 # sky position (R.A., Dec.), neglecting geometric distortion.
@@ -594,6 +1031,25 @@ def compute_xyz(ra,dec):
     return x,y,z
 
 
+#-------------------------------------------------------------------
+# Given arrays of (R.A., Dec.), compute array of shape (n, 3)
+# of (x, y, z) on the unit sphere.  Vectorized version of compute_xyz.
+
+def compute_xyz_array(ra,dec):
+
+    alpha = np.radians(np.asarray(ra,dtype=np.float64))
+    delta = np.radians(np.asarray(dec,dtype=np.float64))
+
+    cosdelta = np.cos(delta)
+
+    xyz = np.empty((alpha.size,3),dtype=np.float64)
+    xyz[:,0] = cosdelta * np.cos(alpha)
+    xyz[:,1] = cosdelta * np.sin(alpha)
+    xyz[:,2] = np.sin(delta)
+
+    return xyz
+
+
 #------------------------------------------
 # Subroutine to compute angular separation,
 # in degrees, for any two sky positions.
@@ -986,6 +1442,14 @@ def convert_from_sip_to_pv(input_fits_file_with_sip,hdu_index,output_fits_file_w
     hdul.close()
 
 
+#-------------------------------------------------------------------
+# Scale image data array.  Returns new float32 array.
+
+def scale_data(data_array,scale_factor):
+
+    return (np.array(data_array) * scale_factor).astype(np.float32)
+
+
 #-------------------------------------------------------------------
 # Scale image data in input FITS file and write new output FITS file.
 
@@ -993,18 +1457,12 @@ def scale_image_data(input_fits_file,scale_factor,output_fits_file):
     '''
     Scale image data in input FITS file and write new output FITS file.
     Assume image data are in PRIMARY HDU.
+    See scale_data for an already-loaded data array.
     '''
 
     hdul = fits.open(input_fits_file)
 
-    data = hdul[0].data
-
-    np_data = np.array(data)
-    scaled_data = np_data * scale_factor
-
-    hdul[0].data = scaled_data
-
-    new_hdu = fits.PrimaryHDU(data=hdul[0].data.astype(np.float32),header=hdul[0].header)
+    new_hdu = fits.PrimaryHDU(data=scale_data(hdul[0].data,scale_factor),header=hdul[0].header)
 
     new_hdu.writeto(output_fits_file,overwrite=True,checksum=True)
 
@@ -1403,7 +1861,79 @@ def build_sextractor_command_line_args(sextractor_dict):
     return code_to_execute_args
 
 
-def smooth_image_by_local_clipped_averaging(nx,ny,data,x_window = 3,y_window = 3,n_sigma = 3.0):
+def smooth_image_by_local_clipped_averaging(nx,ny,data,x_window = 3,y_window = 3,n_sigma = 3.0,block_rows = 128):
+
+    """
+    Smooth image by replacing each non-NaN pixel with the n-sigma-clipped average of the non-NaN
+    pixels in the local window centered on it (truncated at the image edges).  Output pixels are NaN
+    where input pixels are NaN.  Vectorized with sliding-window views over a NaN-padded copy of the
+    image, processed in blocks of block_rows rows to bound memory.
+    """
+
+    x_hwin = int((x_window - 1) / 2)
+    y_hwin = int((y_window - 1) / 2)
+
+
+    # Pad with NaNs, so that windows truncated at the image edges simply contain NaNs.
+
+    padded_data = np.full((ny + 2 * y_hwin, nx + 2 * x_hwin), np.nan, dtype=np.float64)
+    padded_data[y_hwin:y_hwin + ny, x_hwin:x_hwin + nx] = data[0:ny, 0:nx]
+
+    windows = sliding_window_view(padded_data, (2 * y_hwin + 1, 2 * x_hwin + 1))
+
+    smooth_image = np.zeros(shape=(ny, nx))
+    smooth_image[:] = np.nan                                              # Initialize 2-D array of NaNs
+
+    for i_start in range(0, ny, block_rows):
+
+        i_end = min(i_start + block_rows, ny)
+
+        a = windows[i_start:i_end].reshape(i_end - i_start, nx, -1)
+
+
+        # Percentiles over the non-NaN values of each window, with the same linear interpolation
+        # as np.percentile.  Sorting puts the NaNs last, so the first n values of each window are valid.
+        # This avoids np.nanpercentile, which loops over windows in Python when an axis is given.
+
+        a_sorted = np.sort(a, axis=-1)
+        n = np.count_nonzero(~np.isnan(a_sorted), axis=-1)
+        last = np.maximum(n - 1, 0)
+
+        percentiles = []
+        for q in (16.0, 50.0, 84.0):
+            pos = 0.01 * q * last
+            lo = np.floor(pos).astype(np.intp)
+            hi = np.ceil(pos).astype(np.intp)
+            v_lo = np.take_along_axis(a_sorted, lo[..., np.newaxis], axis=-1)[..., 0]
+            v_hi = np.take_along_axis(a_sorted, hi[..., np.newaxis], axis=-1)[..., 0]
+            percentiles.append(v_lo + (v_hi - v_lo) * (pos - lo))
+
+        p16,med,p84 = percentiles
+
+        sigma = 0.5 * (p84 - p16)
+        mdmsg = med - n_sigma * sigma
+        mdpsg = med + n_sigma * sigma
+
+        keep = a >= mdmsg[..., np.newaxis]                                # NaNs are never kept
+        keep &= a <= mdpsg[..., np.newaxis]
+
+        nkept = keep.sum(axis=-1)
+        sums = np.where(keep, a, 0.0).sum(axis=-1)
+
+        block_data = data[i_start:i_end, 0:nx]
+        valid = ~np.isnan(block_data) & (nkept > 0)
+
+        smooth_image[i_start:i_end][valid] = sums[valid] / nkept[valid]
+
+    return smooth_image
+
+
+def smooth_image_by_local_clipped_averaging_loop(nx,ny,data,x_window = 3,y_window = 3,n_sigma = 3.0):
+
+    """
+    Previous per-pixel loop implementation of smooth_image_by_local_clipped_averaging,
+    kept only as a regression reference (see scripts/benchmark_smooth_image_by_local_clipped_averaging.py).
+    """
 
     x_hwin = int((x_window - 1) / 2)
     y_hwin = int((y_window - 1) / 2)
@@ -1498,6 +2028,69 @@ def parse_ascii_text_sextractor_catalog(catalog_filename,params_filename,params_
     return r
 
 
+def parse_sextractor_catalog(catalog_filename,params_filename,params_to_parse):
+
+    '''
+    Method to parse SExtractor catalog for select columns (no row filtering done here), returning a dictionary
+    of 1-D float64 NumPy arrays keyed by parameter name, in one bulk read instead of line by line.
+    Both ASCII text (ASCII or ASCII_HEAD) and FITS (FITS_LDAC or FITS_1.0) catalogs are supported;
+    the catalog type is detected from the file contents.
+    As in parse_ascii_text_sextractor_catalog, SExtractor parameters like FLUX_RADIUS(1) are translated into
+    FLUX_RADIUS_1, and such translated parameter names must be inputted to this method via the params_to_parse list.
+    For FITS catalogs, FLUX_RADIUS_1 is the first element of the vector column FLUX_RADIUS (params_filename is not used).
+    '''
+
+    with open(catalog_filename, 'rb') as file:
+        is_fits = file.read(6) == b"SIMPLE"
+
+    vals = {}
+
+    if is_fits:
+
+        with fits.open(catalog_filename) as hdul:
+
+            # The object table is in extension LDAC_OBJECTS for FITS_LDAC catalogs, and in the first extension for FITS_1.0 catalogs.
+
+            if "LDAC_OBJECTS" in hdul:
+                data = hdul["LDAC_OBJECTS"].data
+            else:
+                data = hdul[1].data
+
+            for p in params_to_parse:
+
+                string_match = re.match(r"^(.+)_(\d+)$", p)
+
+                if p in data.names or string_match is None:
+                    vals[p] = np.array(data[p],dtype=np.float64)
+                else:
+                    col = np.asarray(data[string_match.group(1)])
+                    element = int(string_match.group(2)) - 1
+                    vals[p] = np.array(col[:,element] if col.ndim == 2 else col,dtype=np.float64)
+
+        return vals
+
+    with open(params_filename, 'r') as file:
+        idx = {}
+        for i,line in enumerate(file):
+            param = line.strip()
+            param = param.replace("(","_")
+            param = param.replace(")","")
+            idx[param] = i
+
+    usecols = [idx[p] for p in params_to_parse]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore",UserWarning)      # Empty catalog.
+        data = np.loadtxt(catalog_filename,dtype=np.float64,comments="#",usecols=usecols,ndmin=2)
+
+    data = data.reshape(-1,len(usecols))
+
+    for j,p in enumerate(params_to_parse):
+        vals[p] = data[:,j]
+
+    return vals
+
+
 #-------------------------------------------------------------------
 # Compute PSF-fit catalog with photutils.
 
@@ -1559,12 +2152,16 @@ def compute_psf_catalog(n_clip_sigma,
     print("input_psf_filename =",input_psf_filename)
     print("output_psfcat_residual_filename =",output_psfcat_residual_filename)
 
-    hdu_index = 0
+    hdul_image = fits.open(input_img_filename)
+    hdr_image = hdul_image[0].header
+    data_image = hdul_image[0].data
+
+    hdul_image.close()
+
     saturation_level_image_rate = 999999
-    stats_image = fits_data_statistics_with_clipping(input_img_filename,\
-                                                     n_clip_sigma,\
-                                                     hdu_index,\
-                                                     saturation_level_image_rate)
+    stats_image = data_statistics_with_clipping(data_image,\
+                                                n_clip_sigma,\
+                                                saturation_level_image_rate)
 
     avg_image = stats_image["clippedavg"]
     std_image = stats_image["clippedstd"]
@@ -1582,12 +2179,6 @@ def compute_psf_catalog(n_clip_sigma,
     threshold = n_thresh_sigma * std_image
     print ("threshold =",threshold)
 
-    hdul_image = fits.open(input_img_filename)
-    hdr_image = hdul_image[0].header
-    data_image = hdul_image[0].data
-
-    hdul_image.close()
-
     hdul_uncert = fits.open(input_unc_filename)
     hdr_uncert = hdul_uncert[0].header
     data_uncert = hdul_uncert[0].data
@@ -1835,6 +2426,83 @@ def list_aws_batch_jobs(batch_client,next_token,job_queue,job_name_wildcard):
     return response
 
 
+##################################################################################################
+# Pack boolean mask of NaN pixel locations (np.packbits, 1 bit per pixel) into dictionary with
+# the packed bits, the image shape, and the number of NaNs.  The packed mask of a 4089x4089 image
+# is 2 MB, regardless of the number of NaNs (the row and column indices of np.where take 16 bytes
+# per NaN, i.e., 267 MB for a fully masked image).
+##################################################################################################
+
+def pack_nan_mask(nan_mask):
+
+    nan_mask = np.asarray(nan_mask,dtype=bool)
+
+    packed_nan_mask = {}
+    packed_nan_mask["packed_bits"] = np.packbits(nan_mask,axis=None)
+    packed_nan_mask["shape"] = nan_mask.shape
+    packed_nan_mask["nan_count"] = int(np.count_nonzero(nan_mask))
+
+    return packed_nan_mask
+
+
+##################################################################################################
+# Unpack dictionary returned by pack_nan_mask into boolean mask of NaN pixel locations.
+##################################################################################################
+
+def unpack_nan_mask(packed_nan_mask):
+
+    shape = tuple(packed_nan_mask["shape"])
+    size = int(np.prod(shape))
+
+    return np.unpackbits(packed_nan_mask["packed_bits"],count=size).view(bool).reshape(shape)
+
+
+##################################################################################################
+# Save packed NaN mask (see pack_nan_mask) to compressed NumPy .npz file, e.g., alongside the
+# image product it belongs to, and load it back.
+##################################################################################################
+
+def save_nan_mask(packed_nan_mask,filename):
+
+    np.savez_compressed(filename,
+                        packed_bits=packed_nan_mask["packed_bits"],
+                        shape=np.array(packed_nan_mask["shape"]),
+                        nan_count=np.array(packed_nan_mask["nan_count"]))
+
+
+def load_nan_mask(filename):
+
+    with np.load(filename) as npz:
+
+        packed_nan_mask = {}
+        packed_nan_mask["packed_bits"] = npz["packed_bits"]
+        packed_nan_mask["shape"] = tuple(int(n) for n in npz["shape"])
+        packed_nan_mask["nan_count"] = int(npz["nan_count"])
+
+    return packed_nan_mask
+
+
+##################################################################################################
+# Replace NaNs, if any, with given value in image data array.  Returns new float32 data array
+# and packed mask of NaN pixel locations (see pack_nan_mask), or the input data array and None
+# if there are no NaNs.
+##################################################################################################
+
+def replace_nans_in_data(data_array,value):
+
+    nan_mask = np.isnan(data_array)
+    nan_count = np.count_nonzero(nan_mask)
+
+    print(f"nan_count = {nan_count}")
+
+    if nan_count == 0:
+        return data_array,None
+
+    new_image_array = np.where(nan_mask,value,data_array).astype(np.float32)
+
+    return new_image_array,pack_nan_mask(nan_mask)
+
+
 ##################################################################################################
 # Replace NaNs, if any, with given value in image of specified FITS file.
 ##################################################################################################
@@ -1848,25 +2516,18 @@ def replace_nans_with_value(fits_file,value):
 
     hdul = fits.open(fits_file)
     hdr = hdul[0].header
-    data = hdul[0].data
-    data_array = np.array(data)
 
 
     # Replace NaNs, if there are any, in image with given value.
 
-    nan_mask = np.isnan(data_array)
-    nan_count = nan_mask.sum()
-
-    print(f"nan_count = {nan_count}")
+    new_image_array,packed_nan_mask = replace_nans_in_data(np.array(hdul[0].data),value)
 
-    if np.any(nan_mask):
-        row_indices, col_indices = np.where(nan_mask)
-        new_image_array = np.where(nan_mask,value,data_array)
+    if packed_nan_mask is not None:
 
 
         # Replace primary HDU with new image data
 
-        hdul[0] = fits.PrimaryHDU(header=hdr,data=new_image_array.astype(np.float32))
+        hdul[0] = fits.PrimaryHDU(header=hdr,data=new_image_array)
 
 
         # Write output FITS file.
@@ -1876,9 +2537,9 @@ def replace_nans_with_value(fits_file,value):
         hdul.close()
 
 
-        # Return row and columns indices of NaNs.
+        # Return packed mask of NaN pixel locations.
 
-        return row_indices,col_indices
+        return packed_nan_mask
 
 
     # Return None if there are no NaNs.
@@ -1887,40 +2548,43 @@ def replace_nans_with_value(fits_file,value):
 
 
 ##################################################################################################
-# Restore NaNs in image, if any, of specified FITS file, at specified pixel locations.
+# Restore NaNs in image data array at the pixel locations of packed NaN mask (returned by
+# replace_nans_in_data or replace_nans_with_value, or loaded with load_nan_mask), with a single
+# boolean-index assignment.  Returns new float32 data array, or the input data array if
+# packed_nan_mask is None.
 ##################################################################################################
 
-def restore_nans(fits_file,nan_indices):
+def restore_nans_in_data(data_array,packed_nan_mask):
 
-    if nan_indices:
+    if not packed_nan_mask:
+        return data_array
 
-        print(f"Restoring NaNs in image of FITS file = {fits_file}")
+    new_image_array = np.array(data_array,dtype=np.float32)
+    new_image_array[unpack_nan_mask(packed_nan_mask)] = np.nan
 
-        row_indices, col_indices = nan_indices
+    return new_image_array
 
 
-        # Read input FITS file.
+##################################################################################################
+# Restore NaNs in image, if any, of specified FITS file, at pixel locations of packed NaN mask.
+##################################################################################################
 
-        hdul = fits.open(fits_file)
-        hdr = hdul[0].header
-        data = hdul[0].data
+def restore_nans(fits_file,packed_nan_mask):
 
+    if packed_nan_mask:
 
-        # Put NaNs back into image,
+        print(f"Restoring NaNs in image of FITS file = {fits_file}")
 
-        num_nans = len(row_indices)
 
-        for idx in range(num_nans):
-            i = row_indices[idx]
-            j = col_indices[idx]
-            data[i][j] = np.nan
+        # Read input FITS file.
 
-        new_image_array = np.array(data)
+        hdul = fits.open(fits_file)
+        hdr = hdul[0].header
 
 
-        # Replace primary HDU with new image data
+        # Put NaNs back into image, and replace primary HDU with new image data
 
-        hdul[0] = fits.PrimaryHDU(header=hdr,data=new_image_array.astype(np.float32))
+        hdul[0] = fits.PrimaryHDU(header=hdr,data=restore_nans_in_data(hdul[0].data,packed_nan_mask))
 
 
         # Write output FITS file.
@@ -1935,17 +2599,193 @@ def restore_nans(fits_file,nan_indices):
     return None
 
 
+#####################################################################################################
+# Compute 1-D overlap weights for shifting an image axis by an integer number of subpixels, where each
+# pixel is divided into scale_factor subpixels.  Output pixel i sums the subpixels in the window
+# [max(0,i*scale_factor+offset), min(n*scale_factor,start+scale_factor)) of the upsampled axis, which
+# overlaps at most two input pixels, p0 = start // scale_factor and p0 + 1.  Returns the indices of the
+# two input pixels and the numbers of subpixels of overlap with each.
+#####################################################################################################
+
+def compute_subpixel_overlap_weights(n,offset,scale_factor):
+
+    new_n = n * scale_factor
+
+    starts = np.maximum(0,np.arange(n) * scale_factor + offset)
+    ends = np.minimum(new_n,starts + scale_factor)
+
+    p0 = np.minimum(starts // scale_factor,n - 1)
+    p1 = np.minimum(p0 + 1,n - 1)
+
+    w0 = np.clip(np.minimum(ends,(p0 + 1) * scale_factor) - starts,0,None)
+    w1 = np.clip(ends - (p0 + 1) * scale_factor,0,None)
+
+    return p0,p1,w0,w1
+
+
+#####################################################################################################
+# Shift image data by integer numbers of subpixels in x and y, where each pixel is divided into
+# scale_factor x scale_factor subpixels of equal value, and sum subpixels back into pixels.
+# This is separable, so the shift is applied as 1-D overlap weights along y and then along x,
+# without materializing the upsampled image.  Pixels with zero overlap contribute nothing, even if NaN.
+#####################################################################################################
+
+def shift_image_data_by_subpixels(data_array,x_offset,y_offset,scale_factor=6):
+
+    data_array = np.asarray(data_array,dtype=np.float64)
+    naxis2,naxis1 = data_array.shape
+
+    p0,p1,w0,w1 = compute_subpixel_overlap_weights(naxis2,y_offset,scale_factor)
+
+    shifted = np.where(w0[:,None] > 0,w0[:,None] * data_array[p0,:],0.0)
+    shifted += np.where(w1[:,None] > 0,w1[:,None] * data_array[p1,:],0.0)
+
+    p0,p1,w0,w1 = compute_subpixel_overlap_weights(naxis1,x_offset,scale_factor)
+
+    dn_data = np.where(w0 > 0,w0 * shifted[:,p0],0.0)
+    dn_data += np.where(w1 > 0,w1 * shifted[:,p1],0.0)
+
+    dn_data /= scale_factor ** 2
+
+    return dn_data
+
+
+#####################################################################################################
+# Shift image data by fractional pixel offsets with cubic-spline interpolation.  NaNs are set to zero
+# for the interpolation, and output pixels whose nearest input pixel is NaN are set to NaN.
+#####################################################################################################
+
+def shift_image_data_by_spline(data_array,dx,dy):
+
+    data_array = np.asarray(data_array,dtype=np.float64)
+
+    nan_mask = np.isnan(data_array)
+
+    dn_data = shift(np.where(nan_mask,0.0,data_array),(-dy,-dx),order=3,mode='constant',cval=0.0)
+
+    if np.any(nan_mask):
+        shifted_nan_mask = shift(nan_mask.astype(np.float64),(-dy,-dx),order=0,mode='constant',cval=0.0)
+        dn_data[shifted_nan_mask > 0.5] = np.nan
+
+    return dn_data
+
+
 #####################################################################################################
 # Apply subpixel orthogonal offsets to image by upsampling image, shifting in x and y in subpixels,
 # and then downsampling image.
+# Offsets dx and dy are in units of input pixels.
+# Positive offsets shift image left and down w.r.t. image-viewing screen.
+# The method parameter selects the shift engine:
+#    box = integer-subpixel box shift with upsampling factor of six (default), computed with
+#          separable overlap weights (see shift_image_data_by_subpixels); same result as
+#          apply_subpixel_orthogonal_offsets_upsampled, without the 36x larger upsampled image.
+#    spline = cubic-spline interpolation by the exact fractional offsets.
+#####################################################################################################
+
+def apply_subpixel_orthogonal_offsets_to_data(data_array,hdr,dx,dy,method="box"):
+
+    print(f"Sub apply_subpixel_orthogonal_offsets_to_data: dx = {dx}, dy = {dy}, method = {method}")
+
+    if (abs(dx) > 0.1 and abs(dx) < 5.0) or (abs(dy) > 0.1 and abs(dy) < 5.0):
+
+        print(f"Applying subpixel offsets dx = {dx}, dy = {dy}")
+
+
+        # Make correction to CRPIX1 and CRPIX2.
+
+        crpix1 = hdr["CRPIX1"]
+        crpix2 = hdr["CRPIX2"]
+        hdr["CRPIX1"] = crpix1 - dx
+        hdr["CRPIX2"] = crpix2 - dy
+
+
+        # Apply the subpixel offsets.
+
+        if method == "box":
+
+            scale_factor = 6
+
+
+            # Compute nearest integer pixel offsets in upsampled image.
+
+            x_offset = int(round(dx * scale_factor))
+            y_offset = int(round(dy * scale_factor))
+
+            print("Upsampled image x and y offsets =",x_offset,y_offset)
+
+            return shift_image_data_by_subpixels(data_array,x_offset,y_offset,scale_factor)
+
+        elif method == "spline":
+
+            return shift_image_data_by_spline(data_array,dx,dy)
+
+        else:
+            print(f"*** Error: Unsupported method ({method}) in apply_subpixel_orthogonal_offsets; quitting...")
+            exit(64)
+
+
+    # Return None if the offsets are too small or too large to be applied.
+
+    return None
+
+
+#####################################################################################################
+# Apply subpixel orthogonal offsets to image in FITS file (see apply_subpixel_orthogonal_offsets_to_data),
+# and write the shifted image to output FITS file (or overwrite input FITS file).
+#####################################################################################################
+
+def apply_subpixel_orthogonal_offsets(fits_file,dx,dy,output_fits_file=None,method="box"):
+
+    print(f"Sub apply_subpixel_orthogonal_offsets: dx = {dx}, dy = {dy} fits_file = {fits_file}, method = {method}")
+
+
+    # Read input FITS file.
+
+    hdul = fits.open(fits_file)
+    hdr = hdul[0].header
+
+    np_data = apply_subpixel_orthogonal_offsets_to_data(np.array(hdul[0].data),hdr,dx,dy,method)
+
+    if np_data is not None:
+
+
+        # Create a new primary HDU with the new image data
+
+        hdul[0] = fits.PrimaryHDU(header=hdr,data=np_data)
+
+
+        # Write output FITS file.
+
+        if output_fits_file is None:
+            output_fits_file = fits_file
+            print(f"Overwriting input FITS file = {output_fits_file}")
+        else:
+            print(f"Writing new FITS file = {output_fits_file}")
+
+        hdul.writeto(output_fits_file,overwrite=True,checksum=True)
+
+    hdul.close()
+
+
+    # Return None implicitly.
+
+    return
+
+
+#####################################################################################################
+# Previous implementation of apply_subpixel_orthogonal_offsets (box method), which materializes the
+# upsampled image (36 times the input image size in float64) and loops over all pixels in Python.
+# Kept only as a reference for regression testing (see scripts/benchmark_apply_subpixel_orthogonal_offsets.py).
+# Apply subpixel orthogonal offsets to image by upsampling image, shifting in x and y in subpixels,
+# and then downsampling image.
 # Assume there are no NaNs in the input image (as special handling would need to be included).
 # Offsets dx and dy are in units of input pixels.
 # Positive offsets shift image left and down w.r.t. image-viewing screen.
 #####################################################################################################
 
-def apply_subpixel_orthogonal_offsets(fits_file,dx,dy,output_fits_file=None):
+def apply_subpixel_orthogonal_offsets_upsampled(fits_file,dx,dy,output_fits_file=None):
 
-    print(f"Sub apply_subpixel_orthogonal_offsets: dx = {dx}, dy = {dy} fits_file = {fits_file}")
+    print(f"Sub apply_subpixel_orthogonal_offsets_upsampled: dx = {dx}, dy = {dy} fits_file = {fits_file}")
 
     if (abs(dx) > 0.1 and abs(dx) < 5.0) or (abs(dy) > 0.1 and abs(dy) < 5.0):
 
@@ -2198,9 +3038,24 @@ def computeSkyCoordsFromPixelCoords(filename_sciimage_image,x_list,y_list,hdu_in
 
 
 #####################################################################################################
-# Normalize the FITS image data.
+# Normalize the image data (sum of 1), and record the final sum in the NRMLZSUM keyword of the header.
+# The normalize_data version operates on an already-loaded data array and header.
 #####################################################################################################
 
+def normalize_data(data_array,hdr):
+
+    data_output = np.array(data_array)
+    global_sum = np.sum(data_output)
+    data_output /= global_sum
+
+    final_sum = np.sum(data_output)
+    print("Method normalize_data: final_sum =",final_sum)
+
+    hdr["NRMLZSUM"] = (final_sum, "Image sum after normalizing")
+
+    return data_output
+
+
 def normalize_image(fits_file,hdu_index,output_fits_file=None):
 
     print(f"Normalizing image in input FITS file = {fits_file}")
@@ -2214,22 +3069,13 @@ def normalize_image(fits_file,hdu_index,output_fits_file=None):
     hdul.close()
 
 
-    # Normalize the image.
+    # Normalize the image (see normalize_data for an already-loaded data array).
 
-    data_output = np.array(data)
-    global_sum = np.sum(data_output)
-    data_output /= global_sum
-
-    final_sum = np.sum(data_output)
-    print("Method normalize_image: final_sum =",final_sum)
-
-    hdr["NRMLZSUM"] = (final_sum, "Image sum after normalizing")
+    np_data = normalize_data(data,hdr)
 
 
     # Create a new primary HDU with the new image data
 
-    np_data = np.array(data_output)
-
     new_hdu = fits.PrimaryHDU(header=hdr,data=np_data)
 
 
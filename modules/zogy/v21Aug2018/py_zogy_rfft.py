@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+
+############################################################
+# Single-precision, real-FFT version of py_zogy.py.
+# Same ZOGY algebra (Zackay, Ofek, and Gal-Yam 2016,
+# http://arxiv.org/abs/1601.02655), but:
+#   - rfft2/irfft2 on float32 images, so all Fourier-space
+#     arrays are complex64 half planes (1/8 the size of the
+#     complex128 full planes in py_zogy.py);
+#   - intermediates are deleted as soon as they are no
+#     longer needed;
+#   - number of FFTW threads is selectable, and FFTW wisdom
+#     can be loaded from and saved to a file, so that the
+#     plans for the fixed image shape are measured once and
+#     reused by later jobs;
+#   - py_zogy_arrays is an in-memory entry point taking
+#     ndarrays, next to the file-based py_zogy and the CLI.
+############################################################
+
+import os, sys, pickle
+import numpy as np
+
+import astropy.io.fits as fits
+
+import pyfftw
+import pyfftw.interfaces.numpy_fft as fft
+pyfftw.interfaces.cache.enable()
+pyfftw.interfaces.cache.set_keepalive_time(1.)
+
+
+def load_fftw_wisdom(wisdom_file):
+
+    '''
+    Import FFTW wisdom from a pickle file written by save_fftw_wisdom.
+    Return True if wisdom was imported, False if the file does not exist or cannot be read.
+    '''
+
+    if wisdom_file is None or not os.path.exists(wisdom_file):
+        return False
+
+    try:
+        with open(wisdom_file, 'rb') as f:
+            wisdom = pickle.load(f)
+        success = pyfftw.import_wisdom(wisdom)
+        print(f"load_fftw_wisdom: Imported FFTW wisdom from {wisdom_file} (success = {success})")
+        return all(success)
+
+    except Exception as e:
+        print(f"*** Warning: Could not import FFTW wisdom from {wisdom_file} ({e}); continuing without it...")
+        return False
+
+
+def save_fftw_wisdom(wisdom_file):
+
+    '''
+    Export the accumulated FFTW wisdom to a pickle file.
+    '''
+
+    with open(wisdom_file, 'wb') as f:
+        pickle.dump(pyfftw.export_wisdom(), f)
+
+    print(f"save_fftw_wisdom: Exported FFTW wisdom to {wisdom_file}")
+
+
+def _abs2(a):
+
+    # Squared modulus of a complex64 array, as float32.
+
+    return a.real**2 + a.imag**2
+
+
+def py_zogy_arrays(N, R, P_N_small, P_R_small, S_N, S_R, SN, SR, dx=0.25, dy=0.25,
+                   threads=1, planner_effort='FFTW_ESTIMATE'):
+
+    '''In-memory ZOGY image subtraction in single precision with real FFTs.
+    As with py_zogy.py, assume images have been aligned,
+    background subtracted, and gain-matched.
+
+    Arguments:
+    N: New image (2D array)
+    R: Reference image (2D array, same shape as N)
+    P_N_small: PSF of New image (2D array, odd dimensions)
+    P_R_small: PSF of Reference image (2D array, same shape as P_N_small)
+    S_N: 2D Uncertainty (sigma) of New image (2D array)
+    S_R: 2D Uncertainty (sigma) of Reference image (2D array)
+    SN: Average uncertainty (sigma) of New image
+    SR: Average uncertainty (sigma) of Reference image
+    dx: Astrometric uncertainty (sigma) in x coordinate
+    dy: Astrometric uncertainty (sigma) in y coordinate
+    threads: Number of FFTW threads
+    planner_effort: FFTW planner effort (e.g., FFTW_ESTIMATE, or FFTW_MEASURE with wisdom)
+
+    Returns (all float32):
+    D: Subtracted image
+    P_D: PSF of subtracted image
+    S_corr: Corrected subtracted image
+    '''
+
+    shape = N.shape
+
+    def rfft2(a):
+        return fft.rfft2(a, threads=threads, planner_effort=planner_effort)
+
+    def irfft2(a):
+        return fft.irfft2(a, s=shape, threads=threads, planner_effort=planner_effort, overwrite_input=True)
+
+    N = np.asarray(N, dtype=np.float32)
+    R = np.asarray(R, dtype=np.float32)
+
+    # Place PSF at center of image with same size as new / reference
+    idx0 = slice((shape[0]+1)//2 - P_N_small.shape[0]//2, (shape[0]+1)//2 + P_N_small.shape[0]//2 + 1)
+    idx1 = slice((shape[1]+1)//2 - P_N_small.shape[1]//2, (shape[1]+1)//2 + P_N_small.shape[1]//2 + 1)
+
+    P = np.zeros(shape, dtype=np.float32)
+
+    # Shift the PSF to the origin so it will not introduce a shift
+    P[idx0,idx1] = P_N_small
+    P_N_hat = rfft2(np.fft.fftshift(P))
+    P[idx0,idx1] = P_R_small
+    P_R_hat = rfft2(np.fft.fftshift(P))
+    del P
+
+    # Fourier Transforms of new and reference images
+    N_hat = rfft2(N)
+    del N
+    R_hat = rfft2(R)
+    del R
+
+    abs2_P_N_hat = _abs2(P_N_hat)
+    abs2_P_R_hat = _abs2(P_R_hat)
+
+    # Denominator of Equation 13, squared
+    D_hat_den2 = np.float32(SN**2) * abs2_P_R_hat + np.float32(SR**2) * abs2_P_N_hat
+
+    # Flux-based zero point (Equation 15)
+    FD = np.float32(1. / np.sqrt(SN**2 + SR**2))
+
+    # Fourier Transform of Difference Image (Equation 13)
+    D_hat_den = np.sqrt(D_hat_den2)
+    D_hat = P_R_hat * N_hat
+    D_hat -= P_N_hat * R_hat
+    D_hat /= D_hat_den
+
+    # Difference Image
+    D = irfft2(D_hat.copy())
+    D /= FD
+
+    # Fourier Transform of PSF of Subtraction Image (Equation 14)
+    P_D_hat = P_R_hat * P_N_hat
+    P_D_hat /= D_hat_den
+    P_D_hat /= FD
+    del D_hat_den
+
+    # Fourier Transform of Score Image (Equation 17)
+    S_hat = np.conj(P_D_hat)
+    S_hat *= D_hat
+    S_hat *= FD
+    del D_hat
+
+    # PSF of Subtraction Image
+    P_D = np.fft.ifftshift(irfft2(P_D_hat))
+    P_D = P_D[idx0,idx1].copy()
+    del P_D_hat
+
+    # Score Image
+    S = irfft2(S_hat)
+    del S_hat
+
+    # Now start calculating Scorr matrix (including all noise terms)
+
+    # Equation 28
+    kr_hat = np.conj(P_R_hat)
+    kr_hat *= abs2_P_N_hat / D_hat_den2
+
+    # Equation 29
+    kn_hat = np.conj(P_N_hat)
+    kn_hat *= abs2_P_R_hat / D_hat_den2
+    del P_N_hat, P_R_hat, abs2_P_N_hat, abs2_P_R_hat, D_hat_den2
+
+    # Astrometric Noise
+    # Equation 31
+    # TODO: Check axis (0/1) vs x/y coordinates
+    N_hat *= kn_hat
+    S_N_ast = irfft2(N_hat)
+    del N_hat
+
+    # Equation 30 (accumulated into the total variance V)
+    V = np.float32(dx**2) * (S_N_ast - np.roll(S_N_ast, 1, axis=1))**2
+    V += np.float32(dy**2) * (S_N_ast - np.roll(S_N_ast, 1, axis=0))**2
+    del S_N_ast
+
+    # Equation 33
+    R_hat *= kr_hat
+    S_R_ast = irfft2(R_hat)
+    del R_hat
+
+    # Equation 32
+    V += np.float32(dx**2) * (S_R_ast - np.roll(S_R_ast, 1, axis=1))**2
+    V += np.float32(dy**2) * (S_R_ast - np.roll(S_R_ast, 1, axis=0))**2
+    del S_R_ast
+
+    # Noise in New Image: Equation 26
+    kn = irfft2(kn_hat)
+    del kn_hat
+    kn *= kn
+    V_hat = rfft2(kn)
+    del kn
+    V_hat *= rfft2(np.square(np.asarray(S_N, dtype=np.float32)))
+    V += irfft2(V_hat)
+    del V_hat
+
+    # Noise in Reference Image: Equation 27
+    kr = irfft2(kr_hat)
+    del kr_hat
+    kr *= kr
+    V_hat = rfft2(kr)
+    del kr
+    V_hat *= rfft2(np.square(np.asarray(S_R, dtype=np.float32)))
+    V += irfft2(V_hat)
+    del V_hat
+
+    # Calculate Scorr
+    np.sqrt(V, out=V)
+    S /= V
+    S_corr = S
+    del V
+
+    return D, P_D, S_corr
+
+
+def py_zogy(Nf, Rf, P_Nf, P_Rf, S_Nf, S_Rf, SN, SR, dx=0.25, dy=0.25,
+            threads=1, wisdom_file=None):
+
+    '''File-based ZOGY image subtraction (same arguments and returns as py_zogy.py),
+    plus the number of FFTW threads and an optional FFTW wisdom file.
+    If wisdom_file is given, its wisdom (if any) is imported, the FFTs are planned with
+    FFTW_MEASURE, and the updated wisdom is written back to the file.
+    '''
+
+    planner_effort = 'FFTW_ESTIMATE'
+
+    if wisdom_file is not None:
+        load_fftw_wisdom(wisdom_file)
+        planner_effort = 'FFTW_MEASURE'
+
+    N = fits.getdata(Nf, 0)
+    R = fits.getdata(Rf, 0)
+    P_N_small = fits.getdata(P_Nf, 0)
+    P_R_small = fits.getdata(P_Rf, 0)
+    S_N = fits.getdata(S_Nf, 0)
+    S_R = fits.getdata(S_Rf, 0)
+
+    D, P_D, S_corr = py_zogy_arrays(N, R, P_N_small, P_R_small, S_N, S_R, SN, SR, dx=dx, dy=dy,
+                                    threads=threads, planner_effort=planner_effort)
+
+    if wisdom_file is not None:
+        save_fftw_wisdom(wisdom_file)
+
+    return D, P_D, S_corr
+
+
+def write_zogy_outputs(Nf, P_Nf, D, P_D, S_corr, Df, P_Df, S_corrf):
+
+    '''Write the ZOGY outputs with the headers of the new image and its PSF, as in py_zogy.py.'''
+
+    tmp = fits.open(Nf)
+
+    # Difference Image
+    tmp[0].data = D.astype(np.float32)
+    tmp.writeto(Df, output_verify="warn", overwrite=True, checksum=True)
+
+    # S_corr image
+    tmp[0].data = S_corr.astype(np.float32)
+    tmp.writeto(S_corrf, output_verify="warn", overwrite=True, checksum=True)
+
+    tmp.close()
+
+    # PSF Image
+    tmp = fits.open(P_Nf)
+    tmp[0].data = P_D.astype(np.float32)
+    tmp.writeto(P_Df, output_verify="warn", overwrite=True, checksum=True)
+
+    tmp.close()
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 12:
+
+        D, P_D, S_corr = py_zogy(sys.argv[1], sys.argv[2], sys.argv[3],
+                                 sys.argv[4], sys.argv[5], sys.argv[6],
+                                 float(sys.argv[7]), float(sys.argv[8]))
+
+        write_zogy_outputs(sys.argv[1], sys.argv[3], D, P_D, S_corr,
+                           sys.argv[9], sys.argv[10], sys.argv[11])
+
+    elif len(sys.argv) == 14 or len(sys.argv) == 16:
+
+        threads = 1
+        wisdom_file = None
+
+        if len(sys.argv) == 16:
+            threads = int(sys.argv[14])
+            if sys.argv[15] != "None":
+                wisdom_file = sys.argv[15]
+
+        D, P_D, S_corr = py_zogy(sys.argv[1], sys.argv[2], sys.argv[3],
+                                 sys.argv[4], sys.argv[5], sys.argv[6],
+                                 float(sys.argv[7]), float(sys.argv[8]),
+                                 dx=float(sys.argv[9]), dy=float(sys.argv[10]),
+                                 threads=threads, wisdom_file=wisdom_file)
+
+        write_zogy_outputs(sys.argv[1], sys.argv[3], D, P_D, S_corr,
+                           sys.argv[11], sys.argv[12], sys.argv[13])
+
+    else:
+
+        print("Usage: python py_zogy_rfft.py <NewImage> <RefImage> <NewPSF> <RefPSF> <NewSigmaImage> <RefSigmaImage> <NewSigmaMode> <RefSigmaMode> <AstUncertX> <AstUncertY> <DiffImage> <DiffPSF> <ScorrImage> [<NumThreads> <FFTWWisdomFile or None>]")
@@ -2,12 +2,11 @@ import os
 from datetime import datetime, timezone
 from dateutil import tz
 import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 to_zone = tz.gettz('America/Los_Angeles')
 
 import database.modules.utils.rapid_db as db
-import modules.utils.rapid_pipeline_subs as util
+import pipeline.launchSciencePipelineSubs as lsps
 
 swname = "awsBatchSubmitJobs_launchSciencePipelinesForDateTimeRange.py"
 swvers = "1.0"
@@ -56,49 +55,6 @@ print("startdatetime =",startdatetime)
 print("enddatetime =",enddatetime)
 
 
-# Custom methods for parallel processing, taking advantage of multiple cores on the job-launcher machine.
-
-def run_script(rid):
-
-    """
-    Load unique value of rid into the environment variable RID.
-    Launch single instance of script with given environment-variable setting for RID.
-    """
-
-
-    # Load RID into the environment.
-
-    os.environ['RID'] = str(rid)
-
-
-    # Launch single pipeline from within Docker container.
-
-    python_cmd = 'python3.11'
-    launch_single_pipeline_instance_code = '/code/pipeline/awsBatchSubmitJobs_launchSingleSciencePipeline.py'
-
-    launch_cmd = [python_cmd,
-                  launch_single_pipeline_instance_code]
-
-    exitcode_from_launch_cmd = util.execute_command(launch_cmd)
-
-
-def launch_parallel_processes(rids, num_cores=None):
-
-    if num_cores is None:
-        num_cores = os.cpu_count()  # Use all available cores if not specified
-
-    print("num_cores =",num_cores)
-
-    with ProcessPoolExecutor(max_workers=num_cores) as executor:
-        # Submit all tasks to the executor and store the futures in a list
-        futures = [executor.submit(run_script,rid) for rid in rids]
-
-        # Iterate over completed futures and update progress
-        for i, future in enumerate(as_completed(futures)):
-            index = futures.index(future)  # Find the original index/order of the completed future
-            print(f"Completed: {i+1} processes, lastly for index={index}")
-
-
 #################
 # Main program.
 #################
@@ -142,9 +98,15 @@ if __name__ == '__main__':
         print("rid, sca =",rid,sca)
 
 
-    # The job launching is done in parallel, taking advantage of multiple cores on the job-launcher machine.
+    # The job launching is done in parallel from this process, with a pool of worker threads that share
+    # the launcher config, AWS clients, database connection pool, and Roman tessellation index.
+
+    context = lsps.ScienceLaunchContext(swname,swvers)
+
+    if context.exit_code >= 64:
+        exit(context.exit_code)
 
-    launch_parallel_processes(rid_list)
+    lsps.launch_science_pipelines(context,rid_list)
 
 
     # Close database connection.
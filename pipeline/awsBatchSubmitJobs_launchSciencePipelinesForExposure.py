@@ -6,7 +6,7 @@ import time
 to_zone = tz.gettz('America/Los_Angeles')
 
 import database.modules.utils.rapid_db as db
-import modules.utils.rapid_pipeline_subs as util
+import pipeline.launchSciencePipelineSubs as lsps
 
 swname = "awsBatchSubmitJobs_launchSciencePipelinesForExposure.py"
 swvers = "1.0"
@@ -68,27 +68,25 @@ if __name__ == '__main__':
 
     # Launch pipeline instances via AWS Batch.
 
+    rid_list = []
+
     for rec in recs:
         rid = rec[0]
         sca = rec[1]
         print("rid, sca =",rid,sca)
 
-
-        # Load RID into the environment.
-        # Database query record has numbers converted to values.
-
-        os.environ['RID'] = str(rid)
+        rid_list.append(rid)
 
 
-        # Launch single pipeline instance.
+    # The job launching is done in parallel from this process, with a pool of worker threads that share
+    # the launcher config, AWS clients, database connection pool, and Roman tessellation index.
 
-        python_cmd = 'python3.11'
-        launch_single_pipeline_instance_code = '/code/pipeline/awsBatchSubmitJobs_launchSingleSciencePipeline.py'
+    context = lsps.ScienceLaunchContext(swname,swvers)
 
-        launch_cmd = [python_cmd,
-                      launch_single_pipeline_instance_code]
+    if context.exit_code >= 64:
+        exit(context.exit_code)
 
-        exitcode_from_launch_cmd = util.execute_command(launch_cmd)
+    lsps.launch_science_pipelines(context,rid_list)
 
 
     # Close database connection.
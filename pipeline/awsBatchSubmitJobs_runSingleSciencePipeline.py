@@ -35,7 +35,6 @@ from astropy.io import fits
 from astropy.io import ascii
 from astropy.table import QTable, join
 import numpy as np
-import pandas as pd
 from datetime import datetime, timezone
 from dateutil import tz
 import time
@@ -45,6 +44,7 @@ import shutil
 to_zone = tz.gettz('America/Los_Angeles')
 
 import modules.utils.rapid_pipeline_subs as util
+import modules.utils.rapid_catalog_subs as catsubs
 import database.modules.utils.rapid_db as db
 import pipeline.referenceImageSubs as rfis
 import pipeline.differenceImageSubs as dfis
@@ -280,6 +280,10 @@ if __name__ == '__main__':
     astrometric_uncert_y = float(zogy_dict['astrometric_uncert_y'])
     post_zogy_keep_diffimg_lower_cov_map_thresh = float(zogy_dict['post_zogy_keep_diffimg_lower_cov_map_thresh'])
     s3_full_name_sciimage_psf = zogy_dict['s3_full_name_sciimage_psf']
+    zogy_engine = zogy_dict['zogy_engine']
+    zogy_num_threads = int(zogy_dict['zogy_num_threads'])
+    zogy_fftw_wisdom_s3_bucket_dir = zogy_dict['zogy_fftw_wisdom_s3_bucket_dir']
+    zogy_fftw_wisdom_file = zogy_dict['zogy_fftw_wisdom_file']
 
     awaicgen_dict = config_input['AWAICGEN']
 
@@ -562,17 +566,13 @@ if __name__ == '__main__':
     sextractor_refimage_paramsfile = cfg_path + "/rapidSexParamsRefImage.inp"
     params_to_get_refimage = ["FWHM_IMAGE"]
 
-    vals_refimage = util.parse_ascii_text_sextractor_catalog(filename_sex_refimage_catalog,
-                                                             sextractor_refimage_paramsfile,
-                                                             params_to_get_refimage)
+    vals_refimage = util.parse_sextractor_catalog(filename_sex_refimage_catalog,
+                                                  sextractor_refimage_paramsfile,
+                                                  params_to_get_refimage)
 
-    nsexcatsources_refimage = len(vals_refimage)
+    np_vals_fwhm = vals_refimage["FWHM_IMAGE"]
 
-    vals_fwhm = []
-    for val in vals_refimage:
-        vals_fwhm.append(float(val[0]))
-
-    np_vals_fwhm = np.array(vals_fwhm)
+    nsexcatsources_refimage = len(np_vals_fwhm)
 
     fwhm_ref_minpix = np.nanmin(np_vals_fwhm)
     fwhm_ref_maxpix = np.nanmax(np_vals_fwhm)
@@ -912,17 +912,13 @@ if __name__ == '__main__':
     sextractor_sciimage_paramsfile = cfg_path + "/rapidSexParamsSciImage.inp"
     params_to_get_sciimage = ["FWHM_IMAGE"]
 
-    vals_sciimage = util.parse_ascii_text_sextractor_catalog(filename_sciimage_catalog,
-                                                             sextractor_sciimage_paramsfile,
-                                                             params_to_get_sciimage)
-
-    nsexcatsources_sciimage = len(vals_sciimage)
+    vals_sciimage = util.parse_sextractor_catalog(filename_sciimage_catalog,
+                                                  sextractor_sciimage_paramsfile,
+                                                  params_to_get_sciimage)
 
-    fwhm_sci_vals = []
-    for val in vals_sciimage:
-        fwhm_sci_vals.append(float(val[0]))
+    np_fwhm_sci_vals = vals_sciimage["FWHM_IMAGE"]
 
-    np_fwhm_sci_vals = np.array(fwhm_sci_vals)
+    nsexcatsources_sciimage = len(np_fwhm_sci_vals)
 
     fwhm_sci_minpix = np.nanmin(np_fwhm_sci_vals)
     fwhm_sci_maxpix = np.nanmax(np_fwhm_sci_vals)
@@ -977,12 +973,28 @@ if __name__ == '__main__':
     start_time_benchmark = end_time_benchmark
 
 
+    # Images that go through several of the following steps are kept in memory in an image workspace,
+    # and each is written to its FITS file only when an external tool (ZOGY, SFFT, SExtractor) needs it.
+
+    workspace = util.ImageWorkspace()
+
+
     # Normalize the science PSF.  The reference-image PSF is already normalized.
+    # Transpose the normalized science-image PSF for rimtimsim data.
 
     filename_sciimage_psf_normalized = filename_sciimage_psf.replace(".fits","_normalized.fits")
 
     hdu_index = 0
-    util.normalize_image(filename_sciimage_psf,hdu_index,filename_sciimage_psf_normalized)
+    sciimage_psf = workspace.load("sciimage_psf",filename_sciimage_psf,hdu_index)
+    sciimage_psf_normalized = util.normalize_data(sciimage_psf,workspace.get_header("sciimage_psf"))
+
+    if "rimtimsim" in science_image_filename:
+        sciimage_psf_normalized = np.ascontiguousarray(np.transpose(sciimage_psf_normalized))
+
+    workspace.add("sciimage_psf_normalized",sciimage_psf_normalized,workspace.get_header("sciimage_psf"),filename_sciimage_psf_normalized)
+    workspace.write("sciimage_psf_normalized")
+    workspace.remove("sciimage_psf")
+    workspace.remove("sciimage_psf_normalized")
 
 
     # Subtract background from science image.  Since the reference image has been swarped,
@@ -1056,12 +1068,24 @@ if __name__ == '__main__':
 
 
     # Compute resampled gain-matched reference image.  Do the same for the refimage uncertainty map.
+    # These are kept in memory through the NaN replacement and subpixel offsets below, and written once for ZOGY.
+
+    refimage = workspace.load("refimage",output_resampled_reference_image)
+    refimage_unc = workspace.load("refimage_unc",output_resampled_reference_uncert_image)
 
     output_resampled_gainmatched_reference_image = output_resampled_reference_image.replace(".fits","_gainmatched.fits")
-    util.scale_image_data(output_resampled_reference_image,scalefacref,output_resampled_gainmatched_reference_image)
+    workspace.add("gainmatched_refimage",
+                  util.scale_data(refimage,scalefacref),
+                  workspace.get_header("refimage"),
+                  output_resampled_gainmatched_reference_image)
 
     output_resampled_gainmatched_reference_uncert_image = output_resampled_reference_uncert_image.replace(".fits","_gainmatched.fits")
-    util.scale_image_data(output_resampled_reference_uncert_image,scalefacref,output_resampled_gainmatched_reference_uncert_image)
+    workspace.add("gainmatched_refimage_unc",
+                  util.scale_data(refimage_unc,scalefacref),
+                  workspace.get_header("refimage_unc"),
+                  output_resampled_gainmatched_reference_uncert_image)
+
+    workspace.remove("refimage_unc")
 
 
     # Code-timing benchmark.
@@ -1075,8 +1099,16 @@ if __name__ == '__main__':
     # Replace NaNs, if any, in ZOGY input images.  Use the same saturation level rate since they are gain-matched.
 
     saturation_value_rate_sciimage = saturation_level_sciimage / exptime_sciimage
-    nan_indices_sciimage = util.replace_nans_with_value(filename_bkg_subbed_science_image,saturation_value_rate_sciimage)
-    nan_indices_refimage = util.replace_nans_with_value(output_resampled_gainmatched_reference_image,saturation_value_rate_sciimage)
+
+    workspace.load("bkg_subbed_sciimage",filename_bkg_subbed_science_image)
+
+    data,nan_mask_sciimage = util.replace_nans_in_data(workspace.get_data("bkg_subbed_sciimage"),saturation_value_rate_sciimage)
+    if nan_mask_sciimage is not None:
+        workspace.set_data("bkg_subbed_sciimage",data)
+
+    data,nan_mask_refimage = util.replace_nans_in_data(workspace.get_data("gainmatched_refimage"),saturation_value_rate_sciimage)
+    if nan_mask_refimage is not None:
+        workspace.set_data("gainmatched_refimage",data)
 
 
     # Compute image statistics for ZOGY.
@@ -1093,10 +1125,11 @@ if __name__ == '__main__':
     std_sci_img = stats_sci_img["clippedstd"]
     cnt_sci_img = stats_sci_img["nkept"]
 
-    stats_ref_img = util.fits_data_statistics_with_clipping(output_resampled_reference_image,\
-                                                            n_sigma,\
-                                                            hdu_index,\
-                                                            saturation_level_refimage)
+    stats_ref_img = util.data_statistics_with_clipping(refimage,\
+                                                       n_sigma,\
+                                                       saturation_level_refimage)
+
+    workspace.remove("refimage")
 
     avg_ref_img = stats_ref_img["clippedavg"]
     std_ref_img = stats_ref_img["clippedstd"]
@@ -1108,20 +1141,33 @@ if __name__ == '__main__':
 
     # Replace NaNs, if any, with relevant clipped standard deviation in ZOGY input uncertainty images.
 
-    util.replace_nans_with_value(reformatted_science_uncert_image_filename,std_sci_img)
-    util.replace_nans_with_value(output_resampled_gainmatched_reference_uncert_image,std_ref_img)
+    workspace.load("sciimage_unc",reformatted_science_uncert_image_filename)
+
+    data,nan_mask = util.replace_nans_in_data(workspace.get_data("sciimage_unc"),std_sci_img)
+    if nan_mask is not None:
+        workspace.set_data("sciimage_unc",data)
+
+    data,nan_mask = util.replace_nans_in_data(workspace.get_data("gainmatched_refimage_unc"),std_ref_img)
+    if nan_mask is not None:
+        workspace.set_data("gainmatched_refimage_unc",data)
 
 
     # Apply subpixel orthogonal offsets to ZOGY input reference image.
 
-    util.apply_subpixel_orthogonal_offsets(output_resampled_gainmatched_reference_image,dxmedianfin,dymedianfin)
+    data = util.apply_subpixel_orthogonal_offsets_to_data(workspace.get_data("gainmatched_refimage"),
+                                                          workspace.get_header("gainmatched_refimage"),
+                                                          dxmedianfin,
+                                                          dymedianfin)
+    if data is not None:
+        workspace.set_data("gainmatched_refimage",data)
 
 
-    # Transpose science-image PSF for rimtimsim data.
+    # Write the ZOGY input images (only those modified in memory) to their FITS files, and release their memory.
 
-    if "rimtimsim" in science_image_filename:
+    for name in ["bkg_subbed_sciimage","gainmatched_refimage","sciimage_unc","gainmatched_refimage_unc"]:
+        workspace.write(name)
 
-        util.transpose_image_data(filename_sciimage_psf_normalized)
+    workspace.clear()
 
 
     # Code-timing benchmark.
@@ -1180,13 +1226,14 @@ if __name__ == '__main__':
     # ZOGY only cares about the image data, not what is in the FITS headers.
     # Usage: python py_zogy.py <NewImage> <RefImage> <NewPSF> <RefPSF> <NewSigmaImage> <RefSigmaImage>
     #                    <NewSigmaMode> <RefSigmaMode> <AstUncertX> <AstUncertY> <DiffImage> <DiffPSF> <ScorrImage>
+    # The py_zogy_rfft.py engine takes two more arguments: <NumThreads> <FFTWWisdomFile>
     #
     # Assume top-level directory of rapid git repo is mapped to /code inside Docker container.
     #################################################################################################################
 
 
     python_cmd = '/usr/bin/python3.11'
-    zogy_code = rapid_sw + '/modules/zogy/v21Aug2018/py_zogy.py'
+    zogy_code = rapid_sw + '/modules/zogy/v21Aug2018/' + zogy_engine + '.py'
     filename_diffimage = zogy_dict['zogy_output_diffimage_file']
     filename_diffpsf = zogy_dict['zogy_output_diffpsf_file']
     filename_scorrimage = zogy_dict['zogy_output_scorrimage_file']
@@ -1217,8 +1264,30 @@ if __name__ == '__main__':
                 filename_diffpsf,
                 filename_scorrimage]
 
+
+    # For the single-precision real-FFT engine, reuse FFTW wisdom saved by previous jobs, if any,
+    # and save it for later jobs if there was none.
+
+    if zogy_engine == "py_zogy_rfft":
+
+        s3_full_name_zogy_fftw_wisdom_file = "s3://" + job_info_s3_bucket + "/" +\
+            zogy_fftw_wisdom_s3_bucket_dir + "/" + zogy_fftw_wisdom_file
+
+        zogy_fftw_wisdom_file,subdirs_zogy_fftw_wisdom,zogy_fftw_wisdom_downloaded_from_bucket =\
+            util.download_file_from_s3_bucket(s3_client,s3_full_name_zogy_fftw_wisdom_file)
+
+        zogy_cmd.append(str(zogy_num_threads))
+        zogy_cmd.append(zogy_fftw_wisdom_file)
+
     exitcode_from_zogy = util.execute_command(zogy_cmd)
 
+    if zogy_engine == "py_zogy_rfft" and not zogy_fftw_wisdom_downloaded_from_bucket and upload_to_s3_bucket:
+
+        util.upload_files_to_s3_bucket(s3_client,
+                                       job_info_s3_bucket,
+                                       [zogy_fftw_wisdom_file],
+                                       [zogy_fftw_wisdom_s3_bucket_dir + "/" + zogy_fftw_wisdom_file])
+
 
     # Code-timing benchmark.
 
@@ -1254,40 +1323,44 @@ if __name__ == '__main__':
     filename_diffimage_masked = filename_diffimage.replace(".fits","_masked.fits")
     filename_scorrimage_masked = filename_scorrimage.replace(".fits","_masked.fits")
 
-    dfis.mask_difference_image_with_resampled_reference_cov_map(filename_diffimage,
-                                                                output_resampled_reference_cov_map,
-                                                                filename_diffimage_masked,
-                                                                post_zogy_keep_diffimg_lower_cov_map_thresh)
+    filename_diffimage_masked_negative = filename_diffimage_masked.replace(".fits","_negative.fits")
+    filename_scorrimage_masked_negative = filename_scorrimage_masked.replace(".fits","_negative.fits")
 
-    dfis.mask_difference_image_with_resampled_reference_cov_map(filename_scorrimage,
-                                                                output_resampled_reference_cov_map,
-                                                                filename_scorrimage_masked,
-                                                                post_zogy_keep_diffimg_lower_cov_map_thresh)
+    refimage_cov_map = workspace.load("refimage_cov_map",output_resampled_reference_cov_map)
 
+    for name,filename,filename_masked,filename_masked_negative in \
+        [("diffimage",filename_diffimage,filename_diffimage_masked,filename_diffimage_masked_negative),
+         ("scorrimage",filename_scorrimage,filename_scorrimage_masked,filename_scorrimage_masked_negative)]:
 
-    # Restore NaNs to the ZOGY output files that were masked prior to executing ZOGY,
-    # both from science and reference images.
+        data = workspace.load(name,filename)
 
-    if nan_indices_sciimage:
-        util.restore_nans(filename_diffimage_masked,nan_indices_sciimage)
+        data_masked = dfis.mask_difference_image_data_with_resampled_reference_cov_map(data,
+                                                                                      refimage_cov_map,
+                                                                                      post_zogy_keep_diffimg_lower_cov_map_thresh)
 
-    if nan_indices_refimage:
-        util.restore_nans(filename_diffimage_masked,nan_indices_refimage)
 
-    if nan_indices_sciimage:
-        util.restore_nans(filename_scorrimage_masked,nan_indices_sciimage)
+        # Restore NaNs to the ZOGY outputs that were masked prior to executing ZOGY,
+        # both from science and reference images.
 
-    if nan_indices_refimage:
-        util.restore_nans(filename_scorrimage_masked,nan_indices_refimage)
+        data_masked = util.restore_nans_in_data(data_masked,nan_mask_sciimage)
+        data_masked = util.restore_nans_in_data(data_masked,nan_mask_refimage)
 
+        workspace.add(name + "_masked",data_masked,workspace.get_header(name),filename_masked)
+        workspace.write(name + "_masked")
 
-    # Compute negative ZOGY difference and scorr images.
 
-    filename_diffimage_masked_negative = filename_diffimage_masked.replace(".fits","_negative.fits")
-    util.scale_image_data(filename_diffimage_masked,-1.0,filename_diffimage_masked_negative)
+        # Compute negative ZOGY difference and scorr images.
 
-    filename_scorrimage_masked_negative = filename_scorrimage_masked.replace(".fits","_negative.fits")
-    util.scale_image_data(filename_scorrimage_masked,-1.0,filename_scorrimage_masked_negative)
+        workspace.add(name + "_masked_negative",util.scale_data(data_masked,-1.0),workspace.get_header(name),filename_masked_negative)
+        workspace.write(name + "_masked_negative")
+
+        workspace.remove(name)
+        workspace.remove(name + "_masked")
+        workspace.remove(name + "_masked_negative")
+
+    print(f"Image workspace: number of FITS files read = {workspace.n_reads}, written = {workspace.n_writes}")
+
+    workspace.clear()
 
 
     # Code-timing benchmark.
@@ -1350,11 +1423,11 @@ if __name__ == '__main__':
 
     params_to_get_diffimage = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6"]
 
-    vals_diffimage = util.parse_ascii_text_sextractor_catalog(filename_diffimage_sextractor_catalog,
-                                                              sextractor_diffimage_paramsfile,
-                                                              params_to_get_diffimage)
+    vals_diffimage = util.parse_sextractor_catalog(filename_diffimage_sextractor_catalog,
+                                                   sextractor_diffimage_paramsfile,
+                                                   params_to_get_diffimage)
 
-    nsexcatsources_zogy_diffimage = len(vals_diffimage)
+    nsexcatsources_zogy_diffimage = len(vals_diffimage[params_to_get_diffimage[0]])
 
     print("nsexcatsources_zogy_diffimage =",nsexcatsources_zogy_diffimage)
 
@@ -1399,11 +1472,11 @@ if __name__ == '__main__':
 
     params_to_get_diffimage = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6"]
 
-    vals_diffimage_negative = util.parse_ascii_text_sextractor_catalog(filename_diffimage_sextractor_catalog_negative,
-                                                              sextractor_diffimage_paramsfile,
-                                                              params_to_get_diffimage)
+    vals_diffimage_negative = util.parse_sextractor_catalog(filename_diffimage_sextractor_catalog_negative,
+                                                            sextractor_diffimage_paramsfile,
+                                                            params_to_get_diffimage)
 
-    nsexcatsources_zogy_diffimage_negative = len(vals_diffimage_negative)
+    nsexcatsources_zogy_diffimage_negative = len(vals_diffimage_negative[params_to_get_diffimage[0]])
 
     print("nsexcatsources_zogy_diffimage_negative =",nsexcatsources_zogy_diffimage_negative)
 
@@ -1510,11 +1583,9 @@ if __name__ == '__main__':
             nrows = len(joined_table_inner)
             print(f"nrows in PSF-fit catalog = {nrows}\n")
 
-            # Convert the QTable to a pandas DataFrame
-            df = joined_table_inner.to_pandas()
-
-            # Write the DataFrame to a Parquet file.
-            df.to_parquet(output_psfcat_parquet_filename, engine='pyarrow')
+            # Write the joined table to the sidecar Parquet file (output_psfcat_parquet_filename), which is
+            # read in preference to the ASCII catalogs (see modules/utils/rapid_catalog_subs.py).
+            catsubs.write_psfcat_sidecar(joined_table_inner,output_psfcat_filename)
 
         except Exception as e:
             print(f"PSF-fit PSFPhotometry and DAOStarFinder catalogs: An unexpected error occurred: {e}")
@@ -1622,11 +1693,9 @@ if __name__ == '__main__':
             nrows = len(joined_table_inner)
             print(f"nrows in PSF-fit catalog = {nrows}\n")
 
-            # Convert the QTable to a pandas DataFrame
-            df = joined_table_inner.to_pandas()
-
-            # Write the DataFrame to a Parquet file.
-            df.to_parquet(output_psfcat_parquet_filename_negative, engine='pyarrow')
+            # Write the joined table to the sidecar Parquet file (output_psfcat_parquet_filename_negative), which is
+            # read in preference to the ASCII catalogs (see modules/utils/rapid_catalog_subs.py).
+            catsubs.write_psfcat_sidecar(joined_table_inner,output_psfcat_filename_negative)
 
         except Exception as e:
             print(f"PSF-fit PSFPhotometry and DAOStarFinder catalogs: An unexpected error occurred: {e}")
@@ -2040,11 +2109,11 @@ if __name__ == '__main__':
 
             params_to_get_diffimage = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6"]
 
-            vals_sfftdiffimage = util.parse_ascii_text_sextractor_catalog(filename_sfftdiffimage_sextractor_catalog,
-                                                                          sextractor_diffimage_paramsfile,
-                                                                          params_to_get_diffimage)
+            vals_sfftdiffimage = util.parse_sextractor_catalog(filename_sfftdiffimage_sextractor_catalog,
+                                                               sextractor_diffimage_paramsfile,
+                                                               params_to_get_diffimage)
 
-            nsexcatsources_sfftdiffimage = len(vals_sfftdiffimage)
+            nsexcatsources_sfftdiffimage = len(vals_sfftdiffimage[params_to_get_diffimage[0]])
 
             print("nsexcatsources_sfftdiffimage =",nsexcatsources_sfftdiffimage)
 
@@ -2093,11 +2162,11 @@ if __name__ == '__main__':
 
             params_to_get_diffimage = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6"]
 
-            vals_sfftdiffimage_negative = util.parse_ascii_text_sextractor_catalog(filename_sfftdiffimage_sextractor_catalog_negative,
-                                                                          sextractor_diffimage_paramsfile,
-                                                                          params_to_get_diffimage)
+            vals_sfftdiffimage_negative = util.parse_sextractor_catalog(filename_sfftdiffimage_sextractor_catalog_negative,
+                                                                        sextractor_diffimage_paramsfile,
+                                                                        params_to_get_diffimage)
 
-            nsexcatsources_sfftdiffimage_negative = len(vals_sfftdiffimage_negative)
+            nsexcatsources_sfftdiffimage_negative = len(vals_sfftdiffimage_negative[params_to_get_diffimage[0]])
 
             print("nsexcatsources_sfftdiffimage_negative =",nsexcatsources_sfftdiffimage_negative)
 
@@ -2231,11 +2300,9 @@ if __name__ == '__main__':
                     nrows = len(joined_table_inner)
                     print(f"nrows in PSF-fit catalog = {nrows}\n")
 
-                    # Convert the QTable to a pandas DataFrame
-                    df = joined_table_inner.to_pandas()
-
-                    # Write the DataFrame to a Parquet file.
-                    df.to_parquet(output_psfcat_parquet_filename, engine='pyarrow')
+                    # Write the joined table to the sidecar Parquet file (output_psfcat_parquet_filename), which is
+                    # read in preference to the ASCII catalogs (see modules/utils/rapid_catalog_subs.py).
+                    catsubs.write_psfcat_sidecar(joined_table_inner,output_psfcat_filename)
 
                 except Exception as e:
                     print(f"PSF-fit PSFPhotometry and DAOStarFinder catalogs (positive SFFT difference image): An unexpected error occurred: {e}")
@@ -2345,11 +2412,9 @@ if __name__ == '__main__':
                     nrows = len(joined_table_inner)
                     print(f"nrows in PSF-fit catalog = {nrows}\n")
 
-                    # Convert the QTable to a pandas DataFrame
-                    df = joined_table_inner.to_pandas()
-
-                    # Write the DataFrame to a Parquet file.
-                    df.to_parquet(output_psfcat_parquet_filename_negative, engine='pyarrow')
+                    # Write the joined table to the sidecar Parquet file (output_psfcat_parquet_filename_negative), which is
+                    # read in preference to the ASCII catalogs (see modules/utils/rapid_catalog_subs.py).
+                    catsubs.write_psfcat_sidecar(joined_table_inner,output_psfcat_filename_negative)
 
                 except Exception as e:
                     print(f"PSF-fit PSFPhotometry and DAOStarFinder catalogs (negative SFFT difference image): An unexpected error occurred: {e}")
@@ -2458,11 +2523,11 @@ if __name__ == '__main__':
 
         # Restore NaNs that were masked prior to executing ZOGY.
 
-        if nan_indices_sciimage:
-            util.restore_nans(filename_naive_diffimage_masked,nan_indices_sciimage)
+        if nan_mask_sciimage:
+            util.restore_nans(filename_naive_diffimage_masked,nan_mask_sciimage)
 
-        if nan_indices_refimage:
-            util.restore_nans(filename_naive_diffimage_masked,nan_indices_refimage)
+        if nan_mask_refimage:
+            util.restore_nans(filename_naive_diffimage_masked,nan_mask_refimage)
 
 
         # Compute negative naive difference image.
@@ -2536,11 +2601,11 @@ if __name__ == '__main__':
 
         params_to_get_diffimage = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6"]
 
-        vals_naive_diffimage = util.parse_ascii_text_sextractor_catalog(filename_naive_diffimage_sextractor_catalog,
-                                                                      sextractor_diffimage_paramsfile,
-                                                                      params_to_get_diffimage)
+        vals_naive_diffimage = util.parse_sextractor_catalog(filename_naive_diffimage_sextractor_catalog,
+                                                             sextractor_diffimage_paramsfile,
+                                                             params_to_get_diffimage)
 
-        nsexcatsources_naive_diffimage = len(vals_naive_diffimage)
+        nsexcatsources_naive_diffimage = len(vals_naive_diffimage[params_to_get_diffimage[0]])
 
         print("nsexcatsources_naive_diffimage =",nsexcatsources_naive_diffimage)
 
@@ -2570,11 +2635,11 @@ if __name__ == '__main__':
 
         params_to_get_diffimage = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6"]
 
-        vals_naive_diffimage_negative = util.parse_ascii_text_sextractor_catalog(filename_naive_diffimage_sextractor_catalog_negative,
+        vals_naive_diffimage_negative = util.parse_sextractor_catalog(filename_naive_diffimage_sextractor_catalog_negative,
                                                                       sextractor_diffimage_paramsfile,
                                                                       params_to_get_diffimage)
 
-        nsexcatsources_naive_diffimage_negative = len(vals_naive_diffimage_negative)
+        nsexcatsources_naive_diffimage_negative = len(vals_naive_diffimage_negative[params_to_get_diffimage[0]])
 
         print("nsexcatsources_naive_diffimage_negative =",nsexcatsources_naive_diffimage_negative)
 
@@ -11,6 +11,7 @@ to_zone = tz.gettz('America/Los_Angeles')
 import database.modules.utils.rapid_db as db
 import modules.utils.rapid_pipeline_subs as util
 import database.modules.utils.roman_tessellation_db as sqlite
+from modules.crossmatch.kdtree_crossmatch import KDTreeCrossMatcher
 
 
 swname = "crossMatchSources.py"
@@ -114,8 +115,15 @@ ppid = int(config_input['SCI_IMAGE']['ppid'])
 
 match_radius = float(config_input['SOURCE_MATCHING']['match_radius'])
 
+# Configuration files that predate crossmatch_mode get the original database cross-matching (legacy mode).
 
-# Open database connections for parallel access.
+crossmatch_mode = config_input['SOURCE_MATCHING'].get('crossmatch_mode','legacy')
+
+print("crossmatch_mode =",crossmatch_mode)
+
+
+# Number of parallel processes.  Each process lazily acquires its own database
+# connection from a per-process connection pool (see RAPIDDB pooled option).
 
 num_cores = os.getenv('NUM_CORES')
 
@@ -126,17 +134,6 @@ else:
 
 print("num_cores =",num_cores)
 
-dbh_list = []
-
-for i in range(num_cores):
-
-    dbh = db.RAPIDDB()
-
-    if dbh.exit_code >= 64:
-        exit(dbh.exit_code)
-
-    dbh_list.append(dbh)
-
 
 # Get S3 client.
 
@@ -150,7 +147,7 @@ cols.append("ra0")
 cols.append("dec0")
 cols.append("flux0")
 cols.append("meanra")
-cols.append("stdefra")
+cols.append("stdevra")
 cols.append("meandec")
 cols.append("stdevdec")
 cols.append("meanflux")
@@ -170,6 +167,37 @@ print(f"AstroObjects columns: {cols_comma_separated_string}")
 # Custom methods for parallel processing, taking advantage of multiple cores on the job-launcher machine.
 #-------------------------------------------------------------------------------------------------------------
 
+def get_expids_for_field(dbh,scas,field,thread_debug=0):
+
+    '''
+    For a given field, query for all pertinent exposures and return list of exposure IDs
+    in ascending time order.  Allow for missing SCAs (cannot assume all SCAs are the same or present).
+    '''
+
+    expids_dict = {}
+
+    for sca in scas:
+
+        sources_tablename = f"sources_{proc_date}_{sca}"
+
+        query = f"SELECT distinct expid,mjdobs FROM {sources_tablename} " +\
+            f"WHERE field = {field} AND flags = 0;"
+
+        sql_queries = []
+        sql_queries.append(query)
+        records = dbh.execute_sql_queries(sql_queries,thread_debug)
+
+        for record in records:
+            expid = record[0]
+            mjdobs = record[1]
+            expids_dict[expid] = mjdobs
+
+    sorted_expids_dict = dict(sorted(expids_dict.items(), key=lambda item: item[1]))
+    expids_list = list(sorted_expids_dict.keys())
+
+    return expids_list
+
+
 def run_single_core_job_stage_1_crossmatching(scas,fields,index_thread):
 
 
@@ -208,223 +236,692 @@ def run_single_core_job_stage_1_crossmatching(scas,fields,index_thread):
         print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
         exit(64)
 
-    dbh = dbh_list[index_thread]
+    dbh = db.RAPIDDB(pooled=True)
 
-    fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
 
-    for index_field in range(nfields):
+    try:
+        fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
 
-        index_core = index_field % num_cores
-        if index_thread != index_core:
-            continue
+        for index_field in range(nfields):
 
-        field = fields[index_field]
+            index_core = index_field % num_cores
+            if index_thread != index_core:
+                continue
 
-        astroobjects_tablename = f"astroobjects_{field}"
-        merges_tablename = f"merges_{field}"
+            field = fields[index_field]
 
-        fh.write(f"Loop start: index_field,field = {index_field},{field}\n")
+            astroobjects_tablename = f"astroobjects_{field}"
+            merges_tablename = f"merges_{field}"
 
+            fh.write(f"Loop start: index_field,field = {index_field},{field}\n")
 
-        # For a given field, query for all pertinent exposures.
-        # Create list of exposure IDs in ascending time order.
-        # Allow for missing SCAs (cannot assume all SCAs are the same or present).
 
-        expids_dict = {}
+            # For a given field, query for all pertinent exposures.
+            # Create list of exposure IDs in ascending time order.
 
-        for sca in scas:
+            expids_list = get_expids_for_field(dbh,scas,field,thread_debug)
 
-            sources_tablename = f"sources_{proc_date}_{sca}"
 
-            query = f"SELECT distinct expid,mjdobs FROM {sources_tablename} " +\
-                f"WHERE field = {field} AND flags = 0;"
+            # For a given field pertinent to this parallel process,
+            # loop over exposure IDs and SCAs to perform source-matching:
+            # 1. Cross-match each source for field,expid,sca with the AstroObjects_<field> table.
+            # 2. If there is no match, then create a new AstroObjects_<field> record.
+            # 3. Register a Merges_<field> record to associate astroobject with source.
+            # 4. After all SCAs are done, advance to next exposure ID in ascending time order.
 
-            sql_queries = []
-            sql_queries.append(query)
-            records = dbh.execute_sql_queries(sql_queries,thread_debug)
+            for expid in expids_list:
 
-            for record in records:
-                expid = record[0]
-                mjdobs = record[1]
-                expids_dict[expid] = mjdobs
+                for sca in scas:
 
-        sorted_expids_dict = dict(sorted(expids_dict.items(), key=lambda item: item[1]))
-        expids_list = list(sorted_expids_dict.keys())
+                    sources_tablename = f"sources_{proc_date}_{sca}"
 
+                    query = f"SELECT a.sid,a.ra,a.dec,b.aid,b.meanra,b.meandec,b.nsources FROM {sources_tablename} AS a, " +\
+                        f"{astroobjects_tablename} AS b WHERE q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
+                        f"AND a.field = {field} AND a.expid = {expid} AND a.flags = 0;"
 
-        # For a given field pertinent to this parallel process,
-        # loop over exposure IDs and SCAs to perform source-matching:
-        # 1. Cross-match each source for field,expid,sca with the AstroObjects_<field> table.
-        # 2. If there is no match, then create a new AstroObjects_<field> record.
-        # 3. Register a Merges_<field> record to associate astroobject with source.
-        # 4. After all SCAs are done, advance to next exposure ID in ascending time order.
+                    sql_queries = []
+                    sql_queries.append(query)
+                    records = dbh.execute_sql_queries(sql_queries,thread_debug)
 
-        for expid in expids_list:
 
-            for sca in scas:
+                    # Code-timing benchmark.
 
-                sources_tablename = f"sources_{proc_date}_{sca}"
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to cross-match {sources_tablename} and {astroobjects_tablename} database tables = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
 
-                query = f"SELECT a.sid,a.ra,a.dec,b.aid,b.meanra,b.meandec,b.nsources FROM {sources_tablename} AS a, " +\
-                    f"{astroobjects_tablename} AS b WHERE q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
-                    f"AND a.field = {field} AND a.expid = {expid} AND a.flags = 0;"
 
-                sql_queries = []
-                sql_queries.append(query)
-                records = dbh.execute_sql_queries(sql_queries,thread_debug)
+                    # For the sources that were matched, create Merges_<field> record.
+                    # Also, update meanra, meandec, nsources in the AstroObjects_<field> record.
 
+                    sid_dict = {}
 
-                # Code-timing benchmark.
+                    for record in records:
 
-                thread_end_time_benchmark = time.time()
-                diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
-                fh.write(f"Elapsed time in seconds to cross-match {sources_tablename} and {astroobjects_tablename} database tables = {diff_time_benchmark}\n")
-                thread_start_time_benchmark = thread_end_time_benchmark
+                        sid = record[0]
+                        source_ra = record[1]
+                        source_dec = record[2]
+                        aid = record[3]
+                        meanra = record[4]
+                        meandec = record[5]
+                        nsources = record[6]
 
+                        sid_dict[sid] = 1
 
-                # For the sources that were matched, create Merges_<field> record.
-                # Also, update meanra, meandec, nsources in the AstroObjects_<field> record.
+                        dbh.add_merge_to_field(merges_tablename,aid,sid)
 
-                sid_dict = {}
+                        meanra = util.update_meanra(meanra,nsources,source_ra)
+                        meandec = util.update_meandec(meandec,nsources,source_dec)
+                        nsources += 1
 
-                for record in records:
+                        dbh.update_astroobject_mean_sky_position(astroobjects_tablename,
+                                                                 aid,
+                                                                 meanra,
+                                                                 meandec,
+                                                                 nsources,
+                                                                 thread_debug)
+
+
+                    # Code-timing benchmark.
+
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to insert {merges_tablename} database records for matched sources = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
+
+
+                    # Query for all sources for the field of interest in Sources_<proc_date>_<sca> and load into memory.
+                    # Find those sources that were not matched.
+
+                    query = f"SELECT sid FROM {sources_tablename} WHERE field = {field} AND expid = {expid} AND flags = 0;"
+
+                    sql_queries = []
+                    sql_queries.append(query)
+                    records = dbh.execute_sql_queries(sql_queries,thread_debug)
+
+                    sids_list = []
+
+
+                    # For the sources that were not matched for the field of interest,
+                    # create AstroObjects_<field> record and then Merges_<field> record.
+
+                    for record in records:
+
+                        sid = record[0]
+                        sids_list.append(sid)
+
+                    for sid in sids_list:
+
+                        if sid not in sid_dict:
+
+
+                            # Source was not matched, so create AstroObjects_<field> record and then Merges_<field> record.
+
+                            query = f"SELECT ra,dec,field,hp6,hp9,fluxfit FROM {sources_tablename} WHERE sid = {sid};"
+
+                            sql_queries = []
+                            sql_queries.append(query)
+                            records = dbh.execute_sql_queries(sql_queries,thread_debug)
+
+                            for record in records:
+
+                                source_ra = record[0]
+                                source_dec = record[1]
+                                source_field = record[2]
+                                source_hp6 = record[3]
+                                source_hp9 = record[4]
+                                source_flux = record[5]
+
+                                if field != source_field:
+                                    fh.write(f"*** Error: field ({field}) not equal to source_field ({source_field}); quitting...")
+                                    print(f"*** Error: field ({field}) not equal to source_field ({source_field}); quitting...")
+                                    raise Exception(f"*** Error: field ({field}) not equal to source_field ({source_field}); quitting...")
+
+
+                            # For now, set the lightcurve statistics to zero.              # TODO
+
+                            meanra = source_ra
+                            stdevra = 0
+                            meandec = source_dec
+                            stdevdec = 0
+                            meanflux = 0
+                            stdevflux = 0
+                            nsources = 1
+
+                            aid = dbh.add_astro_object_to_field(astroobjects_tablename,
+                                                                source_ra,
+                                                                source_dec,
+                                                                source_flux,
+                                                                meanra,
+                                                                stdevra,
+                                                                meandec,
+                                                                stdevdec,
+                                                                meanflux,
+                                                                stdevflux,
+                                                                nsources,
+                                                                field,
+                                                                source_hp6,
+                                                                source_hp9,
+                                                                thread_debug)
+
+                            dbh.add_merge_to_field(merges_tablename,aid,sid,thread_debug)
+
+
+                    # Code-timing benchmark.
+
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to insert {merges_tablename} and {astroobjects_tablename} database records for unmatched sources = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
+
+
+                    # End of loop over SCAs.
+
+                    fh.write(f"Loop end over SCAs: index_field,field,expid,sca = {index_field},{field},{expid},{sca}\n")
+
+
+                # End of loop over expids.
+
+                fh.write(f"Loop end over exposure IDs: index_field,field,expid = {index_field},{field},{expid}\n")
+
+
+            # End of loop over fields.
+
+            fh.write(f"Loop end over fields: index_field,field = {index_field},{field}\n")
+
+
+            # Flush write buffer.
+
+            fh.flush()
+
+    finally:
+
+        # Return database connection to pool.
+
+        dbh.close()
+
+    fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
+
+    fh.close()
+
+    message = f"Finish normally for index_thread = {index_thread}"
+
+    return message
+
+
+def run_single_core_job_stage_1_crossmatching_bulk(scas,fields,index_thread):
+
+
+    '''
+    Same as run_single_core_job_stage_1_crossmatching, but each (field, expid, sca) batch of sources
+    is handled with a few set-based database statements instead of several statements per source:
+    1. One q3c_join (left join, so that unmatched sources are returned in the same query).
+    2. One multi-row insert into AstroObjects_<field> for unmatched sources, returning the new aids.
+    3. One bulk insert into Merges_<field> for both matched and unmatched sources.
+    4. One UPDATE ... FROM VALUES for the running mean sky positions of matched astroobjects.
+
+    Running means are accumulated in memory, so an astroobject matched by more than one source
+    in the same batch has all of those sources folded into its mean sky position.
+    '''
+
+
+    # Compute thread start time for code-timing benchmark.
+
+    thread_start_time_benchmark = time.time()
+
+
+    # Set thread_debug = 0 here to severly limit the amount of information logged for runs
+    # that are anything but short tests.
+
+    thread_debug = 0
+
+    nfields = len(fields)
+
+    print("index_thread,nfields =",index_thread,nfields)
+
+    thread_work_file = swname.replace(".py","_stage_1_thread") + str(index_thread) + ".out"
+
+    try:
+        fh = open(thread_work_file, 'w', encoding="utf-8")
+    except:
+        print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
+        exit(64)
+
+    dbh = db.RAPIDDB(pooled=True)
+
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
+
+    try:
+        fh.write(f"\nStart of run_single_core_job (bulk mode): index_thread={index_thread}, dbh={dbh}\n")
+
+        for index_field in range(nfields):
+
+            index_core = index_field % num_cores
+            if index_thread != index_core:
+                continue
+
+            field = fields[index_field]
+
+            astroobjects_tablename = f"astroobjects_{field}"
+            merges_tablename = f"merges_{field}"
+
+            fh.write(f"Loop start: index_field,field = {index_field},{field}\n")
+
+
+            # For a given field, query for all pertinent exposures.
+            # Create list of exposure IDs in ascending time order.
+
+            expids_list = get_expids_for_field(dbh,scas,field,thread_debug)
+
+
+            # For a given field pertinent to this parallel process,
+            # loop over exposure IDs and SCAs to perform source-matching in bulk.
+
+            for expid in expids_list:
+
+                for sca in scas:
+
+                    sources_tablename = f"sources_{proc_date}_{sca}"
+
+
+                    # Cross-match all sources for field,expid,sca with the AstroObjects_<field> table.
+                    # Unmatched sources are returned with null astroobject columns.
 
-                    sid = record[0]
-                    source_ra = record[1]
-                    source_dec = record[2]
-                    aid = record[3]
-                    meanra = record[4]
-                    meandec = record[5]
-                    nsources = record[6]
+                    query = f"SELECT a.sid,a.ra,a.dec,a.hp6,a.hp9,a.fluxfit,b.aid,b.meanra,b.meandec,b.nsources " +\
+                        f"FROM {sources_tablename} AS a " +\
+                        f"LEFT JOIN {astroobjects_tablename} AS b " +\
+                        f"ON q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
+                        f"WHERE a.field = {field} AND a.expid = {expid} AND a.flags = 0;"
 
-                    sid_dict[sid] = 1
+                    sql_queries = []
+                    sql_queries.append(query)
+                    records = dbh.execute_sql_queries(sql_queries,thread_debug)
 
-                    dbh.add_merge_to_field(merges_tablename,aid,sid)
+                    if dbh.exit_code >= 64:
+                        raise Exception(f"*** Error: Could not cross-match {sources_tablename} and {astroobjects_tablename}; quitting...")
 
-                    meanra = util.update_meanra(meanra,nsources,source_ra)
-                    meandec = util.update_meandec(meandec,nsources,source_dec)
-                    nsources += 1
 
-                    dbh.update_astroobject_mean_sky_position(astroobjects_tablename,
-                                                             aid,
-                                                             meanra,
-                                                             meandec,
-                                                             nsources,
-                                                             thread_debug)
+                    # Code-timing benchmark.
 
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to cross-match {sources_tablename} and {astroobjects_tablename} database tables = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
 
-                # Code-timing benchmark.
 
-                thread_end_time_benchmark = time.time()
-                diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
-                fh.write(f"Elapsed time in seconds to insert {merges_tablename} database records for matched sources = {diff_time_benchmark}\n")
-                thread_start_time_benchmark = thread_end_time_benchmark
+                    # Separate matched from unmatched sources, and accumulate running means for matched astroobjects.
 
+                    merges_list = []
+                    astroobjects_dict = {}
+                    unmatched_sids_list = []
+                    unmatched_astroobjects_list = []
 
-                # Query for all sources for the field of interest in Sources_<proc_date>_<sca> and load into memory.
-                # Find those sources that were not matched.
+                    for record in records:
 
-                query = f"SELECT sid FROM {sources_tablename} WHERE field = {field} AND expid = {expid} AND flags = 0;"
+                        sid = record[0]
+                        source_ra = record[1]
+                        source_dec = record[2]
+                        source_hp6 = record[3]
+                        source_hp9 = record[4]
+                        source_flux = record[5]
+                        aid = record[6]
+
+                        if aid is None:
+
+
+                            # For now, set the lightcurve statistics to zero.              # TODO
+
+                            unmatched_sids_list.append(sid)
+                            unmatched_astroobjects_list.append((source_ra,
+                                                                source_dec,
+                                                                source_flux,
+                                                                source_ra,
+                                                                0,
+                                                                source_dec,
+                                                                0,
+                                                                0,
+                                                                0,
+                                                                1,
+                                                                field,
+                                                                source_hp6,
+                                                                source_hp9))
+                            continue
+
+                        if aid in astroobjects_dict:
+                            meanra,meandec,nsources = astroobjects_dict[aid]
+                        else:
+                            meanra = record[7]
+                            meandec = record[8]
+                            nsources = record[9]
+
+                        meanra = util.update_meanra(meanra,nsources,source_ra)
+                        meandec = util.update_meandec(meandec,nsources,source_dec)
+                        nsources += 1
+
+                        astroobjects_dict[aid] = (meanra,meandec,nsources)
+                        merges_list.append((aid,sid))
+
+
+                    # The inserts into AstroObjects_<field> and Merges_<field> and the update of the mean sky
+                    # positions are committed in one transaction per batch, so that a failure leaves neither
+                    # table changed and the batch can be rerun without duplicating astroobjects.
+
+
+                    # Create AstroObjects_<field> records for the sources that were not matched.
+
+                    aids = dbh.add_astro_objects_to_field(astroobjects_tablename,
+                                                          unmatched_astroobjects_list,
+                                                          thread_debug,
+                                                          commit=False)
+
+                    if dbh.exit_code >= 64:
+                        dbh.conn.rollback()
+                        raise Exception(f"*** Error: Could not insert {astroobjects_tablename} records; quitting...")
+
+                    for aid,sid in zip(aids,unmatched_sids_list):
+                        merges_list.append((aid,sid))
+
+
+                    # Create Merges_<field> records for both matched and unmatched sources.
+
+                    n_merges = dbh.add_merges_to_field(merges_tablename,merges_list,thread_debug,commit=False)
+
+                    if dbh.exit_code >= 64:
+                        dbh.conn.rollback()
+                        raise Exception(f"*** Error: Could not insert {merges_tablename} records; quitting...")
+
+
+                    # Update meanra, meandec, nsources in the AstroObjects_<field> records of matched sources.
+
+                    position_records = [(aid,) + astroobjects_dict[aid] for aid in astroobjects_dict.keys()]
+
+                    dbh.update_astroobjects_mean_sky_positions(astroobjects_tablename,
+                                                               position_records,
+                                                               thread_debug,
+                                                               commit=False)
+
+                    if dbh.exit_code >= 64:
+                        dbh.conn.rollback()
+                        raise Exception(f"*** Error: Could not update {astroobjects_tablename} records; quitting...")
+
+                    dbh.conn.commit()
+
+
+                    # Code-timing benchmark.
+
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to insert {n_merges} {merges_tablename}, {len(aids)} {astroobjects_tablename}, " +\
+                        f"and update {len(position_records)} {astroobjects_tablename} database records = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
+
+
+                    # End of loop over SCAs.
+
+                    fh.write(f"Loop end over SCAs: index_field,field,expid,sca = {index_field},{field},{expid},{sca}\n")
+
+
+                # End of loop over expids.
+
+                fh.write(f"Loop end over exposure IDs: index_field,field,expid = {index_field},{field},{expid}\n")
+
+
+            # End of loop over fields.
+
+            fh.write(f"Loop end over fields: index_field,field = {index_field},{field}\n")
+
+
+            # Flush write buffer.
+
+            fh.flush()
+
+    finally:
+
+        # Return database connection to pool.
+
+        dbh.close()
+
+    fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
+
+    fh.close()
+
+    message = f"Finish normally for index_thread = {index_thread}"
+
+    return message
+
+
+def run_single_core_job_stage_1_crossmatching_kdtree(scas,fields,index_thread):
+
+
+    '''
+    Same as run_single_core_job_stage_1_crossmatching, but with the cross-matching done in memory.
+    For each field, the AstroObjects_<field> records and all sources in the field are loaded once,
+    the sources are streamed through a KD-tree spherical index one (expid, sca) batch at a time in
+    ascending mjdobs order, and the final AstroObjects_<field> table and new Merges_<field> records
+    are written back with COPY.  The database is only a source and sink here, not the inner loop.
+    '''
+
+
+    # Compute thread start time for code-timing benchmark.
+
+    thread_start_time_benchmark = time.time()
+
+
+    # Set thread_debug = 0 here to severly limit the amount of information logged for runs
+    # that are anything but short tests.
+
+    thread_debug = 0
+
+    nfields = len(fields)
+
+    print("index_thread,nfields =",index_thread,nfields)
+
+    thread_work_file = swname.replace(".py","_stage_1_thread") + str(index_thread) + ".out"
+
+    try:
+        fh = open(thread_work_file, 'w', encoding="utf-8")
+    except:
+        print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
+        exit(64)
+
+    dbh = db.RAPIDDB(pooled=True)
+
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
+
+    try:
+        fh.write(f"\nStart of run_single_core_job (kdtree mode): index_thread={index_thread}, dbh={dbh}\n")
+
+        astroobjects_columns = ("aid",) + columns
+
+        for index_field in range(nfields):
+
+            index_core = index_field % num_cores
+            if index_thread != index_core:
+                continue
+
+            field = fields[index_field]
+
+            astroobjects_tablename = f"astroobjects_{field}"
+            merges_tablename = f"merges_{field}"
+
+            fh.write(f"Loop start: index_field,field = {index_field},{field}\n")
+
+
+            # Load AstroObjects_<field> records into memory.
+
+            query = f"SELECT aid,{cols_comma_separated_string} FROM {astroobjects_tablename};"
+
+            sql_queries = []
+            sql_queries.append(query)
+            astroobject_records = dbh.execute_sql_queries(sql_queries,thread_debug)
+
+            if dbh.exit_code >= 64:
+                raise Exception(f"*** Error: Could not query {astroobjects_tablename}; quitting...")
+
+            matcher = KDTreeCrossMatcher(match_radius,astroobject_records)
+
+
+            # Load all sources in the field for all SCAs into memory.
+
+            sids = []
+            ras = []
+            decs = []
+            fluxes = []
+            hp6s = []
+            hp9s = []
+            expids = []
+            mjdobss = []
+            sca_indices = []
+
+            for index_sca,sca in enumerate(scas):
+
+                sources_tablename = f"sources_{proc_date}_{sca}"
+
+                query = f"SELECT sid,ra,dec,fluxfit,hp6,hp9,expid,mjdobs FROM {sources_tablename} " +\
+                    f"WHERE field = {field} AND flags = 0;"
 
                 sql_queries = []
                 sql_queries.append(query)
                 records = dbh.execute_sql_queries(sql_queries,thread_debug)
 
-                sids_list = []
+                if dbh.exit_code >= 64:
+                    raise Exception(f"*** Error: Could not query {sources_tablename}; quitting...")
 
+                for record in records:
+                    sids.append(record[0])
+                    ras.append(record[1])
+                    decs.append(record[2])
+                    fluxes.append(record[3])
+                    hp6s.append(record[4])
+                    hp9s.append(record[5])
+                    expids.append(record[6])
+                    mjdobss.append(record[7])
+                    sca_indices.append(index_sca)
 
-                # For the sources that were not matched for the field of interest,
-                # create AstroObjects_<field> record and then Merges_<field> record.
+            nsources = len(sids)
+            fields_array = [field] * nsources
 
-                for record in records:
 
-                    sid = record[0]
-                    sids_list.append(sid)
+            # Code-timing benchmark.
+
+            thread_end_time_benchmark = time.time()
+            diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+            fh.write(f"Elapsed time in seconds to load {len(astroobject_records)} astroobjects and {nsources} sources for field {field} = {diff_time_benchmark}\n")
+            thread_start_time_benchmark = thread_end_time_benchmark
+
+
+            # Stream the sources through the matcher in (expid, sca) batches, in ascending mjdobs order
+            # and in the order of the SCAs list for a given exposure.
+
+            if nsources > 0:
+
+                expids_array = np.array(expids)
+                order = np.lexsort((np.array(sca_indices),expids_array,np.array(mjdobss)))
+
+                sids = np.array(sids)[order]
+                ras = np.array(ras,dtype=np.float64)[order]
+                decs = np.array(decs,dtype=np.float64)[order]
+                fluxes = np.array(fluxes)[order]
+                hp6s = np.array(hp6s)[order]
+                hp9s = np.array(hp9s)[order]
+                batch_keys = expids_array[order] * (len(scas) + 1) + np.array(sca_indices)[order]
 
-                for sid in sids_list:
+                batch_starts = np.flatnonzero(np.concatenate(([True],batch_keys[1:] != batch_keys[:-1])))
+                batch_ends = np.append(batch_starts[1:],nsources)
 
-                    if sid not in sid_dict:
+                n_matched_total = 0
+                n_unmatched_total = 0
 
+                for i_start,i_end in zip(batch_starts,batch_ends):
 
-                        # Source was not matched, so create AstroObjects_<field> record and then Merges_<field> record.
+                    n_matched,n_unmatched = matcher.match_sources(sids[i_start:i_end].tolist(),
+                                                                  ras[i_start:i_end],
+                                                                  decs[i_start:i_end],
+                                                                  fluxes[i_start:i_end].tolist(),
+                                                                  fields_array[i_start:i_end],
+                                                                  hp6s[i_start:i_end].tolist(),
+                                                                  hp9s[i_start:i_end].tolist())
 
-                        query = f"SELECT ra,dec,field,hp6,hp9,fluxfit FROM {sources_tablename} WHERE sid = {sid};"
+                    n_matched_total += n_matched
+                    n_unmatched_total += n_unmatched
 
-                        sql_queries = []
-                        sql_queries.append(query)
-                        records = dbh.execute_sql_queries(sql_queries,thread_debug)
+                fh.write(f"Number of batches,matched sources,unmatched sources for field {field} = {len(batch_starts)},{n_matched_total},{n_unmatched_total}\n")
 
-                        for record in records:
 
-                            source_ra = record[0]
-                            source_dec = record[1]
-                            source_field = record[2]
-                            source_hp6 = record[3]
-                            source_hp9 = record[4]
-                            source_flux = record[5]
+            # Code-timing benchmark.
 
-                            if field != source_field:
-                                fh.write(f"*** Error: field ({field}) not equal to source_field ({source_field}); quitting...")
-                                print(f"*** Error: field ({field}) not equal to source_field ({source_field}); quitting...")
-                                raise Exception(f"*** Error: field ({field}) not equal to source_field ({source_field}); quitting...")
+            thread_end_time_benchmark = time.time()
+            diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+            fh.write(f"Elapsed time in seconds to cross-match sources in memory for field {field} = {diff_time_benchmark}\n")
+            thread_start_time_benchmark = thread_end_time_benchmark
 
 
-                        # For now, set the lightcurve statistics to zero.              # TODO
+            # Write back the final AstroObjects_<field> table and the new Merges_<field> records.
 
-                        meanra = source_ra
-                        stdevra = 0
-                        meandec = source_dec
-                        stdevdec = 0
-                        meanflux = 0
-                        stdevflux = 0
-                        nsources = 1
+            new_aids = dbh.reserve_astroobject_aids(matcher.get_number_of_new_astroobjects(),thread_debug)
 
-                        aid = dbh.add_astro_object_to_field(astroobjects_tablename,
-                                                            source_ra,
-                                                            source_dec,
-                                                            source_flux,
-                                                            meanra,
-                                                            stdevra,
-                                                            meandec,
-                                                            stdevdec,
-                                                            meanflux,
-                                                            stdevflux,
-                                                            nsources,
-                                                            field,
-                                                            source_hp6,
-                                                            source_hp9,
-                                                            thread_debug)
+            if dbh.exit_code >= 64:
+                raise Exception(f"*** Error: Could not reserve aids for {astroobjects_tablename}; quitting...")
 
-                        dbh.add_merge_to_field(merges_tablename,aid,sid,thread_debug)
+            astroobject_records = matcher.get_astroobject_records(new_aids)
+            merge_records = matcher.get_merge_records(new_aids)
 
+            # The TRUNCATE and COPY of AstroObjects_<field> and the insert of the Merges_<field> records are
+            # committed in one transaction, so that a failure leaves both tables as they were.  Merges that
+            # already exist (e.g., from a rerun) are skipped, as in add_merge_to_field.
 
-                # Code-timing benchmark.
+            dbh.copy_records_into_database(astroobject_records,
+                                           astroobjects_tablename,
+                                           astroobjects_columns,
+                                           truncate_first=True,
+                                           commit=False,
+                                           debug=thread_debug)
 
-                thread_end_time_benchmark = time.time()
-                diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
-                fh.write(f"Elapsed time in seconds to insert {merges_tablename} and {astroobjects_tablename} database records for unmatched sources = {diff_time_benchmark}\n")
-                thread_start_time_benchmark = thread_end_time_benchmark
+            if dbh.exit_code >= 64:
+                raise Exception(f"*** Error: Could not copy records into {astroobjects_tablename}; quitting...")
 
+            dbh.add_merges_to_field(merges_tablename,merge_records,thread_debug)
 
-                # End of loop over SCAs.
+            if dbh.exit_code >= 64:
+                raise Exception(f"*** Error: Could not insert records into {merges_tablename}; quitting...")
 
-                fh.write(f"Loop end over SCAs: index_field,field,expid,sca = {index_field},{field},{expid},{sca}\n")
+            if len(merge_records) == 0:
+                dbh.conn.commit()           # add_merges_to_field returns without committing if no records
 
 
-            # End of loop over expids.
+            # Code-timing benchmark.
 
-            fh.write(f"Loop end over exposure IDs: index_field,field,expid = {index_field},{field},{expid}\n")
+            thread_end_time_benchmark = time.time()
+            diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+            fh.write(f"Elapsed time in seconds to copy {len(astroobject_records)} {astroobjects_tablename} and {len(merge_records)} {merges_tablename} database records = {diff_time_benchmark}\n")
+            thread_start_time_benchmark = thread_end_time_benchmark
 
 
-        # End of loop over fields.
+            # End of loop over fields.
 
-        fh.write(f"Loop end over fields: index_field,field = {index_field},{field}\n")
+            fh.write(f"Loop end over fields: index_field,field = {index_field},{field}\n")
 
 
-        # Flush write buffer.
+            # Flush write buffer.
 
-        fh.flush()
+            fh.flush()
 
+    finally:
+
+        # Return database connection to pool.
+
+        dbh.close()
 
     fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
 
@@ -472,168 +969,179 @@ def run_single_core_job_stage_2_crossmatching(scas,fields,index_thread):
         print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
         exit(64)
 
-    dbh = dbh_list[index_thread]
+    dbh = db.RAPIDDB(pooled=True)
 
-    fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
 
-    for index_field in range(nfields):
+    try:
+        fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
 
-        index_core = index_field % num_cores
-        if index_thread != index_core:
-            continue
+        for index_field in range(nfields):
 
-        field = fields[index_field]
+            index_core = index_field % num_cores
+            if index_thread != index_core:
+                continue
 
-        astroobjects_tablename = f"astroobjects_{field}"
-        merges_tablename = f"merges_{field}"
+            field = fields[index_field]
 
+            astroobjects_tablename = f"astroobjects_{field}"
+            merges_tablename = f"merges_{field}"
 
-        # Cross-match the current AstroObjects_<field> table with sources in all adjacent fields.
-        # Field boundaries are infinitesimally thin lines, and the match radius can extend across them.
 
-        fh.write(f"Loop start for adjacent fields (rtid is equivalent to field number): index_field,field = {index_field},{field}\n")
+            # Cross-match the current AstroObjects_<field> table with sources in all adjacent fields.
+            # Field boundaries are infinitesimally thin lines, and the match radius can extend across them.
 
-        rtid = field
-        rtids_list = roman_tessellation_db.get_all_neighboring_rtids(rtid)
+            fh.write(f"Loop start for adjacent fields (rtid is equivalent to field number): index_field,field = {index_field},{field}\n")
 
+            rtid = field
+            rtids_list = roman_tessellation_db.get_all_neighboring_rtids(rtid)
 
-        # If away from poles, a sky tile will have 8 adjacent fields,
-        # and this can be exploited to speed up the cross-matching.
 
-        n_adjacent_fields = len(rtids_list)
+            # If away from poles, a sky tile will have 8 adjacent fields,
+            # and this can be exploited to speed up the cross-matching.
 
-        if n_adjacent_fields == 8:
+            n_adjacent_fields = len(rtids_list)
 
+            if n_adjacent_fields == 8:
 
-            # Get sky positions of center and four corners of sky tile.
 
-            roman_tessellation_db.get_center_sky_position(rtid)
-            ra0_field = roman_tessellation_db.ra0
-            dec0_field = roman_tessellation_db.dec0
-            roman_tessellation_db.get_corner_sky_positions(rtid)
-            ra1_field = roman_tessellation_db.ra1
-            dec1_field = roman_tessellation_db.dec1
-            ra2_field = roman_tessellation_db.ra2
-            dec2_field = roman_tessellation_db.dec2
-            ra3_field = roman_tessellation_db.ra3
-            dec3_field = roman_tessellation_db.dec3
-            ra4_field = roman_tessellation_db.ra4
-            dec4_field = roman_tessellation_db.dec4
+                # Get sky positions of center and four corners of sky tile.
 
+                roman_tessellation_db.get_center_sky_position(rtid)
+                ra0_field = roman_tessellation_db.ra0
+                dec0_field = roman_tessellation_db.dec0
+                roman_tessellation_db.get_corner_sky_positions(rtid)
+                ra1_field = roman_tessellation_db.ra1
+                dec1_field = roman_tessellation_db.dec1
+                ra2_field = roman_tessellation_db.ra2
+                dec2_field = roman_tessellation_db.dec2
+                ra3_field = roman_tessellation_db.ra3
+                dec3_field = roman_tessellation_db.dec3
+                ra4_field = roman_tessellation_db.ra4
+                dec4_field = roman_tessellation_db.dec4
 
-            # Compute angular separation, in degrees, between field center and corner.
-            # Use this with some margin to compute a radius of inclusion for cross-matching.
-            # The tiles are not necessarily square or even rectangular, so choose maximum separation.
 
-            ang_sep1 = util.compute_angular_separation(ra0_field, dec0_field, ra1_field, dec1_field)
-            ang_sep2 = util.compute_angular_separation(ra0_field, dec0_field, ra2_field, dec2_field)
-            ang_sep3 = util.compute_angular_separation(ra0_field, dec0_field, ra3_field, dec3_field)
-            ang_sep4 = util.compute_angular_separation(ra0_field, dec0_field, ra4_field, dec4_field)
+                # Compute angular separation, in degrees, between field center and corner.
+                # Use this with some margin to compute a radius of inclusion for cross-matching.
+                # The tiles are not necessarily square or even rectangular, so choose maximum separation.
 
-            ang_sep = max(ang_sep1,ang_sep2,ang_sep3,ang_sep4)
+                ang_sep1 = util.compute_angular_separation(ra0_field, dec0_field, ra1_field, dec1_field)
+                ang_sep2 = util.compute_angular_separation(ra0_field, dec0_field, ra2_field, dec2_field)
+                ang_sep3 = util.compute_angular_separation(ra0_field, dec0_field, ra3_field, dec3_field)
+                ang_sep4 = util.compute_angular_separation(ra0_field, dec0_field, ra4_field, dec4_field)
 
+                ang_sep = max(ang_sep1,ang_sep2,ang_sep3,ang_sep4)
 
-            # Augment the angular separation with the match radius.
 
-            ang_sep += match_radius
+                # Augment the angular separation with the match radius.
 
+                ang_sep += match_radius
 
-        # Loop over adjacent fields and perform cross-matching.
 
-        for rtid in rtids_list:
-            adjacent_field = rtid
-            fh.write(f"Cross-matching field = {field} with adjacent field = {adjacent_field}\n")
+            # Loop over adjacent fields and perform cross-matching.
 
+            for rtid in rtids_list:
+                adjacent_field = rtid
+                fh.write(f"Cross-matching field = {field} with adjacent field = {adjacent_field}\n")
 
-            # For a given field pertinent to this parallel process, loop over all SCAs
-            # and perform source-matching:
-            # 1. Cross-match each source in an adjacent field with the AstroObjects_<field> table.
-            # 2. Speed it up by restricting cross-matching within the inclusion radius.
-            # 3. Register Merges_<field> records for cross-matches.
 
-            for sca in scas:
+                # For a given field pertinent to this parallel process, loop over all SCAs
+                # and perform source-matching:
+                # 1. Cross-match each source in an adjacent field with the AstroObjects_<field> table.
+                # 2. Speed it up by restricting cross-matching within the inclusion radius.
+                # 3. Register Merges_<field> records for cross-matches.
 
-                sources_tablename = f"sources_{proc_date}_{sca}"
+                for sca in scas:
 
-                if n_adjacent_fields == 8:
+                    sources_tablename = f"sources_{proc_date}_{sca}"
 
-                    query = f"SELECT a.sid,a.ra,a.dec,b.aid,b.meanra,b.meandec,b.nsources " +\
-                        f"FROM {sources_tablename} AS a, " +\
-                        f"{astroobjects_tablename} AS b " +\
-                        f"WHERE q3c_radial_query(a.ra, a.dec, {ra0_field}, {dec0_field}, {ang_sep}) " +\
-                        f"AND q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
-                        f"AND a.field = {adjacent_field} AND a.flags = 0;"
+                    if n_adjacent_fields == 8:
 
-                else:
+                        query = f"SELECT a.sid,a.ra,a.dec,b.aid,b.meanra,b.meandec,b.nsources " +\
+                            f"FROM {sources_tablename} AS a, " +\
+                            f"{astroobjects_tablename} AS b " +\
+                            f"WHERE q3c_radial_query(a.ra, a.dec, {ra0_field}, {dec0_field}, {ang_sep}) " +\
+                            f"AND q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
+                            f"AND a.field = {adjacent_field} AND a.flags = 0;"
 
-                    query = f"SELECT a.sid,a.ra,a.dec,b.aid,b.meanra,b.meandec,b.nsources " +\
-                        f"FROM {sources_tablename} AS a, " +\
-                        f"{astroobjects_tablename} AS b " +\
-                        f"WHERE q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
-                        f"AND a.field = {adjacent_field} AND a.flags = 0;"
+                    else:
 
-                sql_queries = []
-                sql_queries.append(query)
-                records = dbh.execute_sql_queries(sql_queries,thread_debug)
+                        query = f"SELECT a.sid,a.ra,a.dec,b.aid,b.meanra,b.meandec,b.nsources " +\
+                            f"FROM {sources_tablename} AS a, " +\
+                            f"{astroobjects_tablename} AS b " +\
+                            f"WHERE q3c_join(a.ra, a.dec, b.meanra, b.meandec, {match_radius}) " +\
+                            f"AND a.field = {adjacent_field} AND a.flags = 0;"
 
+                    sql_queries = []
+                    sql_queries.append(query)
+                    records = dbh.execute_sql_queries(sql_queries,thread_debug)
 
-                # Code-timing benchmark.
 
-                thread_end_time_benchmark = time.time()
-                diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
-                fh.write(f"Elapsed time in seconds to cross-match adjacent {sources_tablename} and {astroobjects_tablename} database tables = {diff_time_benchmark}\n")
-                thread_start_time_benchmark = thread_end_time_benchmark
+                    # Code-timing benchmark.
 
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to cross-match adjacent {sources_tablename} and {astroobjects_tablename} database tables = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
 
-                # For the sources that were matched, create Merges_<field> record.
-                # Also, update meanra, meandec, nsources in the AstroObjects_<field> record.
 
-                for record in records:
+                    # For the sources that were matched, create Merges_<field> record.
+                    # Also, update meanra, meandec, nsources in the AstroObjects_<field> record.
+
+                    for record in records:
+
+                        sid = record[0]
+                        source_ra = record[1]
+                        source_dec = record[2]
+                        aid = record[3]
+                        meanra = record[4]
+                        meandec = record[5]
+                        nsources = record[6]
 
-                    sid = record[0]
-                    source_ra = record[1]
-                    source_dec = record[2]
-                    aid = record[3]
-                    meanra = record[4]
-                    meandec = record[5]
-                    nsources = record[6]
+                        dbh.add_merge_to_field(merges_tablename,aid,sid)
 
-                    dbh.add_merge_to_field(merges_tablename,aid,sid)
+                        meanra = util.update_meanra(meanra,nsources,source_ra)
+                        meandec = util.update_meandec(meandec,nsources,source_dec)
+                        nsources += 1
 
-                    meanra = util.update_meanra(meanra,nsources,source_ra)
-                    meandec = util.update_meandec(meandec,nsources,source_dec)
-                    nsources += 1
+                        dbh.update_astroobject_mean_sky_position(astroobjects_tablename,
+                                                                 aid,
+                                                                 meanra,
+                                                                 meandec,
+                                                                 nsources,
+                                                                 thread_debug)
 
-                    dbh.update_astroobject_mean_sky_position(astroobjects_tablename,
-                                                             aid,
-                                                             meanra,
-                                                             meandec,
-                                                             nsources,
-                                                             thread_debug)
 
+                    # Code-timing benchmark.
 
-                # Code-timing benchmark.
+                    thread_end_time_benchmark = time.time()
+                    diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
+                    fh.write(f"Elapsed time in seconds to insert {merges_tablename} database records for adjacent matched sources = {diff_time_benchmark}\n")
+                    thread_start_time_benchmark = thread_end_time_benchmark
 
-                thread_end_time_benchmark = time.time()
-                diff_time_benchmark = thread_end_time_benchmark - thread_start_time_benchmark
-                fh.write(f"Elapsed time in seconds to insert {merges_tablename} database records for adjacent matched sources = {diff_time_benchmark}\n")
-                thread_start_time_benchmark = thread_end_time_benchmark
 
+                    # End of loop over scas.
 
-                # End of loop over scas.
+                    fh.write(f"Loop end: index_field,field,sca = {index_field},{field},{sca}\n")
 
-                fh.write(f"Loop end: index_field,field,sca = {index_field},{field},{sca}\n")
 
+            # End of loop over fields.
 
-        # End of loop over fields.
+            fh.write(f"Loop end: index_field,field = {index_field},{field}\n")
 
-        fh.write(f"Loop end: index_field,field = {index_field},{field}\n")
 
+            # Flush write buffer.
 
-        # Flush write buffer.
+            fh.flush()
 
-        fh.flush()
+    finally:
 
+        # Return database connection to pool.
+
+        dbh.close()
 
     fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
 
@@ -644,6 +1152,25 @@ def run_single_core_job_stage_2_crossmatching(scas,fields,index_thread):
     return message
 
 
+def select_stage_1_crossmatching_method():
+
+    '''
+    Select stage-1 cross-matching method according to crossmatch_mode in the [SOURCE_MATCHING] section
+    of the configuration file: legacy (statements per source), bulk (set-based statements per batch),
+    or kdtree (in-memory matching with the database read once and written once per field).
+    '''
+
+    if crossmatch_mode == "legacy":
+        return run_single_core_job_stage_1_crossmatching
+    elif crossmatch_mode == "bulk":
+        return run_single_core_job_stage_1_crossmatching_bulk
+    elif crossmatch_mode == "kdtree":
+        return run_single_core_job_stage_1_crossmatching_kdtree
+    else:
+        print(f"*** Error: Unsupported crossmatch_mode ({crossmatch_mode}); quitting...")
+        exit(64)
+
+
 def execute_parallel_processes_stage_1_crossmatching(scas_list,fields_list,num_cores=None):
 
     if num_cores is None:
@@ -651,9 +1178,11 @@ def execute_parallel_processes_stage_1_crossmatching(scas_list,fields_list,num_c
 
     print("num_cores =",num_cores)
 
+    run_single_core_job = select_stage_1_crossmatching_method()
+
     with ProcessPoolExecutor(max_workers=num_cores) as executor:
         # Submit all tasks to the executor and store the futures in a list
-        futures = [executor.submit(run_single_core_job_stage_1_crossmatching,scas_list,fields_list,thread_index) for thread_index in range(num_cores)]
+        futures = [executor.submit(run_single_core_job,scas_list,fields_list,thread_index) for thread_index in range(num_cores)]
 
         # Iterate over completed futures and update progress
         for i, future in enumerate(as_completed(futures)):
@@ -870,7 +1399,8 @@ if __name__ == '__main__':
         execute_parallel_processes_stage_1_crossmatching(scas_list,fields_list,num_cores)
     else:
         thread_index = 0
-        run_single_core_job_stage_1_crossmatching(scas_list,fields_list,thread_index)
+        run_single_core_job = select_stage_1_crossmatching_method()
+        run_single_core_job(scas_list,fields_list,thread_index)
 
 
     # Code-timing benchmark.
@@ -950,12 +1480,6 @@ if __name__ == '__main__':
     if dbh.exit_code >= 64:
         exit(dbh.exit_code)
 
-    for tdbh in dbh_list:
-        tdbh.close()
-
-        if tdbh.exit_code >= 64:
-            exit(tdbh.exit_code)
-
 
     # Termination.
 
@@ -79,6 +79,12 @@ def reformat_simdata_fits_file_and_compute_uncertainty_image_via_simple_model(in
 # This method is applied to ZOGY outputs because swarping the
 # reference image resets NaNs to zero, which would otherwise
 # give bogus positive image values in the difference image.
+# The _data version masks already-loaded data arrays and returns the masked array.
+
+def mask_difference_image_data_with_resampled_reference_cov_map(data_input,data_mask,thresh):
+
+    return np.where(np.asarray(data_mask) >= thresh,np.asarray(data_input),np.nan)
+
 
 def mask_difference_image_with_resampled_reference_cov_map(input_filename,mask_filename,output_filename,thresh):
 
@@ -89,10 +95,7 @@ def mask_difference_image_with_resampled_reference_cov_map(input_filename,mask_f
     hdul_mask = fits.open(mask_filename)
     data_mask = hdul_mask[0].data
 
-    np_data_input = np.array(data_input)
-    np_data_mask = np.array(data_mask)
-
-    np_data_output = np.where(np_data_mask >= thresh,np_data_input,np.nan)
+    np_data_output = mask_difference_image_data_with_resampled_reference_cov_map(data_input,data_mask,thresh)
 
     hdu_list = []
     hdu = fits.PrimaryHDU(header=hdr_input,data=np_data_output)
@@ -336,64 +339,33 @@ def gainMatchScienceAndReferenceImages(s3_client,
 
     # Parse XWIN_IMAGE,YWIN_IMAGE,FLUX_APER_6 (14-pixel diameter) from SExtractor catalog for science image.
 
-    sci_vals = util.parse_ascii_text_sextractor_catalog(filename_scigainmatchsexcat_catalog,params_file,params_to_get_vals_scicat)
+    sci_vals = util.parse_sextractor_catalog(filename_scigainmatchsexcat_catalog,params_file,params_to_get_vals_scicat)
 
 
-    # Parse XWIN_IMAGE,YWIN_IMAGE,FLUX_APER_6 (14-pixel diameter),CLASS_STAR,ISOAREAF_IMAGE,AWIN_WORLD,BWIN_WORLD
+    # Parse XWIN_IMAGE,YWIN_IMAGE,FLUX_APER_6 (14-pixel diameter),MAG_APER_6,CLASS_STAR,ISOAREAF_IMAGE,AWIN_WORLD,BWIN_WORLD
     # from SExtractor catalog for reference image.
 
-    ref_vals = util.parse_ascii_text_sextractor_catalog(filename_refgainmatchsexcat_catalog,params_file,params_to_get_vals_refcat)
-
-
-    # Convert returned catalog values to 1-D lists.
-
-    num_rows_sci = len(sci_vals)
-
-    sci_x_vals = []
-    sci_y_vals = []
-    sci_flux_vals = []
-    for i in range(num_rows_sci):
-        sci_x = float(sci_vals[i][0])
-        sci_y = float(sci_vals[i][1])
-        sci_flux = float(sci_vals[i][2])
-        sci_x_vals.append(sci_x)
-        sci_y_vals.append(sci_y)
-        sci_flux_vals.append(sci_flux)
-
-    num_rows_ref = len(ref_vals)
-
-    ref_x_vals = []
-    ref_y_vals = []
-    ref_flux_vals = []
-    ref_mag_vals = []
-    ref_class_star_vals = []
-    ref_isoareaf_image_vals = []
-    ref_awin_to_bwin_world_ratio_vals = []
-    for i in range(num_rows_ref):
-        ref_x = float(ref_vals[i][0])
-        ref_y = float(ref_vals[i][1])
-        ref_flux = float(ref_vals[i][2])
-        ref_mag = float(ref_vals[i][3])
-        ref_class_star = float(ref_vals[i][4])
-        ref_isoareaf_image = float(ref_vals[i][5])
-        ref_awin_world = float(ref_vals[i][6])
-        ref_bwin_world = float(ref_vals[i][7])
-        ref_x_vals.append(ref_x)
-        ref_y_vals.append(ref_y)
-        ref_flux_vals.append(ref_flux)
-        ref_mag_vals.append(ref_mag)
-        ref_class_star_vals.append(ref_class_star)
-        ref_isoareaf_image_vals.append(ref_isoareaf_image)
-        ref_awin_to_bwin_world_ratio_vals.append(ref_awin_world / ref_bwin_world)
+    ref_vals = util.parse_sextractor_catalog(filename_refgainmatchsexcat_catalog,params_file,params_to_get_vals_refcat)
+
+
+    # Catalog values are returned as 1-D NumPy arrays.
+
+    sci_x_vals = sci_vals["XWIN_IMAGE"]
+    sci_y_vals = sci_vals["YWIN_IMAGE"]
+    sci_flux_vals = sci_vals["FLUX_APER_6"]
+
+    num_rows_sci = len(sci_x_vals)
+
+    num_rows_ref = len(ref_vals["XWIN_IMAGE"])
 
     nrefcat = num_rows_ref
 
-    xsci_val = np.array(ref_x_vals)
-    ysci_val = np.array(ref_y_vals)
-    magref_val = np.array(ref_mag_vals)
-    classstarref_val = np.array(ref_class_star_vals)
-    isoareafimageref_val = np.array(ref_isoareaf_image_vals)
-    awintobwinworldratioref_val = np.array(ref_awin_to_bwin_world_ratio_vals)
+    xsci_val = ref_vals["XWIN_IMAGE"]
+    ysci_val = ref_vals["YWIN_IMAGE"]
+    magref_val = ref_vals["MAG_APER_6"].copy()
+    classstarref_val = ref_vals["CLASS_STAR"]
+    isoareafimageref_val = ref_vals["ISOAREAF_IMAGE"]
+    awintobwinworldratioref_val = ref_vals["AWIN_WORLD"] / ref_vals["BWIN_WORLD"]
 
     magref_val += magzpref
 
@@ -54,9 +54,11 @@ from astropy.wcs import WCS
 from astropy.io import fits
 from astropy.coordinates import SkyCoord
 from astropy.table import QTable, join
+from scipy.spatial import cKDTree
 
 import database.modules.utils.rapid_db as db
 import modules.utils.rapid_pipeline_subs as util
+import modules.utils.rapid_catalog_subs as catsubs
 import database.modules.utils.roman_tessellation_db as sqlite
 
 
@@ -244,6 +246,10 @@ maxbadpixfrac = float(config_input['FORCED_PHOTOMETRY']['maxbadpixfrac'])
 # Minimum percent overlap of difference image onto sky tile (field).
 minimum_percent_overlap_area = float(config_input['FORCED_PHOTOMETRY']['minimum_percent_overlap_area'])
 
+# Number of threads for concurrently prefetching input files from S3 buckets
+# (default for configuration files that predate prefetch_num_threads).
+prefetch_num_threads = int(config_input['FORCED_PHOTOMETRY'].get('prefetch_num_threads','16'))
+
 # FITS keywords.
 diffimg_fits_keyword_zptmag = config_input['FORCED_PHOTOMETRY']['diffimg_fits_keyword_zptmag']
 refimg_fits_keyword_zptmag = config_input['FORCED_PHOTOMETRY']['refimg_fits_keyword_zptmag']
@@ -413,22 +419,22 @@ def add_simulated_point_source_to_difference_image(diffimg_filename,
 
 
 #---------------------------------------------------------------------
-# Find nearest source in reference-image PSF-catalog that is within
-# refmatchrad arcsec and return metrics.
-# Canonical catalog filenames are:
-#     refimage_masked_psfcat.txt
-#     refimage_masked_psfcat_finder.txt
+# Per-run cache of reference-image PSF-catalogs, keyed by the resolved
+# catalog filenames (many epochs share the same reference image, and
+# their local catalog filenames are symbolic links to the same files).
+# Each entry holds the joined catalog columns as numpy arrays and a
+# KD-tree of the source unit vectors for nearest-neighbor queries,
+# or None if one or the other catalog file does not exist.
 #---------------------------------------------------------------------
 
-def nearestrefpsfcatmetrics(reffilenameinp,refcatfname,refcatfinderfname,fph_ra,fph_dec,refzp,refmatchrad):
+refpsfcat_cache = {}
 
-    dnearestrefsrc = "null"
-    nearestref_mag_fit = "null"
-    nearestref_mag_err = "null"
-    nearestref_reduced_chi2 = "null"
-    nearestref_sharpness = "null"
-    exitstatuseph4 = 0
-    exitstatuseph5 = 0
+def load_refpsfcat(refcatfname,refcatfinderfname):
+
+    key = (os.path.realpath(refcatfname),os.path.realpath(refcatfinderfname))
+
+    if key in refpsfcat_cache:
+        return refpsfcat_cache[key]
 
 
     #--------
@@ -436,77 +442,113 @@ def nearestrefpsfcatmetrics(reffilenameinp,refcatfname,refcatfinderfname,fph_ra,
 
     if (not os.path.isfile(refcatfname)) or (not os.path.isfile(refcatfinderfname)):
 
-        print(f"*** Warning: One or the other file does not exist ({refcatfname},{refcatfinderfname}); skipping...")
+        refpsfcat_cache[key] = None
 
-        exitstatuseph4 = 58
+        return None
 
-        return dnearestrefsrc, nearestref_mag_fit, nearestref_mag_err, nearestref_reduced_chi2,\
-               nearestref_sharpness, exitstatuseph4, exitstatuseph5
 
     #--------
-    # Read ra,dec positions of sources from PSF-catalog, compute square
-    # of Pythagorean distances from input ra,dec position, store numpy array
-    # index corresponding to minimum value and distance.
-    # Note: Pythagorean approximation is for speed!
-    #--------
-    # Join catalogs and extract the columns needed.
-
-    psfcat_qtable = QTable.read(refcatfname,format='ascii')
-    psfcat_finder_qtable = QTable.read(refcatfinderfname,format='ascii')
+    # Join catalogs (or read the sidecar Parquet file of the joined catalogs, if it was downloaded)
+    # and extract the columns needed.
 
-    joined_table_inner = join(psfcat_qtable, psfcat_finder_qtable, keys='id', join_type='inner')
+    joined_table_inner = catsubs.read_joined_psfcat(refcatfname,refcatfinderfname)
 
     nrows = len(joined_table_inner)
-    print(f"nrows in PSF-fit catalog = {nrows}\n")
+    print(f"nrows in PSF-fit catalog {key[0]} = {nrows}\n")
+
+    refpsfcat = {}
+
+    for colname in ['ra','dec','flux_fit','flux_err','reduced_chi2','sharpness']:
+        refpsfcat[colname] = np.asarray(joined_table_inner[colname].value,dtype=np.float64)
+
+    if nrows > 0:
+        refpsfcat['tree'] = cKDTree(util.compute_xyz_array(refpsfcat['ra'],refpsfcat['dec']))
+    else:
+        refpsfcat['tree'] = None
+
+    refpsfcat_cache[key] = refpsfcat
+
+    return refpsfcat
+
+
+#---------------------------------------------------------------------
+# Find nearest source in reference-image PSF-catalog that is within
+# refmatchrad arcsec and return metrics, for all input sky positions
+# with one vectorized nearest-neighbor query.
+# Canonical catalog filenames are:
+#     refimage_masked_psfcat.txt
+#     refimage_masked_psfcat_finder.txt
+# Returns list, with one element per sky position, of tuples:
+# (dnearestrefsrc, nearestref_mag_fit, nearestref_mag_err,
+#  nearestref_reduced_chi2, nearestref_sharpness, exitstatuseph4, exitstatuseph5)
+#---------------------------------------------------------------------
+
+def nearestrefpsfcatmetrics(refcatfname,refcatfinderfname,fph_ras,fph_decs,refzp,refmatchrad):
+
+    npositions = len(fph_ras)
+
+    refpsfcat = load_refpsfcat(refcatfname,refcatfinderfname)
 
-    ra_val = joined_table_inner['ra'].value
-    dec_val = joined_table_inner['dec'].value
+    if refpsfcat is None:
 
-    num_ra_val = len(ra_val)
-    num_dec_val = len(dec_val)
+        print(f"*** Warning: One or the other file does not exist ({refcatfname},{refcatfinderfname}); skipping...")
+
+        exitstatuseph4 = 58
 
-    print(f"Number of ra values = {num_ra_val}")
-    print(f"Number of dec values = {num_dec_val}")
+        return [("null","null","null","null","null",exitstatuseph4,0)] * npositions
 
-    cos_dec = np.cos(np.radians(fph_dec))
-    dist2_val = ((cos_dec * (ra_val - fph_ra)) *\
-        (cos_dec *(ra_val - fph_ra))) +\
-        ((dec_val - fph_dec)*(dec_val - fph_dec))
+    if refpsfcat['tree'] is None:
 
-    idxmin = dist2_val.argmin()
+        print(f"*** Warning: No ref-image catalog source exists within {refmatchrad} arcsec; skipping...")
+
+        exitstatuseph5 = 57
+
+        return [("null","null","null","null","null",0,exitstatuseph5)] * npositions
 
-    print(f"idxmin = {idxmin}")
 
     #--------
-    # Compute minimum approximate distance in arcsec.
+    # Query for nearest source and compute its distance in arcsec.
 
-    distmin = 3600. * np.sqrt(dist2_val[idxmin])
+    chord,idxmin = refpsfcat['tree'].query(util.compute_xyz_array(fph_ras,fph_decs))
 
-    print(f"{swname}: nearestrefpsfcatmetrics: distance to nearest source in PSF-catalog = {distmin} arcsec.")
+    distmin = 3600.0 * np.degrees(2.0 * np.arcsin(np.minimum(0.5 * chord,1.0)))
 
 
     #--------
     # if distance is <= refmatchrad arcsec, store associated metrics from
     # catalog, otherwise issue warning.
 
-    if distmin <= refmatchrad:
+    metrics = []
 
-        dnearestrefsrc = distmin
-        nearestref_flux_fit = joined_table_inner['flux_fit'].value[idxmin]
-        nearestref_mag_fit = -2.5 * np.log10(nearestref_flux_fit) + refzp
-        nearestref_mag_err = 1.085736205 * joined_table_inner['flux_err'].value[idxmin] / nearestref_flux_fit
-        nearestref_reduced_chi2 = joined_table_inner['reduced_chi2'].value[idxmin]
-        nearestref_sharpness = joined_table_inner['sharpness'].value[idxmin]
+    for k in range(npositions):
 
-    else:
+        print(f"{swname}: nearestrefpsfcatmetrics: distance to nearest source in PSF-catalog = {distmin[k]} arcsec.")
 
-        print(f"*** Warning: No ref-image catalog source exists within {refmatchrad} arcsec; skipping...")
+        if distmin[k] <= refmatchrad:
 
-        exitstatuseph5 = 57
+            idx = idxmin[k]
+
+            nearestref_flux_fit = refpsfcat['flux_fit'][idx]
+            nearestref_mag_fit = -2.5 * np.log10(nearestref_flux_fit) + refzp
+            nearestref_mag_err = 1.085736205 * refpsfcat['flux_err'][idx] / nearestref_flux_fit
 
+            metrics.append((distmin[k],
+                            nearestref_mag_fit,
+                            nearestref_mag_err,
+                            refpsfcat['reduced_chi2'][idx],
+                            refpsfcat['sharpness'][idx],
+                            0,
+                            0))
 
-    return dnearestrefsrc, nearestref_mag_fit, nearestref_mag_err, nearestref_reduced_chi2,\
-           nearestref_sharpness, exitstatuseph4, exitstatuseph5
+        else:
+
+            print(f"*** Warning: No ref-image catalog source exists within {refmatchrad} arcsec; skipping...")
+
+            exitstatuseph5 = 57
+
+            metrics.append(("null","null","null","null","null",0,exitstatuseph5))
+
+    return metrics
 
 
 #################
@@ -525,7 +567,15 @@ if __name__ == '__main__':
 
     exitcode = 0
 
-    s3_client = boto3.client('s3')
+    # Optionally serve S3 objects from a local directory instead (for testing).
+
+    s3_local_dir = os.getenv('S3LOCALDIR')
+
+    if s3_local_dir is None:
+        s3_client = boto3.client('s3')
+    else:
+        print(f"Reading S3 objects from local directory {s3_local_dir}")
+        s3_client = util.LocalDirectoryS3Client(s3_local_dir)
 
 
     # Read input sky positions, which should be (ra,dec) in degrees.
@@ -608,6 +658,96 @@ if __name__ == '__main__':
         print("Zero DiffImages database records returned; quitting...")
 
 
+    # Prefetch all required input files from S3 buckets concurrently.  Each S3 object is
+    # downloaded once into prefetch/<bucket>/<object name>, so that files with the same
+    # name in different S3 subdirectories do not collide and reference images
+    # shared by several difference images are not requested again.
+
+    prefetch_dir = "prefetch"
+
+    def get_prefetch_filename(s3_full_name):
+        s3_bucket_name,s3_object_name = util.parse_s3_full_name(s3_full_name)
+        return os.path.join(prefetch_dir,s3_bucket_name,s3_object_name)
+
+    diffimg_s3_full_name_list = []
+    diffimgpsf_s3_full_name_list = []
+    prefetch_s3_full_names = {}
+
+    for record in records:
+        fid = record[3]
+        filename = record[16]
+        refimfilename = record[21]
+
+        # TODO The database query returns ZOGY difference images.  E.g.,
+        # s3://rapid-product-files/20260519/jid91919/zogy_diffimage_masked.fits
+        # We want to use SFFT difference images.  E.g.,
+        # s3://rapid-product-files/20260519/jid91919/sfftdiffimage_masked.fits
+        # Note that crossconv_flag is True for Open Universe sims and False for rimtimsims.
+
+        if crossconv_flag:
+            filename = filename.replace("zogy_diffimage","sfftdiffimage_dconv")
+        else:
+            filename = filename.replace("zogy_diffimage","sfftdiffimage")
+
+        diffimg_s3_full_name_list.append(filename)
+
+        s3_full_name_diff_image_psf = f"{os.path.dirname(filename)}/{filename_diffimgpsf}"
+        diffimgpsf_s3_full_name_list.append(s3_full_name_diff_image_psf)
+
+        _,refimg_s3_object_name = util.parse_s3_full_name(refimfilename)
+        subdirs_ref_image = os.path.dirname(refimg_s3_object_name)
+
+        s3_full_name_ref_image_psfcat = "s3://" + product_s3_bucket_base + "/" + subdirs_ref_image + "/" + output_psfcat_filename
+        s3_full_name_ref_image_psfcat_finder = "s3://" + product_s3_bucket_base + "/" + subdirs_ref_image + "/" + output_psfcat_finder_filename
+        s3_full_name_ref_image_psfcat_sidecar = catsubs.psfcat_sidecar_filename(s3_full_name_ref_image_psfcat)
+
+        for s3_full_name in (filename,s3_full_name_diff_image_psf,refimfilename,
+                             s3_full_name_ref_image_psfcat,s3_full_name_ref_image_psfcat_finder,
+                             s3_full_name_ref_image_psfcat_sidecar):
+            prefetch_s3_full_names[s3_full_name] = get_prefetch_filename(s3_full_name)
+
+
+        # The reference-image PSF for the filter is downloaded directly into its local filename.
+
+        refimage_psf_filename_from_bucket = refimage_psf_filename.replace("FID",str(fid))
+        s3_full_name_refimage_psf = "s3://" + job_info_s3_bucket_base + "/" +\
+            refimage_psf_s3_bucket_dir + "/" + refimage_psf_filename_from_bucket
+        prefetch_s3_full_names[s3_full_name_refimage_psf] = refimage_psf_filename_from_bucket
+
+    prefetched_from_bucket,prefetched_bytes = util.prefetch_files_from_s3_bucket(s3_client,
+                                                                                 prefetch_s3_full_names,
+                                                                                 prefetch_num_threads)
+
+
+    # Prefetch the alternate difference-image PSFs where the primary ones are not available.
+
+    prefetch_s3_full_names_alternate = {}
+
+    for i in range(nrecs):
+        if not prefetched_from_bucket[diffimgpsf_s3_full_name_list[i]]:
+            s3_full_name_diff_image_psf = f"{os.path.dirname(diffimg_s3_full_name_list[i])}/{filename_diffimgpsf_alternate}"
+            prefetch_s3_full_names_alternate[s3_full_name_diff_image_psf] = get_prefetch_filename(s3_full_name_diff_image_psf)
+
+    if len(prefetch_s3_full_names_alternate) > 0:
+
+        prefetched_from_bucket_alternate,prefetched_bytes_alternate = \
+            util.prefetch_files_from_s3_bucket(s3_client,prefetch_s3_full_names_alternate,prefetch_num_threads)
+
+        prefetched_from_bucket.update(prefetched_from_bucket_alternate)
+        prefetch_s3_full_names.update(prefetch_s3_full_names_alternate)
+        prefetched_bytes += prefetched_bytes_alternate
+
+
+    # Code-timing benchmark.
+
+    end_time_benchmark = time.time()
+    elapsed_time_prefetch = end_time_benchmark - start_time_benchmark
+    print("Elapsed time in seconds to prefetch input files from S3 buckets =",elapsed_time_prefetch)
+    print(f"Prefetched {prefetched_bytes} bytes from S3 buckets " +
+          f"({prefetched_bytes / elapsed_time_prefetch / 1.0e6:.3f} MB/s)")
+    start_time_benchmark = end_time_benchmark
+
+
     # Filter the DiffImages database records and set up forced-photometry calculations.
 
     i = 0
@@ -641,6 +781,8 @@ if __name__ == '__main__':
     ppid_ref_list = []
     dist_field_sciimg_center_list = []
     wcs_diffimg_list = []
+    naxis1_diffimg_list = []
+    naxis2_diffimg_list = []
     refimg_psfcat_list = []
     refimg_psfcat_finder_list = []
     refjdstart_list = []
@@ -653,17 +795,6 @@ if __name__ == '__main__':
     ref_image_fname_dict = {}
 
 
-    # Open text file to write list of valid difference-image filenames.
-
-    diffimglistfile = 'diffimglist.txt'
-
-    try:
-        fh_diffimglist = open(diffimglistfile, 'w', encoding="utf-8")
-    except:
-        print(f"*** Error: Could not open {diffimglistfile}; quitting...")
-        exit(64)
-
-
     # Loop over records returned from database query.
 
     for record in records:
@@ -683,19 +814,7 @@ if __name__ == '__main__':
         dec3 = record[13]
         ra4 = record[14]
         dec4 = record[15]
-        filename = record[16]
-
-        # TODO The database query returns ZOGY difference images.  E.g.,
-        # s3://rapid-product-files/20260519/jid91919/zogy_diffimage_masked.fits
-        # We want to use SFFT difference images.  E.g.,
-        # s3://rapid-product-files/20260519/jid91919/sfftdiffimage_masked.fits
-        # Note that crossconv_flag is True for Open Universe sims and False for rimtimsims.
-
-        if crossconv_flag:
-            filename = filename.replace("zogy_diffimage","sfftdiffimage_dconv")
-        else:
-            filename = filename.replace("zogy_diffimage","sfftdiffimage")
-
+        filename = diffimg_s3_full_name_list[i]
         checksum = record[17]
         infobitssci = record[18]
         infobitsref = record[19]
@@ -710,12 +829,13 @@ if __name__ == '__main__':
         print(f"i,field,filename,refimfilename,ppid_ref,dist = {i},{field},{filename},{refimfilename},{ppid_ref},{dist_field_sciimg_center}")
 
 
-        # Download difference image from S3 bucket.
+        # Difference image prefetched from S3 bucket.
 
         s3_full_name_diff_image = filename
-        diffimg_filename_from_bucket,subdirs_diff_image,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_diff_image)
+        diffimg_filename_from_bucket = prefetch_s3_full_names[s3_full_name_diff_image]
+        downloaded_from_bucket = prefetched_from_bucket[s3_full_name_diff_image]
 
-        print(f"diffimg_filename_from_bucket,subdirs_diff_image,downloaded_from_bucket = {diffimg_filename_from_bucket},{subdirs_diff_image},{downloaded_from_bucket}")
+        print(f"diffimg_filename_from_bucket,downloaded_from_bucket = {diffimg_filename_from_bucket},{downloaded_from_bucket}")
 
 
         # Parse S3 URI of difference image.
@@ -733,56 +853,49 @@ if __name__ == '__main__':
             exit(64)
 
 
-        # Download difference-image PSF from S3 bucket.
+        # Difference-image PSF prefetched from S3 bucket.
 
         s3_full_name_diff_image_psf = f"{s3path}/{filename_diffimgpsf}"
-        diffimgpsf_filename_from_bucket,subdirs_diff_image,downloaded_diffimgpsf_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_diff_image_psf)
-
-        print(f"diffimgpsf_filename_from_bucket,subdirs_diff_image,downloaded_diffimgpsf_from_bucket = {diffimgpsf_filename_from_bucket},{subdirs_diff_image},{downloaded_diffimgpsf_from_bucket}")
+        diffimgpsf_filename_from_bucket = prefetch_s3_full_names[s3_full_name_diff_image_psf]
+        downloaded_diffimgpsf_from_bucket = prefetched_from_bucket[s3_full_name_diff_image_psf]
 
         if not downloaded_diffimgpsf_from_bucket:
 
             s3_full_name_diff_image_psf = f"{s3path}/{filename_diffimgpsf_alternate}"
-            diffimgpsf_filename_from_bucket,subdirs_diff_image,downloaded_diffimgpsf_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_diff_image_psf)
+            diffimgpsf_filename_from_bucket = prefetch_s3_full_names[s3_full_name_diff_image_psf]
+            downloaded_diffimgpsf_from_bucket = prefetched_from_bucket[s3_full_name_diff_image_psf]
 
-            print(f"diffimgpsf_filename_from_bucket,subdirs_diff_image,downloaded_diffimgpsf_from_bucket = {diffimgpsf_filename_from_bucket},{subdirs_diff_image},{downloaded_diffimgpsf_from_bucket}")
+        print(f"diffimgpsf_filename_from_bucket,downloaded_diffimgpsf_from_bucket = {diffimgpsf_filename_from_bucket},{downloaded_diffimgpsf_from_bucket}")
 
 
-        # Download reference image and PSF-fit catalogs from S3 bucket.
+        # Reference image and PSF-fit catalogs prefetched from S3 bucket.
 
         if refimfilename not in ref_image_fname_dict:
 
-
-
             s3_full_name_ref_image = refimfilename
-            refimg_filename_from_bucket,subdirs_ref_image,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_ref_image)
-
-            print(f"refimg_filename_from_bucket,subdirs_ref_image,downloaded_from_bucket = {refimg_filename_from_bucket},{subdirs_ref_image},{downloaded_from_bucket}")
-
-            refimg_downloaded_from_bucket = downloaded_from_bucket
+            refimg_filename_from_bucket = prefetch_s3_full_names[s3_full_name_ref_image]
+            refimg_downloaded_from_bucket = prefetched_from_bucket[s3_full_name_ref_image]
 
+            _,refimg_s3_object_name = util.parse_s3_full_name(refimfilename)
+            subdirs_ref_image = os.path.dirname(refimg_s3_object_name)
 
             s3_full_name_ref_image_psfcat = "s3://" + product_s3_bucket_base + "/" + subdirs_ref_image + "/" + output_psfcat_filename
-            refimg_psfcat_filename_from_bucket,subdirs_ref_image,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_ref_image_psfcat)
-
-            print(f"refimg_psfcat_filename_from_bucket,subdirs_ref_image,downloaded_from_bucket = {refimg_psfcat_filename_from_bucket},{subdirs_ref_image},{downloaded_from_bucket}")
-
-            refimg_psfcat_downloaded_from_bucket = downloaded_from_bucket
-
+            refimg_psfcat_filename_from_bucket = prefetch_s3_full_names[s3_full_name_ref_image_psfcat]
+            refimg_psfcat_downloaded_from_bucket = prefetched_from_bucket[s3_full_name_ref_image_psfcat]
 
             s3_full_name_ref_image_psfcat_finder = "s3://" + product_s3_bucket_base + "/" + subdirs_ref_image + "/" + output_psfcat_finder_filename
-            refimg_psfcat_finder_filename_from_bucket,subdirs_ref_image,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_ref_image_psfcat_finder)
-
-            print(f"refimg_psfcat_finder_filename_from_bucket,subdirs_ref_image,downloaded_from_bucket = {refimg_psfcat_finder_filename_from_bucket},{subdirs_ref_image},{downloaded_from_bucket}")
+            refimg_psfcat_finder_filename_from_bucket = prefetch_s3_full_names[s3_full_name_ref_image_psfcat_finder]
+            refimg_psfcat_finder_downloaded_from_bucket = prefetched_from_bucket[s3_full_name_ref_image_psfcat_finder]
 
-            refimg_psfcat_finder_downloaded_from_bucket = downloaded_from_bucket
+            print(f"refimg_filename_from_bucket,refimg_psfcat_filename_from_bucket,refimg_psfcat_finder_filename_from_bucket = " +
+                  f"{refimg_filename_from_bucket},{refimg_psfcat_filename_from_bucket},{refimg_psfcat_finder_filename_from_bucket}")
 
 
             if (not refimg_downloaded_from_bucket) or (not refimg_psfcat_downloaded_from_bucket) or (not refimg_psfcat_finder_downloaded_from_bucket):
                 continue
 
 
-            newrefimfilename = refimg_filename_from_bucket.replace(".fits",f"_{refimg_idx}.fits")
+            newrefimfilename = os.path.basename(refimg_filename_from_bucket).replace(".fits",f"_{refimg_idx}.fits")
 
             shutil.move(refimg_filename_from_bucket, newrefimfilename)
             print(f"Moved '{refimg_filename_from_bucket}' to '{newrefimfilename}'")
@@ -792,7 +905,7 @@ if __name__ == '__main__':
             ref_image_fname_dict[refimfilename].append(newrefimfilename)
 
 
-            newrefimpsfcatfilename = refimg_psfcat_filename_from_bucket.replace(".txt",f"_{refimg_idx}.txt")
+            newrefimpsfcatfilename = os.path.basename(refimg_psfcat_filename_from_bucket).replace(".txt",f"_{refimg_idx}.txt")
 
             shutil.move(refimg_psfcat_filename_from_bucket, newrefimpsfcatfilename)
             print(f"Moved '{refimg_psfcat_filename_from_bucket}' to '{newrefimpsfcatfilename}'")
@@ -800,7 +913,21 @@ if __name__ == '__main__':
             ref_image_fname_dict[refimfilename].append(newrefimpsfcatfilename)
 
 
-            newrefimpsfcatfinderfilename = refimg_psfcat_finder_filename_from_bucket.replace(".txt",f"_{refimg_idx}.txt")
+            # The sidecar Parquet file of the joined PSF-fit and finder catalogs, if it exists,
+            # is kept next to the PSF-fit catalog, where load_refpsfcat looks for it.
+
+            s3_full_name_ref_image_psfcat_sidecar = catsubs.psfcat_sidecar_filename(s3_full_name_ref_image_psfcat)
+
+            if prefetched_from_bucket[s3_full_name_ref_image_psfcat_sidecar]:
+
+                refimg_psfcat_sidecar_filename_from_bucket = prefetch_s3_full_names[s3_full_name_ref_image_psfcat_sidecar]
+                newrefimpsfcatsidecarfilename = catsubs.psfcat_sidecar_filename(newrefimpsfcatfilename)
+
+                shutil.move(refimg_psfcat_sidecar_filename_from_bucket, newrefimpsfcatsidecarfilename)
+                print(f"Moved '{refimg_psfcat_sidecar_filename_from_bucket}' to '{newrefimpsfcatsidecarfilename}'")
+
+
+            newrefimpsfcatfinderfilename = os.path.basename(refimg_psfcat_finder_filename_from_bucket).replace(".txt",f"_{refimg_idx}.txt")
 
             shutil.move(refimg_psfcat_finder_filename_from_bucket, newrefimpsfcatfinderfilename)
             print(f"Moved '{refimg_psfcat_finder_filename_from_bucket}' to '{newrefimpsfcatfinderfilename}'")
@@ -847,9 +974,9 @@ if __name__ == '__main__':
         print("CTYPE = ",wcs_diffimg.wcs.crpix)
 
         naxis1_diffimg = hdr['NAXIS1']
-        naxis1_diffimg = hdr['NAXIS2']
+        naxis2_diffimg = hdr['NAXIS2']
 
-        print("naxis1_diffimg,naxis1_diffimg =",naxis1_diffimg,naxis1_diffimg)
+        print("naxis1_diffimg,naxis2_diffimg =",naxis1_diffimg,naxis2_diffimg)
 
         crpix1 = wcs_diffimg.wcs.crpix[0]
         crpix2 = wcs_diffimg.wcs.crpix[1]
@@ -872,13 +999,13 @@ if __name__ == '__main__':
 
         # Compute pixel coordinates of diff-image center and four corners.
 
-        x0,y0,x1,y1,x2,y2,x3,y3,x4,y4 = util.compute_pix_image_center_and_four_corners(naxis1_diffimg,naxis1_diffimg)
+        x0,y0,x1,y1,x2,y2,x3,y3,x4,y4 = util.compute_pix_image_center_and_four_corners(naxis1_diffimg,naxis2_diffimg)
 
 
         # Compute percent overlap area.
 
         percent_overlap_area = util.compute_image_overlap_area(wcs_diffimg,
-                                                               naxis1_diffimg,naxis1_diffimg,
+                                                               naxis1_diffimg,naxis2_diffimg,
                                                                x0,y0,
                                                                x1,y1,
                                                                x2,y2,
@@ -925,12 +1052,6 @@ if __name__ == '__main__':
             refzp = ref_image_fname_dict[refimfilename][5]
 
 
-            # Write valid difference-image filename and corresponding SCA gain to text list file.
-            # This probably varies with SCA.  TODO
-
-            fh_diffimglist.write(f"{diffimg_filename} {sca_gain}\n")
-
-
             # Append record columns into memory.
 
             pid_list.append(pid)
@@ -960,6 +1081,8 @@ if __name__ == '__main__':
             ppid_ref_list.append(ppid_ref)
             dist_field_sciimg_center_list.append(dist_field_sciimg_center)
             wcs_diffimg_list.append(wcs_diffimg)
+            naxis1_diffimg_list.append(naxis1_diffimg)
+            naxis2_diffimg_list.append(naxis2_diffimg)
             refimg_psfcat_list.append(refimg_psfcat_filename)
             refimg_psfcat_finder_list.append(refimg_psfcat_finder_filename)
             scizp_list.append(scizp)
@@ -975,12 +1098,9 @@ if __name__ == '__main__':
             s3_full_name_refimage_psf = "s3://" + job_info_s3_bucket_base + "/" +\
                 refimage_psf_s3_bucket_dir + "/" + refimage_psf_filename_from_bucket
 
-            if not os.path.exists(refimage_psf_filename_from_bucket):
-                refimg_psf_from_bucket,subdirs_refimage_psf,downloaded_from_bucket = \
-                    util.download_file_from_s3_bucket(s3_client,s3_full_name_refimage_psf,refimage_psf_filename_from_bucket)
-
-                print("s3_full_name_refimage_psf = ",s3_full_name_refimage_psf)
-                print("refimg_psf_from_bucket = ",refimg_psf_from_bucket)
+            print("s3_full_name_refimage_psf = ",s3_full_name_refimage_psf)
+            print("refimg_psf_from_bucket,downloaded_from_bucket = ",
+                  refimage_psf_filename_from_bucket,prefetched_from_bucket[s3_full_name_refimage_psf])
 
 
             # Move or copy PSF filename to unique local filename, as appropriate.fe
@@ -1021,8 +1141,6 @@ if __name__ == '__main__':
 
     numrecs = j
 
-    fh_diffimglist.close()
-
 
     # Code-timing benchmark.
 
@@ -1040,66 +1158,106 @@ if __name__ == '__main__':
         truesrcfluxperskyposition[c] = []
 
 
-    # Create the text file that stores sky positions and (x,y) one-based
-    # image pixel coordinates for the cforcepsfaper C module.  Whether
-    # a sky position falls off a difference is checked by the C module.
+    # Project all requested sky positions through the WCS of each difference image
+    # in a single vectorized call per image.  Positions are stored in 2D arrays
+    # indexed by [c,i], where c is the sky-position index and i is the difference-image index.
 
-    xydatafile = 'xy.txt'
+    positions = SkyCoord(ra=ra_list, dec=dec_list, unit='deg')
+
+    x_zerobased_array = np.empty((numskypositions,numrecs))
+    y_zerobased_array = np.empty((numskypositions,numrecs))
+
+    for i in range(numrecs):
+        x_zerobased_array[:,i],y_zerobased_array[:,i] = wcs_diffimg_list[i].world_to_pixel(positions)
+
+    x_array = x_zerobased_array + 1       # Convert to one-based pixels coordinates.
+    y_array = y_zerobased_array + 1
+
+
+    # Flag positions whose stamps fall off a difference image, with the same test as
+    # in the cforcepsfaper C module: the stamp centered on the nearest (one-based) pixel
+    # must lie entirely within the image.
+
+    hsz = int(0.5 * (stampsz - 1))
+    xi_array = np.trunc(x_array + 0.5)
+    yi_array = np.trunc(y_array + 0.5)
+    naxis1_array = np.array(naxis1_diffimg_list)
+    naxis2_array = np.array(naxis2_diffimg_list)
+
+    onimage = (xi_array - hsz >= 1) & (xi_array + hsz <= naxis1_array) & \
+              (yi_array - hsz >= 1) & (yi_array + hsz <= naxis2_array)
+
+
+    # Only difference images with at least one position on the image are given to the
+    # cforcepsfaper C module, which requires all sky positions for each difference image.
+    # The C module indexes these by k, which maps to i via cforcepsfaper_i_list[k].
+
+    cforcepsfaper_i_list = np.flatnonzero(onimage.any(axis=0)).tolist()
+    numrecs_cforcepsfaper = len(cforcepsfaper_i_list)
+
+    print(f"Number of sky positions on difference images = {np.count_nonzero(onimage)} out of {onimage.size}")
+    print(f"Number of difference images with at least one sky position on image = {numrecs_cforcepsfaper} out of {numrecs}")
+
+
+    # Write valid difference-image filenames and corresponding SCA gain to text list file.
+    # This probably varies with SCA.  TODO
+
+    diffimglistfile = 'diffimglist.txt'
 
     try:
-        fh_xydatafile = open(xydatafile, 'w', encoding="utf-8")
+        fh_diffimglist = open(diffimglistfile, 'w', encoding="utf-8")
     except:
-        print(f"*** Error: Could not open {xydatafile}; quitting...")
+        print(f"*** Error: Could not open {diffimglistfile}; quitting...")
         exit(64)
 
-    c = 0
+    fh_diffimglist.write("".join([f"{diffimg_list[i]} {sca_gain}\n" for i in cforcepsfaper_i_list]))
 
-    for ra,dec in zip(ra_list,dec_list):
+    fh_diffimglist.close()
 
-        for i in range(numrecs):
 
-            diffimg_filename = diffimg_list[i]
-            w = wcs_diffimg_list[i]
-            pid = pid_list[i]
-            scizp = scizp_list[i]
-            diffimg_psf_filename = diffimg_psf_list[i]
+    # Create the text file that stores sky positions and (x,y) one-based
+    # image pixel coordinates for the cforcepsfaper C module.
 
+    xydatafile = 'xy.txt'
 
-            pos = SkyCoord(ra=ra, dec=dec, unit='deg')     # Returns zero-based pixel coordinates.
-            x_zerobased,y_zerobased = w.world_to_pixel(pos)
+    try:
+        fh_xydatafile = open(xydatafile, 'w', encoding="utf-8")
+    except:
+        print(f"*** Error: Could not open {xydatafile}; quitting...")
+        exit(64)
 
-            x = x_zerobased + 1       # Convert to one-based pixels coordinates.
-            y = y_zerobased + 1
+    fh_xydatafile.write("".join([f"{c} {k} {pid_list[i]} {ra_list[c]} {dec_list[c]} {x_array[c,i]} {y_array[c,i]}\n"
+                                 for c in range(numskypositions)
+                                 for k,i in enumerate(cforcepsfaper_i_list)]))
 
-            print(f"Center: ra={ra}, dec={dec} corresponds to x={x}, y={y} (one-based pixel coordinates) in {diffimg_filename}")
+    fh_xydatafile.close()
 
 
-            # Write positions to text list file.
+    # Optionally add a simulated point source of magnitude specified by
+    # the simmag parameter to local copy of difference image.
+    # A prerequisite for this option is that the input (ra,dec) is at
+    # a sky position with an empty background.  The difference image
+    # is locally replaced with one containing the simulated point source.
 
-            fh_xydatafile.write(f"{c} {i} {pid} {ra} {dec} {x} {y}\n")
+    if simflag == 1:
 
+        for c in range(numskypositions):
 
-            # Optionally add a simulated point source of magnitude specified by
-            # the simmag parameter to local copy of difference image.
-            # A prerequisite for this option is that the input (ra,dec) is at
-            # a sky position with an empty background.  The difference image
-            # is locally replaced with one containing the simulated point source.
+            for i in range(numrecs):
 
-            if simflag == 1:
+                if not onimage[c,i]:
+                    truesrcfluxperskyposition[c].append(np.nan)
+                    continue
 
-                truesrcflux = add_simulated_point_source_to_difference_image(diffimg_filename,
-                                                                             scizp,
-                                                                             diffimg_psf_filename,
-                                                                             x_zerobased,
-                                                                             y_zerobased,
+                truesrcflux = add_simulated_point_source_to_difference_image(diffimg_list[i],
+                                                                             scizp_list[i],
+                                                                             diffimg_psf_list[i],
+                                                                             x_zerobased_array[c,i],
+                                                                             y_zerobased_array[c,i],
                                                                              simmag)
 
                 truesrcfluxperskyposition[c].append(truesrcflux)
 
-        c += 1
-
-    fh_xydatafile.close()
-
 
     # Code-timing benchmark.
 
@@ -1150,10 +1308,12 @@ if __name__ == '__main__':
 
     run_cforcepsfaper_was_successful = True
 
-    exitcode_from_cforcepsfaper,_ = util.execute_command_in_shell(f"./{cforcepsfaper_bash_script}","cforcepsfaper_sh.out")
+    if numrecs_cforcepsfaper > 0:
+
+        exitcode_from_cforcepsfaper,_ = util.execute_command_in_shell(f"./{cforcepsfaper_bash_script}","cforcepsfaper_sh.out")
 
-    if int(exitcode_from_cforcepsfaper) != 0:
-        run_cforcepsfaper_was_successful = False
+        if int(exitcode_from_cforcepsfaper) != 0:
+            run_cforcepsfaper_was_successful = False
 
     print(f"run_cforcepsfaper_was_successful = {run_cforcepsfaper_was_successful}")
 
@@ -1180,45 +1340,49 @@ if __name__ == '__main__':
     exitstatuseph0 = {}
     exitstatuseph2 = {}
 
+    # Sky positions that fall off a difference image are not measured by the C module,
+    # so initialize with the values it would write for them (no calculation possible).
+
     for c in range(numskypositions):
-        forcediffimflux[c] = []
-        forcediffimfluxunc[c] = []
-        forcediffimsnr[c] = []
-        forcediffimchisq[c] = []
-        forcediffimfluxap[c] = []
-        forcediffimfluxuncap[c] = []
-        forcediffimsnrap[c] = []
-        aperturecorr[c] = []
-        exitstatuseph0[c] = []
-        exitstatuseph2[c] = []
+        forcediffimflux[c] = ["-99999.000000"] * numrecs
+        forcediffimfluxunc[c] = ["-99999.000000"] * numrecs
+        forcediffimsnr[c] = ["-99999.000000"] * numrecs
+        forcediffimchisq[c] = ["-99999.000000"] * numrecs
+        forcediffimfluxap[c] = ["-99999.000000"] * numrecs
+        forcediffimfluxuncap[c] = ["-99999.000000"] * numrecs
+        forcediffimsnrap[c] = ["-99999.000000"] * numrecs
+        aperturecorr[c] = ["-99999.000000"] * numrecs
+        exitstatuseph0[c] = ["61"] * numrecs
+        exitstatuseph2[c] = ["0"] * numrecs
 
+    if numrecs_cforcepsfaper > 0:
 
-    with open(lightcurvefile, mode='r', newline='') as csvfile:
+        with open(lightcurvefile, mode='r', newline='') as csvfile:
 
-        lightcurvefile_reader = csv.reader(csvfile, delimiter=' ')
+            lightcurvefile_reader = csv.reader(csvfile, delimiter=' ')
 
-        next(lightcurvefile_reader)                           # Skip header line.
+            next(lightcurvefile_reader)                           # Skip header line.
 
-        for row in lightcurvefile_reader:
+            for row in lightcurvefile_reader:
 
-            c = int(row[0])
-            i = int(row[1])
+                c = int(row[0])
+                i = cforcepsfaper_i_list[int(row[1])]
 
-            # row[2] stores pid; skip since it is available from DB query.
-            if row[2] != str(pid_list[i]):
-                print(f"pid from row[2] ({row[2]}) does not match pid_list ({pid_list[i]}) for i = {i}; quitting...")
-                #exit(64)
+                # row[2] stores pid; skip since it is available from DB query.
+                if row[2] != str(pid_list[i]):
+                    print(f"pid from row[2] ({row[2]}) does not match pid_list ({pid_list[i]}) for i = {i}; quitting...")
+                    #exit(64)
 
-            forcediffimflux[c].append(row[3])
-            forcediffimfluxunc[c].append(row[4])
-            forcediffimsnr[c].append(row[5])
-            forcediffimchisq[c].append(row[6])
-            forcediffimfluxap[c].append(row[7])
-            forcediffimfluxuncap[c].append(row[8])
-            forcediffimsnrap[c].append(row[9])
-            aperturecorr[c].append(row[10])
-            exitstatuseph0[c].append(row[11])
-            exitstatuseph2[c].append(row[12])
+                forcediffimflux[c][i] = row[3]
+                forcediffimfluxunc[c][i] = row[4]
+                forcediffimsnr[c][i] = row[5]
+                forcediffimchisq[c][i] = row[6]
+                forcediffimfluxap[c][i] = row[7]
+                forcediffimfluxuncap[c][i] = row[8]
+                forcediffimsnrap[c][i] = row[9]
+                aperturecorr[c][i] = row[10]
+                exitstatuseph0[c][i] = row[11]
+                exitstatuseph2[c][i] = row[12]
 
 
     # If simflag was set, for each sky position, compute median ratio of true (sim) flux
@@ -1300,20 +1464,18 @@ if __name__ == '__main__':
         exitstatuseph4[c] = []
         exitstatuseph5[c] = []
 
-    c = 0
+    for i in range(numrecs):
 
-    for ra,dec in zip(ra_list,dec_list):
+        refcatfname = refimg_psfcat_list[i]
+        refcatfinderfname = refimg_psfcat_finder_list[i]
+        refzp = refzp_list[i]
 
-        for i in range(numrecs):
+        metrics = nearestrefpsfcatmetrics(refcatfname,refcatfinderfname,ra_list,dec_list,refzp,refmatchrad)
 
-            reffilenameinp = refimg_list[i]
-            refcatfname = refimg_psfcat_list[i]
-            refcatfinderfname = refimg_psfcat_finder_list[i]
-            refzp = refzp_list[i]
+        for c in range(numskypositions):
 
             dnearestrefsrc, nearestrefmag, nearestrefmagunc, nearestrefredchi2,\
-                nearestrefsharp, exitstatus4, exitstatus5 =\
-                nearestrefpsfcatmetrics(reffilenameinp,refcatfname,refcatfinderfname,ra,dec,refzp,refmatchrad)
+                nearestrefsharp, exitstatus4, exitstatus5 = metrics[c]
 
             d_nearestrefsrc[c].append(dnearestrefsrc)
             nearestref_mag_fit[c].append(nearestrefmag)
@@ -1323,7 +1485,7 @@ if __name__ == '__main__':
             exitstatuseph4[c].append(exitstatus4)
             exitstatuseph5[c].append(exitstatus5)
 
-        c += 1
+    print(f"Number of distinct reference-image PSF-catalogs loaded = {len(refpsfcat_cache)}")
 
 
     # Create output lightcurve files, one for each sky position.
@@ -4,12 +4,11 @@ import ast
 from datetime import datetime, timezone
 from dateutil import tz
 import time
-from concurrent.futures import ProcessPoolExecutor, as_completed
 
 to_zone = tz.gettz('America/Los_Angeles')
 
 import database.modules.utils.rapid_db as db
-import modules.utils.rapid_pipeline_subs as util
+import pipeline.launchSciencePipelineSubs as lsps
 
 swname = "launchSciencePipelinesForDateTimeRangeWithRefImageWindow.py"
 swvers = "1.0"
@@ -150,50 +149,6 @@ print("min_n_images_to_coadd =",min_n_images_to_coadd)
 print("max_n_images_to_coadd =",max_n_images_to_coadd)
 
 
-# Custom methods for parallel processing, taking advantage of multiple cores on the job-launcher machine.
-
-def run_script(rid):
-
-
-    """
-    Load unique value of rid into the environment variable RID.
-    Launch single instance of script with given environment-variable setting for RID.
-    """
-
-
-    # Load RID into the environment.
-
-    os.environ['RID'] = str(rid)
-
-
-    # Launch single pipeline from within Docker container.
-
-    python_cmd = 'python3.11'
-    launch_single_pipeline_instance_code = '/code/pipeline/awsBatchSubmitJobs_launchSingleSciencePipeline.py'
-
-    launch_cmd = [python_cmd,
-                  launch_single_pipeline_instance_code]
-
-    exitcode_from_launch_cmd = util.execute_command(launch_cmd)
-
-
-def launch_parallel_processes(rids, num_cores=None):
-
-    if num_cores is None:
-        num_cores = os.cpu_count()  # Use all available cores if not specified
-
-    print("num_cores =",num_cores)
-
-    with ProcessPoolExecutor(max_workers=num_cores) as executor:
-        # Submit all tasks to the executor and store the futures in a list
-        futures = [executor.submit(run_script,rid) for rid in rids]
-
-        # Iterate over completed futures and update progress
-        for i, future in enumerate(as_completed(futures)):
-            index = futures.index(future)  # Find the original index/order of the completed future
-            print(f"Completed: {i+1} processes, lastly for index={index}")
-
-
 #################
 # Main program.
 #################
@@ -318,9 +273,14 @@ if __name__ == '__main__':
     if dry_run:
         print("*** Message: Skip launching pipelines...")
     else:
-        print("*** Message: Executing pipeline/awsBatchSubmitJobs_launchSingleSciencePipeline.py " +\
-              "in parallel to launch pipelines...")
-        launch_parallel_processes(rid_list)
+        print("*** Message: Launching pipelines in parallel from this process...")
+
+        context = lsps.ScienceLaunchContext(swname,swvers)
+
+        if context.exit_code >= 64:
+            exit(context.exit_code)
+
+        lsps.launch_science_pipelines(context,rid_list)
 
 
     # Close database connection.
@@ -18,6 +18,7 @@ to_zone = tz.gettz('America/Los_Angeles')
 
 import database.modules.utils.rapid_db as db
 import modules.utils.rapid_pipeline_subs as util
+import modules.utils.rapid_catalog_subs as catsubs
 import database.modules.utils.roman_tessellation_db as sqlite
 
 level6 = 6
@@ -102,6 +103,14 @@ if roman_tessellation_dbname is None:
 roman_tessellation_db = sqlite.RomanTessellationNSIDE512()
 
 
+# Load the in-memory index of the Roman sky tessellation once, for vectorized rtid lookups.
+
+roman_tessellation_index = roman_tessellation_db.get_tessellation_index()
+
+if roman_tessellation_index is None:
+    exit(roman_tessellation_db.exit_code)
+
+
 # Other required environment variables.
 
 rapid_sw = os.getenv('RAPID_SW')
@@ -144,60 +153,68 @@ naxis2 = int(config_input['INSTRUMENT']['naxis2_sciimage'])
 ppid = int(config_input['SCI_IMAGE']['ppid'])
 
 
-# Open database connections for parallel access.
+# Number of parallel processes.  Each process lazily acquires its own database
+# connection from a per-process connection pool (see RAPIDDB pooled option).
 
 num_cores = os.cpu_count()
 
 print("num_cores =",num_cores)
 
-dbh_list = []
-
-for i in range(num_cores):
-
-    dbh = db.RAPIDDB()
-
-    if dbh.exit_code >= 64:
-        exit(dbh.exit_code)
-
-    dbh_list.append(dbh)
-
 
 # Get S3 client.
 
 s3_client = boto3.client('s3')
 
 
-# Define columns to be populated in sources tables.
-
-cols = []
-cols.append("id")
-cols.append("ra")
-cols.append("dec")
-cols.append("xfit")
-cols.append("yfit")
-cols.append("fluxfit")
-cols.append("xerr")
-cols.append("yerr")
-cols.append("fluxerr")
-cols.append("npixfit")
-cols.append("qfit")
-cols.append("cfit")
-cols.append("redchi")
-cols.append("flags")
-cols.append("sharpness")
-cols.append("roundness1")
-cols.append("roundness2")
-cols.append("npix")
-cols.append("peak")
-cols.append("pid")
-cols.append("isdiffpos")
-cols.append("field")
-cols.append("hp6")
-cols.append("hp9")
-cols.append("expid")
-cols.append("fid")
-cols.append("sca")
-cols.append("mjdobs")
+# Define columns to be populated in sources tables, with their PostgreSQL types
+# (see database/schema/rapidOpsSourcesTable.sql), which are needed for binary COPY.
+
+col_types_dict = {}
+col_types_dict["id"] = "integer"
+col_types_dict["ra"] = "double precision"
+col_types_dict["dec"] = "double precision"
+col_types_dict["xfit"] = "real"
+col_types_dict["yfit"] = "real"
+col_types_dict["fluxfit"] = "real"
+col_types_dict["xerr"] = "real"
+col_types_dict["yerr"] = "real"
+col_types_dict["fluxerr"] = "real"
+col_types_dict["npixfit"] = "smallint"
+col_types_dict["qfit"] = "real"
+col_types_dict["cfit"] = "real"
+col_types_dict["redchi"] = "real"
+col_types_dict["flags"] = "smallint"
+col_types_dict["sharpness"] = "real"
+col_types_dict["roundness1"] = "real"
+col_types_dict["roundness2"] = "real"
+col_types_dict["npix"] = "smallint"
+col_types_dict["peak"] = "real"
+col_types_dict["pid"] = "integer"
+col_types_dict["isdiffpos"] = "boolean"
+col_types_dict["field"] = "integer"
+col_types_dict["hp6"] = "integer"
+col_types_dict["hp9"] = "integer"
+col_types_dict["expid"] = "integer"
+col_types_dict["fid"] = "smallint"
+col_types_dict["sca"] = "smallint"
+col_types_dict["mjdobs"] = "double precision"
+
+cols = list(col_types_dict.keys())
+col_types = list(col_types_dict.values())
+
+
+# Catalog column names that differ from sources-table column names (catalog columns with underscores).
+
+catalog_col_names = {}
+catalog_col_names["xfit"] = "x_fit"
+catalog_col_names["yfit"] = "y_fit"
+catalog_col_names["fluxfit"] = "flux_fit"
+catalog_col_names["xerr"] = "x_err"
+catalog_col_names["yerr"] = "y_err"
+catalog_col_names["fluxerr"] = "flux_err"
+catalog_col_names["npixfit"] = "n_pixels_fit"
+catalog_col_names["redchi"] = "reduced_chi2"
+catalog_col_names["npix"] = "n_pixels"
 
 cols_comma_separated_string = ", ".join(cols)
 columns = tuple(cols)
@@ -217,12 +234,12 @@ def run_single_core_job(jids,overlapping_fields_list,meta_list,negative_diffimg_
     print("negative_diffimg_flag =",negative_diffimg_flag)
 
     if negative_diffimg_flag:
-        isdiffpos = "false"
+        isdiffpos = False
         output_psfcat_filename_to_use = output_psfcat_filename.replace(".txt","_negative.txt")
         output_psfcat_finder_filename_to_use = output_psfcat_finder_filename.replace(".txt","_negative.txt")
         done_suffix = "_negative"
     else:
-        isdiffpos = "true"
+        isdiffpos = True
         output_psfcat_filename_to_use = output_psfcat_filename
         output_psfcat_finder_filename_to_use = output_psfcat_finder_filename
         done_suffix = ""
@@ -239,241 +256,229 @@ def run_single_core_job(jids,overlapping_fields_list,meta_list,negative_diffimg_
         print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
         exit(64)
 
-    dbh = dbh_list[index_thread]
+    dbh = db.RAPIDDB(pooled=True)
 
-    fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
 
-    for index_job in range(njobs):
+    try:
+        fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
 
-        index_core = index_job % num_cores
-        if index_thread != index_core:
-            continue
+        for index_job in range(njobs):
 
-        jid = jids[index_job]
-        overlapping_fields = overlapping_fields_list[index_job]
-        meta_dict = meta_list[index_job]
+            index_core = index_job % num_cores
+            if index_thread != index_core:
+                continue
 
-        jid_from_dict = meta_dict["jid"]
+            jid = jids[index_job]
+            overlapping_fields = overlapping_fields_list[index_job]
+            meta_dict = meta_list[index_job]
 
-        if jid != jid_from_dict:
-            fh.write(f"*** Error: jid is not equal to jid from meta dictionary; quitting...\n")
-            exit(64)
+            jid_from_dict = meta_dict["jid"]
 
-        expid = meta_dict["expid"]
-        sca = meta_dict["sca"]
-        fid = meta_dict["fid"]
-        field = meta_dict["field"]
-        hp6 = meta_dict["hp6"]
-        hp9 = meta_dict["hp9"]
-        mjdobs = meta_dict["mjdobs"]
-        pid = meta_dict["pid"]
+            if jid != jid_from_dict:
+                fh.write(f"*** Error: jid is not equal to jid from meta dictionary; quitting...\n")
+                exit(64)
 
+            expid = meta_dict["expid"]
+            sca = meta_dict["sca"]
+            fid = meta_dict["fid"]
+            field = meta_dict["field"]
+            hp6 = meta_dict["hp6"]
+            hp9 = meta_dict["hp9"]
+            mjdobs = meta_dict["mjdobs"]
+            pid = meta_dict["pid"]
 
-        fh.write(f"Loop start: index_job,jid,overlapping_fields = {index_job},{jid},{overlapping_fields}\n")
 
+            fh.write(f"Loop start: index_job,jid,overlapping_fields = {index_job},{jid},{overlapping_fields}\n")
 
-        # Check whether done file exists in S3 bucket for job, and skip if it exists.
-        # This is done by attempting to download the done file.  Regardless the sub
-        # always returns the filename and subdirs by parsing the s3_full_name.
 
-        s3_full_name_done_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/source_dbload" + done_suffix + "_jid" +  str(jid)  + ".done"
-        done_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_done_file)
+            # Check whether done file exists in S3 bucket for job, and skip if it exists.
+            # This is done by attempting to download the done file.  Regardless the sub
+            # always returns the filename and subdirs by parsing the s3_full_name.
 
-        if do_done_check and downloaded_from_bucket:
-            fh.write("*** Warning: Done file exists ({}); skipping...\n".format(done_filename))
-            continue
+            s3_full_name_done_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/source_dbload" + done_suffix + "_jid" +  str(jid)  + ".done"
+            done_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_done_file)
 
+            if do_done_check and downloaded_from_bucket:
+                fh.write("*** Warning: Done file exists ({}); skipping...\n".format(done_filename))
+                continue
 
-        # Download SFFT-difference-image PSF-fit catalog file from S3 bucket.
 
-        output_psfcat_filename_for_jid = output_psfcat_filename_to_use.replace(".txt",f"_jid{jid}.txt")
+            # Download SFFT-difference-image PSF-fit catalog sidecar Parquet file (joined PSF-fit and finder catalogs)
+            # from S3 bucket, or else the PSF-fit and finder catalog files if the sidecar file does not exist.
 
-        s3_full_name_psfcat_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/" +  output_psfcat_filename_to_use
-        ret_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,
-                                                                                             s3_full_name_psfcat_file,
-                                                                                             output_psfcat_filename_for_jid)
+            output_psfcat_filename_for_jid = output_psfcat_filename_to_use.replace(".txt",f"_jid{jid}.txt")
+            output_psfcat_finder_filename_for_jid = output_psfcat_finder_filename_to_use.replace(".txt",f"_jid{jid}.txt")
+            output_psfcat_sidecar_filename_for_jid = catsubs.psfcat_sidecar_filename(output_psfcat_filename_for_jid)
 
-        if not downloaded_from_bucket:
-            fh.write("*** Warning: PSF-fit catalog file does not exist ({}); skipping...\n".format(output_psfcat_filename_to_use))
-            continue
+            s3_full_name_psfcat_sidecar_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/" +\
+                catsubs.psfcat_sidecar_filename(output_psfcat_filename_to_use)
+            ret_filename,subdirs_done,downloaded_sidecar_from_bucket = util.download_file_from_s3_bucket(s3_client,
+                                                                                                         s3_full_name_psfcat_sidecar_file,
+                                                                                                         output_psfcat_sidecar_filename_for_jid)
 
+            if not downloaded_sidecar_from_bucket:
 
-        # Download SFFT-difference-image PSF-fit finder catalog file from S3 bucket.
+                fh.write("*** Warning: PSF-fit catalog sidecar file does not exist ({}); downloading catalog files...\n".format(s3_full_name_psfcat_sidecar_file))
 
-        output_psfcat_finder_filename_for_jid = output_psfcat_finder_filename_to_use.replace(".txt",f"_jid{jid}.txt")
 
-        s3_full_name_psfcat_finder_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/" +  output_psfcat_finder_filename_to_use
-        ret_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,
-                                                                                             s3_full_name_psfcat_finder_file,
-                                                                                             output_psfcat_finder_filename_for_jid)
+                # Download SFFT-difference-image PSF-fit catalog file from S3 bucket.
 
-        if not downloaded_from_bucket:
-            fh.write("*** Warning: PSF-fit finder catalog file does not exist ({}); skipping...\n".format(output_psfcat_finder_filename_to_use))
-            continue
-
-
-        # Join catalogs and extract columns for sources database tables.
-
-        psfcat_qtable = QTable.read(output_psfcat_filename_for_jid,format='ascii')
-        psfcat_finder_qtable = QTable.read(output_psfcat_finder_filename_for_jid,format='ascii')
+                s3_full_name_psfcat_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/" +  output_psfcat_filename_to_use
+                ret_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,
+                                                                                                     s3_full_name_psfcat_file,
+                                                                                                     output_psfcat_filename_for_jid)
 
-        joined_table_inner = join(psfcat_qtable, psfcat_finder_qtable, keys='id', join_type='inner')
+                if not downloaded_from_bucket:
+                    fh.write("*** Warning: PSF-fit catalog file does not exist ({}); skipping...\n".format(output_psfcat_filename_to_use))
+                    continue
 
-        nrows = len(joined_table_inner)
-        fh.write(f"nrows in PSF-fit catalog = {nrows}\n")
 
+                # Download SFFT-difference-image PSF-fit finder catalog file from S3 bucket.
 
-        # Here are what the columns in the photutils catalogs are called:
-        # Main: id group_id group_size local_bkg x_init y_init flux_init x_fit y_fit flux_fit x_err y_err flux_err n_pixels_fit qfit cfit reduced_chi2 flags ra dec
-        # Finder: id xcentroid ycentroid sharpness roundness1 roundness2 npix peak flux mag daofind_mag
-        # Note that some catalog-column names have underscores that need to be dealt with specially
-        # because the database columns do not have underscores.
-        #
-        # Prepare records into sources database tables.
+                s3_full_name_psfcat_finder_file = "s3://" + product_s3_bucket_base + "/" + proc_date + '/jid' + str(jid) + "/" +  output_psfcat_finder_filename_to_use
+                ret_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,
+                                                                                                     s3_full_name_psfcat_finder_file,
+                                                                                                     output_psfcat_finder_filename_for_jid)
 
-        sources_table = f"sources_{proc_date}_{sca}"
-        sources_table_file = f"sources_{proc_date}_sca{sca}_jid{jid}" + ".csv"
+                if not downloaded_from_bucket:
+                    fh.write("*** Warning: PSF-fit finder catalog file does not exist ({}); skipping...\n".format(output_psfcat_finder_filename_to_use))
+                    continue
 
-        with open(sources_table_file, "w") as csv_fh:
 
-            for row in joined_table_inner:
-                nums = ""
-                for col in cols:
+            # Read joined PSF-fit and finder catalogs (from the sidecar file if it was downloaded)
+            # and extract columns for sources database tables.
 
-                    cat_col = col
+            joined_table_inner = catsubs.read_joined_psfcat(output_psfcat_filename_for_jid,output_psfcat_finder_filename_for_jid)
 
-                    if cat_col == 'xfit':
-                        cat_col = 'x_fit'
-                    elif cat_col == 'yfit':
-                        cat_col = 'y_fit'
-                    elif cat_col == 'fluxfit':
-                        cat_col = 'flux_fit'
-                    elif cat_col == 'xerr':
-                        cat_col = 'x_err'
-                    elif cat_col == 'yerr':
-                        cat_col = 'y_err'
-                    elif cat_col == 'fluxerr':
-                        cat_col = 'flux_err'
-                    elif cat_col == 'npixfit':
-                        cat_col = 'n_pixels_fit'
-                    elif cat_col == 'redchi':
-                        cat_col = 'reduced_chi2'
-                    elif cat_col == 'npix':
-                        cat_col = 'n_pixels'
+            nrows = len(joined_table_inner)
+            fh.write(f"nrows in PSF-fit catalog = {nrows}\n")
 
-                    if cat_col == 'pid':
-                        continue
-                    if cat_col == 'isdiffpos':
-                        continue
-                    if cat_col == 'field':
-                        continue
-                    if cat_col == 'hp6':
-                        continue
-                    if cat_col == 'hp9':
-                        continue
-                    if cat_col == 'expid':
-                        continue
-                    if cat_col == 'fid':
-                        continue
-                    if cat_col == 'sca':
-                        continue
-                    if cat_col == 'mjdobs':
-                        continue
-
-                    num = str(row[cat_col])
-                    nums = nums + num + ","
-
-
-                # The field,hp6,hp9 indexes must be overridden with
-                # the actual ra,dec position of the source.
-
-                ra = float(row["ra"])
-                dec = float(row["dec"])
-                roman_tessellation_db.get_rtid(ra,dec)
-                field = roman_tessellation_db.rtid
-                hp6 = hp.ang2pix(nside6,ra,dec,nest=True,lonlat=True)
-                hp9 = hp.ang2pix(nside9,ra,dec,nest=True,lonlat=True)
-
-                num = str(pid)
-                nums = nums + num + ","
-                num = str(isdiffpos)
-                nums = nums + num + ","
-                num = str(field)
-                nums = nums + num + ","
-                num = str(hp6)
-                nums = nums + num + ","
-                num = str(hp9)
-                nums = nums + num + ","
-                num = str(expid)
-                nums = nums + num + ","
-                num = str(fid)
-                nums = nums + num + ","
-                num = str(sca)
-                nums = nums + num + ","
-                num = str(mjdobs)
-                nums = nums + num + ","
-
-                # Slice the string to get all but the last character, then add the newline character
-                new_character = "\n"
-                line_to_write_to_file = nums[:-1] + new_character
-
-                csv_fh.write(line_to_write_to_file)
-
-
-        # Check whether database connection is still alive.
-
-        if dbh.is_connection_alive():
-
-            print("Database is responsive!")
 
-        else:
+            # Here are what the columns in the photutils catalogs are called:
+            # Main: id group_id group_size local_bkg x_init y_init flux_init x_fit y_fit flux_fit x_err y_err flux_err n_pixels_fit qfit cfit reduced_chi2 flags ra dec
+            # Finder: id xcentroid ycentroid sharpness roundness1 roundness2 npix peak flux mag daofind_mag
+            # Note that some catalog-column names have underscores that need to be dealt with specially
+            # because the database columns do not have underscores (see catalog_col_names).
+            #
+            # Prepare columns of values for sources database tables, one array per catalog column,
+            # and one value for columns that are the same for all sources of the job.
+
+            sources_table = f"sources_{proc_date}_{sca}"
+
+
+            # The field,hp6,hp9 indexes must be overridden with
+            # the actual ra,dec positions of the sources.
+
+            ras = np.array(joined_table_inner["ra"],dtype=np.float64)
+            decs = np.array(joined_table_inner["dec"],dtype=np.float64)
+
+            fields = roman_tessellation_index.get_rtids(ras,decs)
+
+
+            # Skip sources not contained in any sky tile (rtid = -1), since field is required.
+
+            outside = fields < 0
+
+            if np.any(outside):
+                fh.write(f"*** Warning: {np.count_nonzero(outside)} sources are not in any sky tile (field); skipping them...\n")
 
-            print("Database is not responsive! Connection is dead. Re-establishment required...")
+                inside = ~outside
+                joined_table_inner = joined_table_inner[inside]
+                ras = ras[inside]
+                decs = decs[inside]
+                fields = fields[inside]
 
+            job_values_dict = {}
+            job_values_dict["pid"] = pid
+            job_values_dict["isdiffpos"] = isdiffpos
+            job_values_dict["field"] = fields
+            job_values_dict["hp6"] = hp.ang2pix(nside6,ras,decs,nest=True,lonlat=True)
+            job_values_dict["hp9"] = hp.ang2pix(nside9,ras,decs,nest=True,lonlat=True)
+            job_values_dict["expid"] = expid
+            job_values_dict["fid"] = fid
+            job_values_dict["sca"] = sca
+            job_values_dict["mjdobs"] = mjdobs
 
-            # Open database connection.
+            arrays = []
+            for col in cols:
+                if col in job_values_dict:
+                    arrays.append(job_values_dict[col])
+                else:
+                    arrays.append(np.asarray(joined_table_inner[catalog_col_names.get(col,col)]))
 
-            dbh = db.RAPIDDB()
+
+            # Check whether database connection is still alive.
+
+            if dbh.is_connection_alive():
+
+                print("Database is responsive!")
+
+            else:
+
+                print("Database is not responsive! Connection is dead. Re-establishment required...")
+
+
+                # Release dead database connection (the pool discards it) and acquire a new one.
+
+                dbh.close()
+
+                dbh = db.RAPIDDB(pooled=True)
+
+                if dbh.exit_code >= 64:
+                    exit(dbh.exit_code)
+
+
+            # Load records into sources database tables with binary COPY from memory.
+
+            start_time_copy = time.time()
+
+            nrows_copied = dbh.copy_arrays_into_database(arrays,sources_table,columns,col_types)
 
             if dbh.exit_code >= 64:
+                fh.write(f"*** Error bulk-loading data into specified database table ({sources_table}); quitting...\n")
                 exit(dbh.exit_code)
 
+            elapsed_time_copy = time.time() - start_time_copy
+            rows_per_second = nrows_copied / elapsed_time_copy if elapsed_time_copy > 0.0 else 0.0
 
-        # Load records into sources database tables.
+            fh.write(f"Copied {nrows_copied} rows into {sources_table} in {elapsed_time_copy:.3f} seconds ({rows_per_second:.1f} rows/s)\n")
 
-        dbh.copy_data_from_file_into_database(sources_table_file,sources_table,columns)
 
-        if dbh.exit_code >= 64:
-            fh.write(f"*** Error bulk-loading data from file ({sources_table_file}) into specified database table ({sources_table}); quitting...\n")
-            exit(dbh.exit_code)
+            # Touch done file.  Upload done file to S3 bucket.
 
+            util.write_done_file_to_s3_bucket(done_filename,product_s3_bucket_base,proc_date,jid,s3_client)
 
-        # Touch done file.  Upload done file to S3 bucket.
+            fh.write(f"Loop end: done_filename,product_s3_bucket_base,proc_date,jid = {done_filename},{product_s3_bucket_base},{proc_date},{jid}\n")
 
-        util.write_done_file_to_s3_bucket(done_filename,product_s3_bucket_base,proc_date,jid,s3_client)
 
-        fh.write(f"Loop end: done_filename,product_s3_bucket_base,proc_date,jid = {done_filename},{product_s3_bucket_base},{proc_date},{jid}\n")
+            # Flush write buffer.
 
+            fh.flush()
 
-        # Flush write buffer.
 
-        fh.flush()
+            # Remove no-longer-needed intermediate files.
 
+            file_paths = [output_psfcat_sidecar_filename_for_jid,output_psfcat_filename_for_jid,output_psfcat_finder_filename_for_jid]
+            for file_path in file_paths:
 
-        # Remove no-longer-needed intermediate files.
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    print(f"File deleted successfully ({file_path}).")
+                else:
+                    print(f"The file does not exist({file_path}).")
 
-        file_paths = [output_psfcat_filename_for_jid,output_psfcat_finder_filename_for_jid,sources_table_file]
-        for file_path in file_paths:
 
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                print(f"File deleted successfully ({file_path}).")
-            else:
-                print(f"The file does not exist({file_path}).")
+            # End of loop over job ID.
 
+    finally:
 
-        # End of loop over job ID.
+        # Return database connection to pool.
 
+        dbh.close()
 
     fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
 
@@ -605,16 +610,25 @@ if __name__ == '__main__':
         x_list.append(naxis1)
         y_list.append(naxis1)
 
+        ra_list = []
+        dec_list = []
+
         for y in y_list:
             for x in x_list:
 
                 # x,y,crpix1,crpix2 must be zero-based.
                 ra,dec = util.tan_proj2(x,y,crpix1-1,crpix2-1,crval1,crval2,cd11,cd12,cd21,cd22)
 
-                roman_tessellation_db.get_rtid(ra,dec)
-                rtid = str(roman_tessellation_db.rtid)
+                ra_list.append(ra)
+                dec_list.append(dec)
+
+        rtids = roman_tessellation_index.get_rtids(ra_list,dec_list)
+
+        if np.any(rtids < 0):
+            print(f"*** Warning: {np.count_nonzero(rtids < 0)} sky positions in image are not in any sky tile (field); skipping them...")
 
-                rtid_dict[rtid] = 1
+        for rtid in rtids[rtids >= 0]:
+            rtid_dict[str(rtid)] = 1
 
         keys_view = rtid_dict.keys()
         print("fields overlapping image =",keys_view)
@@ -778,13 +792,6 @@ if __name__ == '__main__':
     if dbh.exit_code >= 64:
         exit(dbh.exit_code)
 
-    for tdbh in dbh_list:
-        tdbh.close()
-
-        if tdbh.exit_code >= 64:
-            exit(tdbh.exit_code)
-
-
     # Termination.
 
     terminating_exitcode = 0
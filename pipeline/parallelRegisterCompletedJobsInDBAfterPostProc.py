@@ -137,21 +137,11 @@ awaicgen_output_mosaic_image_file = config_input['AWAICGEN']['awaicgen_output_mo
 zogy_output_diffimage_file = config_input['ZOGY']['zogy_output_diffimage_file']
 
 
-# Open database connections for parallel access.
+# Number of parallel processes.  Each process lazily acquires its own database
+# connection from a per-process connection pool (see RAPIDDB pooled option).
 
 num_cores = os.cpu_count()
 
-dbh_list = []
-
-for i in range(num_cores):
-
-    dbh = db.RAPIDDB()
-
-    if dbh.exit_code >= 64:
-        exit(dbh.exit_code)
-
-    dbh_list.append(dbh)
-
 
 #-------------------------------------------------------------------------------------------------------------
 # Custom methods for parallel processing, taking advantage of multiple cores on the job-launcher machine.
@@ -171,268 +161,279 @@ def run_single_core_job(jids,log_fnames,index_thread):
         print(f"*** Error: Could not open output file {thread_work_file}; quitting...")
         exit(64)
 
-    dbh = dbh_list[index_thread]
+    dbh = db.RAPIDDB(pooled=True)
 
-    fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
+    if dbh.exit_code >= 64:
+        fh.write(f"*** Error: Could not acquire database connection (exit_code={dbh.exit_code}); quitting...\n")
+        fh.close()
+        exit(dbh.exit_code)
 
+    try:
+        fh.write(f"\nStart of run_single_core_job: index_thread={index_thread}, dbh={dbh}\n")
 
-    #####################################################################
-    # Loop over jobs for a given processing date.  In a given thread, only
-    # process those jobs associated with the thread by the remainder function.
-    #####################################################################
 
-    for index_job in range(njobs):
+        #####################################################################
+        # Loop over jobs for a given processing date.  In a given thread, only
+        # process those jobs associated with the thread by the remainder function.
+        #####################################################################
 
-        index_core = index_job % num_cores
-        if index_thread != index_core:
-            continue
+        for index_job in range(njobs):
 
-        jid = jids[index_job]
-        log_fname = log_fnames[index_job]
+            index_core = index_job % num_cores
+            if index_thread != index_core:
+                continue
 
-        fh.write(f"Loop start: index_job,jid,log_fname = {index_job},{jid},{log_fname}\n")
+            jid = jids[index_job]
+            log_fname = log_fnames[index_job]
 
-        job_exitcode = 64
-        aws_batch_job_id = 'not_found'
+            fh.write(f"Loop start: index_job,jid,log_fname = {index_job},{jid},{log_fname}\n")
 
+            job_exitcode = 64
+            aws_batch_job_id = 'not_found'
 
-        # Check whether science-pipeline done file exists in S3 bucket for job, and skip if it does NOT exist.
-        # This is done by attempting to download the done file.  Regardless the sub
-        # always returns the filename and subdirs by parsing the s3_full_name.
 
-        s3_full_name_science_pipeline_done_file = \
-            "s3://" + product_s3_bucket_base + "/" + datearg + '/jid' + str(jid) + "/" + \
-            job_config_filename_base +  str(jid)  + ".done"
-        science_pipeline_done_filename,subdirs_done,downloaded_from_bucket = \
-            util.download_file_from_s3_bucket(s3_client,
-                                              s3_full_name_science_pipeline_done_file)
+            # Check whether science-pipeline done file exists in S3 bucket for job, and skip if it does NOT exist.
+            # This is done by attempting to download the done file.  Regardless the sub
+            # always returns the filename and subdirs by parsing the s3_full_name.
 
-        if not downloaded_from_bucket:
-            fh.write("*** Warning: Science-pipeline done file does NOT exist ({}); skipping...\n".format(done_filename))
-            continue
+            s3_full_name_science_pipeline_done_file = \
+                "s3://" + product_s3_bucket_base + "/" + datearg + '/jid' + str(jid) + "/" + \
+                job_config_filename_base +  str(jid)  + ".done"
+            science_pipeline_done_filename,subdirs_done,downloaded_from_bucket = \
+                util.download_file_from_s3_bucket(s3_client,
+                                                  s3_full_name_science_pipeline_done_file)
 
+            if not downloaded_from_bucket:
+                fh.write("*** Warning: Science-pipeline done file does NOT exist ({}); skipping...\n".format(done_filename))
+                continue
 
-        # Check whether post-processing done file exists in S3 bucket for job, and skip if it exists.
-        # This is done by attempting to download the done file.  Regardless the sub
-        # always returns the filename and subdirs by parsing the s3_full_name.
 
-        s3_full_name_done_file = \
-            "s3://" + product_s3_bucket_base + "/" + datearg + '/jid' + str(jid) + "/" + \
-            postproc_job_config_filename_base +  str(jid)  + ".done"
-        done_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_done_file)
+            # Check whether post-processing done file exists in S3 bucket for job, and skip if it exists.
+            # This is done by attempting to download the done file.  Regardless the sub
+            # always returns the filename and subdirs by parsing the s3_full_name.
 
-        if downloaded_from_bucket:
-            fh.write("*** Warning: Done file exists ({}); skipping...\n".format(done_filename))
-            continue
+            s3_full_name_done_file = \
+                "s3://" + product_s3_bucket_base + "/" + datearg + '/jid' + str(jid) + "/" + \
+                postproc_job_config_filename_base +  str(jid)  + ".done"
+            done_filename,subdirs_done,downloaded_from_bucket = util.download_file_from_s3_bucket(s3_client,s3_full_name_done_file)
 
+            if downloaded_from_bucket:
+                fh.write("*** Warning: Done file exists ({}); skipping...\n".format(done_filename))
+                continue
 
-        # Download log file from S3 bucket.
 
-        s3_bucket_object_name = datearg + '/' + log_fname
+            # Download log file from S3 bucket.
 
-        fh.write("Downloading s3://{}/{} into {}...\n".format(job_logs_s3_bucket_base,s3_bucket_object_name,log_fname))
+            s3_bucket_object_name = datearg + '/' + log_fname
 
-        response = s3_client.download_file(job_logs_s3_bucket_base,s3_bucket_object_name,log_fname)
+            fh.write("Downloading s3://{}/{} into {}...\n".format(job_logs_s3_bucket_base,s3_bucket_object_name,log_fname))
 
-        fh.write(f"response = {response}\n")
+            response = s3_client.download_file(job_logs_s3_bucket_base,s3_bucket_object_name,log_fname)
 
+            fh.write(f"response = {response}\n")
 
-        # Download job config file, in order to harvest some of its metadata.
 
-        job_config_ini_filename = postproc_job_config_filename_base + str(jid) + ".ini"
+            # Download job config file, in order to harvest some of its metadata.
 
-        s3_bucket_object_name = datearg + '/' + job_config_ini_filename
+            job_config_ini_filename = postproc_job_config_filename_base + str(jid) + ".ini"
 
-        fh.write("Downloading s3://{}/{} into {}...\n".format(job_info_s3_bucket_base,s3_bucket_object_name,job_config_ini_filename))
+            s3_bucket_object_name = datearg + '/' + job_config_ini_filename
 
-        response = s3_client.download_file(job_info_s3_bucket_base,s3_bucket_object_name,job_config_ini_filename)
+            fh.write("Downloading s3://{}/{} into {}...\n".format(job_info_s3_bucket_base,s3_bucket_object_name,job_config_ini_filename))
 
-        fh.write(f"response = {response}\n")
+            response = s3_client.download_file(job_info_s3_bucket_base,s3_bucket_object_name,job_config_ini_filename)
 
+            fh.write(f"response = {response}\n")
 
-        # Harvest job metadata from job config file
 
-        job_config_input = configparser.ConfigParser()
-        job_config_input.read(job_config_ini_filename)
+            # Harvest job metadata from job config file
 
-        infobitssci = int(job_config_input['DIFF_IMAGE']['infobitssci'])
+            job_config_input = configparser.ConfigParser()
+            job_config_input.read(job_config_ini_filename)
 
-        infobits = int(job_config_input['REF_IMAGE']['infobits'])
+            infobitssci = int(job_config_input['DIFF_IMAGE']['infobitssci'])
 
-        fh.write(f"infobitssci,infobits = {infobitssci},{infobits}\n")
+            infobits = int(job_config_input['REF_IMAGE']['infobits'])
 
+            fh.write(f"infobitssci,infobits = {infobitssci},{infobits}\n")
 
-        # Grep log file for aws_batch_job_id and terminating_exitcode.
 
-        file = open(log_fname, "r")
-        search_string1 = "aws_batch_job_id"
-        search_string2 = "terminating_exitcode"
+            # Grep log file for aws_batch_job_id and terminating_exitcode.
 
-        for line in file:
-            if re.search(search_string1, line):
-                line = line.rstrip("\n")
-                fh.write(line + "\n")
-                tokens = re.split(r'\s*=\s*',line)
-                aws_batch_job_id = tokens[1]
-            elif re.search(search_string2, line):
-                line = line.rstrip("\n")
-                fh.write(line + "\n")
-                tokens = re.split(r'\s*=\s*',line)
-                job_exitcode = tokens[1]
+            file = open(log_fname, "r")
+            search_string1 = "aws_batch_job_id"
+            search_string2 = "terminating_exitcode"
 
-        file.close()
+            for line in file:
+                if re.search(search_string1, line):
+                    line = line.rstrip("\n")
+                    fh.write(line + "\n")
+                    tokens = re.split(r'\s*=\s*',line)
+                    aws_batch_job_id = tokens[1]
+                elif re.search(search_string2, line):
+                    line = line.rstrip("\n")
+                    fh.write(line + "\n")
+                    tokens = re.split(r'\s*=\s*',line)
+                    job_exitcode = tokens[1]
 
-        # Try to download product config file, in order to harvest some of its metadata.
-        # This may be unsuccessful if the pipeline failed.
+            file.close()
 
-        product_config_ini_filename = postproc_product_config_filename_base + str(jid) + ".ini"
+            # Try to download product config file, in order to harvest some of its metadata.
+            # This may be unsuccessful if the pipeline failed.
 
-        s3_bucket_object_name = datearg + '/' + product_config_ini_filename
+            product_config_ini_filename = postproc_product_config_filename_base + str(jid) + ".ini"
 
-        fh.write("Try downloading s3://{}/{} into {}...\n".format(product_s3_bucket_base,
-                                                             s3_bucket_object_name,
-                                                             product_config_ini_filename))
+            s3_bucket_object_name = datearg + '/' + product_config_ini_filename
 
-        try:
-            response = s3_client.download_file(product_s3_bucket_base,s3_bucket_object_name,product_config_ini_filename)
+            fh.write("Try downloading s3://{}/{} into {}...\n".format(product_s3_bucket_base,
+                                                                 s3_bucket_object_name,
+                                                                 product_config_ini_filename))
 
-            fh.write(f"response = {response}\n")
-            downloaded_from_bucket = True
+            try:
+                response = s3_client.download_file(product_s3_bucket_base,s3_bucket_object_name,product_config_ini_filename)
 
+                fh.write(f"response = {response}\n")
+                downloaded_from_bucket = True
 
-            # Read input parameters from product config *.ini file.
 
-            product_config_input_filename = product_config_ini_filename
-            product_config_input = configparser.ConfigParser()
-            product_config_input.read(product_config_input_filename)
+                # Read input parameters from product config *.ini file.
 
+                product_config_input_filename = product_config_ini_filename
+                product_config_input = configparser.ConfigParser()
+                product_config_input.read(product_config_input_filename)
 
-            # Get the timestamps of when the job started and ended on the AWS Batch machine,
-            # which have already been converted to Pacific Time.
 
-            jid_post_proc = product_config_input['JOB_PARAMS']['jid_postproc']
-            job_started = product_config_input['JOB_PARAMS']['job_started']
-            job_ended = product_config_input['JOB_PARAMS']['job_ended']
+                # Get the timestamps of when the job started and ended on the AWS Batch machine,
+                # which have already been converted to Pacific Time.
 
-            fh.write(f"jid_post_proc = {jid_post_proc}\n")
-            fh.write(f"job_started = {job_started}\n")
-            fh.write(f"job_ended = {job_ended}\n")
+                jid_post_proc = product_config_input['JOB_PARAMS']['jid_postproc']
+                job_started = product_config_input['JOB_PARAMS']['job_started']
+                job_ended = product_config_input['JOB_PARAMS']['job_ended']
 
-            string_match = re.match(r"(.+?)T(.+?) PT", job_started)
+                fh.write(f"jid_post_proc = {jid_post_proc}\n")
+                fh.write(f"job_started = {job_started}\n")
+                fh.write(f"job_ended = {job_ended}\n")
 
-            try:
-                started_date = string_match.group(1)
-                started_time = string_match.group(2)
-                fh.write("started = {} {}\n".format(started_date,started_time))
+                string_match = re.match(r"(.+?)T(.+?) PT", job_started)
 
-            except:
-                fh.write("*** Error: Could not parse job_started; quitting...\n")
-                exit(64)
+                try:
+                    started_date = string_match.group(1)
+                    started_time = string_match.group(2)
+                    fh.write("started = {} {}\n".format(started_date,started_time))
 
-            started = started_date + " " + started_time
+                except:
+                    fh.write("*** Error: Could not parse job_started; quitting...\n")
+                    exit(64)
 
-            string_match = re.match(r"(.+?)T(.+?) PT", job_ended)
+                started = started_date + " " + started_time
 
-            try:
-                ended_date = string_match.group(1)
-                ended_time = string_match.group(2)
-                fh.write("ended = {} {}\n".format(ended_date,ended_time))
+                string_match = re.match(r"(.+?)T(.+?) PT", job_ended)
 
-            except:
-                fh.write("*** Error: Could not parse job_ended; quitting...\n")
-                exit(64)
+                try:
+                    ended_date = string_match.group(1)
+                    ended_time = string_match.group(2)
+                    fh.write("ended = {} {}\n".format(ended_date,ended_time))
 
-            ended = ended_date + " " + ended_time
+                except:
+                    fh.write("*** Error: Could not parse job_ended; quitting...\n")
+                    exit(64)
 
+                ended = ended_date + " " + ended_time
 
-            # Read in reference-image metadata to update checksums.
-            # Only update record if rfid is not equal to "None".
 
-            rfid = product_config_input['REF_IMAGE']['rfid']
+                # Read in reference-image metadata to update checksums.
+                # Only update record if rfid is not equal to "None".
 
-            fh.write(f"rfid = {rfid}\n")
+                rfid = product_config_input['REF_IMAGE']['rfid']
 
-            if rfid != "None":
+                fh.write(f"rfid = {rfid}\n")
 
-                refimage_filename = product_config_input['REF_IMAGE']['refimage_filename']
-                refimage_file_version = product_config_input['REF_IMAGE']['refimage_file_version']
-                refimage_file_checksum = product_config_input['REF_IMAGE']['refimage_file_checksum']
-                fh.write(f"refimage_filename = {refimage_filename}\n")
-                fh.write(f"refimage_file_version = {refimage_file_version}\n")
-                fh.write(f"refimage_file_checksum = {refimage_file_checksum}\n")
+                if rfid != "None":
 
+                    refimage_filename = product_config_input['REF_IMAGE']['refimage_filename']
+                    refimage_file_version = product_config_input['REF_IMAGE']['refimage_file_version']
+                    refimage_file_checksum = product_config_input['REF_IMAGE']['refimage_file_checksum']
+                    fh.write(f"refimage_filename = {refimage_filename}\n")
+                    fh.write(f"refimage_file_version = {refimage_file_version}\n")
+                    fh.write(f"refimage_file_checksum = {refimage_file_checksum}\n")
 
-                # Update record in RefImages database table.
 
-                refimage_status = 1
-                dbh.update_refimage(rfid,refimage_filename,refimage_file_checksum,refimage_status,refimage_file_version)
+                    # Update record in RefImages database table.
 
-                if dbh.exit_code >= 64:
-                    exit(dbh.exit_code)
+                    refimage_status = 1
+                    dbh.update_refimage(rfid,refimage_filename,refimage_file_checksum,refimage_status,refimage_file_version)
 
+                    if dbh.exit_code >= 64:
+                        exit(dbh.exit_code)
 
-            # Read in difference-image metadata to update checksums.
-            # Only update record if pid is not equal to "None".
 
-            pid = product_config_input['DIFF_IMAGE']['pid']
+                # Read in difference-image metadata to update checksums.
+                # Only update record if pid is not equal to "None".
 
-            fh.write(f"pid = {pid}\n")
+                pid = product_config_input['DIFF_IMAGE']['pid']
 
-            if pid != "None":
+                fh.write(f"pid = {pid}\n")
 
+                if pid != "None":
 
-                diffimage_filename = product_config_input['DIFF_IMAGE']['diffimage_filename']
-                diffimage_file_version = product_config_input['DIFF_IMAGE']['diffimage_file_version']
-                diffimage_file_checksum = product_config_input['DIFF_IMAGE']['diffimage_file_checksum']
-                fh.write(f"diffimage_filename = {diffimage_filename}\n")
-                fh.write(f"diffimage_file_version = {diffimage_file_version}\n")
-                fh.write(f"diffimage_file_checksum = {diffimage_file_checksum}\n")
 
+                    diffimage_filename = product_config_input['DIFF_IMAGE']['diffimage_filename']
+                    diffimage_file_version = product_config_input['DIFF_IMAGE']['diffimage_file_version']
+                    diffimage_file_checksum = product_config_input['DIFF_IMAGE']['diffimage_file_checksum']
+                    fh.write(f"diffimage_filename = {diffimage_filename}\n")
+                    fh.write(f"diffimage_file_version = {diffimage_file_version}\n")
+                    fh.write(f"diffimage_file_checksum = {diffimage_file_checksum}\n")
 
-                # Update record in DiffImages database table.
 
-                diffimage_status = 1
-                dbh.update_diffimage(pid,diffimage_filename,diffimage_file_checksum,diffimage_status,diffimage_file_version)
+                    # Update record in DiffImages database table.
 
-                if dbh.exit_code >= 64:
-                    exit(dbh.exit_code)
+                    diffimage_status = 1
+                    dbh.update_diffimage(pid,diffimage_filename,diffimage_file_checksum,diffimage_status,diffimage_file_version)
 
-        except ClientError as e:
-            fh.write("*** Warning: Failed to download {} from s3://{}/{}\n"\
-                .format(product_config_ini_filename,product_s3_bucket_base,s3_bucket_object_name))
-            downloaded_from_bucket = False
+                    if dbh.exit_code >= 64:
+                        exit(dbh.exit_code)
 
+            except ClientError as e:
+                fh.write("*** Warning: Failed to download {} from s3://{}/{}\n"\
+                    .format(product_config_ini_filename,product_s3_bucket_base,s3_bucket_object_name))
+                downloaded_from_bucket = False
 
-        # Update Jobs record.
 
-        fh.write(f"For Jobs record: jid_post_proc,job_exitcode,aws_batch_job_id,started,ended = " +\
-                 f"{jid_post_proc},{job_exitcode},{aws_batch_job_id},{started},{ended}\n")
+            # Update Jobs record.
 
-        dbh.end_job(jid_post_proc,job_exitcode,aws_batch_job_id,started,ended)
+            fh.write(f"For Jobs record: jid_post_proc,job_exitcode,aws_batch_job_id,started,ended = " +\
+                     f"{jid_post_proc},{job_exitcode},{aws_batch_job_id},{started},{ended}\n")
 
-        if dbh.exit_code >= 64:
-            exit(dbh.exit_code)
+            dbh.end_job(jid_post_proc,job_exitcode,aws_batch_job_id,started,ended)
 
+            if dbh.exit_code >= 64:
+                exit(dbh.exit_code)
 
-        # Touch done file.  Upload done file to S3 bucket.
 
-        util.write_done_file_to_s3_bucket(done_filename,product_s3_bucket_base,datearg,jid,s3_client)
+            # Touch done file.  Upload done file to S3 bucket.
 
+            util.write_done_file_to_s3_bucket(done_filename,product_s3_bucket_base,datearg,jid,s3_client)
+
+
+            #####################################################################
+            # End of loop over jobs for a given processing date.
+            #####################################################################
+
+            fh.write(f"Loop end: done_filename,product_s3_bucket_base,datearg,jid = {done_filename},{product_s3_bucket_base},{datearg},{jid}\n")
 
-        #####################################################################
-        # End of loop over jobs for a given processing date.
-        #####################################################################
 
-        fh.write(f"Loop end: done_filename,product_s3_bucket_base,datearg,jid = {done_filename},{product_s3_bucket_base},{datearg},{jid}\n")
+            # Flush write buffer.
 
+            fh.flush()
 
-        # Flush write buffer.
 
-        fh.flush()
+            # End of loop over job ID.
 
+    finally:
 
-        # End of loop over job ID.
+        # Return database connection to pool.
 
+        dbh.close()
 
     fh.write(f"\nEnd of run_single_core_job: index_thread={index_thread}\n")
 
@@ -9,6 +9,7 @@ import numpy as np
 import time
 
 import modules.utils.rapid_pipeline_subs as util
+import modules.utils.rapid_catalog_subs as catsubs
 import database.modules.utils.rapid_db as db
 
 
@@ -749,11 +750,9 @@ def generatePhotUtilsReferenceImageCatalog(s3_client,
 
             output_psfcat_parquet_filename = output_psfcat_filename.replace(".txt",".parquet")
 
-            # Convert the QTable to a pandas DataFrame
-            df = joined_table_inner.to_pandas()
-
-            # Write the DataFrame to a Parquet file.
-            df.to_parquet(output_psfcat_parquet_filename, engine='pyarrow')
+            # Write the joined table to the sidecar Parquet file (output_psfcat_parquet_filename), which is
+            # read in preference to the ASCII catalogs (see modules/utils/rapid_catalog_subs.py).
+            catsubs.write_psfcat_sidecar(joined_table_inner,output_psfcat_filename)
 
         except Exception as e:
             print(f"PSF-fit PSFPhotometry and DAOStarFinder catalogs: An unexpected error occurred: {e}")
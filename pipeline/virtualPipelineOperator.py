@@ -226,11 +226,6 @@ def wait_until_aws_batch_jobs_finished(job_type,proc_date,config_input,dbh):
         return
 
 
-    # Initialize iteration number.
-
-    iter = 0
-
-
     # Define job definition.
 
     if job_type == "science":
@@ -247,6 +242,12 @@ def wait_until_aws_batch_jobs_finished(job_type,proc_date,config_input,dbh):
     job_queue = config_input['AWS_BATCH']['job_queue']
 
 
+    # Get adaptive polling intervals for job statuses, in seconds.
+
+    min_poll_interval = float(config_input['AWS_BATCH']['job_status_min_poll_interval'])
+    max_poll_interval = float(config_input['AWS_BATCH']['job_status_max_poll_interval'])
+
+
     # Get job name base.    Example job name: rapid_postproc_pipeline_20250404_jid997
 
     if job_type == "science":
@@ -271,63 +272,21 @@ def wait_until_aws_batch_jobs_finished(job_type,proc_date,config_input,dbh):
 
     client = boto3.client('batch')
 
-    while True:
-
-        # Get description of jobs.
-
-        n_succeeded = 0
-        n_failed = 0
-        n_checked = 0
-
-        for jobs_record in jobs_records:
 
-            jid = jobs_record[0]
-            awsbatchjobid = jobs_record[1]
+    # Poll only the outstanding jobs, in batches of 100 job IDs per describe_jobs request,
+    # until all jobs have either succeeded or failed.
 
-            if njobs_total < 3000 or n_checked % 100 == 0:
-                print(f"Calling client.describe_jobs for jobs={awsbatchjobid}, n_checked={n_checked}")
+    awsbatchjobids = [jobs_record[1] for jobs_record in jobs_records]
 
-            try:
-                response = client.describe_jobs(jobs=[awsbatchjobid,])
+    tracker = util.AWSBatchJobTracker(client,awsbatchjobids)
 
-                if n_checked < 5:
-                    print(f"response={response}")
+    status_counts = tracker.wait(min_poll_interval,max_poll_interval)
 
-                n_checked += 1
-
-                job_status = response['jobs'][0]['status']
-
-                if njobs_total < 3000 or n_checked % 100 == 0:
-                    print("job_status =",job_status)
-
-                if job_status == "SUCCEEDED":
-                    n_succeeded += 1
-                elif job_status == "FAILED":
-                    n_failed += 1
-                elif job_status == "RUNNABLE":
-                    break
-                elif job_status == "STARTING":
-                    break
-                elif job_status == "RUNNING":
-                    break
-
-            except Exception as error:
-                print('*** Error running client.describe_jobs ({}); continuing...'.format(error))
-
-
-        print(f"n_succeeded,n_failed = {n_succeeded},{n_failed}")
-
-        njobs_succeeded_failed = n_succeeded + n_failed
-
-        print("njobs_succeeded_failed =",njobs_succeeded_failed)
-
-        if njobs_total == njobs_succeeded_failed:
-            break
+    n_succeeded = status_counts.get("SUCCEEDED",0)
+    n_failed = status_counts.get("FAILED",0)
 
-        iter += 1
-        print(f"From method wait_until_aws_batch_jobs_finished after iteration iter={iter}: " +\
-               "Sleeping 60 seconds and then will check again...")
-        time.sleep(60)
+    print(f"n_succeeded,n_failed = {n_succeeded},{n_failed}")
+    print(f"From method wait_until_aws_batch_jobs_finished: n_polls={tracker.n_polls}, n_api_calls={tracker.n_api_calls}")
 
     return
 
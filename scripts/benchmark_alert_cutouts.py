@@ -0,0 +1,135 @@
+####################################################################################################################
+# Regression test and benchmark of making alert cutouts for the sources of a difference image: separate FITS opens
+# of the science, template, and difference images per source, astropy Cutout2D, and a gzipped FITS file per stamp
+# read back by load_cutout (per-stamp files in a cutout_dir, as previously required by assemble_alert), versus
+# make_cutouts (alerts/produce_alert.py), which slices all stamps from memory-mapped images in a single pass and
+# gzips them into in-memory buffers.  Synthetic images with a TAN-SIP WCS are written to a temporary directory, and
+# sources include some near the image edges.  The stamps (data and WCS) of both methods are compared.
+# Usage: python scripts/benchmark_alert_cutouts.py [nsources]
+####################################################################################################################
+
+import io
+import os
+import sys
+import gzip
+import time
+import shutil
+import tempfile
+import numpy as np
+from astropy.io import fits
+from astropy.wcs import WCS
+from astropy.nddata import Cutout2D
+
+import alerts.produce_alert as pa
+
+nsources = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+image_size = 4089
+size = pa.CUTOUT_SIZE
+
+np.random.seed(0)
+
+
+# Synthetic images on the same pixel grid.
+
+tmp_dir = tempfile.mkdtemp()
+
+hdr = fits.Header()
+hdr["CTYPE1"] = "RA---TAN-SIP"
+hdr["CTYPE2"] = "DEC--TAN-SIP"
+hdr["CRPIX1"] = 2045.0
+hdr["CRPIX2"] = 2045.0
+hdr["CRVAL1"] = 10.5
+hdr["CRVAL2"] = -4.5
+hdr["CD1_1"] = -3.0e-5
+hdr["CD1_2"] = 1.0e-7
+hdr["CD2_1"] = 1.0e-7
+hdr["CD2_2"] = 3.0e-5
+hdr["A_ORDER"] = 2
+hdr["B_ORDER"] = 2
+hdr["A_2_0"] = 1.0e-7
+hdr["B_0_2"] = -1.0e-7
+
+image_filenames = {}
+for key,name,sigma in [("cutoutScience","sciimage",10.0),("cutoutTemplate","refimage",8.0),("cutoutDifference","diffimage",5.0)]:
+    data = np.random.normal(0.0,sigma,(image_size,image_size)).astype(np.float32)
+    image_filenames[key] = os.path.join(tmp_dir,name + ".fits")
+    fits.PrimaryHDU(header=hdr,data=data).writeto(image_filenames[key],overwrite=True)
+
+source_rows = []
+for sid in range(1,nsources + 1):
+    if sid % 50 == 0:
+        xfit,yfit = np.random.uniform(-10.0,image_size + 10.0,2)
+    else:
+        xfit,yfit = np.random.uniform(0.0,image_size - 1.0,2)
+    source_rows.append({"sid": sid,"xfit": float(np.float32(xfit)),"yfit": float(np.float32(yfit))})
+
+
+# Previous method: separate FITS opens per source, and a gzipped FITS file per stamp.
+
+cutout_dir = os.path.join(tmp_dir,"cutouts")
+os.makedirs(cutout_dir)
+
+suffixes = {"cutoutScience": "sci","cutoutTemplate": "tmpl","cutoutDifference": "diff"}
+
+start_time = time.time()
+
+expected = {}
+for row in source_rows:
+    sid = row["sid"]
+    for key,filename in image_filenames.items():
+        with fits.open(filename) as hdul:
+            cutout = Cutout2D(hdul[0].data,(row["xfit"],row["yfit"]),size,wcs=WCS(hdul[0].header),
+                              mode="partial",fill_value=np.nan)
+            fits.PrimaryHDU(header=cutout.wcs.to_header(relax=True),data=cutout.data.astype(np.float32)).\
+                writeto(os.path.join(cutout_dir,f"{sid}_{suffixes[key]}.fits.gz"),overwrite=True)
+    alert_dict = pa.build_alert({"sid": sid,"mjdobs": 61000.0,"ra": 10.5,"dec": -4.5},cutout_dir=cutout_dir)
+    expected[sid] = {key: alert_dict[key] for key in suffixes.keys()}
+
+elapsed_time_files = time.time() - start_time
+
+
+# Current method: single pass over memory-mapped images, with stamps gzipped in memory.
+
+start_time = time.time()
+
+cutouts = pa.make_cutouts(source_rows,image_filenames["cutoutScience"],image_filenames["cutoutTemplate"],
+                          image_filenames["cutoutDifference"])
+
+actual = {}
+for row in source_rows:
+    sid = row["sid"]
+    alert_dict = pa.build_alert({"sid": sid,"mjdobs": 61000.0,"ra": 10.5,"dec": -4.5},cutouts=cutouts[sid])
+    actual[sid] = {key: alert_dict[key] for key in suffixes.keys()}
+
+elapsed_time_memory = time.time() - start_time
+
+print(f"Number of sources = {nsources}, cutout size = {size}")
+print(f"per-stamp FITS opens and files: elapsed time in seconds = {elapsed_time_files:.3f}")
+print(f"memory-mapped single pass: elapsed time in seconds = {elapsed_time_memory:.3f}")
+
+
+# Compare stamps (data and WCS).
+
+def read_stamp(gzipped_bytes):
+    with fits.open(io.BytesIO(gzip.decompress(gzipped_bytes))) as hdul:
+        return hdul[0].data.copy(),WCS(hdul[0].header)
+
+n_failed = 0
+
+for row in source_rows:
+    for key in suffixes.keys():
+        data_expected,wcs_expected = read_stamp(expected[row["sid"]][key])
+        data_actual,wcs_actual = read_stamp(actual[row["sid"]][key])
+        passed = data_expected.shape == data_actual.shape and \
+            np.array_equal(data_expected,data_actual,equal_nan=True) and \
+            np.allclose(wcs_expected.all_pix2world([[0.0,0.0],[31.0,31.0]],0),
+                        wcs_actual.all_pix2world([[0.0,0.0],[31.0,31.0]],0),rtol=0.0,atol=1.0e-10)
+        if not passed:
+            n_failed += 1
+
+shutil.rmtree(tmp_dir)
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
@@ -0,0 +1,140 @@
+####################################################################################################################
+# Regression test and benchmark of alert production (alerts/produce_alert.py): one alert per source ID, with the
+# schema loaded, three queries run, and the producer flushed for every alert (previous method of produce_alert), versus
+# produce_alerts for all sources of a difference image (pid), with the schema parsed once, set-based queries per field,
+# and asynchronous delivery with a single flush at the end.  Alerts are delivered to FileAlertSink instances, and the
+# serialized alerts of both methods are compared.  Runs against the database given by the usual env. vars. DBSERVER,
+# DBPORT, DBNAME, DBUSER, DBPASS (e.g., a local Postgres), in temporary tables (which shadow the operations tables of
+# the same names), so nothing persists.
+# Usage: python scripts/benchmark_alert_production.py [nsources]
+####################################################################################################################
+
+import io
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import tempfile
+
+import fastavro
+
+import database.modules.utils.rapid_db as db
+import alerts.produce_alert as pa
+
+nsources = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+logging.getLogger(pa.__name__).setLevel(logging.WARNING)
+
+dbh = db.RAPIDDB()
+
+if dbh.exit_code >= 64:
+    exit(dbh.exit_code)
+
+fields = [101,102,103]
+n_epochs = 30
+pid = n_epochs
+
+queries = ["CREATE TEMPORARY TABLE filters (fid smallint, filter varchar(16));",
+           "CREATE TEMPORARY TABLE sources (sid bigint primary key, id integer, pid integer, isdiffpos boolean, " +
+           "ra double precision, dec double precision, xfit real, yfit real, fluxfit real, xerr real, yerr real, " +
+           "fluxerr real, npixfit smallint, qfit real, cfit real, redchi real, flags smallint, sharpness real, " +
+           "roundness1 real, roundness2 real, npix smallint, peak real, field integer, hp6 integer, hp9 integer, " +
+           "expid integer, fid smallint, sca smallint, mjdobs double precision);",
+           "CREATE INDEX ON sources (pid);"]
+
+for field in fields:
+    queries += [f"CREATE TEMPORARY TABLE merges_{field} (aid bigint, sid bigint);",
+                f"CREATE INDEX ON merges_{field} (aid);",
+                f"CREATE INDEX ON merges_{field} (sid);",
+                f"CREATE TEMPORARY TABLE astroobjects_{field} (aid bigint primary key, ra0 double precision, " +
+                "dec0 double precision, flux0 real, meanra double precision, stdevra real, meandec double precision, " +
+                "stdevdec real, meanflux real, stdevflux real, nsources smallint, field integer, hp6 integer, hp9 integer);"]
+
+for query in queries:
+    dbh.cur.execute(query)
+
+
+# Synthetic records: nsources objects, each with a source in every epoch (difference image pid = epoch),
+# of which 80% are merged into astroobjects.  The alerts are for the sources of the last epoch.
+
+random.seed(0)
+
+for fid,filter_name in enumerate(pa.ROMAN_FILTERS,start=1):
+    dbh.cur.execute("insert into filters values (%s,%s);",(fid,filter_name))
+
+sid = 0
+for aid in range(1,nsources + 1):
+    field = fields[aid % len(fields)]
+    ra = random.uniform(10.0,11.0)
+    dec = random.uniform(-5.0,-4.0)
+    fid = random.randint(1,len(pa.ROMAN_FILTERS))
+    merged = random.random() < 0.8
+    if merged:
+        dbh.cur.execute(f"insert into astroobjects_{field} values (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s);",
+                        (aid,ra,dec,100.0,ra,0.0,dec,0.0,100.0,1.0,n_epochs,field,1,2))
+    for epoch in range(1,n_epochs + 1):
+        sid += 1
+        mjdobs = 61000.0 + 20.0 * epoch + aid * 1.0e-6
+        dbh.cur.execute("insert into sources values (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s);",
+                        (sid,aid,epoch,True,ra,dec,random.uniform(0,4088),random.uniform(0,4088),random.gauss(100.0,10.0),
+                         0.1,0.1,5.0,25,0.1,0.05,1.1,0,0.5,0.01,0.02,25,12.0,field,1,2,epoch,fid,1 + aid % 18,mjdobs))
+        if merged:
+            dbh.cur.execute(f"insert into merges_{field} values (%s,%s);",(aid,sid))
+
+dbh.conn.commit()
+
+dbh.cur.execute("select sid from sources where pid = %s order by sid;",(pid,))
+sids = [record[0] for record in dbh.cur.fetchall()]
+
+output_dir = tempfile.mkdtemp()
+
+
+# Previous method: one alert per source ID, with the schema loaded and the producer flushed for every alert.
+
+sink = pa.FileAlertSink(os.path.join(output_dir,"per_alert"))
+
+start_time = time.time()
+
+expected = {}
+for sid in sids:
+    alert_dict = pa.assemble_alert(dbh,sid)
+    expected[sid] = pa.serialize_alert(alert_dict,schema=pa.load_schema())
+    pa.publish_alert(expected[sid],sink)
+
+elapsed_time_per_alert = time.time() - start_time
+
+
+# Current method: batch of alerts for the difference image.
+
+sink = pa.FileAlertSink(os.path.join(output_dir,"batch"))
+
+start_time = time.time()
+
+counts = pa.produce_alerts(dbh,sink,pid=pid)
+
+elapsed_time_batch = time.time() - start_time
+
+actual = {}
+for sid in sids:
+    with open(os.path.join(output_dir,"batch","alerts",f"{sid}.avro"),"rb") as f:
+        actual[sid] = f.read()
+
+print(f"Number of alerts = {len(sids)}")
+print(f"per-alert production: elapsed time in seconds = {elapsed_time_per_alert:.3f}")
+print(f"batch production: elapsed time in seconds = {elapsed_time_batch:.3f}, counts = {counts}")
+
+alert = fastavro.schemaless_reader(io.BytesIO(actual[sids[0]]),pa.get_schema())
+print(f"First alert: diaSourceId = {alert['diaSourceId']}, number of prvDiaSources = " +
+      f"{0 if alert['prvDiaSources'] is None else len(alert['prvDiaSources'])}")
+
+shutil.rmtree(output_dir)
+
+same = expected == actual and counts["delivered"] == len(sids)
+
+print("Same alerts =",same)
+
+dbh.close()
+
+exit(0 if same else 1)
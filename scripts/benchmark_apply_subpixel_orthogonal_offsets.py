@@ -0,0 +1,82 @@
+####################################################################################################################
+# Regression test and benchmark of util.apply_subpixel_orthogonal_offsets (box method with separable overlap weights)
+# versus util.apply_subpixel_orthogonal_offsets_upsampled (previous method, which materializes the 6x-upsampled image).
+# Both methods are applied to the same random image for positive, negative, and mixed offsets, and the outputs and
+# headers are compared.  Also runs the spline method once for timing.
+# Usage: python scripts/benchmark_apply_subpixel_orthogonal_offsets.py [naxis]
+####################################################################################################################
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from astropy.io import fits
+
+import modules.utils.rapid_pipeline_subs as util
+
+naxis = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+
+offsets = [(0.37,-0.21),(-1.45,0.08),(2.2,3.9),(-4.6,-0.55),(0.05,1.3)]
+
+# Relative tolerance allows for the previous method dividing float32 input pixels by 36 in float32.
+
+tolerance = 1.0e-6
+
+np.random.seed(0)
+data = np.random.normal(100.0,10.0,(naxis,naxis)).astype(np.float32)
+
+tmp_dir = tempfile.mkdtemp()
+input_fits_file = os.path.join(tmp_dir,"input.fits")
+old_fits_file = os.path.join(tmp_dir,"old.fits")
+new_fits_file = os.path.join(tmp_dir,"new.fits")
+
+hdr = fits.Header()
+hdr["CRPIX1"] = 0.5 * naxis
+hdr["CRPIX2"] = 0.5 * naxis
+fits.PrimaryHDU(header=hdr,data=data).writeto(input_fits_file,overwrite=True)
+
+n_failed = 0
+
+for dx,dy in offsets:
+
+    start_time = time.time()
+    util.apply_subpixel_orthogonal_offsets_upsampled(input_fits_file,dx,dy,output_fits_file=old_fits_file)
+    elapsed_time_old = time.time() - start_time
+
+    start_time = time.time()
+    util.apply_subpixel_orthogonal_offsets(input_fits_file,dx,dy,output_fits_file=new_fits_file)
+    elapsed_time_new = time.time() - start_time
+
+    with fits.open(old_fits_file) as hdul_old, fits.open(new_fits_file) as hdul_new:
+        max_abs_diff = np.max(np.abs(hdul_old[0].data - hdul_new[0].data))
+        max_rel_diff = max_abs_diff / np.max(np.abs(hdul_old[0].data))
+        crpix_match = hdul_old[0].header["CRPIX1"] == hdul_new[0].header["CRPIX1"] and \
+                      hdul_old[0].header["CRPIX2"] == hdul_new[0].header["CRPIX2"]
+
+    passed = max_rel_diff <= tolerance and crpix_match
+
+    if not passed:
+        n_failed += 1
+
+    print(f"dx,dy = {dx},{dy}: max_abs_diff = {max_abs_diff}, max_rel_diff = {max_rel_diff}, crpix_match = {crpix_match}, passed = {passed}")
+    print(f"Elapsed time in seconds (upsampled) = {elapsed_time_old}, (box) = {elapsed_time_new}, " +
+          f"speedup = {elapsed_time_old / elapsed_time_new}")
+
+
+# Spline method (timing only, as it interpolates by the exact rather than subpixel-rounded offsets).
+
+start_time = time.time()
+util.apply_subpixel_orthogonal_offsets(input_fits_file,offsets[0][0],offsets[0][1],
+                                       output_fits_file=new_fits_file,method="spline")
+elapsed_time_spline = time.time() - start_time
+
+print("Elapsed time in seconds (spline) =",elapsed_time_spline)
+
+for fits_file in [input_fits_file,old_fits_file,new_fits_file]:
+    os.remove(fits_file)
+os.rmdir(tmp_dir)
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
@@ -0,0 +1,117 @@
+####################################################################################################################
+# Test and benchmark of util.AWSBatchJobTracker against a stub AWS Batch client, in which every job runs for a
+# random number of polling cycles and then succeeds or fails.  Reports number of describe_jobs API calls and
+# polls needed by the tracker, versus the previous loop in virtualPipelineOperator.py, which described one job
+# per call from the start of the job list each cycle and stopped at the first unfinished job.  Also checks that
+# job IDs never returned by describe_jobs (e.g., mistyped or aged out) are marked FAILED instead of stalling wait.
+# Usage: python scripts/benchmark_aws_batch_job_tracker.py [njobs]
+####################################################################################################################
+
+import sys
+import random
+
+import modules.utils.rapid_pipeline_subs as util
+
+njobs = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+
+class StubBatchClient:
+
+    '''
+    Stub for boto3.client('batch') with only the describe_jobs method.  Time advances by one cycle
+    per call to sleep (the tracker calls it between polls), and job i is RUNNING until its finish cycle.
+    Unknown job IDs are left out of the response, as by AWS Batch.
+    '''
+
+    def __init__(self,njobs,max_cycles=30,failure_rate=0.02,seed=0):
+
+        rng = random.Random(seed)
+        self.finish_cycle = {f"job-{i}": rng.randint(1,max_cycles) for i in range(njobs)}
+        self.final_status = {job_id: ("FAILED" if rng.random() < failure_rate else "SUCCEEDED")
+                             for job_id in self.finish_cycle}
+        self.cycle = 0
+        self.n_calls = 0
+
+    def sleep(self,seconds):
+
+        self.cycle += 1
+
+    def describe_jobs(self,jobs):
+
+        if len(jobs) > 100:
+            raise ValueError("describe_jobs accepts at most 100 job IDs")
+
+        self.n_calls += 1
+
+        response_jobs = []
+
+        for job_id in jobs:
+            if job_id not in self.finish_cycle:
+                continue
+            if self.cycle >= self.finish_cycle[job_id]:
+                job_status = self.final_status[job_id]
+            else:
+                job_status = "RUNNING"
+            response_jobs.append({'jobId': job_id,'status': job_status})
+
+        return {'jobs': response_jobs}
+
+
+# Batched tracker.
+
+client = StubBatchClient(njobs)
+tracker = util.AWSBatchJobTracker(client,list(client.finish_cycle.keys()))
+status_counts = tracker.wait(min_poll_interval=15,max_poll_interval=120,sleep=client.sleep)
+
+expected_counts = {}
+for job_status in client.final_status.values():
+    expected_counts[job_status] = expected_counts.get(job_status,0) + 1
+
+n_calls_tracker = client.n_calls
+n_polls_tracker = tracker.n_polls
+
+
+# Previous loop (one job per call, restarting from the first job and breaking at the first unfinished job).
+
+client = StubBatchClient(njobs)
+job_ids = list(client.finish_cycle.keys())
+n_polls_previous = 0
+
+while True:
+    n_finished = 0
+    for job_id in job_ids:
+        job_status = client.describe_jobs(jobs=[job_id])['jobs'][0]['status']
+        if job_status in ("SUCCEEDED","FAILED"):
+            n_finished += 1
+        else:
+            break
+    n_polls_previous += 1
+    if n_finished == njobs:
+        break
+    client.sleep(60)
+
+n_calls_previous = client.n_calls
+
+print("njobs =",njobs)
+print("status_counts (tracker) =",status_counts)
+print("status_counts (expected) =",expected_counts)
+print("Tracker counts match =",status_counts == expected_counts)
+print(f"describe_jobs calls: previous loop = {n_calls_previous} in {n_polls_previous} polls, " +
+      f"tracker = {n_calls_tracker} in {n_polls_tracker} polls")
+
+
+# Job IDs never returned by describe_jobs, with jobs that run longer than max_missing_polls polls.
+
+missing_job_ids = ["job-mistyped","job-aged-out"]
+
+client = StubBatchClient(200,max_cycles=40)
+tracker = util.AWSBatchJobTracker(client,list(client.finish_cycle.keys()) + missing_job_ids,max_missing_polls=10)
+status_counts = tracker.wait(min_poll_interval=15,max_poll_interval=120,sleep=client.sleep)
+
+expected_counts = {}
+for job_status in list(client.final_status.values()) + ["FAILED"] * len(missing_job_ids):
+    expected_counts[job_status] = expected_counts.get(job_status,0) + 1
+
+print("Missing job IDs marked FAILED =",sorted(tracker.missing_job_ids) == sorted(missing_job_ids),
+      f"(status_counts = {status_counts}, polls = {tracker.n_polls})")
+print("Tracker counts with missing job IDs match =",status_counts == expected_counts)
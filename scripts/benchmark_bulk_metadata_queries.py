@@ -0,0 +1,140 @@
+####################################################################################################################
+# Regression test and benchmark of the metadata queries for launching science pipelines: single-row RAPIDDB queries
+# per RID (get_l2filemeta_record, get_exposure_filter, get_best_psf, get_info_for_l2file, get_best_reference_image
+# for two pipelines) versus the bulk RAPIDDB queries for all RIDs (get_l2filemeta_records_for_rids, get_filters,
+# get_best_psfs, get_info_for_l2files, get_best_reference_images) used by ScienceLaunchContext.prefetch_metadata.
+# Runs against the database given by the usual env. vars. DBSERVER, DBPORT, DBNAME, DBUSER, DBPASS (e.g., a local
+# Postgres), in temporary tables (which shadow the operations tables of the same names), so nothing persists.
+# Usage: python scripts/benchmark_bulk_metadata_queries.py [nrids]
+####################################################################################################################
+
+import sys
+import time
+import random
+
+import database.modules.utils.rapid_db as db
+
+nrids = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+dbh = db.RAPIDDB()
+
+if dbh.exit_code >= 64:
+    exit(dbh.exit_code)
+
+for query in ["CREATE TEMPORARY TABLE filters (fid smallint, filter varchar(16));",
+              "CREATE TEMPORARY TABLE l2filemeta (rid integer primary key, sca smallint, fid smallint, " +
+              "ra0 double precision, dec0 double precision, ra1 double precision, dec1 double precision, " +
+              "ra2 double precision, dec2 double precision, ra3 double precision, dec3 double precision, " +
+              "ra4 double precision, dec4 double precision);",
+              "CREATE TEMPORARY TABLE l2files (rid integer primary key, filename varchar(255), expid integer, sca smallint, " +
+              "field integer, mjdobs double precision, exptime real, infobits integer, status smallint, " +
+              "vbest smallint, version smallint);",
+              "CREATE TEMPORARY TABLE psfs (psfid integer, fid smallint, sca smallint, filename varchar(255), " +
+              "vbest smallint, status smallint);",
+              "CREATE TEMPORARY TABLE refimages (rfid integer, field integer, fid smallint, ppid smallint, " +
+              "filename varchar(255), infobits integer, version smallint, vbest smallint, status smallint);",
+              "CREATE INDEX ON refimages (field,fid);"]:
+    dbh.cur.execute(query)
+
+
+# Synthetic records.
+
+random.seed(0)
+
+n_filters = 8
+n_scas = 18
+n_fields = nrids // 20
+
+for fid in range(1,n_filters + 1):
+    dbh.cur.execute("insert into filters values (%s,%s);",(fid,f"F{fid:03d}"))
+
+psfid = 0
+for fid in range(1,n_filters + 1):
+    for sca in range(1,n_scas + 1):
+        for vbest in [0,1]:
+            psfid += 1
+            dbh.cur.execute("insert into psfs values (%s,%s,%s,%s,%s,%s);",(psfid,fid,sca,f"s3://psfs/psf{psfid}.fits",vbest,1))
+
+rids = list(range(1000,1000 + nrids))
+
+for rid in rids:
+    sca = random.randint(1,n_scas)
+    fid = random.randint(1,n_filters)
+    field = random.randint(1,n_fields)
+    coords = [random.uniform(0.0,360.0) if i % 2 == 0 else random.uniform(-90.0,90.0) for i in range(10)]
+    dbh.cur.execute("insert into l2filemeta values (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s);",[rid,sca,fid] + coords)
+    dbh.cur.execute("insert into l2files values (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s);",
+                    (rid,f"s3://images/l2_{rid}.fits",rid // 18,sca,field,62000.0 + rid / 1000.0,139.8,0,1,1,1))
+
+rfid = 0
+for field in range(1,n_fields + 1):
+    for fid in range(1,n_filters + 1):
+        for ppid in [12,15]:
+            if random.random() < 0.3:
+                rfid += 1
+                dbh.cur.execute("insert into refimages values (%s,%s,%s,%s,%s,%s,%s,%s,%s);",
+                                (rfid,field,fid,ppid,f"s3://refimages/ref{rfid}.fits",0,1,1,1))
+
+dbh.conn.commit()
+
+ppids = [12,15]
+
+
+# Single-row queries per RID (previous method).
+
+start_time = time.time()
+
+expected = {}
+
+for rid in rids:
+
+    sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4 = dbh.get_l2filemeta_record(rid)
+    exposure_filter = dbh.get_exposure_filter(fid)
+    psf = dbh.get_best_psf(sca,fid)
+    image_info = dbh.get_info_for_l2file(rid)
+    field = image_info[3]
+
+    refimages = []
+    for ppid in ppids:
+        refimages.append(dbh.get_best_reference_image(ppid,field,fid))
+
+    expected[rid] = ((sca,fid,ra0,dec0,ra1,dec1,ra2,dec2,ra3,dec3,ra4,dec4),exposure_filter,psf,image_info,refimages)
+
+elapsed_time_single = time.time() - start_time
+
+
+# Bulk queries for all RIDs (current method).
+
+start_time = time.time()
+
+l2filemeta = dbh.get_l2filemeta_records_for_rids(rids)
+l2file_info = dbh.get_info_for_l2files(rids)
+filters = {record[0]: record[1] for record in dbh.get_filters()}
+psfs = dbh.get_best_psfs()
+
+field_fid_pairs = sorted(set([(l2file_info[rid][3],l2filemeta[rid][1]) for rid in rids]))
+best_refimages = {ppid: dbh.get_best_reference_images(ppid,[pair[0] for pair in field_fid_pairs],[pair[1] for pair in field_fid_pairs])
+                  for ppid in ppids}
+
+actual = {}
+
+for rid in rids:
+    fid = l2filemeta[rid][1]
+    sca = l2filemeta[rid][0]
+    field = l2file_info[rid][3]
+    actual[rid] = (l2filemeta[rid],filters[fid],psfs[(sca,fid)],l2file_info[rid],
+                   [best_refimages[ppid].get((field,fid),{}) for ppid in ppids])
+
+elapsed_time_bulk = time.time() - start_time
+
+print(f"Number of RIDs = {nrids}")
+print(f"single-row queries: elapsed time in seconds = {elapsed_time_single:.3f}")
+print(f"bulk queries: elapsed time in seconds = {elapsed_time_bulk:.3f}")
+
+same = expected == actual
+
+print("Same metadata =",same)
+
+dbh.close()
+
+exit(0 if same else 1)
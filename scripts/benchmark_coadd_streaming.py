@@ -0,0 +1,83 @@
+####################################################################################################################
+# Regression test and benchmark of the streaming coadd (compute_coadd_streaming in modules/coadd/coadd.py) versus
+# reproject_and_coadd (compute_coadd), for science and uncertainty images with dithered WCSs and NaN pixels.
+# Compares the coadd, uncertainty, and coverage maps, and reports elapsed time and peak traced memory of each mode.
+# Usage: python scripts/benchmark_coadd_streaming.py [n_inputs] [naxis] [reprojection_type]
+####################################################################################################################
+
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+from astropy.io import fits
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules", "coadd"))
+
+import coadd
+
+n_inputs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+naxis = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+reprojection_type = sys.argv[3] if len(sys.argv) > 3 else "exact"
+
+ra0 = 10.0
+dec0 = -40.0
+cdelt = 0.000030555555556
+
+np.random.seed(0)
+
+tmp_dir = tempfile.mkdtemp()
+input_paths = []
+uncertainty_paths = []
+
+for i in range(n_inputs):
+
+    wcs = coadd.create_output_wcs(ra0 + np.random.uniform(-20.0, 20.0) * cdelt / np.cos(np.radians(dec0)),
+                                  dec0 + np.random.uniform(-20.0, 20.0) * cdelt,
+                                  naxis, -cdelt, cdelt)
+    wcs.wcs.crota = [0.0, np.random.uniform(-5.0, 5.0)]
+    header = wcs.to_header()
+
+    data = np.random.normal(100.0, 10.0, (naxis, naxis)).astype(np.float32)
+    data[np.random.randint(0, naxis, 50), np.random.randint(0, naxis, 50)] = np.nan
+    unc = np.random.uniform(5.0, 15.0, (naxis, naxis)).astype(np.float32)
+
+    input_paths.append(os.path.join(tmp_dir, f"sci_{i}.fits"))
+    uncertainty_paths.append(os.path.join(tmp_dir, f"unc_{i}.fits"))
+    fits.writeto(input_paths[-1], data, header=header, overwrite=True)
+    fits.writeto(uncertainty_paths[-1], unc, header=header, overwrite=True)
+
+shape_out = (naxis + 60, naxis + 60)
+output_wcs = coadd.create_output_wcs(ra0, dec0, shape_out[0], -cdelt, cdelt)
+
+results = {}
+
+for combine in ["mean", "sum", "max"]:
+
+    for name, coadd_function in [("reproject_and_coadd", coadd.compute_coadd),
+                                 ("streaming", coadd.compute_coadd_streaming)]:
+
+        tracemalloc.start()
+        start_time = time.time()
+
+        results[name] = coadd_function(input_paths, uncertainty_paths=uncertainty_paths,
+                                       output_wcs=output_wcs, shape_out=shape_out, combine=combine,
+                                       n_jobs=1, reprojection_type=reprojection_type)
+
+        elapsed_time = time.time() - start_time
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"combine = {combine}, {name}: elapsed time in seconds = {elapsed_time:.3f}, " +
+              f"peak traced memory in MB = {peak_memory / 1024**2:.1f}")
+
+    for label, old, new in zip(["coadd", "uncertainty", "coverage"],
+                               results["reproject_and_coadd"][:3], results["streaming"][:3]):
+        same_nans = np.array_equal(np.isnan(old), np.isnan(new))
+        max_abs_diff = np.nanmax(np.abs(old - new))
+        print(f"combine = {combine}, {label}: same NaNs = {same_nans}, max_abs_diff = {max_abs_diff}")
+
+for path in input_paths + uncertainty_paths:
+    os.remove(path)
+os.rmdir(tmp_dir)
@@ -0,0 +1,37 @@
+####################################################################################################################
+# Benchmark the sigma-clipping variance correction factor: Monte Carlo (previous method) versus
+# closed-form truncated-normal variance with LRU cache (current method of util.compute_clip_corr).
+# The science pipeline calls util.fits_data_statistics_with_clipping about eight times per job,
+# plus once more inside util.compute_psf_catalog, and each call needs the correction factor.
+####################################################################################################################
+
+import time
+import modules.utils.rapid_pipeline_subs as util
+
+n_sigma = 3.0
+n_calls_per_job = 9
+
+
+# Monte Carlo method (one call suffices to estimate the per-call cost).
+
+start_time = time.time()
+corr_fact_mc = util.compute_clip_corr_monte_carlo(n_sigma)
+elapsed_time_mc = time.time() - start_time
+
+
+# Closed-form method with LRU cache (first call computes, the rest are cache hits).
+
+util.compute_clip_corr.cache_clear()
+
+start_time = time.time()
+for i in range(n_calls_per_job):
+    corr_fact = util.compute_clip_corr(n_sigma)
+elapsed_time_job = time.time() - start_time
+
+print("n_sigma =",n_sigma)
+print("corr_fact (Monte Carlo) =",corr_fact_mc)
+print("corr_fact (closed form) =",corr_fact)
+print("Elapsed time in seconds per call (Monte Carlo) =",elapsed_time_mc)
+print(f"Elapsed time in seconds per job ({n_calls_per_job} calls, Monte Carlo) =",elapsed_time_mc * n_calls_per_job)
+print(f"Elapsed time in seconds per job ({n_calls_per_job} calls, closed form) =",elapsed_time_job)
+print("Savings in seconds per job =",elapsed_time_mc * n_calls_per_job - elapsed_time_job)
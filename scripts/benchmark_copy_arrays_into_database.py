@@ -0,0 +1,124 @@
+####################################################################################################################
+# Regression test and benchmark of bulk-loading a sources table: per-row string concatenation into a CSV file that
+# is loaded with RAPIDDB.copy_data_from_file_into_database (previous method) versus columnar binary COPY from memory
+# with RAPIDDB.copy_arrays_into_database (current method, as in pipeline/loadPSFCatIntoDBSourcesTable.py).
+# Runs against the database given by the usual env. vars. DBSERVER, DBPORT, DBNAME, DBUSER, DBPASS (e.g., a local
+# Postgres), in temporary tables with the columns of a sources table, so nothing persists.
+# Usage: python scripts/benchmark_copy_arrays_into_database.py [nrows]
+####################################################################################################################
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+import database.modules.utils.rapid_db as db
+
+nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+dbh = db.RAPIDDB()
+
+if dbh.exit_code >= 64:
+    exit(dbh.exit_code)
+
+col_types_dict = {"id": "integer","ra": "double precision","dec": "double precision",
+                  "xfit": "real","yfit": "real","fluxfit": "real","xerr": "real","yerr": "real","fluxerr": "real",
+                  "npixfit": "smallint","qfit": "real","cfit": "real","redchi": "real","flags": "smallint",
+                  "sharpness": "real","roundness1": "real","roundness2": "real","npix": "smallint","peak": "real",
+                  "pid": "integer","isdiffpos": "boolean","field": "integer","hp6": "integer","hp9": "integer",
+                  "expid": "integer","fid": "smallint","sca": "smallint","mjdobs": "double precision"}
+
+cols = list(col_types_dict.keys())
+col_types = list(col_types_dict.values())
+columns = tuple(cols)
+
+for tablename in ["benchmark_sources_csv","benchmark_sources_binary"]:
+    dbh.cur.execute(f"CREATE TEMPORARY TABLE {tablename} (" +
+                    ", ".join([f"{col} {col_type}" for col,col_type in col_types_dict.items()]) + ");")
+dbh.conn.commit()
+
+
+# Catalog columns as read by astropy (float64 and int64), with NaNs as in PSF-fit catalogs,
+# and values that are the same for all sources of a job.
+
+np.random.seed(0)
+
+catalog = {}
+for col,col_type in list(col_types_dict.items())[:19]:
+    if col_type in ["integer","smallint"]:
+        catalog[col] = np.random.randint(0,30000,nrows)
+    else:
+        catalog[col] = np.random.uniform(-1000.0,1000.0,nrows)
+catalog["id"] = np.arange(1,nrows + 1)
+catalog["qfit"][::100] = np.nan
+
+job_values = {"pid": 123456,"isdiffpos": True,"expid": 42,"fid": 3,"sca": 7,"mjdobs": 62000.123456789}
+fields = np.random.randint(0,6291457,nrows)
+hp6s = np.random.randint(0,49151,nrows)
+hp9s = np.random.randint(0,3145727,nrows)
+
+
+# Per-row string concatenation into CSV file (previous method).
+
+start_time = time.time()
+
+csv_file = os.path.join(tempfile.mkdtemp(),"benchmark_sources.csv")
+
+with open(csv_file,"w") as csv_fh:
+    for index_row in range(nrows):
+        nums = ""
+        for col in cols[:19]:
+            nums = nums + str(catalog[col][index_row]) + ","
+        for value in [job_values["pid"],"true",fields[index_row],hp6s[index_row],hp9s[index_row],
+                      job_values["expid"],job_values["fid"],job_values["sca"],job_values["mjdobs"]]:
+            nums = nums + str(value) + ","
+        csv_fh.write(nums[:-1] + "\n")
+
+dbh.copy_data_from_file_into_database(csv_file,"benchmark_sources_csv",columns)
+
+elapsed_time_csv = time.time() - start_time
+
+os.remove(csv_file)
+os.rmdir(os.path.dirname(csv_file))
+
+
+# Columnar binary COPY from memory (current method).
+
+start_time = time.time()
+
+values = dict(catalog)
+values.update(job_values)
+values["field"] = fields
+values["hp6"] = hp6s
+values["hp9"] = hp9s
+
+arrays = [values[col] for col in cols]
+
+nrows_copied = dbh.copy_arrays_into_database(arrays,"benchmark_sources_binary",columns,col_types)
+
+if dbh.exit_code >= 64:
+    exit(dbh.exit_code)
+
+elapsed_time_binary = time.time() - start_time
+
+print(f"CSV file: elapsed time in seconds = {elapsed_time_csv:.3f}, rows/s = {nrows / elapsed_time_csv:.1f}")
+print(f"binary COPY: elapsed time in seconds = {elapsed_time_binary:.3f}, rows/s = {nrows_copied / elapsed_time_binary:.1f}")
+
+
+# Compare table contents.
+
+results = {}
+for tablename in ["benchmark_sources_csv","benchmark_sources_binary"]:
+    dbh.cur.execute(f"select {', '.join(cols)} from {tablename} order by id;")
+    results[tablename] = dbh.cur.fetchall()
+
+same = len(results["benchmark_sources_csv"]) == nrows and \
+    str(results["benchmark_sources_csv"]) == str(results["benchmark_sources_binary"])
+
+print("Number of rows =",len(results["benchmark_sources_binary"]))
+print("Same table contents =",same)
+
+dbh.close()
+
+exit(0 if same else 1)
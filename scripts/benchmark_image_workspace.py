@@ -0,0 +1,246 @@
+####################################################################################################################
+# Regression test and benchmark of the image steps around ZOGY in pipeline/awsBatchSubmitJobs_runSingleSciencePipeline.py:
+# FITS-file helpers, each of which reads and rewrites a whole FITS file (previous method), versus the in-memory
+# ImageWorkspace with the ndarray-level helpers (modules/utils/rapid_pipeline_subs.py), which reads each input once
+# and writes each ZOGY input and product once.  Synthetic input images with NaNs are written to a temporary directory,
+# and ZOGY is stood in for by synthetic difference and scorr images.  Output FITS files of both methods are compared
+# (data, dtypes, and headers except checksums).
+# Usage: python scripts/benchmark_image_workspace.py [image_size]
+####################################################################################################################
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import numpy as np
+from astropy.io import fits
+
+import modules.utils.rapid_pipeline_subs as util
+import pipeline.differenceImageSubs as dfis
+
+image_size = int(sys.argv[1]) if len(sys.argv) > 1 else 4089
+
+n_sigma = 3.0
+saturation_level_sciimage = 50000.0
+saturation_level_refimage = 50000.0
+exptime_sciimage = 139.8
+scalefacref = 0.9173
+dxmedianfin = 0.23
+dymedianfin = -0.41
+post_zogy_keep_diffimg_lower_cov_map_thresh = 5
+
+
+# Synthetic input images.
+
+np.random.seed(0)
+
+input_dir = tempfile.mkdtemp()
+
+def write_image(filename,data):
+    hdr = fits.Header()
+    hdr["CRPIX1"] = image_size / 2.0
+    hdr["CRPIX2"] = image_size / 2.0
+    fits.PrimaryHDU(header=hdr,data=data).writeto(os.path.join(input_dir,filename),overwrite=True,checksum=True)
+
+def random_image(mean,sigma,nan_fraction):
+    data = np.random.normal(mean,sigma,(image_size,image_size)).astype(np.float32)
+    data[np.random.uniform(size=data.shape) < nan_fraction] = np.nan
+    return data
+
+write_image("sciimage_bkg_subbed.fits",random_image(0.0,10.0,0.001))
+write_image("sciimage_unc.fits",random_image(10.0,1.0,0.001))
+write_image("refimage.fits",random_image(0.0,10.0,0.002))
+write_image("refimage_unc.fits",random_image(10.0,1.0,0.002))
+write_image("refimage_cov_map.fits",np.random.randint(0,10,(image_size,image_size)).astype(np.float32))
+write_image("diffimage.fits",random_image(0.0,5.0,0.0))
+write_image("scorrimage.fits",random_image(0.0,1.0,0.0))
+
+y,x = np.mgrid[-25:26,-25:26]
+write_image("sciimage_psf.fits",np.exp(-(x**2 + 2.0 * y**2) / 18.0))
+
+output_filenames = ["sciimage_psf_normalized.fits","sciimage_bkg_subbed.fits","sciimage_unc.fits",
+                    "refimage_gainmatched.fits","refimage_unc_gainmatched.fits",
+                    "diffimage_masked.fits","scorrimage_masked.fits",
+                    "diffimage_masked_negative.fits","scorrimage_masked_negative.fits"]
+
+
+# Previous method: FITS-file helpers.
+
+def run_fits_file_helpers(d):
+
+    util.normalize_image(d + "/sciimage_psf.fits",0,d + "/sciimage_psf_normalized.fits")
+
+    util.scale_image_data(d + "/refimage.fits",scalefacref,d + "/refimage_gainmatched.fits")
+    util.scale_image_data(d + "/refimage_unc.fits",scalefacref,d + "/refimage_unc_gainmatched.fits")
+
+    saturation_value_rate_sciimage = saturation_level_sciimage / exptime_sciimage
+    nan_mask_sciimage = util.replace_nans_with_value(d + "/sciimage_bkg_subbed.fits",saturation_value_rate_sciimage)
+    nan_mask_refimage = util.replace_nans_with_value(d + "/refimage_gainmatched.fits",saturation_value_rate_sciimage)
+
+    stats_sci_img = util.fits_data_statistics_with_clipping(d + "/sciimage_bkg_subbed.fits",n_sigma,0,saturation_level_sciimage)
+    stats_ref_img = util.fits_data_statistics_with_clipping(d + "/refimage.fits",n_sigma,0,saturation_level_refimage)
+
+    util.replace_nans_with_value(d + "/sciimage_unc.fits",stats_sci_img["clippedstd"])
+    util.replace_nans_with_value(d + "/refimage_unc_gainmatched.fits",stats_ref_img["clippedstd"])
+
+    util.apply_subpixel_orthogonal_offsets(d + "/refimage_gainmatched.fits",dxmedianfin,dymedianfin)
+
+    util.transpose_image_data(d + "/sciimage_psf_normalized.fits")
+
+    for name in ["diffimage","scorrimage"]:
+
+        dfis.mask_difference_image_with_resampled_reference_cov_map(d + f"/{name}.fits",
+                                                                    d + "/refimage_cov_map.fits",
+                                                                    d + f"/{name}_masked.fits",
+                                                                    post_zogy_keep_diffimg_lower_cov_map_thresh)
+
+        if nan_mask_sciimage:
+            util.restore_nans(d + f"/{name}_masked.fits",nan_mask_sciimage)
+
+        if nan_mask_refimage:
+            util.restore_nans(d + f"/{name}_masked.fits",nan_mask_refimage)
+
+        util.scale_image_data(d + f"/{name}_masked.fits",-1.0,d + f"/{name}_masked_negative.fits")
+
+
+# Current method: image workspace (same sequence as in the science pipeline, with transposed PSF).
+
+def run_image_workspace(d):
+
+    workspace = util.ImageWorkspace()
+
+    sciimage_psf = workspace.load("sciimage_psf",d + "/sciimage_psf.fits",0)
+    sciimage_psf_normalized = util.normalize_data(sciimage_psf,workspace.get_header("sciimage_psf"))
+    sciimage_psf_normalized = np.ascontiguousarray(np.transpose(sciimage_psf_normalized))
+    workspace.add("sciimage_psf_normalized",sciimage_psf_normalized,workspace.get_header("sciimage_psf"),d + "/sciimage_psf_normalized.fits")
+    workspace.write("sciimage_psf_normalized")
+    workspace.remove("sciimage_psf")
+    workspace.remove("sciimage_psf_normalized")
+
+    refimage = workspace.load("refimage",d + "/refimage.fits")
+    refimage_unc = workspace.load("refimage_unc",d + "/refimage_unc.fits")
+    workspace.add("gainmatched_refimage",util.scale_data(refimage,scalefacref),
+                  workspace.get_header("refimage"),d + "/refimage_gainmatched.fits")
+    workspace.add("gainmatched_refimage_unc",util.scale_data(refimage_unc,scalefacref),
+                  workspace.get_header("refimage_unc"),d + "/refimage_unc_gainmatched.fits")
+    workspace.remove("refimage_unc")
+
+    saturation_value_rate_sciimage = saturation_level_sciimage / exptime_sciimage
+
+    workspace.load("bkg_subbed_sciimage",d + "/sciimage_bkg_subbed.fits")
+
+    data,nan_mask_sciimage = util.replace_nans_in_data(workspace.get_data("bkg_subbed_sciimage"),saturation_value_rate_sciimage)
+    if nan_mask_sciimage is not None:
+        workspace.set_data("bkg_subbed_sciimage",data)
+
+    data,nan_mask_refimage = util.replace_nans_in_data(workspace.get_data("gainmatched_refimage"),saturation_value_rate_sciimage)
+    if nan_mask_refimage is not None:
+        workspace.set_data("gainmatched_refimage",data)
+
+    stats_sci_img = util.data_statistics_with_clipping(workspace.get_data("bkg_subbed_sciimage"),n_sigma,saturation_level_sciimage)
+    stats_ref_img = util.data_statistics_with_clipping(refimage,n_sigma,saturation_level_refimage)
+    workspace.remove("refimage")
+
+    workspace.load("sciimage_unc",d + "/sciimage_unc.fits")
+
+    data,nan_mask = util.replace_nans_in_data(workspace.get_data("sciimage_unc"),stats_sci_img["clippedstd"])
+    if nan_mask is not None:
+        workspace.set_data("sciimage_unc",data)
+
+    data,nan_mask = util.replace_nans_in_data(workspace.get_data("gainmatched_refimage_unc"),stats_ref_img["clippedstd"])
+    if nan_mask is not None:
+        workspace.set_data("gainmatched_refimage_unc",data)
+
+    data = util.apply_subpixel_orthogonal_offsets_to_data(workspace.get_data("gainmatched_refimage"),
+                                                          workspace.get_header("gainmatched_refimage"),
+                                                          dxmedianfin,
+                                                          dymedianfin)
+    if data is not None:
+        workspace.set_data("gainmatched_refimage",data)
+
+    for name in ["bkg_subbed_sciimage","gainmatched_refimage","sciimage_unc","gainmatched_refimage_unc"]:
+        workspace.write(name)
+
+    workspace.clear()
+
+    refimage_cov_map = workspace.load("refimage_cov_map",d + "/refimage_cov_map.fits")
+
+    for name in ["diffimage","scorrimage"]:
+
+        data = workspace.load(name,d + f"/{name}.fits")
+
+        data_masked = dfis.mask_difference_image_data_with_resampled_reference_cov_map(data,
+                                                                                      refimage_cov_map,
+                                                                                      post_zogy_keep_diffimg_lower_cov_map_thresh)
+        data_masked = util.restore_nans_in_data(data_masked,nan_mask_sciimage)
+        data_masked = util.restore_nans_in_data(data_masked,nan_mask_refimage)
+
+        workspace.add(name + "_masked",data_masked,workspace.get_header(name),d + f"/{name}_masked.fits")
+        workspace.write(name + "_masked")
+
+        workspace.add(name + "_masked_negative",util.scale_data(data_masked,-1.0),workspace.get_header(name),d + f"/{name}_masked_negative.fits")
+        workspace.write(name + "_masked_negative")
+
+        workspace.remove(name)
+        workspace.remove(name + "_masked")
+        workspace.remove(name + "_masked_negative")
+
+    return workspace.n_reads,workspace.n_writes
+
+
+# Run each method on its own copy of the input images.
+
+output_dirs = {}
+elapsed_times = {}
+
+for name,method in [("fits_file_helpers",run_fits_file_helpers),("image_workspace",run_image_workspace)]:
+
+    output_dirs[name] = tempfile.mkdtemp()
+    for filename in os.listdir(input_dir):
+        shutil.copy(os.path.join(input_dir,filename),output_dirs[name])
+
+    start_time = time.time()
+    result = method(output_dirs[name])
+    elapsed_times[name] = time.time() - start_time
+
+    if result is not None:
+        print(f"Image workspace: number of FITS files read = {result[0]}, written = {result[1]}")
+
+for name in elapsed_times.keys():
+    print(f"{name}: elapsed time in seconds = {elapsed_times[name]:.3f}")
+
+
+# Compare output FITS files.
+
+n_failed = 0
+
+for filename in output_filenames:
+
+    with fits.open(os.path.join(output_dirs["fits_file_helpers"],filename)) as hdul_expected, \
+         fits.open(os.path.join(output_dirs["image_workspace"],filename)) as hdul_actual:
+
+        data_expected = hdul_expected[0].data
+        data_actual = hdul_actual[0].data
+
+        passed = data_expected.dtype == data_actual.dtype and \
+            np.array_equal(data_expected,data_actual,equal_nan=True)
+
+        for hdr in [hdul_expected[0].header,hdul_actual[0].header]:
+            for keyword in ["CHECKSUM","DATASUM"]:
+                if keyword in hdr:
+                    del hdr[keyword]
+
+        passed = passed and hdul_expected[0].header == hdul_actual[0].header
+
+    if not passed:
+        n_failed += 1
+
+    print(f"{filename}: same data and header = {passed}")
+
+for d in [input_dir] + list(output_dirs.values()):
+    shutil.rmtree(d)
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
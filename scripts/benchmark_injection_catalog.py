@@ -0,0 +1,169 @@
+####################################################################################################################
+# Regression test and benchmark of evaluating injection-catalog light curves at an image MJD: JSON dict-of-dicts
+# catalogs with NumPy arrays rebuilt by list comprehensions and light curves evaluated source by source with a type
+# branch per source (previous method in modules/fake_src/rapid_source_injections.py and rapid_l2_injections.py),
+# versus columnar .npz catalogs (converted from the JSON catalogs) with all sources of each light-curve model type
+# evaluated in one vectorized call (modules/fake_src/injectionLightCurveModels.py).  A sky box around the image
+# stands in for the image-WCS selection of sources on the image.
+# Usage: python scripts/benchmark_injection_catalog.py [nsources_per_type]
+####################################################################################################################
+
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+
+import modules.fake_src.injectionLightCurveModels as lcm
+
+nsources_per_type = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+
+ncatalogs = 4
+image_mjdobs = 62010.37
+zeropoint = 26.4
+ra_min,ra_max,dec_min,dec_max = 10.0,10.5,-5.0,-4.5
+ra_image_min,ra_image_max,dec_image_min,dec_image_max = 10.1,10.4,-4.9,-4.6
+
+
+# Synthetic JSON injection catalogs, as written by generateInjectionCatalogForField.py.
+
+np.random.seed(0)
+
+tmp_dir = tempfile.mkdtemp()
+
+json_catalog_filenames = []
+for n in range(ncatalogs):
+    rtid = 5261331 + n
+    injection_catalog = {}
+    injection_counter = 0
+    for i in range(nsources_per_type):
+        injection_catalog[f"{rtid}{injection_counter:05}"] = {
+            'type': 'sinusoidal',
+            'ra': float(np.random.uniform(ra_min,ra_max)),
+            'dec': float(np.random.uniform(dec_min,dec_max)),
+            'parameters': {
+                'period': float(np.random.uniform(0.1,100.0)),
+                'amplitude': float(np.random.uniform(0.1,1.0)),
+                'magnitude': float(np.random.uniform(20.0,25.0)),
+                'phase': float(np.random.uniform(0.0,1.0))
+            }
+        }
+        injection_counter += 1
+    for i in range(nsources_per_type):
+        injection_catalog[f"{rtid}{injection_counter:05}"] = {
+            'type': 'gaussian',
+            'ra': float(np.random.uniform(ra_min,ra_max)),
+            'dec': float(np.random.uniform(dec_min,dec_max)),
+            'parameters': {
+                'peak_time': float(np.random.uniform(61900.0,62100.0)),
+                'peak_amplitude': float(np.random.uniform(0.5,3.0)),
+                'sigma': float(np.random.uniform(1.0,30.0)),
+                'magnitude': float(np.random.uniform(20.0,25.0))
+            }
+        }
+        injection_counter += 1
+
+    json_catalog_filenames.append(os.path.join(tmp_dir,f"injection_catalog_rtid{rtid}.json"))
+    with open(json_catalog_filenames[-1],'w') as f:
+        json.dump(injection_catalog,f,indent=4)
+
+npz_catalog_filenames = []
+for json_catalog_filename in json_catalog_filenames:
+    npz_catalog_filenames.append(json_catalog_filename.replace(".json",".npz"))
+    lcm.write_injection_catalog(lcm.read_injection_catalog(json_catalog_filename),npz_catalog_filenames[-1])
+
+
+def on_image(ra,dec):
+    return (ra >= ra_image_min) & (ra < ra_image_max) & (dec >= dec_image_min) & (dec < dec_image_max)
+
+
+# Previous method: JSON catalogs, and light curves evaluated source by source.
+
+start_time = time.time()
+
+ra_expected,dec_expected,flux_expected = [],[],[]
+
+for catalog_path in json_catalog_filenames:
+    with open(catalog_path,'r') as f:
+        catalog_sources_dict = json.load(f)
+    catalog_sources = np.array(list(catalog_sources_dict.values()))
+
+    ra_coords = np.array([source['ra'] for source in catalog_sources])
+    dec_coords = np.array([source['dec'] for source in catalog_sources])
+    goodidx = on_image(ra_coords,dec_coords)
+
+    for source in catalog_sources[goodidx]:
+        if source['type'] == 'sinusoidal':
+            source_mag = lcm.SinusoidalLightCurve(image_mjdobs,source['parameters']['magnitude'],
+                                                  source['parameters']['amplitude'],
+                                                  source['parameters']['period'],
+                                                  source['parameters']['phase'])
+            source_flux = 10**(-0.4*(source_mag - zeropoint))
+        elif source['type'] == 'gaussian':
+            static_flux = 10**(-0.4*(source['parameters']['magnitude'] - zeropoint))
+            peak_amplitude = static_flux*(10**(0.4*source['parameters']['peak_amplitude']) - 1.0)
+            source_flux = lcm.GaussianLightCurve(image_mjdobs,source['parameters']['peak_time'],peak_amplitude,
+                                                 source['parameters']['sigma'],static_flux)
+
+        ra_expected.append(source['ra'])
+        dec_expected.append(source['dec'])
+        flux_expected.append(source_flux)
+
+ra_expected,dec_expected,flux_expected = np.array(ra_expected),np.array(dec_expected),np.array(flux_expected)
+
+elapsed_time_loop = time.time() - start_time
+
+
+# Current method: columnar catalogs, and one vectorized call per light-curve model type.
+
+results = {}
+elapsed_times = {}
+
+for name,catalog_filenames in [("JSON catalogs",json_catalog_filenames),("npz catalogs",npz_catalog_filenames)]:
+
+    start_time = time.time()
+
+    ra_out,dec_out,flux_out = [],[],[]
+
+    for catalog_path in catalog_filenames:
+        catalog = lcm.read_injection_catalog(catalog_path)
+        on_image_catalog = lcm.select_injection_catalog_sources(catalog,on_image(catalog['ra'],catalog['dec']))
+
+        ra_out.append(on_image_catalog['ra'])
+        dec_out.append(on_image_catalog['dec'])
+        flux_out.append(lcm.evaluate_injection_catalog_fluxes(on_image_catalog,image_mjdobs,zeropoint))
+
+    results[name] = (np.concatenate(ra_out),np.concatenate(dec_out),np.concatenate(flux_out))
+    elapsed_times[name] = time.time() - start_time
+
+size_json = sum([os.path.getsize(filename) for filename in json_catalog_filenames])
+size_npz = sum([os.path.getsize(filename) for filename in npz_catalog_filenames])
+
+shutil.rmtree(tmp_dir)
+
+print(f"Number of sources = {ncatalogs * 2 * nsources_per_type} in {ncatalogs} catalogs, on image = {len(flux_expected)}")
+print(f"Sizes in bytes: JSON catalogs = {size_json}, npz catalogs = {size_npz}")
+print(f"JSON catalogs with loop over sources: elapsed time in seconds = {elapsed_time_loop:.3f}")
+for name in elapsed_times.keys():
+    print(f"{name} with vectorized evaluation: elapsed time in seconds = {elapsed_times[name]:.3f}")
+
+
+# Compare positions and fluxes.
+
+n_failed = 0
+
+for name,(ra,dec,flux) in results.items():
+
+    max_rel_diff = np.max(np.abs(flux - flux_expected) / np.abs(flux_expected))
+    passed = np.array_equal(ra,ra_expected) and np.array_equal(dec,dec_expected) and max_rel_diff <= 1.0e-13
+
+    if not passed:
+        n_failed += 1
+
+    print(f"{name}: same positions and fluxes = {passed} (maximum relative flux difference = {max_rel_diff:.2e})")
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
@@ -0,0 +1,124 @@
+####################################################################################################################
+# Regression test and benchmark of KDTreeCrossMatcher (modules/crossmatch/kdtree_crossmatch.py), with a main KD-tree
+# of the astroobjects loaded at start and a buffer KD-tree of the astroobjects created during matching, versus the
+# previous method, which rebuilt the KD-tree of all astroobjects from their current mean sky positions before every
+# batch that followed a batch with matches or new astroobjects (reproduced below).  Synthetic batches of sources,
+# most of them near existing astroobjects, are matched in a field, and the merges and astroobject records
+# (including running mean sky positions and numbers of sources) of both methods are compared.
+# Usage: python scripts/benchmark_kdtree_crossmatch.py [nastroobjects] [nbatches] [nsources_per_batch]
+####################################################################################################################
+
+import sys
+import math
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+import modules.utils.rapid_pipeline_subs as util
+from modules.crossmatch.kdtree_crossmatch import KDTreeCrossMatcher
+
+nastroobjects = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+nbatches = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+nsources_per_batch = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+match_radius = 1.5 / 3600.0
+field = 5261331
+
+np.random.seed(0)
+
+
+# Synthetic astroobjects in a 0.5x0.5 degree field, and batches of sources: 90% near existing astroobjects
+# (within about 0.5 arcsec), 10% new.
+
+ra_min,dec_min,size = 10.0,-4.75,0.5
+
+ras = np.random.uniform(ra_min,ra_min + size,nastroobjects)
+decs = np.random.uniform(dec_min,dec_min + size,nastroobjects)
+
+astroobject_records = [(aid + 1,ras[aid],decs[aid],100.0,ras[aid],0.0,decs[aid],0.0,100.0,0.0,1,field,1,2)
+                       for aid in range(nastroobjects)]
+
+batches = []
+sid = 0
+for n in range(nbatches):
+    near = np.random.uniform(size=nsources_per_batch) < 0.9
+    index = np.random.randint(0,nastroobjects,nsources_per_batch)
+    batch_ras = np.where(near,ras[index] + np.random.normal(0.0,0.3 / 3600.0,nsources_per_batch),
+                         np.random.uniform(ra_min,ra_min + size,nsources_per_batch))
+    batch_decs = np.where(near,decs[index] + np.random.normal(0.0,0.3 / 3600.0,nsources_per_batch),
+                          np.random.uniform(dec_min,dec_min + size,nsources_per_batch))
+    sids = list(range(sid + 1,sid + nsources_per_batch + 1))
+    sid += nsources_per_batch
+    batches.append((sids,batch_ras.tolist(),batch_decs.tolist(),[100.0] * nsources_per_batch,
+                    [field] * nsources_per_batch,[1] * nsources_per_batch,[2] * nsources_per_batch))
+
+
+# Previous method: KD-tree of all astroobjects rebuilt from current mean sky positions before each batch.
+
+start_time = time.time()
+
+chord_radius = 2.0 * math.sin(0.5 * math.radians(match_radius))
+meanra = list(ras)
+meandec = list(decs)
+nsources = [1] * nastroobjects
+ra0 = list(ras)
+dec0 = list(decs)
+merges_expected = []
+
+for sids,batch_ras,batch_decs,fluxes,fields,hp6s,hp9s in batches:
+    tree = cKDTree(util.compute_xyz_array(meanra,meandec))
+    matches = tree.query_ball_point(util.compute_xyz_array(batch_ras,batch_decs),chord_radius)
+    unmatched = []
+    for i in range(len(sids)):
+        if len(matches[i]) == 0:
+            unmatched.append(i)
+            continue
+        for j in sorted(matches[i]):
+            meanra[j] = util.update_meanra(meanra[j],nsources[j],batch_ras[i])
+            meandec[j] = util.update_meandec(meandec[j],nsources[j],batch_decs[i])
+            nsources[j] += 1
+            merges_expected.append((j,sids[i]))
+    for i in unmatched:
+        merges_expected.append((len(meanra),sids[i]))
+        meanra.append(batch_ras[i])
+        meandec.append(batch_decs[i])
+        ra0.append(batch_ras[i])
+        dec0.append(batch_decs[i])
+        nsources.append(1)
+
+elapsed_time_rebuild = time.time() - start_time
+
+
+# Current method: main KD-tree plus buffer KD-tree of new astroobjects.
+
+start_time = time.time()
+
+matcher = KDTreeCrossMatcher(match_radius,astroobject_records)
+
+for batch in batches:
+    matcher.match_sources(*batch)
+
+new_aids = list(range(nastroobjects + 1,nastroobjects + 1 + matcher.get_number_of_new_astroobjects()))
+records = matcher.get_astroobject_records(new_aids)
+merges = matcher.get_merge_records(new_aids)
+
+elapsed_time_buffer = time.time() - start_time
+
+print(f"Number of astroobjects at start = {nastroobjects}, number of batches = {nbatches}, sources per batch = {nsources_per_batch}")
+print(f"Number of new astroobjects = {len(new_aids)}, number of merges = {len(merges)}")
+print(f"KD-tree rebuilt before each batch: elapsed time in seconds = {elapsed_time_rebuild:.3f}")
+print(f"main KD-tree plus buffer KD-tree: elapsed time in seconds = {elapsed_time_buffer:.3f}")
+
+
+# Compare merges and astroobject records.
+
+same_merges = sorted(merges) == sorted([(j + 1,sid) for j,sid in merges_expected])
+same_records = len(records) == len(meanra) and \
+    all([record[0] == j + 1 and record[1] == ra0[j] and record[2] == dec0[j] and record[10] == nsources[j] and
+         abs(record[4] - meanra[j]) <= 1.0e-12 and abs(record[6] - meandec[j]) <= 1.0e-12
+         for j,record in enumerate(records)])
+
+print("Same merges =",same_merges)
+print("Same astroobject records =",same_records)
+
+exit(0 if same_merges and same_records else 1)
@@ -0,0 +1,113 @@
+####################################################################################################################
+# Regression test and benchmark of SExtractor catalog parsing: parse_ascii_text_sextractor_catalog plus conversion
+# of the returned strings to floats (previous method) versus parse_sextractor_catalog (modules/utils/rapid_pipeline_subs.py),
+# for a synthetic ASCII_HEAD catalog with the parameters of cdf/rapidSexParamsDiffImage.inp, and for the same
+# catalog written as FITS_LDAC (vector parameters like FLUX_APER(1)...FLUX_APER(6) are one vector column).
+# Usage: python scripts/benchmark_parse_sextractor_catalog.py [nrows]
+####################################################################################################################
+
+import os
+import re
+import sys
+import time
+import tempfile
+import numpy as np
+from astropy.io import fits
+
+import modules.utils.rapid_pipeline_subs as util
+
+nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+rapid_sw = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+params_filename = rapid_sw + "/cdf/rapidSexParamsDiffImage.inp"
+
+with open(params_filename, 'r') as file:
+    params = [line.strip() for line in file if line.strip() != ""]
+
+params_to_parse = ["XWIN_IMAGE","YWIN_IMAGE","FLUX_APER_6","MAG_APER_3","CLASS_STAR","FWHM_IMAGE","FLUX_RADIUS_7"]
+
+np.random.seed(0)
+
+data = np.random.normal(100.0,1000.0,(nrows,len(params)))
+data[:,0] = np.arange(1,nrows + 1)
+
+
+# ASCII_HEAD catalog.
+
+tmp_dir = tempfile.mkdtemp()
+ascii_catalog_filename = os.path.join(tmp_dir,"sexcat.txt")
+
+with open(ascii_catalog_filename,"w") as f:
+    for i,param in enumerate(params):
+        f.write(f"#{i + 1:4d} {param:<22s} Synthetic parameter\n")
+    np.savetxt(f,data,fmt="%.7g")
+
+
+# FITS_LDAC catalog, with vector columns for vector parameters.
+
+columns = []
+vector_params = {}
+for i,param in enumerate(params):
+    string_match = re.match(r"^(.+)\((\d+)\)$",param)
+    if string_match is None:
+        columns.append((param,[i]))
+    else:
+        if string_match.group(1) not in vector_params:
+            vector_params[string_match.group(1)] = []
+            columns.append((string_match.group(1),vector_params[string_match.group(1)]))
+        vector_params[string_match.group(1)].append(i)
+
+ascii_values = np.loadtxt(ascii_catalog_filename,comments="#")
+
+fits_columns = []
+for name,indices in columns:
+    if len(indices) == 1:
+        fits_columns.append(fits.Column(name=name,format="D",array=ascii_values[:,indices[0]]))
+    else:
+        fits_columns.append(fits.Column(name=name,format=f"{len(indices)}D",array=ascii_values[:,indices]))
+
+fits_catalog_filename = os.path.join(tmp_dir,"sexcat.fits")
+
+fits.HDUList([fits.PrimaryHDU(),
+              fits.BinTableHDU.from_columns([fits.Column(name="Field Header Card",format="80A",array=np.array([""]))],name="LDAC_IMHEAD"),
+              fits.BinTableHDU.from_columns(fits_columns,name="LDAC_OBJECTS")]).writeto(fits_catalog_filename,overwrite=True)
+
+
+# Parse with each method.
+
+start_time = time.time()
+vals = util.parse_ascii_text_sextractor_catalog(ascii_catalog_filename,params_filename,params_to_parse)
+expected = {p: np.array([float(val[j]) for val in vals]) for j,p in enumerate(params_to_parse)}
+print(f"parse_ascii_text_sextractor_catalog: elapsed time in seconds = {time.time() - start_time:.3f}")
+
+results = {}
+
+start_time = time.time()
+results["ascii"] = util.parse_sextractor_catalog(ascii_catalog_filename,params_filename,params_to_parse)
+print(f"parse_sextractor_catalog (ASCII_HEAD): elapsed time in seconds = {time.time() - start_time:.3f}")
+
+start_time = time.time()
+results["fits_ldac"] = util.parse_sextractor_catalog(fits_catalog_filename,params_filename,params_to_parse)
+print(f"parse_sextractor_catalog (FITS_LDAC): elapsed time in seconds = {time.time() - start_time:.3f}")
+
+for filename in [ascii_catalog_filename,fits_catalog_filename]:
+    os.remove(filename)
+os.rmdir(tmp_dir)
+
+
+# Compare parsed values.
+
+n_failed = 0
+
+for name in results.keys():
+
+    passed = all([np.array_equal(expected[p],results[name][p]) for p in params_to_parse])
+
+    if not passed:
+        n_failed += 1
+
+    print(f"{name}: same values = {passed}")
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
@@ -0,0 +1,136 @@
+####################################################################################################################
+# Regression test and benchmark of the single-precision, real-FFT ZOGY engine (modules/zogy/v21Aug2018/py_zogy_rfft.py)
+# versus the original complex128 ZOGY engine (modules/zogy/v21Aug2018/py_zogy.py).
+# Synthetic new and reference images (Gaussian PSFs, point sources, and noise) are written to a temporary directory,
+# each engine is run through its CLI in a separate process (so that its peak RSS can be measured), and the
+# difference, PSF, and Scorr images are compared.
+# Usage: python scripts/benchmark_py_zogy_rfft.py [naxis] [num_threads]
+####################################################################################################################
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import numpy as np
+from astropy.io import fits
+
+naxis = int(sys.argv[1]) if len(sys.argv) > 1 else 4089
+num_threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+rapid_sw = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+zogy_dir = rapid_sw + "/modules/zogy/v21Aug2018"
+
+
+def gaussian_psf(size,sigma):
+
+    y,x = np.mgrid[:size,:size] - size // 2
+    psf = np.exp(-0.5 * (x**2 + y**2) / sigma**2)
+
+    return (psf / np.sum(psf)).astype(np.float32)
+
+
+def run_zogy(zogy_code,args):
+
+    # Run in a child process and measure elapsed time and peak RSS of that child only.
+
+    cmd = [sys.executable,"-c",
+           "import resource,runpy,sys; sys.argv = sys.argv[1:]; " +
+           "runpy.run_path(sys.argv[0],run_name='__main__'); " +
+           "print('maxrss_kb =',resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)",
+           zogy_code] + args
+
+    start_time = time.time()
+    output = subprocess.run(cmd,capture_output=True,text=True,check=True).stdout
+    elapsed_time = time.time() - start_time
+
+    maxrss_kb = int(output.split("maxrss_kb =")[-1].strip())
+
+    return elapsed_time,maxrss_kb / 1024.0
+
+
+np.random.seed(0)
+
+sigma_n = 10.0
+sigma_r = 5.0
+psf_size = 25
+
+psf_n = gaussian_psf(psf_size,1.6)
+psf_r = gaussian_psf(psf_size,1.2)
+
+sky_n = np.zeros((naxis,naxis),dtype=np.float32)
+sky_r = np.zeros((naxis,naxis),dtype=np.float32)
+
+num_sources = naxis * naxis // 4000
+xs = np.random.randint(psf_size,naxis - psf_size,num_sources)
+ys = np.random.randint(psf_size,naxis - psf_size,num_sources)
+fluxes = np.random.uniform(500.0,50000.0,num_sources).astype(np.float32)
+
+for x,y,flux in zip(xs,ys,fluxes):
+    sky_n[y - psf_size // 2:y + psf_size // 2 + 1,x - psf_size // 2:x + psf_size // 2 + 1] += flux * psf_n
+    sky_r[y - psf_size // 2:y + psf_size // 2 + 1,x - psf_size // 2:x + psf_size // 2 + 1] += flux * psf_r
+
+
+# Transient in the new image only.
+
+xt,yt = naxis // 3,naxis // 3
+sky_n[yt - psf_size // 2:yt + psf_size // 2 + 1,xt - psf_size // 2:xt + psf_size // 2 + 1] += 5000.0 * psf_n
+
+new_image = sky_n + np.random.normal(0.0,sigma_n,(naxis,naxis)).astype(np.float32)
+ref_image = sky_r + np.random.normal(0.0,sigma_r,(naxis,naxis)).astype(np.float32)
+new_uncert = np.full((naxis,naxis),sigma_n,dtype=np.float32)
+ref_uncert = np.full((naxis,naxis),sigma_r,dtype=np.float32)
+
+tmp_dir = tempfile.mkdtemp()
+
+input_files = []
+for name,data in [("new.fits",new_image),("ref.fits",ref_image),("new_psf.fits",psf_n),("ref_psf.fits",psf_r),
+                  ("new_unc.fits",new_uncert),("ref_unc.fits",ref_uncert)]:
+    filename = os.path.join(tmp_dir,name)
+    fits.PrimaryHDU(data=data).writeto(filename,overwrite=True)
+    input_files.append(filename)
+
+del new_image,ref_image,new_uncert,ref_uncert,sky_n,sky_r
+
+common_args = input_files + [str(sigma_n),str(sigma_r),"0.05","0.05"]
+
+results = {}
+
+for engine,zogy_code,extra_args in [("py_zogy",zogy_dir + "/py_zogy.py",[]),
+                                     ("py_zogy_rfft",zogy_dir + "/py_zogy_rfft.py",[str(num_threads),"None"])]:
+
+    output_files = [os.path.join(tmp_dir,engine + "_" + name) for name in ["diff.fits","diffpsf.fits","scorr.fits"]]
+
+    elapsed_time,maxrss_mb = run_zogy(zogy_code,common_args + output_files + extra_args)
+
+    print(f"{engine}: elapsed time in seconds = {elapsed_time:.3f}, peak RSS in MB = {maxrss_mb:.1f}")
+
+    results[engine] = [fits.getdata(filename) for filename in output_files]
+
+    for filename in output_files:
+        os.remove(filename)
+
+for filename in input_files:
+    os.remove(filename)
+os.rmdir(tmp_dir)
+
+
+# Compare outputs, relative to the dynamic range of each original output.
+
+tolerance = 1.0e-4
+
+n_failed = 0
+
+for name,old,new in zip(["diffimage","diffpsf","scorrimage"],results["py_zogy"],results["py_zogy_rfft"]):
+
+    max_rel_diff = np.max(np.abs(old - new)) / np.max(np.abs(old))
+    passed = max_rel_diff <= tolerance
+
+    if not passed:
+        n_failed += 1
+
+    print(f"{name}: max_rel_diff = {max_rel_diff}, passed = {passed}")
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
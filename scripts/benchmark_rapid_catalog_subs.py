@@ -0,0 +1,106 @@
+####################################################################################################################
+# Regression test and benchmark of reading joined photutils PSF-fit and finder catalogs: QTable.read(...,format='ascii')
+# with format guessing (previous method) versus the fixed-schema ASCII reader and the sidecar Parquet file
+# (modules/utils/rapid_catalog_subs.py).  Synthetic catalogs with the columns of the pipeline catalogs are written
+# with astropy.io.ascii.write (as in the pipeline) and with write_psfcat_sidecar to a temporary directory.
+# Usage: python scripts/benchmark_rapid_catalog_subs.py [nrows]
+####################################################################################################################
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from astropy.io import ascii
+from astropy.table import QTable, join
+
+import modules.utils.rapid_catalog_subs as catsubs
+
+nrows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+np.random.seed(0)
+
+
+# Synthetic PSF-fit (PSFPhotometry) and finder (DAOStarFinder) catalogs.
+
+psfcat_columns = ["id","group_id","group_size","local_bkg","x_init","y_init","flux_init","x_fit","y_fit","flux_fit",
+                  "x_err","y_err","flux_err","n_pixels_fit","qfit","cfit","reduced_chi2","flags","ra","dec"]
+finder_columns = ["id","xcentroid","ycentroid","sharpness","roundness1","roundness2","npix","peak","flux","mag","daofind_mag"]
+
+phot = QTable()
+for colname in psfcat_columns:
+    if colname in catsubs.psfcat_int_columns:
+        phot[colname] = np.random.randint(0,100,nrows)
+    else:
+        phot[colname] = np.random.normal(0.0,1000.0,nrows)
+phot["id"] = np.arange(1,nrows + 1)
+phot["ra"] = np.random.uniform(10.0,10.2,nrows)
+phot["dec"] = np.random.uniform(-40.2,-40.0,nrows)
+phot["flux_err"][::50] = np.nan
+for colname in ["x_fit","y_fit","qfit","cfit"]:
+    phot[colname].info.format = ".4f"
+
+finder = QTable()
+for colname in finder_columns:
+    if colname in catsubs.psfcat_int_columns:
+        finder[colname] = np.random.randint(0,100,nrows)
+    else:
+        finder[colname] = np.random.normal(0.0,1000.0,nrows)
+finder["id"] = np.random.permutation(np.arange(1,nrows + 1))
+
+tmp_dir = tempfile.mkdtemp()
+psfcat_filename = os.path.join(tmp_dir,"diffimage_masked_psfcat.txt")
+psfcat_finder_filename = os.path.join(tmp_dir,"diffimage_masked_psfcat_finder.txt")
+
+ascii.write(phot,psfcat_filename,overwrite=True)
+ascii.write(finder,psfcat_finder_filename,overwrite=True)
+
+joined_table_in_memory = join(phot,finder,keys='id',join_type='inner')
+
+
+# Read joined catalogs with each method.
+
+results = {}
+
+start_time = time.time()
+psfcat_qtable = QTable.read(psfcat_filename,format='ascii')
+psfcat_finder_qtable = QTable.read(psfcat_finder_filename,format='ascii')
+results["ascii_guess"] = join(psfcat_qtable,psfcat_finder_qtable,keys='id',join_type='inner')
+print(f"QTable.read(format='ascii'): elapsed time in seconds = {time.time() - start_time:.3f}")
+
+start_time = time.time()
+results["ascii_fixed_schema"] = catsubs.read_joined_psfcat(psfcat_filename,psfcat_finder_filename)
+print(f"fixed-schema reader: elapsed time in seconds = {time.time() - start_time:.3f}")
+
+sidecar_filename = catsubs.write_psfcat_sidecar(joined_table_in_memory,psfcat_filename)
+
+start_time = time.time()
+results["sidecar"] = catsubs.read_joined_psfcat(psfcat_filename,psfcat_finder_filename)
+print(f"sidecar Parquet file: elapsed time in seconds = {time.time() - start_time:.3f}")
+
+for filename in [psfcat_filename,psfcat_finder_filename,sidecar_filename]:
+    os.remove(filename)
+os.rmdir(tmp_dir)
+
+
+# The fixed-schema reader must reproduce the format-guessing reader exactly (same text), and the sidecar file
+# must reproduce the joined table in memory exactly (no text formatting).
+
+n_failed = 0
+
+for name,expected,actual in [("ascii_fixed_schema",results["ascii_guess"],results["ascii_fixed_schema"]),
+                             ("sidecar",joined_table_in_memory,results["sidecar"])]:
+
+    passed = expected.colnames == actual.colnames
+
+    for colname in expected.colnames:
+        passed = passed and np.array_equal(np.asarray(expected[colname]),np.asarray(actual[colname]),equal_nan=True)
+
+    if not passed:
+        n_failed += 1
+
+    print(f"{name}: same columns and values = {passed}")
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
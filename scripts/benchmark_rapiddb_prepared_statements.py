@@ -0,0 +1,107 @@
+####################################################################################################################
+# Benchmark RAPIDDB query execution: literal SQL built by regex substitution of TEMPLATE_* tokens (previous method)
+# versus server-side prepared statements with parameters (current method, RAPIDDB._execute_prepared).
+# Runs against the database given by the usual env. vars. DBSERVER, DBPORT, DBNAME, DBUSER, DBPASS (e.g., a local
+# Postgres), in a temporary table with the columns of an AstroObjects_<field> table, so nothing persists.
+# Usage: python scripts/benchmark_rapiddb_prepared_statements.py [ncalls]
+####################################################################################################################
+
+import sys
+import re
+import time
+import random
+
+import database.modules.utils.rapid_db as db
+
+ncalls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+dbh = db.RAPIDDB()
+
+if dbh.exit_code >= 64:
+    exit(dbh.exit_code)
+
+tablename = "benchmark_astroobjects"
+
+dbh.cur.execute(f"CREATE TEMPORARY TABLE {tablename} (" +
+                "aid bigserial primary key, ra0 double precision, dec0 double precision, flux0 real, " +
+                "meanra double precision, stdevra real, meandec double precision, stdevdec real, " +
+                "meanflux real, stdevflux real, nsources smallint, field integer, hp6 integer, hp9 integer);")
+dbh.conn.commit()
+
+random.seed(0)
+records = [(random.uniform(0.0,360.0),random.uniform(-90.0,90.0),random.uniform(1.0,1000.0),
+            random.randint(0,6291457),random.randint(0,49151),random.randint(0,3145727)) for i in range(ncalls)]
+
+
+# Insert and lookup per record with literal SQL (previous method).
+
+insert_template =\
+    f"insert into {tablename} (ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9) " +\
+    "values (cast('TEMPLATE_RA0' as double precision),cast('TEMPLATE_DEC0' as double precision)," +\
+    "cast('TEMPLATE_FLUX0' as real),cast('TEMPLATE_RA0' as double precision),0," +\
+    "cast('TEMPLATE_DEC0' as double precision),0,0,0,1," +\
+    "cast('TEMPLATE_FIELD' as integer),cast('TEMPLATE_HP6' as integer),cast('TEMPLATE_HP9' as integer)) returning aid;"
+
+lookup_template = f"select aid,meanra,meandec,nsources from {tablename} where aid = TEMPLATE_AID;"
+
+start_time = time.time()
+
+for ra0,dec0,flux0,field,hp6,hp9 in records:
+
+    rep = {"TEMPLATE_RA0": str(ra0),
+           "TEMPLATE_DEC0": str(dec0),
+           "TEMPLATE_FLUX0": str(flux0),
+           "TEMPLATE_FIELD": str(field),
+           "TEMPLATE_HP6": str(hp6),
+           "TEMPLATE_HP9": str(hp9)}
+
+    rep = dict((re.escape(k), v) for k, v in rep.items())
+    pattern = re.compile("|".join(rep.keys()))
+    query = pattern.sub(lambda m: rep[re.escape(m.group(0))], insert_template)
+
+    dbh.cur.execute(query)
+    aid = dbh.cur.fetchone()[0]
+
+    rep = {"TEMPLATE_AID": str(aid)}
+
+    rep = dict((re.escape(k), v) for k, v in rep.items())
+    pattern = re.compile("|".join(rep.keys()))
+    query = pattern.sub(lambda m: rep[re.escape(m.group(0))], lookup_template)
+
+    dbh.cur.execute(query)
+    record = dbh.cur.fetchone()
+
+dbh.conn.commit()
+
+elapsed_time_literal = time.time() - start_time
+
+
+# Insert and lookup per record with prepared statements (current method).
+
+insert_query =\
+    f"insert into {tablename} (ra0,dec0,flux0,meanra,stdevra,meandec,stdevdec,meanflux,stdevflux,nsources,field,hp6,hp9) " +\
+    "values ($1,$2,$3,$1,0,$2,0,0,0,1,$4,$5,$6) returning aid;"
+
+lookup_query = f"select aid,meanra,meandec,nsources from {tablename} where aid = $1;"
+
+start_time = time.time()
+
+for params in records:
+
+    dbh._execute_prepared("benchmark_insert",insert_query,params)
+    aid = dbh.cur.fetchone()[0]
+
+    dbh._execute_prepared("benchmark_lookup",lookup_query,(aid,))
+    record = dbh.cur.fetchone()
+
+dbh.conn.commit()
+
+elapsed_time_prepared = time.time() - start_time
+
+dbh.close()
+
+print("ncalls (insert + lookup) =",ncalls)
+print("Elapsed time in seconds (literal SQL) =",elapsed_time_literal)
+print("Elapsed time in seconds (prepared statements) =",elapsed_time_prepared)
+print("Calls per second (literal SQL) =",ncalls / elapsed_time_literal)
+print("Calls per second (prepared statements) =",ncalls / elapsed_time_prepared)
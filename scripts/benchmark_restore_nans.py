@@ -0,0 +1,85 @@
+####################################################################################################################
+# Regression test and benchmark of restoring NaNs in an image: row and column indices from np.where with a Python
+# loop over NaN pixels (previous method of restore_nans), versus the packed NaN mask (np.packbits) returned by
+# replace_nans_in_data and restored with a single boolean-index assignment by restore_nans_in_data
+# (modules/utils/rapid_pipeline_subs.py), including a round trip of the packed mask through save_nan_mask/load_nan_mask.
+# The synthetic image has a chip gap and a masked region of reference-image coverage, as well as scattered NaNs.
+# Usage: python scripts/benchmark_restore_nans.py [image_size]
+####################################################################################################################
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+import modules.utils.rapid_pipeline_subs as util
+
+image_size = int(sys.argv[1]) if len(sys.argv) > 1 else 4089
+
+np.random.seed(0)
+
+data = np.random.normal(0.0,10.0,(image_size,image_size)).astype(np.float32)
+data[:,image_size // 2 - 50:image_size // 2 + 50] = np.nan
+data[:image_size // 4,:] = np.nan
+data[np.random.uniform(size=data.shape) < 0.001] = np.nan
+
+processed_data = np.random.normal(0.0,5.0,data.shape).astype(np.float32)
+
+
+# Previous method: row and column indices, and loop over NaN pixels.
+
+start_time = time.time()
+
+row_indices, col_indices = np.where(np.isnan(data))
+
+expected = np.array(processed_data)
+for idx in range(len(row_indices)):
+    i = row_indices[idx]
+    j = col_indices[idx]
+    expected[i][j] = np.nan
+expected = expected.astype(np.float32)
+
+elapsed_time_loop = time.time() - start_time
+
+size_indices = row_indices.nbytes + col_indices.nbytes
+
+
+# Current method: packed NaN mask, and boolean-index assignment.
+
+start_time = time.time()
+
+replaced_data,packed_nan_mask = util.replace_nans_in_data(data,0.0)
+actual = util.restore_nans_in_data(processed_data,packed_nan_mask)
+
+elapsed_time_mask = time.time() - start_time
+
+nan_mask_filename = os.path.join(tempfile.mkdtemp(),"nanmask.npz")
+util.save_nan_mask(packed_nan_mask,nan_mask_filename)
+size_file = os.path.getsize(nan_mask_filename)
+actual_from_file = util.restore_nans_in_data(processed_data,util.load_nan_mask(nan_mask_filename))
+os.remove(nan_mask_filename)
+os.rmdir(os.path.dirname(nan_mask_filename))
+
+print(f"Number of NaNs = {len(row_indices)} ({100.0 * len(row_indices) / data.size:.1f}% of pixels)")
+print(f"row and column indices with loop: elapsed time in seconds = {elapsed_time_loop:.3f}, size in bytes = {size_indices}")
+print(f"packed NaN mask: elapsed time in seconds = {elapsed_time_mask:.3f}, size in bytes = {packed_nan_mask['packed_bits'].nbytes}, " +
+      f"size of saved file in bytes = {size_file}")
+
+
+# Compare restored images.
+
+n_failed = 0
+
+for name,result in [("packed NaN mask",actual),("packed NaN mask from file",actual_from_file)]:
+
+    passed = result.dtype == expected.dtype and np.array_equal(expected,result,equal_nan=True)
+
+    if not passed:
+        n_failed += 1
+
+    print(f"{name}: same data = {passed}")
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
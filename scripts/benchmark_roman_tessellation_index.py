@@ -0,0 +1,66 @@
+####################################################################################################################
+# Regression test and benchmark of RomanTessellationIndex.get_rtids (vectorized in-memory lookup) versus
+# RomanTessellationNSIDE512.get_rtid (one SQLite query per sky position), for random sky positions plus positions
+# near RA = 0/360 and near the poles.  Uses the SQLite database given by env. var. ROMANTESSELLATIONDBNAME.
+# Positions for which get_rtid returns None (e.g., in the south-pole tile, which is stored with ramin = ramax = 0)
+# are reported separately.
+# Usage: python scripts/benchmark_roman_tessellation_index.py [npositions]
+####################################################################################################################
+
+import sys
+import time
+import numpy as np
+
+import database.modules.utils.roman_tessellation_db as sqlite
+
+npositions = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+roman_tessellation_db = sqlite.RomanTessellationNSIDE512()
+
+if roman_tessellation_db.exit_code >= 64:
+    exit(roman_tessellation_db.exit_code)
+
+start_time = time.time()
+roman_tessellation_index = roman_tessellation_db.get_tessellation_index()
+elapsed_time_index = time.time() - start_time
+
+if roman_tessellation_index is None:
+    exit(roman_tessellation_db.exit_code)
+
+rng = np.random.default_rng(0)
+ras = rng.uniform(0.0,360.0,npositions)
+decs = np.degrees(np.arcsin(rng.uniform(-1.0,1.0,npositions)))
+
+n_special = npositions // 20
+ras[:n_special] = rng.uniform(359.9,360.0,n_special)
+ras[n_special:2 * n_special] = 0.0
+decs[2 * n_special:3 * n_special] = rng.uniform(89.9,90.0,n_special)
+decs[3 * n_special:4 * n_special] = rng.uniform(-90.0,-89.9,n_special)
+
+start_time = time.time()
+rtids = roman_tessellation_index.get_rtids(ras,decs)
+elapsed_time_vectorized = time.time() - start_time
+
+start_time = time.time()
+rtids_sqlite = []
+for ra,dec in zip(ras,decs):
+    roman_tessellation_db.get_rtid(ra,dec)
+    rtids_sqlite.append(-1 if roman_tessellation_db.rtid is None else roman_tessellation_db.rtid)
+elapsed_time_sqlite = time.time() - start_time
+
+rtids_sqlite = np.array(rtids_sqlite)
+
+resolved = rtids_sqlite != -1
+n_mismatches = np.count_nonzero(rtids[resolved] != rtids_sqlite[resolved])
+
+roman_tessellation_db.close()
+
+print("npositions =",npositions)
+print("Elapsed time in seconds to build or load index =",elapsed_time_index)
+print("Elapsed time in seconds (get_rtid per position) =",elapsed_time_sqlite)
+print("Elapsed time in seconds (get_rtids vectorized) =",elapsed_time_vectorized)
+print("Number of mismatches where get_rtid returned an rtid =",n_mismatches)
+print("Number of positions where get_rtid returned None =",np.count_nonzero(~resolved),
+      "(get_rtids unresolved:",np.count_nonzero(rtids[~resolved] == -1),")")
+
+exit(1 if n_mismatches > 0 else 0)
@@ -0,0 +1,63 @@
+####################################################################################################################
+# Regression test and benchmark of util.smooth_image_by_local_clipped_averaging (vectorized sliding-window method,
+# processed in blocks of rows) versus util.smooth_image_by_local_clipped_averaging_loop (previous per-pixel loop).
+# Random float32 images with scattered NaNs, a NaN block, and NaN edge rows/columns (so windows are truncated at the
+# image edges and around NaNs) are smoothed with several window shapes and block sizes, and the outputs and NaN
+# masks are compared.
+# Usage: python scripts/benchmark_smooth_image_by_local_clipped_averaging.py [naxis]
+####################################################################################################################
+
+import sys
+import time
+import numpy as np
+
+import modules.utils.rapid_pipeline_subs as util
+
+naxis = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+# (x_window, y_window, block_rows); small block sizes exercise windows spanning block boundaries.
+
+cases = [(3,3,128),(5,3,7),(3,7,1),(7,7,50),(1,5,16)]
+
+# Tolerance allows for float32 input pixels summed in a different order.
+
+tolerance = 1.0e-6
+
+np.random.seed(0)
+
+nx = naxis
+ny = naxis + 17
+
+data = np.random.normal(100.0,10.0,(ny,nx)).astype(np.float32)
+data[np.random.uniform(size=data.shape) < 0.05] = np.nan
+data[ny // 3:ny // 3 + 6,nx // 2:nx // 2 + 9] = np.nan
+data[0,:] = np.nan
+data[:,nx - 1] = np.nan
+data[np.random.uniform(size=data.shape) < 0.002] = 1.0e4                 # Outliers to be clipped
+
+n_failed = 0
+
+for x_window,y_window,block_rows in cases:
+
+    start_time = time.time()
+    expected = util.smooth_image_by_local_clipped_averaging_loop(nx,ny,data,x_window,y_window)
+    elapsed_time_loop = time.time() - start_time
+
+    start_time = time.time()
+    actual = util.smooth_image_by_local_clipped_averaging(nx,ny,data,x_window,y_window,block_rows=block_rows)
+    elapsed_time_vectorized = time.time() - start_time
+
+    same_nan_mask = np.array_equal(np.isnan(expected),np.isnan(actual))
+    max_abs_diff = np.nanmax(np.abs(actual - expected))
+    passed = same_nan_mask and np.allclose(actual,expected,rtol=tolerance,atol=tolerance,equal_nan=True)
+
+    if not passed:
+        n_failed += 1
+
+    print(f"window = {x_window}x{y_window}, block_rows = {block_rows}: " +
+          f"loop = {elapsed_time_loop:.3f} s, vectorized = {elapsed_time_vectorized:.3f} s, " +
+          f"same NaN mask = {same_nan_mask}, max abs difference = {max_abs_diff:.2e}, passed = {passed}")
+
+print("Number of failed comparisons =",n_failed)
+
+exit(1 if n_failed > 0 else 0)
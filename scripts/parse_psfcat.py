@@ -6,6 +6,7 @@ from astropy.table import QTable, join
 from astropy import units as u
 
 import modules.utils.rapid_pipeline_subs as util
+import modules.utils.rapid_catalog_subs as catsubs
 
 swname = "parse_psfcat.py"
 swvers = "1.0"
@@ -43,12 +44,9 @@ config_input.read(config_input_filename)
 output_psfcat_filename = str(config_input['PSFCAT_DIFFIMAGE']['output_psfcat_filename'])
 output_psfcat_finder_filename = str(config_input['PSFCAT_DIFFIMAGE']['output_psfcat_finder_filename'])
 
-psfcat_qtable = QTable.read(output_psfcat_filename,format='ascii')
-psfcat_finder_qtable = QTable.read(output_psfcat_finder_filename,format='ascii')
+# Inner join on 'id' (or read sidecar Parquet file of joined catalogs, if it exists).
 
-# Inner join on 'id'
-
-joined_table_inner = join(psfcat_qtable, psfcat_finder_qtable, keys='id', join_type='inner')
+joined_table_inner = catsubs.read_joined_psfcat(output_psfcat_filename,output_psfcat_finder_filename)
 print("Inner Join:")
 print(joined_table_inner)
 
@@ -13,6 +13,8 @@ from astropy.io import fits, ascii
 from astropy.table import QTable, join
 import matplotlib.pyplot as plt
 
+import modules.utils.rapid_catalog_subs as catsubs
+
 
 start_time_benchmark_at_start = time.time()
 
@@ -188,10 +190,7 @@ for directory_path in directory_paths:
 
                     # Join catalogs and extract columns for sources database tables.
 
-                    psfcat_qtable = QTable.read(photutils_file,format='ascii')
-                    psfcat_finder_qtable = QTable.read(finder_file,format='ascii')
-
-                    joined_table_inner = join(psfcat_qtable, psfcat_finder_qtable, keys='id', join_type='inner')
+                    joined_table_inner = catsubs.read_joined_psfcat(photutils_file,finder_file)
 
                     nrows = len(joined_table_inner)
                     print(f"nrows = {nrows}")